@@ -0,0 +1,218 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Deterministic generator of synthetic metadata resembling datasets, studies and samples
+
+The same settings always produce the same documents, so that benchmark results are
+comparable between runs and between different versions of the service.
+"""
+
+import random
+from collections.abc import Iterator
+from itertools import accumulate
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from mass.core import models
+
+SYLLABLES = [
+    "ba", "ce", "di", "fo", "gu", "ha", "ke", "li", "mo", "nu",
+    "pa", "re", "si", "to", "vu", "xa", "ye", "zi", "lo", "ra",
+]  # fmt: skip
+
+
+class GeneratorSettings(BaseModel):
+    """Settings controlling the shape of the generated documents"""
+
+    seed: int = Field(default=42, description="Seed of the random generator")
+    vocabulary_size: int = Field(
+        default=5000, gt=0, description="Number of distinct words in text fields"
+    )
+    text_length: int = Field(
+        default=30, gt=0, description="Number of words in the description fields"
+    )
+    facet_cardinality: int = Field(
+        default=20, gt=0, description="Number of distinct values of each facet field"
+    )
+    nesting_depth: int = Field(
+        default=2, ge=1, description="Depth of the nested objects within documents"
+    )
+    array_length: int = Field(
+        default=3, gt=0, description="Maximum number of items in nested arrays"
+    )
+
+
+# the facetable fields of the generated classes, all fields have the same cardinality
+FACET_FIELDS: dict[str, list[str]] = {
+    "Dataset": ["type", "studies.type", "samples.sex", "samples.tissue"],
+    "Study": ["type", "affiliations", "condition.name"],
+    "Sample": [
+        "sex",
+        "tissue",
+        "case_control_status",
+        "condition.name",
+        "condition.details.category",
+        "biospecimen.type",
+        "biospecimen.age_range",
+        "files.format",
+    ],
+}
+
+
+def searchable_classes() -> dict[str, models.SearchableClass]:
+    """Get the configuration of the generated classes for the search service"""
+    return {
+        class_name: models.SearchableClass(
+            description=f"Synthetic {class_name.lower()} metadata",
+            facetable_fields=[models.FieldLabel(key=key) for key in keys],
+            selected_fields=[
+                models.FieldLabel(key="id_"),
+                models.FieldLabel(key="title"),
+            ],
+        )
+        for class_name, keys in FACET_FIELDS.items()
+    }
+
+
+class MetadataGenerator:
+    """Generates synthetic metadata documents for the configured classes
+
+    Word and facet value frequencies follow a Zipf distribution, as they would in
+    real metadata, so that some search terms and filters are much more selective
+    than others.
+    """
+
+    def __init__(self, settings: GeneratorSettings | None = None):
+        self.settings = settings or GeneratorSettings()
+        self.vocabulary = self._make_vocabulary()
+        self._word_weights = list(
+            accumulate(1 / rank for rank in range(1, len(self.vocabulary) + 1))
+        )
+        self._facet_weights = list(
+            accumulate(
+                1 / rank for rank in range(1, self.settings.facet_cardinality + 1)
+            )
+        )
+
+    def _make_vocabulary(self) -> list[str]:
+        """Make a list of distinct pronounceable words ordered by frequency"""
+        rng = random.Random(f"{self.settings.seed}:vocabulary")  # noqa: S311
+        words: dict[str, None] = {}
+        while len(words) < self.settings.vocabulary_size:
+            length = rng.randint(2, 4)
+            words["".join(rng.choices(SYLLABLES, k=length))] = None
+        return list(words)
+
+    def _words(self, rng: random.Random, count: int) -> str:
+        """Draw words from the vocabulary according to their frequency"""
+        return " ".join(
+            rng.choices(self.vocabulary, cum_weights=self._word_weights, k=count)
+        )
+
+    def _facet(self, rng: random.Random, field: str) -> str:
+        """Draw a value of the given facet field according to its frequency"""
+        [index] = rng.choices(
+            range(self.settings.facet_cardinality), cum_weights=self._facet_weights
+        )
+        return f"{field}-{index}"
+
+    def _array(self, rng: random.Random) -> range:
+        """Get a range with a random length for generating array items"""
+        return range(rng.randint(1, self.settings.array_length))
+
+    def _details(self, rng: random.Random, depth: int) -> dict[str, Any]:
+        """Make nested details down to the configured nesting depth"""
+        details: dict[str, Any] = {
+            "category": self._facet(rng, "category"),
+            "note": self._words(rng, 3),
+        }
+        if depth > 1:
+            details["details"] = self._details(rng, depth - 1)
+        return details
+
+    def _sample(self, rng: random.Random) -> dict[str, Any]:
+        depth = self.settings.nesting_depth
+        return {
+            "title": self._words(rng, 4),
+            "description": self._words(rng, self.settings.text_length),
+            "sex": self._facet(rng, "sex"),
+            "tissue": self._facet(rng, "tissue"),
+            "case_control_status": self._facet(rng, "status"),
+            "condition": {
+                "name": self._facet(rng, "condition"),
+                "details": self._details(rng, depth),
+            },
+            "biospecimen": {
+                "type": self._facet(rng, "biospecimen"),
+                "age_range": self._facet(rng, "age"),
+            },
+            "files": [
+                {"name": self._words(rng, 2), "format": self._facet(rng, "format")}
+                for _ in self._array(rng)
+            ],
+        }
+
+    def _study(self, rng: random.Random) -> dict[str, Any]:
+        return {
+            "title": self._words(rng, 6),
+            "description": self._words(rng, self.settings.text_length),
+            "type": self._facet(rng, "study"),
+            "affiliations": sorted(
+                {self._facet(rng, "affiliation") for _ in self._array(rng)}
+            ),
+            "condition": {
+                "name": self._facet(rng, "condition"),
+                "details": self._details(rng, self.settings.nesting_depth),
+            },
+        }
+
+    def _dataset(self, rng: random.Random) -> dict[str, Any]:
+        return {
+            "title": self._words(rng, 6),
+            "description": self._words(rng, self.settings.text_length),
+            "type": self._facet(rng, "dataset"),
+            "studies": [
+                {"title": self._words(rng, 6), "type": self._facet(rng, "study")}
+                for _ in self._array(rng)
+            ],
+            "samples": [
+                {
+                    "sex": self._facet(rng, "sex"),
+                    "tissue": self._facet(rng, "tissue"),
+                    "details": self._details(rng, self.settings.nesting_depth),
+                }
+                for _ in self._array(rng)
+            ],
+        }
+
+    def resources(
+        self, class_name: str, count: int, *, start: int = 0
+    ) -> Iterator[models.Resource]:
+        """Generate the given number of resources of the given class
+
+        Each resource only depends on the settings, the class name and its index, so
+        that slices of the same sequence can also be generated independently.
+        """
+        make_content = {
+            "Dataset": self._dataset,
+            "Study": self._study,
+            "Sample": self._sample,
+        }[class_name]
+        prefix = class_name[:3].upper()
+        for index in range(start, start + count):
+            rng = random.Random(f"{self.settings.seed}:{class_name}:{index}")  # noqa: S311
+            yield models.Resource(id_=f"{prefix}{index:08d}", content=make_content(rng))
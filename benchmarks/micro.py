@@ -0,0 +1,338 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Micro-benchmarks of the CPU-bound parts of a search request
+
+These isolate the pure Python work done for each search apart from the database call:
+building the aggregation pipeline, constructing the search parameters in the route,
+validating the aggregation results and encoding the response. The ranking of text
+matches and the completion of words are measured as well, since the in-process
+backends compute them in Python, and so is the ranking on a memory-mapped snapshot. The results can be stored as a baseline and
+compared against later runs to catch regressions.
+
+Run with `python -m benchmarks.micro --help` to see the available commands.
+"""
+
+import platform
+import tempfile
+import timeit
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Any
+
+import pydantic
+import typer
+from pydantic import BaseModel, Field
+
+from benchmarks.generator import (
+    GeneratorSettings,
+    MetadataGenerator,
+    searchable_classes,
+)
+from mass.adapters.inbound.fastapi_.routes import parse_search_parameters
+from mass.adapters.outbound.memory import InMemoryCollection
+from mass.adapters.outbound.snapshot import Snapshot, snapshot_path, write_snapshot
+from mass.adapters.outbound.utils import build_pipeline
+from mass.core import models
+
+BASELINE_PATH = Path(__file__).parent / "micro_baseline.json"
+
+# combinations of the number of hits, facets and options per facet
+RESULT_SIZES: list[tuple[int, int, int]] = [
+    (1, 0, 0),
+    (10, 5, 20),
+    (100, 5, 20),
+    (1000, 5, 20),
+    (10, 20, 100),
+    (10, 20, 5000),
+]
+# the number of documents for ranking text matches
+RANKED_DOCUMENTS = 1000
+
+
+class MicroBenchmarkReport(BaseModel):
+    """The results of a run of the micro-benchmarks"""
+
+    started: datetime = Field(..., description="When the benchmarks were started")
+    python_version: str = Field(..., description="The Python version")
+    pydantic_version: str = Field(..., description="The Pydantic version")
+    timings: dict[str, float] = Field(
+        ..., description="The best time per call of each benchmark in microseconds"
+    )
+
+
+class Comparison(BaseModel):
+    """The comparison of a benchmark between the baseline and the current run"""
+
+    name: str = Field(..., description="The name of the benchmark")
+    baseline: float | None = Field(..., description="The baseline time per call")
+    current: float | None = Field(..., description="The current time per call")
+
+    @property
+    def ratio(self) -> float | None:
+        """The current time relative to the baseline time"""
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+
+def make_results(
+    *, hits: int, facets: int, options: int, generator: MetadataGenerator
+) -> dict[str, Any]:
+    """Make aggregation results as returned by the aggregator"""
+    return {
+        "facets": [
+            {
+                "key": f"field_{facet}.key",
+                "name": f"Field {facet}",
+                "options": [
+                    {"value": f"value-{option}", "count": options - option}
+                    for option in range(options)
+                ],
+            }
+            for facet in range(facets)
+        ],
+        "count": hits * 10,
+        "hits": [
+            resource.model_dump() for resource in generator.resources("Dataset", hits)
+        ],
+    }
+
+
+def benchmarks(
+    generator: MetadataGenerator | None = None,
+) -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Yield the names and functions of all micro-benchmarks"""
+    generator = generator or MetadataGenerator(GeneratorSettings())
+
+    for facets in (0, 5, 20):
+        facet_fields = [
+            models.FieldLabel(key=f"field_{facet}.key") for facet in range(facets)
+        ]
+        selected_fields = [models.FieldLabel(key="id_"), models.FieldLabel(key="title")]
+        filters = [models.Filter(key="field_0.key", value="value-0")] * 2
+        sorting_parameters = [
+            models.SortingParameter(field="title", order=models.SortOrder.DESCENDING)
+        ]
+        yield (
+            f"build_pipeline[facets={facets}]",
+            partial(
+                build_pipeline,
+                facet_fields=facet_fields,
+                selected_fields=selected_fields,
+                query="some words",
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=20,
+                limit=10,
+            ),
+        )
+
+    for count in (1, 5, 20):
+        filter_by = [f"field_{index}.key" for index in range(count)]
+        values = [f"value-{index}" for index in range(count)]
+        order_by = [f"field_{index}.key" for index in range(min(count, 5))]
+        sort = [models.SortOrder.ASCENDING] * len(order_by)
+        yield (
+            f"search_parameters[filters={count}]",
+            partial(
+                parse_search_parameters,
+                filter_by=filter_by,
+                value=values,
+                order_by=order_by,
+                sort=sort,
+            ),
+        )
+
+    for hits, facets, options in RESULT_SIZES:
+        size = f"hits={hits},facets={facets},options={options}"
+        results = make_results(
+            hits=hits, facets=facets, options=options, generator=generator
+        )
+        yield (
+            f"validate_results[{size}]",
+            partial(models.QueryResults, **results),
+        )
+        query_results = models.QueryResults(**results)
+        yield f"encode_response[{size}]", query_results.model_dump_json
+
+    resources = list(generator.resources("Dataset", RANKED_DOCUMENTS))
+    query = " ".join(generator.vocabulary[5:7])
+    for text_ranking in ("textscore", "bm25"):
+        collection = InMemoryCollection(text_ranking=text_ranking)
+        for resource in resources:
+            collection.upsert(resource)
+        yield (
+            f"text_scores[ranking={text_ranking},documents={RANKED_DOCUMENTS}]",
+            partial(collection.text_scores, query),
+        )
+
+    for prefix in ("", generator.vocabulary[5][:2]):
+        yield (
+            f"suggest[prefix={prefix!r},documents={RANKED_DOCUMENTS}]",
+            partial(collection.suggest, prefix, 10),
+        )
+
+    # the benchmarks are run while they are yielded, so the snapshot file is kept
+    with tempfile.TemporaryDirectory() as directory:
+        path = snapshot_path(Path(directory), "Dataset")
+        write_snapshot(
+            path,
+            class_name="Dataset",
+            searchable_class=searchable_classes()["Dataset"],
+            resources=resources,
+        )
+        for text_ranking in ("textscore", "bm25"):
+            snapshot = Snapshot(path, ranking=text_ranking)
+            yield (
+                f"snapshot_text_scores[ranking={text_ranking},"
+                + f"documents={RANKED_DOCUMENTS}]",
+                partial(snapshot.text_scores, query),
+            )
+
+
+def time_per_call(
+    function: Callable[[], Any], *, repeat: int, min_time: float
+) -> float:
+    """Get the best time per call in microseconds over several repetitions"""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(int(number * min_time / elapsed), number)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run_benchmarks(
+    *, repeat: int = 5, min_time: float = 0.2, only: str | None = None
+) -> MicroBenchmarkReport:
+    """Run all micro-benchmarks, or only those whose name contains the given text"""
+    timings = {
+        name: time_per_call(function, repeat=repeat, min_time=min_time)
+        for name, function in benchmarks()
+        if not only or only in name
+    }
+    return MicroBenchmarkReport(
+        started=datetime.now(UTC),
+        python_version=platform.python_version(),
+        pydantic_version=pydantic.VERSION,
+        timings=timings,
+    )
+
+
+def compare_reports(
+    baseline: MicroBenchmarkReport, current: MicroBenchmarkReport
+) -> list[Comparison]:
+    """Compare the timings of all benchmarks in either of the reports"""
+    names = dict.fromkeys([*baseline.timings, *current.timings])
+    return [
+        Comparison(
+            name=name,
+            baseline=baseline.timings.get(name),
+            current=current.timings.get(name),
+        )
+        for name in names
+    ]
+
+
+def regressions(comparisons: list[Comparison], *, tolerance: float) -> list[str]:
+    """Get the names of the benchmarks that became slower than tolerated"""
+    return [
+        comparison.name
+        for comparison in comparisons
+        if comparison.ratio is not None and comparison.ratio > 1 + tolerance
+    ]
+
+
+def read_report(path: Path) -> MicroBenchmarkReport:
+    """Read a report of the micro-benchmarks from a JSON file"""
+    return MicroBenchmarkReport.model_validate_json(path.read_text(encoding="utf-8"))
+
+
+def format_time(value: float | None) -> str:
+    """Format a time per call in microseconds for the comparison table"""
+    return "-" if value is None else f"{value:.1f} µs"
+
+
+app = typer.Typer(no_args_is_help=True)
+
+
+@app.command()
+def run(
+    output: Annotated[
+        Path, typer.Option(help="Write the JSON report to this file")
+    ] = BASELINE_PATH,
+    repeat: Annotated[int, typer.Option(min=1, help="Repetitions per benchmark")] = 5,
+    only: Annotated[
+        str | None, typer.Option(help="Only run benchmarks containing this text")
+    ] = None,
+):
+    """Run the micro-benchmarks and write the report, by default as the baseline."""
+    report = run_benchmarks(repeat=repeat, only=only)
+    output.write_text(report.model_dump_json(indent=2) + "\n", encoding="utf-8")
+    for name, timing in report.timings.items():
+        typer.echo(f"{name:60} {format_time(timing):>12}")
+
+
+@app.command()
+def compare(
+    baseline: Annotated[
+        Path, typer.Option(help="The report to compare against")
+    ] = BASELINE_PATH,
+    current: Annotated[
+        Path | None,
+        typer.Option(help="A report of the current run (default: run benchmarks now)"),
+    ] = None,
+    tolerance: Annotated[
+        float, typer.Option(min=0, help="Tolerated relative slowdown")
+    ] = 0.25,
+    repeat: Annotated[int, typer.Option(min=1, help="Repetitions per benchmark")] = 5,
+):
+    """Compare the micro-benchmarks to the baseline, failing on regressions."""
+    baseline_report = read_report(baseline)
+    current_report = read_report(current) if current else run_benchmarks(repeat=repeat)
+    for field in ("python_version", "pydantic_version"):
+        expected, actual = (
+            getattr(baseline_report, field),
+            getattr(current_report, field),
+        )
+        if expected != actual:
+            typer.echo(
+                f"The {field.replace('_', ' ')} {actual} differs from the baseline"
+                + f" ({expected}), so the timings may not be comparable.",
+                err=True,
+            )
+    comparisons = compare_reports(baseline_report, current_report)
+    for comparison in comparisons:
+        ratio = comparison.ratio
+        typer.echo(
+            f"{comparison.name:60} {format_time(comparison.baseline):>12}"
+            + f" {format_time(comparison.current):>12}"
+            + (f" {ratio:6.2f}x" if ratio is not None else "")
+        )
+    slower = regressions(comparisons, tolerance=tolerance)
+    if slower:
+        typer.echo(
+            f"{len(slower)} benchmarks are more than {tolerance:.0%} slower:"
+            + f" {', '.join(slower)}",
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,379 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Benchmark measuring search latency while resources are ingested concurrently
+
+Upsertion events are fed at a fixed rate from an in-memory event source into the
+event subscriber translator, the same path taken by events consumed from Kafka,
+while a search workload runs against the query handler.
+
+Run with `python -m benchmarks.mixed --help` to see the available options.
+A local MongoDB is required, the benchmark database is dropped before each run.
+"""
+
+import asyncio
+import json
+import logging
+import platform
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, nullcontext
+from datetime import UTC, datetime
+from itertools import count, cycle
+from pathlib import Path
+from statistics import fmean
+from time import perf_counter
+from typing import Annotated, Any
+from uuid import uuid4
+
+import typer
+from pydantic import BaseModel, Field
+
+from benchmarks.generator import (
+    GeneratorSettings,
+    MetadataGenerator,
+    searchable_classes,
+)
+from benchmarks.search import load_documents, mongodb_version, scenario_params
+from benchmarks.utils import LatencyStatistics, make_config
+from mass.adapters.inbound.coalescer import UpdateCoalescer
+from mass.adapters.inbound.event_sub import EventSubTranslator
+from mass.config import Config
+from mass.core import models
+from mass.inject import prepare_core
+from mass.ports.inbound.query_handler import QueryHandlerPort
+
+log = logging.getLogger(__name__)
+
+SEARCH_SCENARIOS = ["empty", "keyword", "filtered"]
+
+
+class MixedResult(BaseModel):
+    """The measured latencies for one write rate and document size"""
+
+    text_length: int = Field(..., description="Number of words in description fields")
+    document_size: float = Field(
+        ..., description="The mean size of the upserted documents in bytes"
+    )
+    write_rate: float = Field(..., description="The targeted upsertions per second")
+    achieved_write_rate: float = Field(
+        ..., description="The upsertions per second that were actually achieved"
+    )
+    search_latency: LatencyStatistics = Field(
+        ..., description="The latency of the searches in milliseconds"
+    )
+    write_latency: LatencyStatistics = Field(
+        ..., description="The latency of handling upsertion events in milliseconds"
+    )
+
+
+class MixedBenchmarkReport(BaseModel):
+    """The results of a run of the mixed read/write benchmark"""
+
+    started: datetime = Field(..., description="When the benchmark was started")
+    python_version: str = Field(..., description="The Python version")
+    mongodb_version: str = Field(..., description="The version of MongoDB")
+    settings: GeneratorSettings = Field(..., description="The base generator settings")
+    class_name: str = Field(..., description="The name of the searched class")
+    documents: int = Field(..., description="The number of loaded documents")
+    duration: float = Field(..., description="Seconds measured per write rate")
+    search_concurrency: int = Field(..., description="Number of concurrent searchers")
+    coalesce_window: float = Field(..., description="The coalescing window used")
+    results: list[MixedResult] = Field(..., description="The measured combinations")
+
+
+class InMemoryEventSource:
+    """Feeds upsertion events of the given resources to the translator at a fixed rate
+
+    Events are sent sequentially as the event subscriber would do. If handling an
+    event takes longer than the interval between events, the source falls behind and
+    the achieved write rate is lower than the targeted one.
+    """
+
+    def __init__(
+        self,
+        *,
+        translator: EventSubTranslator,
+        config: Config,
+        class_name: str,
+        resources: Iterator[models.Resource],
+    ):
+        self._translator = translator
+        self._config = config
+        self._class_name = class_name
+        self._resources = resources
+        self.durations: list[float] = []
+
+    def _payload(self, resource: models.Resource) -> dict[str, Any]:
+        return {
+            "accession": resource.id_,
+            "class_name": self._class_name,
+            "content": resource.content,
+        }
+
+    async def run(self, *, rate: float, duration: float) -> float:
+        """Send events at the given rate for the given duration
+
+        Returns the achieved number of events per second.
+        """
+        started = perf_counter()
+        sent = 0
+        while (now := perf_counter()) - started < duration:
+            delay = started + sent / rate - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            resource = next(self._resources)
+            event_started = perf_counter()
+            await self._translator.consume(
+                payload=self._payload(resource),
+                type_=self._config.resource_upsertion_type,
+                topic=self._config.resource_change_topic,
+                key=resource.id_,
+                event_id=uuid4(),
+            )
+            self.durations.append(perf_counter() - event_started)
+            sent += 1
+        return sent / (perf_counter() - started)
+
+
+def updated_resources(
+    generator: MetadataGenerator, *, class_name: str, documents: int
+) -> Iterator[models.Resource]:
+    """Endlessly generate new versions of the loaded resources"""
+    for index in count():
+        [resource] = generator.resources(class_name, 1, start=index % documents)
+        yield resource
+
+
+async def search_workload(
+    query_handler: QueryHandlerPort,
+    *,
+    searches: list[dict[str, Any]],
+    duration: float,
+    durations: list[float],
+) -> None:
+    """Run the given searches one after the other for the given duration"""
+    started = perf_counter()
+    for params in cycle(searches):
+        if perf_counter() - started >= duration:
+            break
+        search_started = perf_counter()
+        await query_handler.handle_query(**params)
+        durations.append(perf_counter() - search_started)
+
+
+@asynccontextmanager
+async def prepare_translator(
+    *, config: Config, query_handler: QueryHandlerPort
+) -> AsyncIterator[EventSubTranslator]:
+    """Prepare the event subscriber translator as done for consuming from Kafka"""
+    async with (
+        UpdateCoalescer.construct(window=config.coalesce_window)
+        if config.coalesce_window
+        else nullcontext()
+    ) as coalescer:
+        yield EventSubTranslator(
+            config=config,
+            query_handler=query_handler,
+            class_names=config.searchable_classes,
+            coalescer=coalescer,
+        )
+
+
+async def run_mixed(  # noqa: PLR0913
+    *,
+    config: Config,
+    settings: GeneratorSettings,
+    class_name: str,
+    documents: int,
+    write_rates: list[float],
+    duration: float,
+    search_concurrency: int,
+) -> list[MixedResult]:
+    """Measure the search latency for all write rates on freshly loaded documents"""
+    generator = MetadataGenerator(settings)
+    # the upserted documents have different content than the loaded ones
+    revision = MetadataGenerator(
+        settings.model_copy(update={"seed": settings.seed + 1})
+    )
+    await load_documents(config=config, generator=generator, size=documents)
+    document_size = fmean(
+        len(json.dumps(resource.model_dump()))
+        for resource in revision.resources(class_name, min(documents, 100))
+    )
+    results: list[MixedResult] = []
+    async with (
+        prepare_core(config=config) as query_handler,
+        prepare_translator(config=config, query_handler=query_handler) as translator,
+    ):
+        searches = [
+            await scenario_params(
+                query_handler,
+                class_name=class_name,
+                scenario=scenario,
+                generator=generator,
+                size=documents,
+            )
+            for scenario in SEARCH_SCENARIOS
+        ]
+        resources = updated_resources(
+            revision, class_name=class_name, documents=documents
+        )
+        for rate in write_rates:
+            source = InMemoryEventSource(
+                translator=translator,
+                config=config,
+                class_name=class_name,
+                resources=resources,
+            )
+            search_durations: list[float] = []
+            workload = [
+                search_workload(
+                    query_handler,
+                    searches=searches,
+                    duration=duration,
+                    durations=search_durations,
+                )
+                for _ in range(search_concurrency)
+            ]
+            writes = (
+                asyncio.create_task(source.run(rate=rate, duration=duration))
+                if rate
+                else None
+            )
+            await asyncio.gather(*workload)
+            achieved_rate = await writes if writes else 0.0
+            result = MixedResult(
+                text_length=settings.text_length,
+                document_size=document_size,
+                write_rate=rate,
+                achieved_write_rate=achieved_rate,
+                search_latency=LatencyStatistics.from_durations(search_durations),
+                write_latency=LatencyStatistics.from_durations(source.durations),
+            )
+            log.info(
+                "%d words, %.1f writes/s: search p50=%.1f ms, p99=%.1f ms",
+                settings.text_length,
+                result.achieved_write_rate,
+                result.search_latency.p50,
+                result.search_latency.p99,
+            )
+            results.append(result)
+    return results
+
+
+async def run_benchmark(  # noqa: PLR0913
+    *,
+    settings: GeneratorSettings,
+    text_lengths: list[int],
+    class_name: str,
+    documents: int,
+    write_rates: list[float],
+    duration: float,
+    search_concurrency: int,
+    coalesce_window: float,
+    mongo_dsn: str,
+    db_name: str,
+) -> MixedBenchmarkReport:
+    """Run the mixed benchmark for all document sizes and return the report"""
+    config = make_config(
+        mongo_dsn=mongo_dsn,
+        db_name=db_name,
+        searchable_classes={class_name: searchable_classes()[class_name]},
+        coalesce_window=coalesce_window,
+    )
+    report = MixedBenchmarkReport(
+        started=datetime.now(UTC),
+        python_version=platform.python_version(),
+        mongodb_version=mongodb_version(config),
+        settings=settings,
+        class_name=class_name,
+        documents=documents,
+        duration=duration,
+        search_concurrency=search_concurrency,
+        coalesce_window=coalesce_window,
+        results=[],
+    )
+    for text_length in text_lengths:
+        report.results.extend(
+            await run_mixed(
+                config=config,
+                settings=settings.model_copy(update={"text_length": text_length}),
+                class_name=class_name,
+                documents=documents,
+                write_rates=write_rates,
+                duration=duration,
+                search_concurrency=search_concurrency,
+            )
+        )
+    return report
+
+
+def main(  # noqa: PLR0913
+    write_rate: Annotated[
+        list[float] | None,
+        typer.Option(min=0, help="Upsertions per second, can be repeated"),
+    ] = None,
+    text_length: Annotated[
+        list[int] | None,
+        typer.Option(min=1, help="Words in description fields, can be repeated"),
+    ] = None,
+    class_name: Annotated[str, typer.Option(help="The class to benchmark")] = "Dataset",
+    documents: Annotated[
+        int, typer.Option(min=1, help="Number of loaded documents")
+    ] = 10_000,
+    duration: Annotated[
+        float, typer.Option(min=0.1, help="Seconds to measure per write rate")
+    ] = 10,
+    search_concurrency: Annotated[
+        int, typer.Option(min=1, help="Number of concurrent searchers")
+    ] = 4,
+    coalesce_window: Annotated[
+        float, typer.Option(min=0, help="Coalescing window of the translator")
+    ] = 0,
+    seed: Annotated[int, typer.Option(help="Seed of the data generator")] = 42,
+    mongo_dsn: Annotated[str, typer.Option()] = "mongodb://localhost:27017",
+    db_name: Annotated[str, typer.Option()] = "mass-benchmark",
+    output: Annotated[
+        Path | None, typer.Option(help="Write the JSON report to this file")
+    ] = None,
+):
+    """Benchmark searches during concurrent ingestion and output a JSON report."""
+    logging.basicConfig(level=logging.INFO)
+    if class_name not in searchable_classes():
+        raise typer.BadParameter(f"Unknown class: {class_name}")
+    report = asyncio.run(
+        run_benchmark(
+            settings=GeneratorSettings(seed=seed),
+            text_lengths=text_length or [30, 300],
+            class_name=class_name,
+            documents=documents,
+            write_rates=write_rate or [0, 10, 100, 1000],
+            duration=duration,
+            search_concurrency=search_concurrency,
+            coalesce_window=coalesce_window,
+            mongo_dsn=mongo_dsn,
+            db_name=db_name,
+        )
+    )
+    report_json = report.model_dump_json(indent=2)
+    if output:
+        output.write_text(report_json + "\n", encoding="utf-8")
+    else:
+        typer.echo(report_json)
+
+
+if __name__ == "__main__":
+    typer.run(main)
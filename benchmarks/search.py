@@ -0,0 +1,410 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Benchmark suite measuring searches on large amounts of synthetic metadata
+
+Run with `python -m benchmarks.search --help` to see the available options.
+A local MongoDB is required for the MongoDB backend, the benchmark database of each
+backend is cleared before each run.
+"""
+
+import asyncio
+import logging
+import platform
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from statistics import fmean
+from time import perf_counter
+from typing import Annotated, Any
+
+import typer
+from hexkit.providers.mongodb.provider import ConfiguredMongoClient
+from pydantic import BaseModel, Field
+
+from benchmarks.generator import (
+    GeneratorSettings,
+    MetadataGenerator,
+    searchable_classes,
+)
+from benchmarks.utils import LatencyStatistics, make_config
+from mass.adapters.outbound.memory import get_database
+from mass.config import Config
+from mass.core import models
+from mass.core.timing import PhaseTimer
+from mass.inject import prepare_bulk_core, prepare_core
+from mass.ports.inbound.query_handler import QueryHandlerPort
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ["mongodb", "memory", "sqlite"]
+SCENARIOS = ["empty", "keyword", "filtered", "sorted", "deep_paged", "facet_heavy"]
+PAGE_SIZE = 10
+
+# additional facets used in the facet-heavy scenario, including nested arrays
+HEAVY_FACET_FIELDS: dict[str, list[str]] = {
+    "Dataset": [
+        "samples.details.category",
+        "samples.details.details.category",
+        "studies.title",
+    ],
+    "Study": [
+        "condition.details.category",
+        "condition.details.details.category",
+        "title",
+    ],
+    "Sample": ["condition.details.details.category", "files.name", "title"],
+}
+
+
+class ScenarioResult(BaseModel):
+    """The measured latency of one search scenario"""
+
+    backend: str = Field(..., description="The search backend")
+    size: int = Field(..., description="The number of documents of the class")
+    class_name: str = Field(..., description="The name of the searched class")
+    scenario: str = Field(..., description="The name of the search scenario")
+    params: dict[str, Any] = Field(..., description="The parameters of the search")
+    hits: int = Field(..., description="The number of matching documents")
+    latency: LatencyStatistics = Field(..., description="Latencies in milliseconds")
+    phases: dict[str, float] = Field(
+        ..., description="Mean duration of the search phases in milliseconds"
+    )
+
+
+class SearchBenchmarkReport(BaseModel):
+    """The results of a run of the search benchmark suite"""
+
+    started: datetime = Field(..., description="When the benchmark was started")
+    python_version: str = Field(..., description="The Python version")
+    mongodb_version: str | None = Field(
+        ..., description="The version of MongoDB if it has been benchmarked"
+    )
+    settings: GeneratorSettings = Field(..., description="The generator settings")
+    repetitions: int = Field(..., description="The number of runs per scenario")
+    load_throughput: dict[str, dict[int, float]] = Field(
+        ..., description="Loaded documents per second for each backend and size"
+    )
+    results: list[ScenarioResult] = Field(..., description="The measured scenarios")
+
+
+def mongodb_version(config: Config) -> str:
+    """Get the version of the MongoDB server"""
+    with ConfiguredMongoClient(config=config) as client:
+        return client.server_info()["version"]
+
+
+def clear_database(config: Config) -> None:
+    """Remove all documents from the database of the configured search backend"""
+    match config.search_backend:
+        case "memory":
+            get_database(config.db_name).collections.clear()
+        case "sqlite":
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{config.sqlite_path}{suffix}").unlink(missing_ok=True)
+        case _:
+            with ConfiguredMongoClient(config=config) as client:
+                client.drop_database(config.db_name)
+
+
+async def load_documents(
+    *, config: Config, generator: MetadataGenerator, size: int
+) -> float:
+    """Replace the database with the given number of documents per class
+
+    The documents are loaded in bulk with deferred indexing, the loaded documents per
+    second are returned.
+    """
+    clear_database(config)
+    started = perf_counter()
+    async with (
+        prepare_bulk_core(config=config) as query_handler,
+        query_handler.deferred_indexing(),
+    ):
+        for class_name in config.searchable_classes:
+            for resource in generator.resources(class_name, size):
+                await query_handler.load_resource(
+                    resource=resource, class_name=class_name
+                )
+    elapsed = perf_counter() - started
+    return size * len(config.searchable_classes) / elapsed
+
+
+async def scenario_params(
+    query_handler: QueryHandlerPort,
+    *,
+    class_name: str,
+    scenario: str,
+    generator: MetadataGenerator,
+    size: int,
+) -> dict[str, Any]:
+    """Get the search parameters of a scenario"""
+    params: dict[str, Any] = {"class_name": class_name, "limit": PAGE_SIZE}
+    match scenario:
+        case "keyword":
+            # two moderately frequent words of the vocabulary
+            params["query"] = " ".join(generator.vocabulary[5:7])
+        case "filtered":
+            # filter by the most frequent options of the first two facets
+            results = await query_handler.handle_query(class_name=class_name, limit=0)
+            params["filters"] = [
+                models.Filter(key=facet.key, value=facet.options[0].value)
+                for facet in results.facets[:2]
+                if facet.options
+            ]
+        case "sorted":
+            params["sorting_parameters"] = [
+                models.SortingParameter(
+                    field="title", order=models.SortOrder.DESCENDING
+                )
+            ]
+        case "deep_paged":
+            params["skip"] = max(size - 2 * PAGE_SIZE, 0)
+    return params
+
+
+async def measure(
+    search: Callable[[PhaseTimer], Awaitable[models.QueryResults]],
+    *,
+    repetitions: int,
+) -> tuple[int, LatencyStatistics, dict[str, float]]:
+    """Run the search repeatedly after a warm-up run and measure its latency"""
+    results = await search(PhaseTimer())
+    durations: list[float] = []
+    phases: dict[str, list[float]] = defaultdict(list)
+    for _ in range(repetitions):
+        timer = PhaseTimer()
+        started = perf_counter()
+        await search(timer)
+        durations.append(perf_counter() - started)
+        for phase, duration in timer.durations.items():
+            phases[phase].append(duration * 1000)
+    return (
+        results.count,
+        LatencyStatistics.from_durations(durations),
+        {phase: fmean(values) for phase, values in phases.items()},
+    )
+
+
+async def run_scenarios(
+    *,
+    config: Config,
+    generator: MetadataGenerator,
+    size: int,
+    scenarios: list[str],
+    repetitions: int,
+) -> list[ScenarioResult]:
+    """Run the search scenarios for all classes on the loaded documents"""
+    heavy_config = config.model_copy(
+        update={
+            "searchable_classes": {
+                class_name: searchable_class.model_copy(
+                    update={
+                        "facetable_fields": [
+                            *searchable_class.facetable_fields,
+                            *(
+                                models.FieldLabel(key=key)
+                                for key in HEAVY_FACET_FIELDS[class_name]
+                            ),
+                        ]
+                    }
+                )
+                for class_name, searchable_class in config.searchable_classes.items()
+            }
+        }
+    )
+    results: list[ScenarioResult] = []
+    async with (
+        prepare_core(config=config) as query_handler,
+        prepare_core(config=heavy_config) as heavy_query_handler,
+    ):
+        for class_name in config.searchable_classes:
+            for scenario in scenarios:
+                handler = (
+                    heavy_query_handler if scenario == "facet_heavy" else query_handler
+                )
+                params = await scenario_params(
+                    handler,
+                    class_name=class_name,
+                    scenario=scenario,
+                    generator=generator,
+                    size=size,
+                )
+
+                async def search(
+                    timer: PhaseTimer,
+                    handler: QueryHandlerPort = handler,
+                    params: dict[str, Any] = params,
+                ) -> models.QueryResults:
+                    return await handler.handle_query(**params, timer=timer)
+
+                hits, latency, phases = await measure(search, repetitions=repetitions)
+                log.info(
+                    "%s: %s/%s with %d documents: p50=%.1f ms, p95=%.1f ms",
+                    config.search_backend,
+                    class_name,
+                    scenario,
+                    size,
+                    latency.p50,
+                    latency.p95,
+                )
+                results.append(
+                    ScenarioResult(
+                        backend=config.search_backend,
+                        size=size,
+                        class_name=class_name,
+                        scenario=scenario,
+                        params={
+                            key: value
+                            for key, value in params.items()
+                            if key != "class_name"
+                        },
+                        hits=hits,
+                        latency=latency,
+                        phases=phases,
+                    )
+                )
+    return results
+
+
+async def run_benchmark(  # noqa: PLR0913
+    *,
+    sizes: list[int],
+    classes: list[str],
+    scenarios: list[str],
+    repetitions: int,
+    settings: GeneratorSettings,
+    backends: list[str],
+    mongo_dsn: str,
+    db_name: str,
+    sqlite_path: Path,
+) -> SearchBenchmarkReport:
+    """Run the search benchmark suite for all backends and sizes and return the report
+
+    All backends are loaded with the same synthetic documents, so their results can
+    be compared directly.
+    """
+    config = make_config(
+        mongo_dsn=mongo_dsn,
+        db_name=db_name,
+        sqlite_path=sqlite_path,
+        searchable_classes={
+            class_name: searchable_class
+            for class_name, searchable_class in searchable_classes().items()
+            if class_name in classes
+        },
+    )
+    generator = MetadataGenerator(settings)
+    report = SearchBenchmarkReport(
+        started=datetime.now(UTC),
+        python_version=platform.python_version(),
+        mongodb_version=mongodb_version(config) if "mongodb" in backends else None,
+        settings=settings,
+        repetitions=repetitions,
+        load_throughput={backend: {} for backend in backends},
+        results=[],
+    )
+    for size in sizes:
+        for backend in backends:
+            backend_config = config.model_copy(update={"search_backend": backend})
+            log.info("Loading %d documents per class into %s", size, backend)
+            report.load_throughput[backend][size] = await load_documents(
+                config=backend_config, generator=generator, size=size
+            )
+            report.results.extend(
+                await run_scenarios(
+                    config=backend_config,
+                    generator=generator,
+                    size=size,
+                    scenarios=scenarios,
+                    repetitions=repetitions,
+                )
+            )
+            clear_database(backend_config)
+    return report
+
+
+def main(  # noqa: PLR0913
+    size: Annotated[
+        list[int] | None,
+        typer.Option(min=1, help="Number of documents per class, can be repeated"),
+    ] = None,
+    class_name: Annotated[
+        list[str] | None,
+        typer.Option(help="Classes to benchmark (default: Dataset, Study, Sample)"),
+    ] = None,
+    scenario: Annotated[
+        list[str] | None,
+        typer.Option(help=f"Scenarios to run (default: {', '.join(SCENARIOS)})"),
+    ] = None,
+    backend: Annotated[
+        list[str] | None,
+        typer.Option(help=f"Search backends to compare ({', '.join(BACKENDS)})"),
+    ] = None,
+    repetitions: Annotated[
+        int, typer.Option(min=1, help="Measured runs per scenario")
+    ] = 20,
+    seed: Annotated[int, typer.Option(help="Seed of the data generator")] = 42,
+    vocabulary_size: Annotated[int, typer.Option(min=1)] = 5000,
+    text_length: Annotated[int, typer.Option(min=1)] = 30,
+    facet_cardinality: Annotated[int, typer.Option(min=1)] = 20,
+    nesting_depth: Annotated[int, typer.Option(min=1)] = 2,
+    array_length: Annotated[int, typer.Option(min=1)] = 3,
+    mongo_dsn: Annotated[str, typer.Option()] = "mongodb://localhost:27017",
+    db_name: Annotated[str, typer.Option()] = "mass-benchmark",
+    sqlite_path: Annotated[Path, typer.Option()] = Path("mass-benchmark.sqlite"),
+    output: Annotated[
+        Path | None, typer.Option(help="Write the JSON report to this file")
+    ] = None,
+):
+    """Benchmark searches on synthetic metadata and output a JSON report."""
+    logging.basicConfig(level=logging.INFO)
+    unknown = set(scenario or []) - set(SCENARIOS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    unknown = set(backend or []) - set(BACKENDS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown backends: {', '.join(sorted(unknown))}")
+    report = asyncio.run(
+        run_benchmark(
+            sizes=size or [10_000],
+            classes=class_name or list(searchable_classes()),
+            scenarios=scenario or SCENARIOS,
+            repetitions=repetitions,
+            settings=GeneratorSettings(
+                seed=seed,
+                vocabulary_size=vocabulary_size,
+                text_length=text_length,
+                facet_cardinality=facet_cardinality,
+                nesting_depth=nesting_depth,
+                array_length=array_length,
+            ),
+            backends=backend or ["mongodb"],
+            mongo_dsn=mongo_dsn,
+            db_name=db_name,
+            sqlite_path=sqlite_path,
+        )
+    )
+    report_json = report.model_dump_json(indent=2)
+    if output:
+        output.write_text(report_json + "\n", encoding="utf-8")
+    else:
+        typer.echo(report_json)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,70 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Utilities shared by the benchmarks"""
+
+from statistics import fmean
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from mass.adapters.inbound.replay import percentile
+from mass.config import Config
+from mass.core import models
+
+
+def make_config(
+    *,
+    mongo_dsn: str,
+    db_name: str,
+    searchable_classes: dict[str, models.SearchableClass],
+    **kwargs,
+) -> Config:
+    """Make a service config for benchmarking with the given database and classes"""
+    settings: dict[str, Any] = {
+        "mongo_dsn": mongo_dsn,
+        "db_name": db_name,
+        "searchable_classes": searchable_classes,
+        "service_instance_id": "benchmark",
+        "kafka_servers": ["localhost:9092"],
+        "resource_change_topic": "searchable_resources",
+        "resource_deletion_type": "searchable_resource_deleted",
+        "resource_upsertion_type": "searchable_resource_upserted",
+        **kwargs,
+    }
+    return Config(**settings)
+
+
+class LatencyStatistics(BaseModel):
+    """Statistics of measured latencies in milliseconds"""
+
+    runs: int = Field(..., description="The number of measured runs")
+    mean: float = Field(..., description="The mean latency")
+    p50: float = Field(..., description="The median latency")
+    p95: float = Field(..., description="The 95th percentile of the latency")
+    p99: float = Field(..., description="The 99th percentile of the latency")
+
+    @classmethod
+    def from_durations(cls, durations: list[float]) -> "LatencyStatistics":
+        """Compute the statistics from durations measured in seconds"""
+        latencies = sorted(duration * 1000 for duration in durations)
+        return cls(
+            runs=len(latencies),
+            mean=fmean(latencies) if latencies else 0,
+            p50=percentile(latencies, 0.5),
+            p95=percentile(latencies, 0.95),
+            p99=percentile(latencies, 0.99),
+        )
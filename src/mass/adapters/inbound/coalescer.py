@@ -0,0 +1,276 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coalesces rapidly repeated write operations that concern the same resource"""
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager
+
+from aiokafka import AIOKafkaConsumer, ConsumerRecord, TopicPartition
+
+from mass.adapters.inbound.consumer import ConsumerWrapper
+
+log = logging.getLogger(__name__)
+
+Operation = Callable[[], Awaitable[None]]
+
+
+class UpdateCoalescer:
+    """Defers keyed write operations and only applies the latest one for each key.
+
+    The first operation submitted for a key opens a time window. Operations submitted
+    for the same key within that window replace the pending one, so that only the
+    latest operation is applied once the window has elapsed. All operations are
+    applied one after another, in the order in which their windows close.
+
+    The operations are numbered in the order of their submission, so that callers can
+    find out up to which operation all of them have been applied. Listeners are
+    awaited after each operation has been applied or has failed. An operation that
+    fails does not keep the others from being applied, but it is never counted as
+    applied, and the error is raised when flushing.
+    """
+
+    class OperationFailedError(RuntimeError):
+        """Raised when a coalesced operation could not be applied"""
+
+        def __init__(self, *, key: Hashable):
+            super().__init__(f"Failed to apply coalesced operation for {key}.")
+
+    @classmethod
+    @asynccontextmanager
+    async def construct(cls, *, window: float) -> AsyncGenerator["UpdateCoalescer"]:
+        """Set up the coalescer and flush all pending operations on teardown"""
+        coalescer = cls(window=window)
+        try:
+            yield coalescer
+        finally:
+            await coalescer.flush()
+
+    def __init__(self, *, window: float):
+        """Initialize with the length of the time window in seconds"""
+        self._window = window
+        # maps keys to the pending operation and the number of the earliest operation
+        #  submitted for the key since the last one was applied
+        self._pending: dict[Hashable, tuple[Operation, int]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self._submitted = 0
+        # the number of the earliest operation that is being applied or has failed
+        self._applying: int | None = None
+        self._failed: int | None = None
+        self._error: UpdateCoalescer.OperationFailedError | None = None
+        self._listeners: list[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def pending(self) -> int:
+        """The number of operations that have not been applied yet"""
+        return len(self._pending)
+
+    @property
+    def submitted(self) -> int:
+        """The number of operations that have been submitted so far"""
+        return self._submitted
+
+    @property
+    def applied(self) -> int:
+        """The number of the last operation up to which all submitted operations have
+        been applied or replaced by a later operation that has been applied
+        """
+        unapplied = [first for _, first in self._pending.values()]
+        unapplied.extend(
+            number for number in (self._applying, self._failed) if number is not None
+        )
+        return min(unapplied, default=self._submitted + 1) - 1
+
+    def raise_for_failure(self) -> None:
+        """Raise an error if any operation has failed.
+
+        Raises:
+            OperationFailedError: if an operation could not be applied
+        """
+        if self._error is not None:
+            raise self._error
+
+    def add_listener(self, listener: Callable[[], Awaitable[None]]) -> None:
+        """Add a listener that is awaited after each operation has been applied or
+        has failed, before the next operation is applied
+
+        The listener must handle its own errors.
+        """
+        self._listeners.append(listener)
+
+    def submit(self, *, key: Hashable, operation: Operation) -> None:
+        """Submit an operation that replaces any pending operation for the same key"""
+        self._submitted += 1
+        first = self._pending[key][1] if key in self._pending else self._submitted
+        self._pending[key] = (operation, first)
+        if key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(self._window, self._window_closed, key)
+
+    def _window_closed(self, key: Hashable) -> None:
+        """Schedule the application of the pending operation for the given key"""
+        del self._timers[key]
+        task = asyncio.create_task(self._apply(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _apply(self, key: Hashable) -> None:
+        """Apply the pending operation for the given key, if there is one.
+
+        Errors cannot be propagated back to the submitter at this point, so they are
+        logged and remembered instead.
+        """
+        async with self._lock:
+            pending = self._pending.pop(key, None)
+            if pending is None:
+                return
+            operation, first = pending
+            self._applying = first
+            try:
+                await operation()
+            except Exception as err:
+                log.error("Failed to apply coalesced operation for %s: %s", key, err)
+                if self._failed is None or first < self._failed:
+                    self._failed = first
+                if self._error is None:
+                    self._error = self.OperationFailedError(key=key)
+                    self._error.__cause__ = err
+            finally:
+                self._applying = None
+            for listener in self._listeners:
+                await listener()
+
+    async def flush(self) -> None:
+        """Apply all pending operations immediately
+
+        Raises:
+            OperationFailedError: if any operation could not be applied
+        """
+        for timer in self._timers.values():
+            timer.cancel()
+        keys = list(self._timers)
+        self._timers.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        for key in keys:
+            await self._apply(key)
+        self.raise_for_failure()
+
+
+class CommitDeferringConsumer(ConsumerWrapper):
+    """Wraps a Kafka consumer so that it only commits events once their coalesced
+    operations have been applied.
+
+    The event subscriber commits the offset of an event right after passing it to the
+    translator, which merely submits an operation to the coalescer. Each commit is
+    therefore deferred until all operations submitted up to that point have been
+    applied, so that the events are delivered again if the consumer stops earlier.
+    The deferred offsets are committed by a listener of the coalescer as soon as the
+    operations have been applied, without waiting for the next event. Once an
+    operation has failed, nothing is committed anymore and the error is raised from
+    the iteration right away, which stops the consumer like any other error that is
+    not sent to the DLQ.
+    """
+
+    def __init__(self, consumer: AIOKafkaConsumer, *, coalescer: UpdateCoalescer):
+        super().__init__(consumer)
+        self._coalescer = coalescer
+        self._event: ConsumerRecord | None = None
+        # the offsets that have not been committed yet along with the number of
+        #  operations that had been submitted when they were to be committed
+        self._uncommitted: deque[tuple[int, TopicPartition, int]] = deque()
+        # the error of a failed operation or commit and whether one has occurred
+        self._error: Exception | None = None
+        self._failed = asyncio.Event()
+        coalescer.add_listener(self._operation_done)
+
+    async def stop(self) -> None:
+        """Apply all pending operations and commit their events before stopping"""
+        try:
+            await self._coalescer.flush()
+            await self._commit_applied()
+        finally:
+            await self._consumer.stop()
+
+    async def __anext__(self) -> ConsumerRecord:
+        """Get the next event of the wrapped consumer
+
+        Raises:
+            UpdateCoalescer.OperationFailedError: if an operation could not be
+                applied, also while waiting for the next event
+        """
+        self._raise_for_error()
+        next_event = asyncio.ensure_future(self._consumer.__anext__())
+        failed = asyncio.ensure_future(self._failed.wait())
+        try:
+            await asyncio.wait(
+                (next_event, failed), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            failed.cancel()
+            next_event.cancel()
+        self._raise_for_error()
+        self._event = next_event.result()
+        return self._event
+
+    async def commit(self, offsets=None) -> None:
+        """Commit the last event as soon as its operations have been applied.
+
+        Raises:
+            UpdateCoalescer.OperationFailedError: if an operation could not be applied
+        """
+        if self._event is not None:
+            event, self._event = self._event, None
+            self._uncommitted.append(
+                (
+                    self._coalescer.submitted,
+                    TopicPartition(event.topic, event.partition),
+                    event.offset + 1,
+                )
+            )
+        await self._commit_applied()
+
+    async def _operation_done(self) -> None:
+        """Commit the events whose operations have been applied, or remember the
+        error to be raised by the iteration
+        """
+        try:
+            await self._commit_applied()
+        except Exception as err:
+            if self._error is None:
+                self._error = err
+            self._failed.set()
+
+    def _raise_for_error(self) -> None:
+        """Raise the error that occurred while committing in the background"""
+        if self._error is not None:
+            raise self._error
+
+    async def _commit_applied(self) -> None:
+        """Commit the offsets of all events whose operations have been applied"""
+        self._raise_for_error()
+        self._coalescer.raise_for_failure()
+        applied = self._coalescer.applied
+        offsets: dict[TopicPartition, int] = {}
+        while self._uncommitted and self._uncommitted[0][0] <= applied:
+            _, partition, offset = self._uncommitted.popleft()
+            offsets[partition] = offset
+        if offsets:
+            await self._consumer.commit(offsets)
@@ -0,0 +1,134 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Wrappers of the Kafka consumer that is used by the event subscriber"""
+
+import asyncio
+from typing import Any
+
+from aiokafka import AIOKafkaConsumer, ConsumerRecord, TopicPartition
+
+
+class ConsumerWrapper:
+    """Wraps a Kafka consumer and passes everything through to it
+
+    Subclasses change the behavior of the wrapped consumer by overriding methods.
+    """
+
+    def __init__(self, consumer: AIOKafkaConsumer):
+        self._consumer = consumer
+
+    def __getattr__(self, name: str) -> Any:
+        """Get other attributes from the wrapped consumer"""
+        return getattr(self._consumer, name)
+
+    async def start(self) -> None:
+        """Start the wrapped consumer"""
+        await self._consumer.start()
+
+    async def stop(self) -> None:
+        """Stop the wrapped consumer"""
+        await self._consumer.stop()
+
+    async def commit(self, offsets=None) -> None:
+        """Commit the offsets using the wrapped consumer"""
+        await self._consumer.commit(offsets)
+
+    def __aiter__(self) -> "ConsumerWrapper":
+        """Iterate over the events of the wrapped consumer"""
+        return self
+
+    async def __anext__(self) -> ConsumerRecord:
+        """Get the next event of the wrapped consumer"""
+        return await self._consumer.__anext__()
+
+
+class IdleStoppingConsumer(ConsumerWrapper):
+    """Wraps a Kafka consumer so that it stops iterating when it becomes idle.
+
+    The iteration ends when no new event arrives within the given timeout, which makes
+    the event subscriber return as well. Only the time spent waiting for the next event
+    counts towards the timeout, not the time spent processing the previous one.
+    """
+
+    def __init__(self, consumer: AIOKafkaConsumer, *, idle_timeout: float):
+        super().__init__(consumer)
+        self._idle_timeout = idle_timeout
+
+    async def __anext__(self) -> ConsumerRecord:
+        """Get the next event of the wrapped consumer unless it has become idle"""
+        try:
+            return await asyncio.wait_for(
+                self._consumer.__anext__(), timeout=self._idle_timeout
+            )
+        except TimeoutError as err:
+            raise StopAsyncIteration from err
+
+
+class ReplayingConsumer(ConsumerWrapper):
+    """Wraps a Kafka consumer without consumer group that replays all events.
+
+    Such a consumer always starts reading with the earliest events and cannot commit,
+    so commits are skipped. When the iteration ends, the consumer verifies that it has
+    reached the end offsets of its partitions as of the time the first event arrived.
+    """
+
+    class IncompleteReplayError(RuntimeError):
+        """Raised when the replay stopped before reaching the end of a partition"""
+
+        def __init__(self, *, partition: TopicPartition, position: int, end: int):
+            super().__init__(
+                f"Replaying stopped at offset {position} of partition"
+                + f" {partition.partition} of topic '{partition.topic}',"
+                + f" which has events up to offset {end}."
+            )
+
+    def __init__(self, consumer: AIOKafkaConsumer):
+        super().__init__(consumer)
+        self._end_offsets: dict[TopicPartition, int] | None = None
+
+    async def commit(self, offsets=None) -> None:
+        """Skip the commit since there is no consumer group"""
+
+    async def __anext__(self) -> ConsumerRecord:
+        """Get the next event of the wrapped consumer and verify the replay at the end
+
+        Raises:
+            IncompleteReplayError: if the wrapped consumer stopped too early
+        """
+        try:
+            event = await self._consumer.__anext__()
+        except StopAsyncIteration:
+            await self._verify_complete()
+            raise
+        if self._end_offsets is None:
+            # the partitions are only assigned once the consumer has fetched events
+            self._end_offsets = await self._consumer.end_offsets(
+                list(self._consumer.assignment())
+            )
+        return event
+
+    async def _verify_complete(self) -> None:
+        """Verify that all events up to the recorded end offsets have been consumed
+
+        Raises:
+            IncompleteReplayError: if a partition has not been consumed completely
+        """
+        for partition, end in (self._end_offsets or {}).items():
+            position = await self._consumer.position(partition)
+            if position < end:
+                raise self.IncompleteReplayError(
+                    partition=partition, position=position, end=end
+                )
@@ -16,6 +16,9 @@
 """Event subscriber details for searchable resource events"""
 
 import logging
+from collections.abc import Collection
+from functools import partial
+from time import perf_counter
 
 import ghga_event_schemas.pydantic_ as event_schemas
 from ghga_event_schemas.configs import ResourceEventsConfig
@@ -25,10 +28,14 @@ from ghga_event_schemas.validation import (
 )
 from hexkit.custom_types import Ascii, JsonObject
 from hexkit.protocols.eventsub import EventSubscriberProtocol
-from pydantic import UUID4
+from pydantic import UUID4, Field
 
+from mass.adapters.inbound import ingest_metrics
+from mass.adapters.inbound.coalescer import Operation, UpdateCoalescer
 from mass.core.models import Resource
+from mass.core.timing import class_label
 from mass.ports.inbound.query_handler import QueryHandlerPort
+from mass.ports.outbound.event_ids import ProcessedEventStorePort
 
 CLASS_NOT_CONFIGURED_LOG_MSG = "Class with name %s not configured."
 
@@ -39,6 +46,7 @@ DELETION_FAILED_LOG_MSG = (
 SCHEMA_VALIDATION_ERROR_LOG_MSG = "Failed to validate event schema for '%s'"
 
 EVENT_RECEIVED_LOG_MESSAGE = "Received event of type '%s'"
+DUPLICATE_EVENT_LOG_MESSAGE = "Skipped event with ID %s that was processed already"
 UNEXPECTED_EVENT_LOG_MESSAGE = "Received unexpected event of type '%s'"
 
 log = logging.getLogger(__name__)
@@ -47,12 +55,28 @@ log = logging.getLogger(__name__)
 class EventSubTranslatorConfig(ResourceEventsConfig):
     """Config for the event subscriber"""
 
+    coalesce_window: float = Field(
+        default=0,
+        ge=0,
+        description="Time window in seconds within which repeated upsertion and"
+        + " deletion events for the same resource are coalesced, so that only the"
+        + " latest one is written to the database. The events are only committed"
+        + " after that. Set to 0 to write every event immediately.",
+        examples=[0, 2.5],
+    )
+
 
 class EventSubTranslator(EventSubscriberProtocol):
     """A translator that can consume events regarding searchable resources"""
 
     def __init__(
-        self, *, config: EventSubTranslatorConfig, query_handler: QueryHandlerPort
+        self,
+        *,
+        config: EventSubTranslatorConfig,
+        query_handler: QueryHandlerPort,
+        class_names: Collection[str],
+        coalescer: UpdateCoalescer | None = None,
+        processed_event_store: ProcessedEventStorePort | None = None,
     ):
         self.topics_of_interest = [config.resource_change_topic]
         self.types_of_interest = [
@@ -61,8 +85,48 @@ class EventSubTranslator(EventSubscriberProtocol):
         ]
         self._config = config
         self._query_handler = query_handler
+        # only these class names are used as labels of the metrics
+        self._class_names = frozenset(class_names)
+        self._coalescer = coalescer
+        self._processed_event_store = processed_event_store
+        # the IDs of the events whose operations are pending in the coalescer
+        self._coalesced_event_ids: dict[tuple[str, str], list[UUID4]] = {}
+
+    def _class_label(self, class_name: str) -> str:
+        """Get the label of the given class name for the metrics."""
+        return class_label(class_name, class_names=self._class_names)
+
+    async def _apply(
+        self, *, class_name: str, accession: str, event_id: UUID4, operation: Operation
+    ):
+        """Apply the operation right away or hand it over to the coalescer, if any.
 
-    async def _handle_deletion(self, *, payload: JsonObject):
+        The event is only remembered as processed after the operation has been applied.
+        """
+        if self._coalescer is None:
+            await operation()
+            await self._remember(event_ids=[event_id])
+            return
+        key = (class_name, accession)
+        self._coalesced_event_ids.setdefault(key, []).append(event_id)
+        self._coalescer.submit(
+            key=key,
+            operation=partial(self._apply_coalesced, key=key, operation=operation),
+        )
+
+    async def _apply_coalesced(self, *, key: tuple[str, str], operation: Operation):
+        """Apply a coalesced operation and remember all events that it replaced."""
+        event_ids = self._coalesced_event_ids.pop(key, [])
+        await operation()
+        await self._remember(event_ids=event_ids)
+
+    async def _remember(self, *, event_ids: list[UUID4]):
+        """Remember the given events as processed if deduplicating events."""
+        if self._processed_event_store:
+            for event_id in event_ids:
+                await self._processed_event_store.add(event_id=event_id)
+
+    async def _handle_deletion(self, *, payload: JsonObject, event_id: UUID4):
         """Delete the specified resource.
 
         Validates the schema, then makes a call to the query handler with the payload.
@@ -74,27 +138,47 @@ class EventSubTranslator(EventSubscriberProtocol):
             )
         except EventSchemaValidationError:
             # If validation fails, send the event to the DLQ (if enabled) or raise.
+            ingest_metrics.VALIDATION_FAILURES.labels("deletion").inc()
             log.error(
                 SCHEMA_VALIDATION_ERROR_LOG_MSG,
                 event_schemas.SearchableResourceInfo.__name__,
             )
             raise
 
-        try:
-            await self._query_handler.delete_resource(
+        ingest_metrics.EVENTS.labels(
+            "deletion", self._class_label(validated_payload.class_name)
+        ).inc()
+        await self._apply(
+            class_name=validated_payload.class_name,
+            accession=validated_payload.accession,
+            event_id=event_id,
+            operation=partial(
+                self._delete_resource,
                 resource_id=validated_payload.accession,
                 class_name=validated_payload.class_name,
+            ),
+        )
+
+    async def _delete_resource(self, *, resource_id: str, class_name: str):
+        """Delete the resource via the query handler and log expected errors."""
+        started = perf_counter()
+        try:
+            await self._query_handler.delete_resource(
+                resource_id=resource_id, class_name=class_name
             )
+            ingest_metrics.WRITE_DURATION.labels(
+                "deletion", self._class_label(class_name)
+            ).observe(perf_counter() - started)
         except self._query_handler.ResourceNotFoundError:
             # In file services, deletion ops that don't find the resource are unimportant
             #  however, here it might indicate an inconsistency between metldata and mass
-            log.warning(DELETION_FAILED_LOG_MSG, validated_payload.accession)
+            log.warning(DELETION_FAILED_LOG_MSG, resource_id)
         except self._query_handler.ClassNotConfiguredError:
             # only log a DEBUG message if consuming a deletion event for a resource that
             #  doesn't concern mass
-            log.debug(CLASS_NOT_CONFIGURED_LOG_MSG, validated_payload.class_name)
+            log.debug(CLASS_NOT_CONFIGURED_LOG_MSG, class_name)
 
-    async def _handle_upsertion(self, *, payload: JsonObject):
+    async def _handle_upsertion(self, *, payload: JsonObject, event_id: UUID4):
         """Load the specified resource.
 
         Validates the schema, then makes a call to the query handler with the payload.
@@ -105,24 +189,44 @@ class EventSubTranslator(EventSubscriberProtocol):
                 payload=payload, schema=event_schemas.SearchableResource
             )
         except EventSchemaValidationError:
+            ingest_metrics.VALIDATION_FAILURES.labels("upsertion").inc()
             log.error(
                 SCHEMA_VALIDATION_ERROR_LOG_MSG,
                 event_schemas.SearchableResource.__name__,
             )
             raise
 
-        try:
-            resource = Resource(
-                id_=validated_payload.accession,
-                content=validated_payload.content,
-            )
-            await self._query_handler.load_resource(
+        ingest_metrics.EVENTS.labels(
+            "upsertion", self._class_label(validated_payload.class_name)
+        ).inc()
+        resource = Resource(
+            id_=validated_payload.accession,
+            content=validated_payload.content,
+        )
+        await self._apply(
+            class_name=validated_payload.class_name,
+            accession=validated_payload.accession,
+            event_id=event_id,
+            operation=partial(
+                self._load_resource,
                 resource=resource,
                 class_name=validated_payload.class_name,
+            ),
+        )
+
+    async def _load_resource(self, *, resource: Resource, class_name: str):
+        """Load the resource via the query handler and log expected errors."""
+        started = perf_counter()
+        try:
+            await self._query_handler.load_resource(
+                resource=resource, class_name=class_name
             )
+            ingest_metrics.WRITE_DURATION.labels(
+                "upsertion", self._class_label(class_name)
+            ).observe(perf_counter() - started)
         except self._query_handler.ClassNotConfiguredError:
             # This can be a common occurrence, so only log as DEBUG
-            log.debug(CLASS_NOT_CONFIGURED_LOG_MSG, validated_payload.class_name)
+            log.debug(CLASS_NOT_CONFIGURED_LOG_MSG, class_name)
 
     async def _consume_validated(
         self,
@@ -135,9 +239,13 @@ class EventSubTranslator(EventSubscriberProtocol):
     ) -> None:
         """Consumes an event"""
         log.info(EVENT_RECEIVED_LOG_MESSAGE, type)
+        store = self._processed_event_store
+        if store and await store.contains(event_id=event_id):
+            log.info(DUPLICATE_EVENT_LOG_MESSAGE, event_id)
+            return
         if type_ == self._config.resource_deletion_type:
-            await self._handle_deletion(payload=payload)
+            await self._handle_deletion(payload=payload, event_id=event_id)
         elif type_ == self._config.resource_upsertion_type:
-            await self._handle_upsertion(payload=payload)
+            await self._handle_upsertion(payload=payload, event_id=event_id)
         else:
             log.warning(UNEXPECTED_EVENT_LOG_MESSAGE, type)
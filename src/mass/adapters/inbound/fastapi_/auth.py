@@ -0,0 +1,49 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Access control for admin-only endpoints"""
+
+from secrets import compare_digest
+from typing import Annotated
+
+from fastapi import Depends, status
+from fastapi.exceptions import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from mass.adapters.inbound.fastapi_.dummies import ConfigDummy
+
+http_bearer = HTTPBearer(auto_error=False)
+
+
+def require_admin(
+    config: ConfigDummy,
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(http_bearer)],
+) -> None:
+    """Make sure that the request has been authorized with the admin token"""
+    if config.admin_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled",
+        )
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
+        )
+    admin_token = config.admin_token.get_secret_value()
+    if not compare_digest(credentials.credentials.encode(), admin_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
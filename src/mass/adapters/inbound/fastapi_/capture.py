@@ -0,0 +1,123 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Capturing of search requests for replaying them later"""
+
+import asyncio
+import json
+import logging
+import random
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TextIO
+
+from hexkit.custom_types import JsonObject
+
+from mass.core.timing import RateLimiter
+
+log = logging.getLogger(__name__)
+
+# the maximum number of records waiting to be written before records are dropped
+MAX_PENDING_RECORDS = 10_000
+# the number of warnings about dropped records per minute
+DROP_LOG_LIMIT = 1
+
+
+class SearchCapture:
+    """Writes a sample of the search requests along with their latency to a JSONL file
+
+    Each line contains the query parameters of one search request as they have been
+    passed to the search endpoint, so that the file can be replayed later.
+
+    Recording a search request only puts the record into a queue, which is drained by
+    a background task that writes the records in a separate thread, so that the
+    requests do not wait for the file. Records are dropped if the queue is full, and
+    the dropped records are counted in a warning at most once per minute.
+    """
+
+    @classmethod
+    @asynccontextmanager
+    async def construct(
+        cls, *, path: Path, rate: float = 1
+    ) -> AsyncIterator["SearchCapture"]:
+        """Open the capture file for appending and close it when done
+
+        The pending records are written before the file is closed.
+        """
+        with open(path, "a", encoding="utf-8") as file:
+            capture = cls(file=file, rate=rate)
+            writer = asyncio.create_task(capture._write_records())
+            try:
+                yield capture
+            finally:
+                await capture._queue.join()
+                writer.cancel()
+
+    def __init__(self, *, file: TextIO, rate: float = 1):
+        self._file = file
+        self._rate = rate
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=MAX_PENDING_RECORDS)
+        self._drop_log_limiter = RateLimiter(limit=DROP_LOG_LIMIT)
+
+    def record(
+        self,
+        *,
+        params: JsonObject,
+        duration: float,
+        count: int,
+        strategy: str | None = None,
+    ) -> None:
+        """Record a search request if it has been sampled"""
+        if self._rate < 1 and random.random() >= self._rate:  # noqa: S311
+            return
+        record = {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "params": params,
+            "duration": duration,
+            "count": count,
+            "strategy": strategy,
+        }
+        try:
+            self._queue.put_nowait(json.dumps(record) + "\n")
+        except asyncio.QueueFull:
+            limiter = self._drop_log_limiter
+            if limiter.allow():
+                log.warning(
+                    "Dropped %d captured searches since the file cannot keep up.",
+                    limiter.suppressed + 1,
+                )
+                limiter.suppressed = 0
+
+    async def _write_records(self) -> None:
+        """Write the queued records to the file in batches"""
+        while True:
+            lines = [await self._queue.get()]
+            while not self._queue.empty():
+                lines.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._write, lines)
+            except OSError as err:
+                log.error("Cannot write captured searches: %s", err)
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+
+    def _write(self, lines: list[str]) -> None:
+        """Write the given lines to the file and flush it"""
+        self._file.writelines(lines)
+        self._file.flush()
@@ -23,6 +23,7 @@ from typing import Annotated
 from fastapi import Depends
 from ghga_service_commons.api.di import DependencyDummy
 
+from mass.adapters.inbound.fastapi_.capture import SearchCapture
 from mass.config import Config
 from mass.ports.inbound.query_handler import QueryHandlerPort
 
@@ -31,3 +32,6 @@ ConfigDummy = Annotated[Config, Depends(config_dummy)]
 
 query_handler_port = DependencyDummy("query_handler_port")
 QueryHandlerDummy = Annotated[QueryHandlerPort, Depends(query_handler_port)]
+
+search_capture_dummy = DependencyDummy("search_capture")
+SearchCaptureDummy = Annotated[SearchCapture | None, Depends(search_capture_dummy)]
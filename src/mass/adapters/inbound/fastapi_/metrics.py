@@ -0,0 +1,79 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Prometheus metrics collected by the REST API"""
+
+from prometheus_client import Counter, Histogram
+
+from mass.config import Config
+from mass.core import models
+from mass.core.timing import PhaseTimer, class_label
+
+SEARCH_DURATION = Histogram(
+    "mass_search_duration_seconds",
+    "Total duration of search requests in seconds",
+    ["class_name"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+SEARCH_PHASE_DURATION = Histogram(
+    "mass_search_phase_duration_seconds",
+    "Duration of the phases of search requests in seconds",
+    ["class_name", "phase"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+SEARCH_HITS = Histogram(
+    "mass_search_hits",
+    "Number of hits of search requests",
+    ["class_name"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000, 1000000),
+)
+SEARCH_FACET_OPTIONS = Histogram(
+    "mass_search_facet_options",
+    "Total number of facet options returned by search requests",
+    ["class_name"],
+    buckets=(0, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+SEARCH_ERRORS = Counter(
+    "mass_search_errors_total",
+    "Number of failed search requests by type of error",
+    ["class_name", "error"],
+)
+
+
+def observe_search(
+    *,
+    class_name: str,
+    duration: float,
+    timer: PhaseTimer,
+    results: models.QueryResults,
+    config: Config,
+) -> None:
+    """Record the metrics of a successful search request"""
+    label = class_label(class_name, class_names=config.searchable_classes)
+    SEARCH_DURATION.labels(label).observe(duration)
+    for phase, phase_duration in timer.durations.items():
+        SEARCH_PHASE_DURATION.labels(label, phase).observe(phase_duration)
+    SEARCH_HITS.labels(label).observe(results.count)
+    SEARCH_FACET_OPTIONS.labels(label).observe(
+        sum(len(facet.options) for facet in results.facets)
+    )
+
+
+def count_search_error(*, class_name: str, error: str, config: Config) -> None:
+    """Count a failed search request with the given type of error"""
+    SEARCH_ERRORS.labels(
+        class_label(class_name, class_names=config.searchable_classes), error
+    ).inc()
@@ -17,19 +17,41 @@
 """API endpoints"""
 
 import logging
+from time import perf_counter
 from typing import Annotated
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.exceptions import HTTPException
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from mass.adapters.inbound.fastapi_.dummies import ConfigDummy, QueryHandlerDummy
+from mass.adapters.inbound.fastapi_ import metrics
+from mass.adapters.inbound.fastapi_.auth import require_admin
+from mass.adapters.inbound.fastapi_.dummies import (
+    ConfigDummy,
+    QueryHandlerDummy,
+    SearchCaptureDummy,
+)
 from mass.core import models
+from mass.core.timing import PhaseTimer
 
 log = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def server_timing(timer: PhaseTimer, *, total: float) -> str:
+    """Format the phase durations and annotations as a Server-Timing header value"""
+    entries = [
+        f"{phase};dur={duration * 1000:.3f}"
+        for phase, duration in timer.durations.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    entries.extend(
+        f'{name};desc="{value}"' for name, value in timer.annotations.items()
+    )
+    return ", ".join(entries)
+
+
 @router.get(
     "/health",
     summary="health",
@@ -40,6 +62,17 @@ async def health():
     return {"status": "OK"}
 
 
+@router.get(
+    "/metrics",
+    summary="metrics",
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+)
+async def get_metrics() -> Response:
+    """Expose the collected metrics in the Prometheus text format"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @router.get(
     path="/search-options",
     summary="Retrieve all configured resource classes with their facetable and selected fields",
@@ -60,41 +93,44 @@ async def search_options(
     return config.searchable_classes
 
 
-@router.get(
-    path="/search",
-    summary="Perform a search using query string and filter parameters",
-    response_model=models.QueryResults,
-)
-async def search(  # noqa: PLR0913
-    query_handler: QueryHandlerDummy,
-    class_name: Annotated[str, Query(description="The class name to search")],
-    query: Annotated[str, Query(description="The keyword search for the query")] = "",
-    filter_by: Annotated[
-        list[str] | None,
-        Query(description="Field(s) that shall be used for filtering results"),
-    ] = None,
-    value: Annotated[
-        list[str] | None,
-        Query(description="Values(s) that shall be used for filtering results"),
-    ] = None,
-    skip: Annotated[
-        int, Query(description="The number of results to skip for pagination")
-    ] = 0,
-    limit: Annotated[
-        int | None, Query(description="Limit the results to this number")
-    ] = None,
-    order_by: Annotated[
-        list[str] | None,
-        Query(description="Field(s) that shall be used for sorting results"),
-    ] = None,
-    sort: Annotated[
-        list[models.SortOrder] | None,
-        Query(description="Sort order(s) that shall be used when sorting results"),
-    ] = None,
-) -> models.QueryResults | None:
-    """Perform search query"""
-    if not class_name:
-        raise HTTPException(status_code=422, detail="A class name must be specified")
+ClassNameParam = Annotated[str, Query(description="The class name to search")]
+QueryParam = Annotated[str, Query(description="The keyword search for the query")]
+FilterByParam = Annotated[
+    list[str] | None,
+    Query(description="Field(s) that shall be used for filtering results"),
+]
+ValueParam = Annotated[
+    list[str] | None,
+    Query(description="Values(s) that shall be used for filtering results"),
+]
+SkipParam = Annotated[
+    int, Query(description="The number of results to skip for pagination")
+]
+LimitParam = Annotated[
+    int | None, Query(description="Limit the results to this number")
+]
+OrderByParam = Annotated[
+    list[str] | None,
+    Query(description="Field(s) that shall be used for sorting results"),
+]
+SortParam = Annotated[
+    list[models.SortOrder] | None,
+    Query(description="Sort order(s) that shall be used when sorting results"),
+]
+
+
+def parse_search_parameters(
+    *,
+    filter_by: list[str] | None,
+    value: list[str] | None,
+    order_by: list[str] | None,
+    sort: list[models.SortOrder] | None,
+) -> tuple[list[models.Filter], list[models.SortingParameter]]:
+    """Combine the search parameters to filters and sorting parameters
+
+    Raises:
+        ValueError - when the parameters do not match, with a suitable error message
+    """
     try:
         filters = [
             models.Filter(key=field, value=value)
@@ -102,10 +138,10 @@ async def search(  # noqa: PLR0913
         ]
     except ValueError as err:
         detail = "Number of fields to filter by must match number of values"
-        raise HTTPException(status_code=422, detail=detail) from err
+        raise ValueError(detail) from err
     if order_by and len(set(order_by)) < len(order_by):
         detail = "Fields to order by must be unique"
-        raise HTTPException(status_code=422, detail=detail)
+        raise ValueError(detail)
     try:
         sorting_parameters = [
             models.SortingParameter(field=field, order=order)
@@ -113,7 +149,42 @@ async def search(  # noqa: PLR0913
         ]
     except ValueError as err:
         detail = "Number of fields to order by must match number of sort options"
-        raise HTTPException(status_code=422, detail=detail) from err
+        raise ValueError(detail) from err
+    return filters, sorting_parameters
+
+
+@router.get(
+    path="/search",
+    summary="Perform a search using query string and filter parameters",
+    response_model=models.QueryResults,
+)
+async def search(  # noqa: PLR0913
+    query_handler: QueryHandlerDummy,
+    config: ConfigDummy,
+    search_capture: SearchCaptureDummy,
+    class_name: ClassNameParam,
+    query: QueryParam = "",
+    filter_by: FilterByParam = None,
+    value: ValueParam = None,
+    skip: SkipParam = 0,
+    limit: LimitParam = None,
+    order_by: OrderByParam = None,
+    sort: SortParam = None,
+) -> Response:
+    """Perform search query"""
+    started = perf_counter()
+    if not class_name:
+        raise HTTPException(status_code=422, detail="A class name must be specified")
+    try:
+        filters, sorting_parameters = parse_search_parameters(
+            filter_by=filter_by, value=value, order_by=order_by, sort=sort
+        )
+    except ValueError as err:
+        metrics.count_search_error(
+            class_name=class_name, error="InvalidParameters", config=config
+        )
+        raise HTTPException(status_code=422, detail=str(err)) from err
+    timer = PhaseTimer()
     try:
         results = await query_handler.handle_query(
             class_name=class_name,
@@ -122,8 +193,12 @@ async def search(  # noqa: PLR0913
             skip=skip,
             limit=limit,
             sorting_parameters=sorting_parameters,
+            timer=timer,
         )
     except query_handler.ClassNotConfiguredError as err:
+        metrics.count_search_error(
+            class_name=class_name, error=type(err).__name__, config=config
+        )
         raise HTTPException(
             status_code=422,
             detail="The specified class name is invalid."
@@ -131,8 +206,213 @@ async def search(  # noqa: PLR0913
         ) from err
     except (query_handler.SearchError, query_handler.ValidationError) as err:
         log.error(err, exc_info=True)
+        metrics.count_search_error(
+            class_name=class_name, error=type(err).__name__, config=config
+        )
         raise HTTPException(
             status_code=500, detail="An error occurred during the search operation"
         ) from err
 
-    return results
+    with timer.phase("serialize"):
+        content = results.model_dump_json()
+    duration = perf_counter() - started
+    metrics.observe_search(
+        class_name=class_name,
+        duration=duration,
+        timer=timer,
+        results=results,
+        config=config,
+    )
+    if search_capture:
+        search_capture.record(
+            params={
+                "class_name": class_name,
+                "query": query,
+                "filter_by": filter_by,
+                "value": value,
+                "skip": skip,
+                "limit": limit,
+                "order_by": order_by,
+                "sort": [order.value for order in sort] if sort else None,
+            },
+            duration=duration,
+            count=results.count,
+            strategy=timer.annotations.get("strategy"),
+        )
+    response = Response(content=content, media_type="application/json")
+    if config.server_timing:
+        response.headers["Server-Timing"] = server_timing(timer, total=duration)
+    return response
+
+
+PrefixParam = Annotated[
+    str,
+    Query(description="The text typed so far, whose last word shall be completed"),
+]
+SuggestLimitParam = Annotated[
+    int, Query(ge=1, le=100, description="The maximum number of completions")
+]
+
+
+@router.get(
+    path="/suggest",
+    summary="Complete the last word of a keyword search",
+    response_model=list[models.Suggestion],
+)
+async def suggest(
+    query_handler: QueryHandlerDummy,
+    class_name: ClassNameParam,
+    prefix: PrefixParam = "",
+    limit: SuggestLimitParam = 10,
+) -> list[models.Suggestion]:
+    """Return the words starting with the last word of the prefix that are contained
+    in the most resources of the class, along with the number of these resources.
+
+    The words are taken from the text covered by the keyword search, ignoring case,
+    diacritics and stop words. They are counted whenever resources are loaded, so
+    that completions can be offered while typing without running a search.
+    """
+    if not class_name:
+        raise HTTPException(status_code=422, detail="A class name must be specified")
+    try:
+        return await query_handler.suggest(
+            class_name=class_name, prefix=prefix, limit=limit
+        )
+    except query_handler.ClassNotConfiguredError as err:
+        raise HTTPException(
+            status_code=422,
+            detail="The specified class name is invalid."
+            + " See /search-options for a list of valid class names.",
+        ) from err
+    except query_handler.SearchError as err:
+        log.error(err, exc_info=True)
+        raise HTTPException(
+            status_code=500, detail="An error occurred during the suggest operation"
+        ) from err
+
+
+FacetKeyParam = Annotated[
+    str, Query(description="The key of the facetable field whose options are wanted")
+]
+FacetPrefixParam = Annotated[
+    str, Query(description="The text that the values of the options must start with")
+]
+FacetValuesLimitParam = Annotated[
+    int, Query(ge=1, le=1000, description="The maximum number of options")
+]
+
+
+@router.get(
+    path="/facet-values",
+    summary="Find the options of a facet starting with a prefix",
+    response_model=models.FacetValues,
+)
+async def facet_values(  # noqa: PLR0913
+    query_handler: QueryHandlerDummy,
+    class_name: ClassNameParam,
+    key: FacetKeyParam,
+    prefix: FacetPrefixParam = "",
+    query: QueryParam = "",
+    filter_by: FilterByParam = None,
+    value: ValueParam = None,
+    skip: SkipParam = 0,
+    limit: FacetValuesLimitParam = 10,
+) -> models.FacetValues:
+    """Return the options of a facet whose values start with the prefix, along with
+    the number of results of the search with the given query and filters having
+    each of them, the most frequent options first.
+
+    The prefix is matched case-sensitively. The total number of matching options is
+    returned as well, so that they can be paginated. This allows offering the options
+    of facets with many different values while typing, instead of loading them all.
+    """
+    if not class_name:
+        raise HTTPException(status_code=422, detail="A class name must be specified")
+    try:
+        filters, _ = parse_search_parameters(
+            filter_by=filter_by, value=value, order_by=None, sort=None
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=422, detail=str(err)) from err
+    try:
+        return await query_handler.facet_values(
+            class_name=class_name,
+            key=key,
+            prefix=prefix,
+            query=query,
+            filters=filters,
+            skip=skip,
+            limit=limit,
+        )
+    except query_handler.ClassNotConfiguredError as err:
+        raise HTTPException(
+            status_code=422,
+            detail="The specified class name is invalid."
+            + " See /search-options for a list of valid class names.",
+        ) from err
+    except query_handler.FacetNotConfiguredError as err:
+        raise HTTPException(
+            status_code=422,
+            detail="The specified facet key is invalid."
+            + " See /search-options for a list of the facetable fields.",
+        ) from err
+    except query_handler.SearchError as err:
+        log.error(err, exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred during the facet values operation",
+        ) from err
+
+
+@router.get(
+    path="/search/explain",
+    summary="Explain how a search is executed in the database",
+    response_model=models.QueryExplanation,
+    dependencies=[Depends(require_admin)],
+)
+async def explain_search(  # noqa: PLR0913
+    query_handler: QueryHandlerDummy,
+    class_name: ClassNameParam,
+    query: QueryParam = "",
+    filter_by: FilterByParam = None,
+    value: ValueParam = None,
+    skip: SkipParam = 0,
+    limit: LimitParam = None,
+    order_by: OrderByParam = None,
+    sort: SortParam = None,
+) -> models.QueryExplanation:
+    """Return the aggregation pipeline of a search along with its query plan and
+    execution statistics, including index usage, the number of examined documents
+    and the time spent in each stage.
+
+    This endpoint accepts the same parameters as the search endpoint, but it is only
+    available for administrators.
+    """
+    if not class_name:
+        raise HTTPException(status_code=422, detail="A class name must be specified")
+    try:
+        filters, sorting_parameters = parse_search_parameters(
+            filter_by=filter_by, value=value, order_by=order_by, sort=sort
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=422, detail=str(err)) from err
+    try:
+        return await query_handler.explain_query(
+            class_name=class_name,
+            query=query,
+            filters=filters,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+    except query_handler.ClassNotConfiguredError as err:
+        raise HTTPException(
+            status_code=422,
+            detail="The specified class name is invalid."
+            + " See /search-options for a list of valid class names.",
+        ) from err
+    except query_handler.SearchError as err:
+        log.error(err, exc_info=True)
+        raise HTTPException(
+            status_code=500, detail="An error occurred during the explain operation"
+        ) from err
@@ -0,0 +1,172 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Loads searchable resources from JSON or JSONL files"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from hexkit.custom_types import JsonObject
+from pydantic import ValidationError
+
+from mass.core.models import Resource
+from mass.ports.inbound.query_handler import QueryHandlerPort
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+log = logging.getLogger(__name__)
+
+
+class FileFormatError(RuntimeError):
+    """Raised when a resource file cannot be parsed or validated"""
+
+
+def resource_from_item(item: JsonObject) -> Resource:
+    """Convert an item with an `id_` field and the content into a resource"""
+    content = dict(item)
+    id_ = content.pop("id_")
+    return Resource.model_validate({"id_": id_, "content": content})
+
+
+def validate_items(items: list[JsonObject], *, source: str) -> list[Resource]:
+    """Validate already parsed items and convert them into resources"""
+    try:
+        return [resource_from_item(item) for item in items]
+    except (KeyError, TypeError, ValidationError) as err:
+        raise FileFormatError(f"Invalid resource in {source}: {err!r}") from None
+
+
+def validate_lines(lines: list[str], *, source: str) -> list[Resource]:
+    """Parse JSON lines and convert them into resources"""
+    try:
+        items = [json.loads(line) for line in lines if line.strip()]
+    except json.JSONDecodeError as err:
+        raise FileFormatError(f"Invalid JSON in {source}: {err}") from None
+    return validate_items(items, source=source)
+
+
+def read_batches(
+    path: Path, *, batch_size: int
+) -> Iterator[Callable[[], list[Resource]]]:
+    """Read the file in batches and yield functions that validate these batches.
+
+    JSONL files are read lazily and the lines are parsed by the validation functions.
+    JSON files must contain an object with the resources in a list under `items` and
+    need to be parsed completely beforehand.
+    """
+    if path.suffix in JSONL_SUFFIXES:
+        with open(path, encoding="utf-8") as file:
+            lines: list[str] = []
+            first_line = 1
+            for line_number, line in enumerate(file, 1):
+                lines.append(line)
+                if len(lines) >= batch_size:
+                    source = f"{path} lines {first_line}-{line_number}"
+                    yield partial(validate_lines, lines, source=source)
+                    lines, first_line = [], line_number + 1
+            if lines:
+                source = f"{path} lines {first_line}-{first_line + len(lines) - 1}"
+                yield partial(validate_lines, lines, source=source)
+    else:
+        with open(path, encoding="utf-8") as file:
+            try:
+                items = json.load(file)["items"]
+            except (json.JSONDecodeError, KeyError, TypeError) as err:
+                raise FileFormatError(f"Invalid resource file {path}: {err}") from err
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+            source = f"{path} items {start + 1}-{start + len(batch)}"
+            yield partial(validate_items, batch, source=source)
+
+
+class FileLoader:
+    """Loads resources from files, validating them in parallel worker processes"""
+
+    @classmethod
+    @asynccontextmanager
+    async def construct(
+        cls, *, query_handler: QueryHandlerPort, workers: int, batch_size: int
+    ) -> AsyncGenerator["FileLoader"]:
+        """Set up the file loader with a pool of worker processes"""
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield cls(
+                query_handler=query_handler,
+                executor=executor,
+                workers=workers,
+                batch_size=batch_size,
+            )
+
+    def __init__(
+        self,
+        *,
+        query_handler: QueryHandlerPort,
+        executor: ProcessPoolExecutor,
+        workers: int,
+        batch_size: int,
+    ):
+        """Initialize with the query handler used for loading the resources"""
+        self._query_handler = query_handler
+        self._executor = executor
+        self._workers = workers
+        self._batch_size = batch_size
+
+    async def load_file(self, path: Path, *, class_name: str | None = None) -> int:
+        """Load all resources from the given file and return their number.
+
+        If no class name is specified, the name of the file without suffix is used.
+        Batches are validated in parallel, but loaded in the order of the file.
+
+        Raises:
+            FileFormatError: if the file contains invalid resources
+            ClassNotConfiguredError: if the class name is not configured
+        """
+        if not class_name:
+            class_name = path.stem
+        loop = asyncio.get_running_loop()
+        # keep the workers busy while limiting the number of batches held in memory
+        pending: deque[asyncio.Future[Any]] = deque()
+        count = 0
+        try:
+            for validate_batch in read_batches(path, batch_size=self._batch_size):
+                pending.append(loop.run_in_executor(self._executor, validate_batch))
+                if len(pending) > 2 * self._workers:
+                    count += await self._load_batch(pending.popleft(), class_name)
+            while pending:
+                count += await self._load_batch(pending.popleft(), class_name)
+        finally:
+            for future in pending:
+                future.cancel()
+        log.info("Loaded %d resources of class %s from %s.", count, class_name, path)
+        return count
+
+    async def _load_batch(
+        self, validated_batch: asyncio.Future[list[Resource]], class_name: str
+    ) -> int:
+        """Load the resources of a batch as soon as it has been validated"""
+        resources = await validated_batch
+        for resource in resources:
+            await self._query_handler.load_resource(
+                resource=resource, class_name=class_name
+            )
+        return len(resources)
@@ -0,0 +1,132 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Prometheus metrics collected by the event consumer"""
+
+import logging
+import time
+from collections.abc import Mapping
+
+from aiokafka import ConsumerRecord
+from hexkit.custom_types import Ascii, JsonObject
+from hexkit.protocols.eventpub import EventPublisherProtocol
+from prometheus_client import Counter, Histogram, start_http_server
+from pydantic import UUID4, Field
+from pydantic_settings import BaseSettings
+
+from mass.adapters.inbound.consumer import ConsumerWrapper
+
+log = logging.getLogger(__name__)
+
+EVENTS = Counter(
+    "mass_events_total",
+    "Number of consumed resource events by type of operation and class name",
+    ["operation", "class_name"],
+)
+VALIDATION_FAILURES = Counter(
+    "mass_event_validation_failures_total",
+    "Number of consumed resource events that failed schema validation",
+    ["operation"],
+)
+DLQ_SENDS = Counter(
+    "mass_event_dlq_sends_total",
+    "Number of events that were published to the dead letter queue",
+)
+EVENT_LAG = Histogram(
+    "mass_event_lag_seconds",
+    "Time in seconds between the publication of an event and its processing",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600, 86400),
+)
+WRITE_DURATION = Histogram(
+    "mass_db_write_duration_seconds",
+    "Duration in seconds of applying a resource event to the database",
+    ["operation", "class_name"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+class IngestMetricsConfig(BaseSettings):
+    """Config for exposing the metrics of the event consumer"""
+
+    ingest_metrics_port: int | None = Field(
+        default=None,
+        description="Port of the HTTP endpoint on which the event consumer exposes"
+        + " its metrics in the Prometheus text format. No endpoint is started if not"
+        + " set.",
+        examples=[None, 9100],
+    )
+    ingest_metrics_host: str = Field(
+        default="127.0.0.1",
+        description="Host or IP address of the HTTP endpoint exposing the metrics of"
+        + " the event consumer",
+        examples=["127.0.0.1", "0.0.0.0"],  # noqa: S104
+    )
+
+
+def start_metrics_server(*, config: IngestMetricsConfig) -> None:
+    """Expose the metrics on an HTTP endpoint running in a background thread.
+
+    Nothing is done if no port has been configured.
+    """
+    if config.ingest_metrics_port is None:
+        return
+    start_http_server(config.ingest_metrics_port, addr=config.ingest_metrics_host)
+    log.info(
+        "Exposing consumer metrics on %s:%d",
+        config.ingest_metrics_host,
+        config.ingest_metrics_port,
+    )
+
+
+class MeteredConsumer(ConsumerWrapper):
+    """Wraps the Kafka consumer of the event subscriber to record the event lag"""
+
+    async def __anext__(self) -> ConsumerRecord:
+        """Get the next event and record the time passed since its publication"""
+        event = await self._consumer.__anext__()
+        # the event timestamp is the time of publication in milliseconds
+        EVENT_LAG.observe(max(time.time() - event.timestamp / 1000, 0))
+        return event
+
+
+class MeteredDlqPublisher(EventPublisherProtocol):
+    """Wraps the publisher used by the event subscriber to count the DLQ sends
+
+    The event subscriber only uses this publisher for sending events to the DLQ.
+    """
+
+    def __init__(self, publisher: EventPublisherProtocol):
+        self._publisher = publisher
+
+    async def _publish_validated(  # noqa: PLR0913
+        self,
+        *,
+        payload: JsonObject,
+        type_: Ascii,
+        key: Ascii,
+        topic: Ascii,
+        event_id: UUID4,
+        headers: Mapping[str, str],
+    ) -> None:
+        """Publish the event using the wrapped publisher and count it"""
+        await self._publisher.publish(
+            payload=payload,
+            type_=type_,
+            key=key,
+            topic=topic,
+            event_id=event_id,
+            headers=headers,
+        )
+        DLQ_SENDS.inc()
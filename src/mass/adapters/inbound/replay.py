@@ -0,0 +1,202 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Replaying of captured search requests for benchmarking"""
+
+import asyncio
+import json
+import math
+import re
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import httpx
+from pydantic import BaseModel, Field
+
+from mass.adapters.inbound.fastapi_.routes import parse_search_parameters
+from mass.core import models
+from mass.core.timing import PhaseTimer
+from mass.ports.inbound.query_handler import QueryHandlerPort
+
+UNKNOWN_STRATEGY = "unknown"
+
+# the query parameters of a search request as passed to the search endpoint
+SearchParams = dict[str, Any]
+
+# runs a search with the given parameters and returns the execution strategy
+SearchFunction = Callable[[SearchParams], Awaitable[str | None]]
+
+
+class ReplayStatistics(BaseModel):
+    """Throughput and latency of a group of replayed search requests"""
+
+    requests: int = Field(..., description="The number of replayed requests")
+    errors: int = Field(..., description="The number of failed requests")
+    throughput: float = Field(..., description="Replayed requests per second")
+    p50: float = Field(..., description="The median latency in milliseconds")
+    p95: float = Field(..., description="The 95th percentile of the latency in ms")
+    p99: float = Field(..., description="The 99th percentile of the latency in ms")
+    max: float = Field(..., description="The maximum latency in milliseconds")
+
+
+class ReplayReport(BaseModel):
+    """The results of replaying search requests"""
+
+    concurrency: int = Field(..., description="The number of concurrent requests")
+    duration: float = Field(..., description="The total duration in seconds")
+    total: ReplayStatistics = Field(..., description="Statistics of all requests")
+    classes: dict[str, ReplayStatistics] = Field(
+        ..., description="Statistics of the requests per class name"
+    )
+    strategies: dict[str, ReplayStatistics] = Field(
+        ..., description="Statistics of the requests per execution strategy"
+    )
+
+
+def read_captured_searches(path: Path) -> Iterator[SearchParams]:
+    """Read the search parameters from a file written by the search capture"""
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)["params"]
+
+
+def query_handler_search(query_handler: QueryHandlerPort) -> SearchFunction:
+    """Get a function running searches directly with the given query handler"""
+
+    async def search(params: SearchParams) -> str | None:
+        filters, sorting_parameters = parse_search_parameters(
+            filter_by=params.get("filter_by"),
+            value=params.get("value"),
+            order_by=params.get("order_by"),
+            sort=[models.SortOrder(order) for order in params.get("sort") or []],
+        )
+        timer = PhaseTimer()
+        await query_handler.handle_query(
+            class_name=params["class_name"],
+            query=params.get("query") or "",
+            filters=filters,
+            sorting_parameters=sorting_parameters,
+            skip=params.get("skip") or 0,
+            limit=params.get("limit"),
+            timer=timer,
+        )
+        return timer.annotations.get("strategy")
+
+    return search
+
+
+def http_search(client: httpx.AsyncClient) -> SearchFunction:
+    """Get a function running searches against the API of a running instance
+
+    The execution strategy can only be determined if the instance sends the
+    Server-Timing header.
+    """
+
+    async def search(params: SearchParams) -> str | None:
+        response = await client.get(
+            "/search",
+            params={key: value for key, value in params.items() if value is not None},
+        )
+        response.raise_for_status()
+        match = re.search(
+            r'strategy;desc="([^"]*)"', response.headers.get("Server-Timing", "")
+        )
+        return match.group(1) if match else None
+
+    return search
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Get the percentile of the sorted values using the nearest-rank method"""
+    if not sorted_values:
+        return 0
+    # round first to avoid that floating point errors affect the rank
+    rank = max(math.ceil(round(fraction * len(sorted_values), 9)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(
+    durations: list[float], *, errors: int, elapsed: float
+) -> ReplayStatistics:
+    """Compute the statistics for a group of measured durations in seconds"""
+    durations = sorted(duration * 1000 for duration in durations)
+    requests = len(durations) + errors
+    return ReplayStatistics(
+        requests=requests,
+        errors=errors,
+        throughput=requests / elapsed if elapsed else 0,
+        p50=percentile(durations, 0.5),
+        p95=percentile(durations, 0.95),
+        p99=percentile(durations, 0.99),
+        max=durations[-1] if durations else 0,
+    )
+
+
+async def replay(
+    searches: Iterable[SearchParams], *, search: SearchFunction, concurrency: int = 1
+) -> ReplayReport:
+    """Replay the searches with the given number of concurrent requests
+
+    Failed searches are counted as errors per class, and their strategy is unknown.
+    """
+    pending = iter(searches)
+    durations: dict[str, dict[str, list[float]]] = {
+        "classes": defaultdict(list),
+        "strategies": defaultdict(list),
+    }
+    errors: dict[str, int] = defaultdict(int)
+
+    async def worker() -> None:
+        for params in pending:
+            class_name = params["class_name"]
+            started = perf_counter()
+            try:
+                strategy = await search(params)
+            except Exception:
+                errors[class_name] += 1
+                continue
+            duration = perf_counter() - started
+            durations["classes"][class_name].append(duration)
+            durations["strategies"][strategy or UNKNOWN_STRATEGY].append(duration)
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - started
+
+    all_durations = [
+        duration for values in durations["classes"].values() for duration in values
+    ]
+    return ReplayReport(
+        concurrency=concurrency,
+        duration=elapsed,
+        total=summarize(all_durations, errors=sum(errors.values()), elapsed=elapsed),
+        classes={
+            class_name: summarize(
+                durations["classes"][class_name],
+                errors=errors[class_name],
+                elapsed=elapsed,
+            )
+            for class_name in sorted(durations["classes"].keys() | errors.keys())
+        },
+        strategies={
+            strategy: summarize(values, errors=0, elapsed=elapsed)
+            for strategy, values in sorted(durations["strategies"].items())
+        },
+    )
@@ -15,17 +15,26 @@
 #
 """Contains concrete implementation of the Aggregator and its Factory"""
 
+import json
 from contextlib import asynccontextmanager
 
+from bson import json_util
 from hexkit.custom_types import JsonObject
 from hexkit.providers.mongodb import ConfiguredMongoClient, MongoDbConfig
+from pymongo import ASCENDING, DESCENDING
 from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.errors import OperationFailure
 
 from mass.adapters.outbound import utils
+from mass.adapters.outbound.suggestions import (
+    WORDS_SUFFIX,
+    completed_word,
+    prefix_range,
+)
 from mass.config import SearchableClassesConfig
 from mass.core import models
+from mass.core.timing import PhaseTimer, timed
 from mass.ports.outbound.aggregator import (
     AggregationError,
     AggregatorCollectionPort,
@@ -36,9 +45,14 @@ from mass.ports.outbound.aggregator import (
 class Aggregator(AggregatorPort):
     """Concrete implementation of an Aggregator"""
 
-    def __init__(self, *, collection: AsyncCollection):
-        """Initialize with a MongoDB collection"""
+    def __init__(self, *, collection: AsyncCollection, class_name: str):
+        """Initialize with the MongoDB collection of the given resource class
+
+        The class name is used for tagging the operations in the database, since the
+        collection may be a shadow collection with a different name.
+        """
         self._collection = collection
+        self._class_name = class_name
 
     async def aggregate(  # noqa: PLR0913, D102
         self,
@@ -50,25 +64,42 @@ class Aggregator(AggregatorPort):
         sorting_parameters: list[models.SortingParameter],
         skip: int = 0,
         limit: int | None = None,
+        timer: PhaseTimer | None = None,
     ) -> JsonObject:
         # don't carry out aggregation if the collection is empty
-        if not await self._collection.find_one():
-            return models.QueryResults().model_dump()
+        with timed(timer, "db"):
+            comment = utils.operation_comment(
+                class_name=self._class_name, operation="find"
+            )
+            if not await self._collection.find_one(comment=comment):
+                if timer:
+                    timer.annotate("strategy", "empty")
+                return models.QueryResults().model_dump()
 
         # build the aggregation pipeline
-        pipeline = utils.build_pipeline(
-            query=query,
-            filters=filters,
-            facet_fields=facet_fields,
-            selected_fields=selected_fields,
-            skip=skip,
-            limit=limit,
-            sorting_parameters=sorting_parameters,
-        )
+        with timed(timer, "build"):
+            pipeline = utils.build_pipeline(
+                query=query,
+                filters=filters,
+                facet_fields=facet_fields,
+                selected_fields=selected_fields,
+                skip=skip,
+                limit=limit,
+                sorting_parameters=sorting_parameters,
+            )
+        if timer:
+            timer.annotate("strategy", "aggregate")
+            timer.annotate("stages", len(pipeline))
 
         try:
-            cursor = await self._collection.aggregate(pipeline=pipeline)
-            [results] = await cursor.to_list()
+            with timed(timer, "db"):
+                cursor = await self._collection.aggregate(
+                    pipeline=pipeline,
+                    comment=utils.operation_comment(
+                        class_name=self._class_name, operation="aggregate"
+                    ),
+                )
+                [results] = await cursor.to_list()
             return results
         except OperationFailure as err:
             filter_repr = [{f.key: f.value} for f in filters]
@@ -89,6 +120,132 @@ class Aggregator(AggregatorPort):
                 missing_index=missing_index,
             ) from err
 
+    def build_pipeline(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> list[JsonObject]:
+        return utils.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+
+    async def explain(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        verbosity: str = "executionStats",
+    ) -> models.QueryExplanation:
+        pipeline = self.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+        command = {
+            "aggregate": self._collection.name,
+            "pipeline": pipeline,
+            "cursor": {},
+        }
+        try:
+            execution_stats = await self._collection.database.command(
+                "explain",
+                command,
+                verbosity=verbosity,
+                comment=utils.operation_comment(
+                    class_name=self._class_name, operation="explain"
+                ),
+            )
+        except OperationFailure as err:
+            raise AggregationError(
+                message=str(err), details=f"pipeline={pipeline}"
+            ) from err
+        # convert BSON specific types so that the explanation can be serialized
+        return models.QueryExplanation(
+            pipeline=json.loads(json_util.dumps(pipeline)),
+            execution_stats=json.loads(json_util.dumps(execution_stats)),
+        )
+
+    async def suggest(self, *, prefix: str, limit: int) -> list[models.Suggestion]:  # noqa: D102
+        lower, upper = prefix_range(completed_word(prefix))
+        words = self._collection.database[self._collection.name + WORDS_SUFFIX]
+        try:
+            cursor = words.find(
+                {"_id": {"$gte": lower, "$lt": upper}},
+                sort=[("count", DESCENDING), ("_id", ASCENDING)],
+                limit=limit,
+                comment=utils.operation_comment(
+                    class_name=self._class_name, operation="suggest"
+                ),
+            )
+            return [
+                models.Suggestion(text=word["_id"], count=word["count"])
+                async for word in cursor
+            ]
+        except OperationFailure as err:
+            raise AggregationError(
+                message=str(err), details=f"prefix={prefix}, limit={limit}"
+            ) from err
+
+    async def facet_values(  # noqa: D102, PLR0913
+        self,
+        *,
+        facet: models.FieldLabel,
+        prefix: str,
+        query: str,
+        filters: list[models.Filter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.FacetValues:
+        pipeline = utils.build_facet_values_pipeline(
+            key=facet.key,
+            prefix=prefix,
+            query=query,
+            filters=filters,
+            skip=skip,
+            limit=limit,
+        )
+        try:
+            cursor = await self._collection.aggregate(
+                pipeline=pipeline,
+                comment=utils.operation_comment(
+                    class_name=self._class_name, operation="facet_values"
+                ),
+            )
+            [results] = await cursor.to_list()
+        except OperationFailure as err:
+            filter_repr = [{f.key: f.value} for f in filters]
+            raise AggregationError(
+                message=str(err),
+                details=f"key={facet.key}, prefix={prefix}, query={query},"
+                + f" filters={filter_repr}, skip={skip}, limit={limit}",
+            ) from err
+        return models.FacetValues(
+            key=facet.key,
+            name=facet.name or utils.name_from_key(facet.key),
+            **results,
+        )
+
 
 class AggregatorFactory:
     """Produces aggregators for a given resource class"""
@@ -105,10 +262,15 @@ class AggregatorFactory:
         """Initialize the factory with the DB config information"""
         self._db = db
 
-    def get_aggregator(self, *, name: str) -> Aggregator:
-        """Returns an aggregator with a collection set up"""
-        collection = self._db[name]
-        return Aggregator(collection=collection)
+    def get_aggregator(
+        self, *, class_name: str, collection_suffix: str = ""
+    ) -> Aggregator:
+        """Returns an aggregator for the collection of the given resource class
+
+        If a collection suffix is given, it is appended to the name of the collection.
+        """
+        collection = self._db[class_name + collection_suffix]
+        return Aggregator(collection=collection, class_name=class_name)
 
 
 class AggregatorNotFoundError(RuntimeError):
@@ -127,11 +289,18 @@ class AggregatorCollection(AggregatorCollectionPort):
         *,
         aggregator_factory: AggregatorFactory,
         config: SearchableClassesConfig,
+        collection_suffix: str = "",
     ):
-        """Initialize the Aggregator collection with one Aggregator for each resource class"""
+        """Initialize the Aggregator collection with one Aggregator for each resource class
+
+        If a collection suffix is given, the aggregators will not use the live
+        collections, but shadow collections with the suffix appended to the class name.
+        """
         aggregators: dict[str, AggregatorPort] = {}
         for name in config.searchable_classes:
-            aggregators[name] = aggregator_factory.get_aggregator(name=name)
+            aggregators[name] = aggregator_factory.get_aggregator(
+                class_name=name, collection_suffix=collection_suffix
+            )
 
         return cls(aggregators=aggregators)
 
@@ -0,0 +1,162 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A columnar store of the values of facetable fields for counting facet options
+
+The values of each field are dictionary-encoded as small integer codes, which are
+stored in NumPy arrays along with the offsets and lengths of the codes of each
+document, so that the facet options of a set of documents can be counted with a
+single call to `np.bincount`. Documents are identified by dense positions, which
+are assigned by the caller.
+"""
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+INITIAL_CAPACITY = 1024
+
+
+def positions_from_bitmap(bitmap: int) -> npt.NDArray[np.intp]:
+    """Get the positions of the set bits of a bitmap given as an integer"""
+    if not bitmap:
+        return np.empty(0, dtype=np.intp)
+    data = np.frombuffer(
+        bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8
+    )
+    return np.flatnonzero(np.unpackbits(data, bitorder="little"))
+
+
+def grow(array: npt.NDArray, size: int) -> npt.NDArray:
+    """Get an array with at least the given size that starts with the given array"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), INITIAL_CAPACITY), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class FacetColumn:
+    """The dictionary-encoded values of one facetable field
+
+    The codes of all documents are stored in one array, the codes of the document
+    at a given position start at the offset of that position and have the stored
+    length. When a document gets more codes than before, they are appended to the
+    array, and the array is compacted when it contains too many unused codes.
+    """
+
+    def __init__(self):
+        self.values: list[Any] = []
+        self._codes: dict[Any, int] = {}
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._data = np.zeros(0, dtype=np.int32)
+        self._size = 0
+        self._unused = 0
+
+    def encode(self, values: Iterable[Any]) -> list[int]:
+        """Get the codes of the given values, adding new values to the dictionary"""
+        codes = []
+        for value in values:
+            code = self._codes.get(value)
+            if code is None:
+                code = self._codes[value] = len(self.values)
+                self.values.append(value)
+            codes.append(code)
+        return codes
+
+    def set(self, position: int, values: Sequence[Any]) -> None:
+        """Set the values of the document at the given position"""
+        codes = self.encode(values)
+        self._offsets = grow(self._offsets, position + 1)
+        self._lengths = grow(self._lengths, position + 1)
+        length = int(self._lengths[position])
+        if len(codes) <= length:
+            offset = int(self._offsets[position])
+            self._unused += length - len(codes)
+        else:
+            offset = self._size
+            self._unused += length
+            self._data = grow(self._data, offset + len(codes))
+            self._offsets[position] = offset
+            self._size += len(codes)
+        self._data[offset : offset + len(codes)] = codes
+        self._lengths[position] = len(codes)
+        if self._unused > max(self._size // 2, INITIAL_CAPACITY):
+            self.compact()
+
+    def clear(self, position: int) -> None:
+        """Remove the values of the document at the given position"""
+        if position < len(self._lengths):
+            self._unused += int(self._lengths[position])
+            self._lengths[position] = 0
+
+    def _indexes(self, positions: npt.NDArray[np.intp]) -> npt.NDArray[np.int64]:
+        """Get the indexes of the codes of the documents at the given positions"""
+        lengths = self._lengths[positions].astype(np.int64)
+        ends = np.cumsum(lengths)
+        shifts = np.repeat(self._offsets[positions] - ends + lengths, lengths)
+        return shifts + np.arange(int(ends[-1]) if len(ends) else 0)
+
+    def compact(self) -> None:
+        """Remove the unused codes from the array of codes"""
+        positions = np.flatnonzero(self._lengths)
+        data = self._data[self._indexes(positions)]
+        self._offsets[positions] = (
+            np.cumsum(self._lengths[positions]) - (self._lengths[positions])
+        )
+        self._data = grow(data, len(data))
+        self._size = len(data)
+        self._unused = 0
+
+    def count(self, positions: npt.NDArray[np.intp]) -> list[tuple[Any, int]]:
+        """Count the documents at the given positions per value
+
+        Only values that occur in these documents are returned.
+        """
+        positions = positions[positions < len(self._lengths)]
+        codes = self._data[self._indexes(positions)]
+        counts = np.bincount(codes, minlength=len(self.values))
+        return [
+            (self.values[code], int(counts[code])) for code in np.flatnonzero(counts)
+        ]
+
+
+class ColumnarFacets:
+    """The columns of the facetable fields of one class of resources"""
+
+    def __init__(self):
+        self.columns: dict[str, FacetColumn] = {}
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether there is a column for the given key"""
+        return key in self.columns
+
+    def add_column(self, key: str) -> FacetColumn:
+        """Add an empty column for the given key"""
+        column = self.columns[key] = FacetColumn()
+        return column
+
+    def clear(self, position: int) -> None:
+        """Remove the values of the document at the given position from all columns"""
+        for column in self.columns.values():
+            column.clear(position)
+
+    def count(self, key: str, positions: npt.NDArray[np.intp]) -> list[tuple[Any, int]]:
+        """Count the documents at the given positions per value of the given key"""
+        return self.columns[key].count(positions)
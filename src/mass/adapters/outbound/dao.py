@@ -16,14 +16,70 @@
 
 """Contains the ResourceDaoCollection, which houses a DAO for each resource class"""
 
-from hexkit.protocols.dao import DaoFactoryProtocol
-from hexkit.providers.mongodb.provider import ConfiguredMongoClient
-from pymongo import TEXT
+import asyncio
+import json
+import logging
+from collections import Counter
+from collections.abc import AsyncIterator, Mapping, Sequence
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any
 
+from hexkit.custom_types import ID, JsonObject
+from hexkit.protocols.dao import (
+    Dao,
+    DaoFactoryProtocol,
+    ResourceAlreadyExistsError,
+    ResourceNotFoundError,
+)
+from hexkit.providers.mongodb.provider import ConfiguredMongoClient, dto_to_document
+from prometheus_client import Histogram
+from pydantic import ConfigDict, Field
+from pymongo import (
+    ASCENDING,
+    DESCENDING,
+    TEXT,
+    DeleteMany,
+    DeleteOne,
+    ReplaceOne,
+    ReturnDocument,
+    UpdateOne,
+)
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
+
+from mass.adapters.outbound import utils
+from mass.adapters.outbound.suggestions import (
+    WORDS_SUFFIX,
+    indexed_words,
+    word_changes,
+)
+from mass.adapters.outbound.text_search import (
+    SEARCH_TEXT_FIELD,
+    indexed_document,
+    search_text,
+)
 from mass.config import Config
 from mass.core import models
 from mass.ports.outbound.dao import DaoCollectionPort, ResourceDao
 
+log = logging.getLogger(__name__)
+
+BULK_WRITE_DURATION = Histogram(
+    "mass_db_bulk_write_duration_seconds",
+    "Duration of bulk write operations in the database in seconds",
+    ["class_name"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+BULK_WRITE_SIZE = Histogram(
+    "mass_db_bulk_write_size",
+    "Number of upsertions and deletions in bulk write operations",
+    ["class_name"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+
 
 class DaoNotFoundError(RuntimeError):
     """Raised when a DAO is not found."""
@@ -32,6 +88,357 @@ class DaoNotFoundError(RuntimeError):
         super().__init__(f"Could not find DAO for class '{class_name}'.")
 
 
+# the number of word counts inserted at once when counting the words from scratch
+WORD_COUNT_BATCH_SIZE = 1000
+# the number of seconds for which the word count changes of single writes are
+#  collected before they are written together
+WORD_COUNT_FLUSH_DELAY = 1
+# the suffix of the collection in which the words are counted from scratch
+COUNTING_SUFFIX = "__counting"
+# the start of the name of a text index covering the compact search text, which is
+#  followed by the paths that the search text is built from
+SEARCH_TEXT_INDEX_PREFIX = f"{SEARCH_TEXT_FIELD}_{TEXT}_"
+
+
+class StoredResource(models.Resource):
+    """A resource as stored in the database along with its compact search text"""
+
+    model_config = ConfigDict(serialize_by_alias=True)
+
+    search_text: str = Field(default="", alias="_search_text")
+
+
+def stored_resource(
+    resource: models.Resource, search_text_paths: Sequence[str]
+) -> StoredResource:
+    """Add the compact search text built from the given paths to a resource"""
+    document = {"_id": resource.id_, "content": resource.content}
+    return StoredResource.model_validate(
+        {
+            "id_": resource.id_,
+            "content": resource.content,
+            SEARCH_TEXT_FIELD: search_text(document, search_text_paths),
+        }
+    )
+
+
+class SearchTextResourceDao:
+    """A DAO for resources that are stored along with their compact search text
+
+    The search text is built whenever a resource is written, so that the text index
+    only needs to cover this one field. The search text is not returned when reading.
+    """
+
+    def __init__(self, *, dao: Dao[StoredResource], search_text_paths: Sequence[str]):
+        self._dao = dao
+        self._search_text_paths = search_text_paths
+
+    @staticmethod
+    def _resource(stored: StoredResource) -> models.Resource:
+        return models.Resource(id_=stored.id_, content=stored.content)
+
+    async def get_by_id(self, id_: ID) -> models.Resource:  # noqa: D102
+        return self._resource(await self._dao.get_by_id(id_))
+
+    async def update(self, dto: models.Resource) -> None:  # noqa: D102
+        await self._dao.update(stored_resource(dto, self._search_text_paths))
+
+    async def delete(self, id_: ID) -> None:  # noqa: D102
+        await self._dao.delete(id_)
+
+    async def find_one(self, *, mapping: Mapping[str, Any]) -> models.Resource:  # noqa: D102
+        return self._resource(await self._dao.find_one(mapping=mapping))
+
+    async def find_all(  # noqa: D102
+        self, *, mapping: Mapping[str, Any]
+    ) -> AsyncIterator[models.Resource]:
+        async for stored in self._dao.find_all(mapping=mapping):
+            yield self._resource(stored)
+
+    async def insert(self, dto: models.Resource) -> None:  # noqa: D102
+        await self._dao.insert(stored_resource(dto, self._search_text_paths))
+
+    async def upsert(self, dto: models.Resource) -> None:  # noqa: D102
+        await self._dao.upsert(stored_resource(dto, self._search_text_paths))
+
+
+@dataclass(frozen=True)
+class TextIndexFields:
+    """The fields covered by the text index of a collection
+
+    The compact search text of a resource is built and its words are counted
+    according to these fields. If the configured searchable fields have changed,
+    these are the fields of the live text index until the collections are rebuilt,
+    so that the resources written in the meantime match the other ones.
+    """
+
+    weights: dict[str, int] | None
+    search_text_paths: list[str] | None
+
+    @classmethod
+    def configured(cls, searchable_class: models.SearchableClass) -> "TextIndexFields":
+        """Get the fields that the text index of the given class shall cover"""
+        return cls(
+            weights=utils.text_index_weights(searchable_class),
+            search_text_paths=utils.search_text_paths(searchable_class),
+        )
+
+    @classmethod
+    def of_index(cls, index: Mapping[str, Any]) -> "TextIndexFields | None":
+        """Get the fields covered by an existing text index
+
+        The paths of a compact search text are read from the name of the index.
+        Returns None if the name does not contain them.
+        """
+        weights = dict(index["weights"])
+        if weights == {"$**": 1}:
+            return cls(weights=None, search_text_paths=None)
+        if weights != {SEARCH_TEXT_FIELD: 1}:
+            return cls(weights=weights, search_text_paths=None)
+        name: str = index["name"]
+        if not name.startswith(SEARCH_TEXT_INDEX_PREFIX):
+            return None
+        try:
+            paths = json.loads(name.removeprefix(SEARCH_TEXT_INDEX_PREFIX))
+        except ValueError:
+            return None
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            return None
+        return cls(weights=weights, search_text_paths=paths)
+
+    @property
+    def index_name(self) -> str | None:
+        """The name of a text index covering the compact search text
+
+        The name contains the paths that the search text is built from, so that
+        changes of these paths can be detected and the paths of the live index can
+        be used until it is replaced. If no compact search text is used, None is
+        returned and MongoDB chooses the name of the text index.
+        """
+        if self.search_text_paths is None:
+            return None
+        return SEARCH_TEXT_INDEX_PREFIX + json.dumps(
+            self.search_text_paths, separators=(",", ":")
+        )
+
+    def stored(self, resource: models.Resource) -> models.Resource:
+        """Get a resource as it is stored, with the compact search text if used"""
+        if self.search_text_paths is None:
+            return resource
+        return stored_resource(resource, self.search_text_paths)
+
+    def words(self, resource_id: str, content: Mapping[str, Any]) -> set[str]:
+        """Get the distinct words of a resource that are covered by the text index"""
+        document = indexed_document(resource_id, dict(content), self.search_text_paths)
+        return indexed_words(document, self.weights)
+
+
+async def count_words(
+    words: AsyncCollection,
+    changes: Mapping[str, int],
+    *,
+    comment: JsonObject | None = None,
+) -> None:
+    """Change the counts of the given words in the collection of word counts,
+    removing the words that are not contained in any resource anymore
+
+    Both is done with one ordered bulk write operation.
+    """
+    operations: list[UpdateOne | DeleteMany] = [
+        UpdateOne({"_id": word}, {"$inc": {"count": change}}, upsert=True)
+        for word, change in changes.items()
+        if change
+    ]
+    removed = [word for word, change in changes.items() if change < 0]
+    if removed:
+        operations.append(DeleteMany({"_id": {"$in": removed}, "count": {"$lte": 0}}))
+    if operations:
+        await words.bulk_write(operations, comment=comment)
+
+
+class WordCountingResourceDao:
+    """A DAO for resources that keeps the counts of their words up to date
+
+    The stored resource is returned by the same operation that replaces or deletes
+    it, so that the words that are added or removed are known without reading it
+    first. The changes of the word counts are collected for a short time and then
+    written together, so that they do not add a round trip to every write. Concurrent
+    writes of the same resource can make the counts inaccurate until the collections
+    are rebuilt.
+
+    Resources are written in the collection directly, while the wrapped DAO is only
+    used for reading them. This way all operations can be tagged with a comment for
+    correlating them with the service logs, like the bulk writes, and the resources
+    are written for the fields of the live text index, which are set by the DAO
+    collection.
+    """
+
+    def __init__(
+        self,
+        *,
+        dao: ResourceDao,
+        collection: AsyncCollection,
+        words: AsyncCollection,
+        class_name: str,
+        text_index: TextIndexFields,
+    ):
+        self._dao = dao
+        self._collection = collection
+        self._words = words
+        self._class_name = class_name
+        self.text_index = text_index
+        self._word_changes: Counter[str] = Counter()
+        self._flush_task: asyncio.Task | None = None
+
+    def _comment(self, operation: str) -> JsonObject:
+        """Build the comment for tagging an operation in the database"""
+        return utils.operation_comment(class_name=self._class_name, operation=operation)
+
+    def _document(self, resource: models.Resource) -> JsonObject:
+        """Get the document storing the given resource"""
+        return dto_to_document(self.text_index.stored(resource), id_field="id_")
+
+    def _words_of(self, document: Mapping[str, Any] | None) -> set[str]:
+        """Get the words of a stored document, if there is one"""
+        if document is None:
+            return set()
+        return self.text_index.words(str(document["_id"]), document["content"])
+
+    def _count_words(
+        self, old_document: Mapping[str, Any] | None, new_resource: models.Resource
+    ) -> None:
+        """Collect the changes of the word counts caused by writing a resource"""
+        new_words = self.text_index.words(new_resource.id_, new_resource.content)
+        self._add_word_changes(word_changes(self._words_of(old_document), new_words))
+
+    def _add_word_changes(self, changes: Mapping[str, int]) -> None:
+        """Collect the given changes of the word counts and write them later"""
+        self._word_changes.update(changes)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_word_counts_later())
+
+    async def _flush_word_counts_later(self) -> None:
+        """Write the collected changes of the word counts after a delay"""
+        await asyncio.sleep(WORD_COUNT_FLUSH_DELAY)
+        self._flush_task = None
+        try:
+            await self._write_word_counts()
+        except Exception as err:
+            log.error("Cannot update the word counts of %s: %s", self._class_name, err)
+
+    async def _write_word_counts(self) -> None:
+        """Write the collected changes of the word counts, keeping them for the next
+        attempt if they cannot be written
+        """
+        changes, self._word_changes = self._word_changes, Counter()
+        try:
+            await count_words(
+                self._words, changes, comment=self._comment("count_words")
+            )
+        except BaseException:
+            self._word_changes.update(changes)
+            raise
+
+    async def flush_word_counts(self) -> None:
+        """Write the collected changes of the word counts without further delay"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._write_word_counts()
+
+    async def get_by_id(self, id_: ID) -> models.Resource:  # noqa: D102
+        return await self._dao.get_by_id(id_)
+
+    async def update(self, dto: models.Resource) -> None:  # noqa: D102
+        old_document = await self._collection.find_one_and_replace(
+            {"_id": dto.id_},
+            self._document(dto),
+            projection={"content": 1},
+            return_document=ReturnDocument.BEFORE,
+            comment=self._comment("update"),
+        )
+        if old_document is None:
+            raise ResourceNotFoundError(id_=dto.id_)
+        self._count_words(old_document, dto)
+
+    async def delete(self, id_: ID) -> None:  # noqa: D102
+        old_document = await self._collection.find_one_and_delete(
+            {"_id": id_}, projection={"content": 1}, comment=self._comment("delete")
+        )
+        if old_document is None:
+            raise ResourceNotFoundError(id_=id_)
+        self._add_word_changes(word_changes(self._words_of(old_document), ()))
+
+    async def find_one(self, *, mapping: Mapping[str, Any]) -> models.Resource:  # noqa: D102
+        return await self._dao.find_one(mapping=mapping)
+
+    def find_all(self, *, mapping: Mapping[str, Any]) -> AsyncIterator[models.Resource]:  # noqa: D102
+        return self._dao.find_all(mapping=mapping)
+
+    async def insert(self, dto: models.Resource) -> None:  # noqa: D102
+        try:
+            await self._collection.insert_one(
+                self._document(dto), comment=self._comment("insert")
+            )
+        except DuplicateKeyError as err:
+            raise ResourceAlreadyExistsError(id_=dto.id_) from err
+        self._count_words(None, dto)
+
+    async def upsert(self, dto: models.Resource) -> None:  # noqa: D102
+        old_document = await self._collection.find_one_and_replace(
+            {"_id": dto.id_},
+            self._document(dto),
+            projection={"content": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+            comment=self._comment("upsert"),
+        )
+        self._count_words(old_document, dto)
+
+
+def create_words_index(words: Collection) -> None:
+    """Create the index for finding the most frequent words in a collection of word
+    counts if it does not exist yet
+    """
+    words.create_index([("count", DESCENDING), ("_id", ASCENDING)])
+
+
+def recount_words(
+    collection: Collection, words: Collection, text_index: TextIndexFields
+) -> None:
+    """Count the words of all documents in a collection from scratch
+
+    The words are counted in a separate collection that replaces the collection of
+    word counts when done, so that the previous counts can be used until then.
+    """
+    word_counts: Counter[str] = Counter()
+    for document in collection.find({}, {"content": 1}):
+        word_counts.update(text_index.words(document["_id"], document["content"]))
+    counting = collection.database[words.name + COUNTING_SUFFIX]
+    counting.drop()
+    create_words_index(counting)
+    items = list(word_counts.items())
+    for start in range(0, len(items), WORD_COUNT_BATCH_SIZE):
+        counting.insert_many(
+            {"_id": word, "count": count}
+            for word, count in items[start : start + WORD_COUNT_BATCH_SIZE]
+        )
+    counting.rename(words.name, dropTarget=True)
+
+
+def facet_index_keys(searchable_class: models.SearchableClass) -> list[str]:
+    """Get the paths of the facetable fields of a class in the stored documents
+
+    These are the keys of the indexes on the values of the facetable fields, which are
+    not needed for the ID, since it is always indexed.
+    """
+    return [
+        f"content.{field.key}"
+        for field in searchable_class.facetable_fields
+        if field.key != "id_"
+    ]
+
+
 class DaoCollection(DaoCollectionPort):
     """Provides a DAO for each configured searchable resource class"""
 
@@ -40,26 +447,87 @@ class DaoCollection(DaoCollectionPort):
         cls,
         *,
         dao_factory: DaoFactoryProtocol,
+        database: AsyncDatabase,
         config: Config,
+        collection_suffix: str = "",
     ):
-        """Initialize the DAO collection with one DAO for each resource class"""
-        resource_daos: dict[str, ResourceDao] = {}
-        for name in config.searchable_classes:
-            resource_daos[name] = await dao_factory.get_dao(
-                name=name, dto_model=models.Resource, id_field="id_"
+        """Initialize the DAO collection with one DAO for each resource class
+
+        The database is used for writing resources in bulk and for keeping the counts
+        of the words of the resources up to date when writing them with the DAOs.
+        If a collection suffix is given, the DAOs will not use the live collections,
+        but shadow collections with the suffix appended to the class name.
+        """
+        resource_daos: dict[str, WordCountingResourceDao] = {}
+        for name, searchable_class in config.searchable_classes.items():
+            collection_name = name + collection_suffix
+            search_text_paths = utils.search_text_paths(searchable_class)
+            dao: ResourceDao
+            if search_text_paths is None:
+                dao = await dao_factory.get_dao(
+                    name=collection_name, dto_model=models.Resource, id_field="id_"
+                )
+            else:
+                dao = SearchTextResourceDao(
+                    dao=await dao_factory.get_dao(
+                        name=collection_name, dto_model=StoredResource, id_field="id_"
+                    ),
+                    search_text_paths=search_text_paths,
+                )
+            resource_daos[name] = WordCountingResourceDao(
+                dao=dao,
+                collection=database[collection_name],
+                words=database[collection_name + WORDS_SUFFIX],
+                class_name=name,
+                text_index=TextIndexFields.configured(searchable_class),
             )
 
-        return cls(config=config, resource_daos=resource_daos)
+        return cls(
+            config=config,
+            resource_daos=resource_daos,
+            database=database,
+            collection_suffix=collection_suffix,
+        )
 
     def __init__(
         self,
         config: Config,
-        resource_daos: dict[str, ResourceDao],
+        resource_daos: dict[str, WordCountingResourceDao],
+        database: AsyncDatabase,
+        collection_suffix: str = "",
     ):
         """Initialize the collection of DAOs"""
         self._config = config
         self._resource_daos = resource_daos
+        self._database = database
+        self._collection_suffix = collection_suffix
         self._indexes_created = False
+        # the fields of the live text indexes, which are the configured ones
+        #  unless an outdated text index has been found
+        self._text_indexes: dict[str, TextIndexFields] = {}
+        self._use_configured_text_indexes()
+
+    def _collection_name(self, class_name: str) -> str:
+        """Get the name of the collection used for the given resource class"""
+        return class_name + self._collection_suffix
+
+    def _use_text_index(self, class_name: str, text_index: TextIndexFields) -> None:
+        """Write the resources of the given class for the given text index fields"""
+        self._text_indexes[class_name] = text_index
+        if class_name in self._resource_daos:
+            self._resource_daos[class_name].text_index = text_index
+
+    def _use_configured_text_indexes(self) -> None:
+        """Write the resources for the configured text index fields"""
+        for class_name, searchable_class in self._config.searchable_classes.items():
+            self._use_text_index(
+                class_name, TextIndexFields.configured(searchable_class)
+            )
+
+    async def flush_word_counts(self) -> None:
+        """Write the changes of the word counts that the DAOs have collected"""
+        for dao in self._resource_daos.values():
+            await dao.flush_word_counts()
 
     def get_dao(self, *, class_name: str) -> ResourceDao:
         """Returns a dao for the given resource class name
@@ -72,6 +540,53 @@ class DaoCollection(DaoCollectionPort):
         except KeyError as err:
             raise DaoNotFoundError(class_name=class_name) from err
 
+    async def bulk_write(
+        self,
+        *,
+        class_name: str,
+        upserts: Sequence[models.Resource] = (),
+        deletions: Sequence[str] = (),
+    ) -> None:
+        """Upsert and delete resources using one unordered bulk write operation
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        if class_name not in self._resource_daos:
+            raise DaoNotFoundError(class_name=class_name)
+
+        text_index = self._text_indexes[class_name]
+        operations: list[ReplaceOne | DeleteOne] = []
+        for resource in upserts:
+            document = dto_to_document(text_index.stored(resource), id_field="id_")
+            operations.append(
+                ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+            )
+        operations.extend(DeleteOne({"_id": resource_id}) for resource_id in deletions)
+        if not operations:
+            return
+
+        started = perf_counter()
+        collection_name = self._collection_name(class_name)
+        collection = self._database[collection_name]
+        comment = utils.operation_comment(class_name=class_name, operation="bulk_write")
+        # the words of the replaced and deleted resources are no longer counted
+        changes: Counter[str] = Counter()
+        async for document in collection.find(
+            {"_id": {"$in": [*(item.id_ for item in upserts), *deletions]}},
+            {"content": 1},
+            comment=comment,
+        ):
+            changes.subtract(text_index.words(document["_id"], document["content"]))
+        for resource in upserts:
+            changes.update(text_index.words(resource.id_, resource.content))
+        await collection.bulk_write(operations, ordered=False, comment=comment)
+        await count_words(
+            self._database[collection_name + WORDS_SUFFIX], changes, comment=comment
+        )
+        BULK_WRITE_DURATION.labels(class_name).observe(perf_counter() - started)
+        BULK_WRITE_SIZE.labels(class_name).observe(len(operations))
+
     def create_collections_and_indexes_if_needed(self) -> None:
         """Create collections and indexes if this hasn't been done yet."""
         if self._indexes_created:
@@ -84,24 +599,134 @@ class DaoCollection(DaoCollectionPort):
             existing_collections = set(db.list_collection_names())
 
             # loop through configured classes (i.e. the expected collection names)
-            for expected_collection_name in self._config.searchable_classes:
+            for class_name in self._config.searchable_classes:
+                expected_collection_name = self._collection_name(class_name)
                 if expected_collection_name not in existing_collections:
                     db.create_collection(expected_collection_name)
                 collection = db[expected_collection_name]
+                searchable_class = self._config.searchable_classes[class_name]
 
-                # see if the wildcard text index exists and add it if not
-                wildcard_text_index_exists = any(
-                    index["name"] == f"$**_{TEXT}"
-                    for index in collection.list_indexes()
-                )
+                # the options of facets are completed with these indexes
+                for key in facet_index_keys(searchable_class):
+                    collection.create_index([(key, ASCENDING)])
+
+                self._ensure_text_index(class_name, collection)
 
-                if not wildcard_text_index_exists:
-                    collection.create_index([("$**", TEXT)])
+                # the words are counted when writing, so they only have to be counted
+                #  from scratch if the counts are missing
+                words = db[expected_collection_name + WORDS_SUFFIX]
+                if words.name in existing_collections:
+                    create_words_index(words)
+                else:
+                    recount_words(collection, words, self._text_indexes[class_name])
 
             # remember that the indexes have been set up
             self._indexes_created = True
 
+    def _ensure_text_index(self, class_name: str, collection: Collection) -> None:
+        """Create the text index covering the configured searchable fields if needed
+
+        A collection can have only one text index, and dropping it would make text
+        searches fail until the new one has been built. So if the searchable fields or
+        their weights have been changed in the configuration, the outdated text index
+        is kept and a warning is logged. The resources are then still written for the
+        fields of the outdated text index, until the collections are rebuilt, which
+        creates shadow collections with the new text index and swaps them in.
+
+        If the class uses a compact search text, the name of the text index contains
+        the paths that the search text is built from, so that changes of these paths
+        are detected as well.
+        """
+        configured = TextIndexFields.configured(
+            self._config.searchable_classes[class_name]
+        )
+        existing_index = next(
+            (index for index in collection.list_indexes() if "weights" in index), None
+        )
+        if existing_index is not None:
+            live = TextIndexFields.of_index(existing_index)
+            if live != configured:
+                log.warning(
+                    "The text index of collection %s does not match the configured"
+                    + " searchable fields with weights %s. Rebuild the collections"
+                    + " to replace it.",
+                    collection.name,
+                    configured.weights or {"$**": 1},
+                )
+            self._use_text_index(class_name, live or configured)
+            return
+
+        weights = configured.weights
+        keys = [(path, TEXT) for path in weights] if weights else [("$**", TEXT)]
+        options: dict[str, Any] = {
+            option: value
+            for option, value in (("weights", weights), ("name", configured.index_name))
+            if value
+        }
+        collection.create_index(keys, **options)
+        self._use_text_index(class_name, configured)
+
     def recreate_collections_and_indexes(self) -> None:
         """Recreate collections and indexes if they have been removed."""
         self._indexes_created = False
         self.create_collections_and_indexes_if_needed()
+
+    def drop_indexes(self) -> None:
+        """Drop all indexes except for the mandatory ID index."""
+        with ConfiguredMongoClient(config=self._config) as client:
+            db = client[self._config.db_name]
+
+            existing_collections = set(db.list_collection_names())
+
+            for class_name in self._config.searchable_classes:
+                collection_name = self._collection_name(class_name)
+                if collection_name in existing_collections:
+                    db[collection_name].drop_indexes()
+
+        # make sure that the indexes will be created again when needed
+        self._indexes_created = False
+        self._use_configured_text_indexes()
+
+    def drop_collections(self) -> None:
+        """Drop all collections that are used by this DAO collection."""
+        with ConfiguredMongoClient(config=self._config) as client:
+            db = client[self._config.db_name]
+            for class_name in self._config.searchable_classes:
+                db.drop_collection(self._collection_name(class_name))
+                db.drop_collection(self._collection_name(class_name) + WORDS_SUFFIX)
+
+        self._indexes_created = False
+        self._use_configured_text_indexes()
+
+    def count_resources(self, *, class_name: str) -> int:
+        """Count the resources of the given class.
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        if class_name not in self._resource_daos:
+            raise DaoNotFoundError(class_name=class_name)
+
+        with ConfiguredMongoClient(config=self._config) as client:
+            collection = client[self._config.db_name][self._collection_name(class_name)]
+            return collection.count_documents(
+                {},
+                comment=utils.operation_comment(
+                    class_name=class_name, operation="count"
+                ),
+            )
+
+    def swap_in_collections(self) -> None:
+        """Atomically replace each live collection with its shadow collection."""
+        if not self._collection_suffix:
+            raise RuntimeError("Only shadow collections can be swapped in.")
+
+        with ConfiguredMongoClient(config=self._config) as client:
+            db = client[self._config.db_name]
+            for class_name in self._config.searchable_classes:
+                db[self._collection_name(class_name)].rename(
+                    class_name, dropTarget=True
+                )
+                db[self._collection_name(class_name) + WORDS_SUFFIX].rename(
+                    class_name + WORDS_SUFFIX, dropTarget=True
+                )
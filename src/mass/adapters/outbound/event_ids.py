@@ -0,0 +1,126 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Contains a MongoDB-based store of processed event IDs with an in-memory cache"""
+
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+from hexkit.providers.mongodb import ConfiguredMongoClient, MongoDbConfig
+from pydantic import UUID4, Field
+from pydantic_settings import BaseSettings
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import OperationFailure
+
+from mass.ports.outbound.event_ids import ProcessedEventStorePort
+
+TIMESTAMP_FIELD = "processed_at"
+
+
+class ProcessedEventStoreConfig(BaseSettings):
+    """Config for deduplicating events that have been delivered more than once"""
+
+    deduplicate_events: bool = Field(
+        default=False,
+        description="Whether to skip events with IDs that have been processed recently,"
+        + " such as events that are delivered again after a consumer group rebalance",
+    )
+    processed_events_collection: str = Field(
+        default="processedEvents",
+        description="The name of the collection holding the IDs of processed events",
+    )
+    processed_events_ttl: int = Field(
+        default=86400,
+        gt=0,
+        description="Time in seconds for which the IDs of processed events are kept",
+    )
+    processed_events_cache_size: int = Field(
+        default=10000,
+        ge=0,
+        description="The maximum number of processed event IDs held in memory",
+    )
+
+
+class MongoDbProcessedEventStore(ProcessedEventStorePort):
+    """A store of processed event IDs using a TTL-indexed collection in MongoDB and
+    an in-memory LRU cache in front of it.
+    """
+
+    @classmethod
+    @asynccontextmanager
+    async def construct(
+        cls, *, config: ProcessedEventStoreConfig, mongodb_config: MongoDbConfig
+    ) -> AsyncGenerator["MongoDbProcessedEventStore"]:
+        """Set up the store and make sure that the TTL index exists"""
+        async with ConfiguredMongoClient(config=mongodb_config) as client:
+            db = client[mongodb_config.db_name]
+            collection_name = config.processed_events_collection
+            ttl = config.processed_events_ttl
+            try:
+                await db[collection_name].create_index(
+                    TIMESTAMP_FIELD, expireAfterSeconds=ttl
+                )
+            except OperationFailure:
+                # the index exists already, but with a different TTL
+                await db.command(
+                    "collMod",
+                    collection_name,
+                    index={
+                        "keyPattern": {TIMESTAMP_FIELD: 1},
+                        "expireAfterSeconds": ttl,
+                    },
+                )
+            yield cls(
+                collection=db[collection_name],
+                cache_size=config.processed_events_cache_size,
+            )
+
+    def __init__(self, *, collection: AsyncCollection, cache_size: int):
+        """Initialize with the MongoDB collection and the maximum cache size"""
+        self._collection = collection
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, None] = OrderedDict()
+
+    def _remember(self, event_id: str) -> None:
+        """Put the event ID into the cache, evicting the least recently used one"""
+        if not self._cache_size:
+            return
+        self._cache[event_id] = None
+        self._cache.move_to_end(event_id)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def contains(self, *, event_id: UUID4) -> bool:
+        """Check whether the event has been processed, looking at the cache first"""
+        key = str(event_id)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return True
+        if await self._collection.find_one({"_id": key}, projection=["_id"]):
+            self._remember(key)
+            return True
+        return False
+
+    async def add(self, *, event_id: UUID4) -> None:
+        """Store the ID of the processed event with the current time"""
+        key = str(event_id)
+        await self._collection.update_one(
+            {"_id": key},
+            {"$set": {TIMESTAMP_FIELD: datetime.now(UTC)}},
+            upsert=True,
+        )
+        self._remember(key)
@@ -0,0 +1,1106 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""An in-memory search backend with an inverted index for the text search
+
+The backend keeps all resources in the memory of the service process and answers
+searches without a database, returning the same results as the MongoDB backend.
+Resources are lost when the process ends and are not shared between processes, so
+the backend is only used in tests and benchmarks, as a reference for the results
+and the performance of the other backends.
+"""
+
+import json
+from bisect import bisect_left, insort
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
+from copy import deepcopy
+from time import perf_counter
+from typing import Any
+
+from hexkit.custom_types import ID, JsonObject
+from hexkit.protocols.dao import (
+    MultipleHitsFoundError,
+    NoHitsFoundError,
+    ResourceAlreadyExistsError,
+    ResourceNotFoundError,
+)
+
+from mass.adapters.outbound import utils
+from mass.adapters.outbound.aggregator import AggregatorNotFoundError
+from mass.adapters.outbound.columnar import ColumnarFacets, positions_from_bitmap
+from mass.adapters.outbound.dao import DaoNotFoundError
+from mass.adapters.outbound.ranking import BM25Index
+from mass.adapters.outbound.suggestions import (
+    WordCounts,
+    facet_values_page,
+    indexed_words,
+    prefix_range,
+)
+from mass.adapters.outbound.text_search import (
+    TextQuery,
+    indexed_document,
+    term_scores,
+)
+from mass.config import SearchableClassesConfig
+from mass.core import models
+from mass.core.timing import PhaseTimer, timed
+from mass.ports.outbound.aggregator import (
+    AggregationError,
+    AggregatorCollectionPort,
+    AggregatorPort,
+)
+from mass.ports.outbound.dao import DaoCollectionPort
+
+MISSING_TEXT_SCORE_MSG = "query requires text score metadata, but it is not available"
+
+
+def path_values(value: Any, path: list[str]) -> list[Any]:
+    """Get the values at the given path, descending into arrays like MongoDB
+
+    Arrays of objects along the path are traversed, and an array at the end of the
+    path contributes all of its items.
+    """
+    if not path:
+        return value if isinstance(value, list) else [value]
+    if isinstance(value, dict):
+        return path_values(value[path[0]], path[1:]) if path[0] in value else []
+    if isinstance(value, list):
+        return [
+            item_value
+            for item in value
+            if isinstance(item, dict)
+            for item_value in path_values(item, path)
+        ]
+    return []
+
+
+def bson_order(value: Any) -> tuple[int, Any]:
+    """Get a key for comparing values of different types like MongoDB does"""
+    if value is None:
+        return (1, 0)
+    if isinstance(value, bool):
+        return (8, value)
+    if isinstance(value, int | float):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4 if isinstance(value, dict) else 5, json.dumps(value))
+
+
+def project(document: dict[str, Any], keys: list[str]) -> dict[str, Any]:
+    """Only keep the given dotted keys of the document, like a MongoDB projection"""
+    tree: dict[str, Any] = {}
+    for key in keys:
+        node = tree
+        *parents, leaf = key.split(".")
+        for part in parents:
+            child = node.setdefault(part, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[leaf] = True
+
+    def apply(value: Any, node: dict[str, Any]) -> Any:
+        if isinstance(value, list):
+            return [
+                apply(item, node) for item in value if isinstance(item, dict | list)
+            ]
+        return {
+            key: value[key] if child is True else apply(value[key], child)
+            for key, child in node.items()
+            if key in value and (child is True or isinstance(value[key], dict | list))
+        }
+
+    return apply(document, tree)
+
+
+def facet_values(content: JsonObject, path: list[str]) -> list[Any]:
+    """Get the distinct values at the given path that are counted in facets"""
+    return list(
+        dict.fromkeys(
+            value
+            for value in path_values(content, path)
+            if isinstance(value, str | int | float)
+        )
+    )
+
+
+def set_bit(bitmap: bytearray, position: int) -> None:
+    """Set the bit at the given position, extending the bitmap if needed"""
+    index, bit = divmod(position, 8)
+    if index >= len(bitmap):
+        bitmap.extend(bytes(index + 1 - len(bitmap)))
+    bitmap[index] |= 1 << bit
+
+
+def clear_bit(bitmap: bytearray, position: int) -> None:
+    """Clear the bit at the given position"""
+    index, bit = divmod(position, 8)
+    if index < len(bitmap):
+        bitmap[index] &= ~(1 << bit) & 0xFF
+
+
+class FacetBitmaps:
+    """Bitmaps of the documents having each value of the indexed facet keys
+
+    The documents are mapped to dense positions, and for every value of an indexed
+    key, the positions of the documents having that value are stored as a bitmap.
+    Filters can then be evaluated by combining the bitmaps with bitwise AND and OR,
+    and facet options can be counted as the population counts of intersections.
+    The bitmaps are stored as mutable byte arrays so that they can be updated in
+    place, and converted to integers when they are used in a search. The number of
+    documents in each bitmap is tracked, so that empty bitmaps are dropped without
+    scanning them.
+
+    Optionally, the values are also stored in dictionary-encoded columns, and the
+    facet options are counted on these columns instead of intersecting the bitmaps
+    of all values. Both ways are kept for comparing them in tests and benchmarks.
+    The text values of each key are also kept in order, so that the values starting
+    with a prefix can be found without looking at all values.
+    """
+
+    def __init__(self, *, columnar: bool = False):
+        self._paths: dict[str, list[str]] = {}
+        self._positions: dict[str, int] = {}
+        # maps the positions to the document IDs, freed positions are reused
+        self._ids: list[str] = []
+        self._free_positions: list[int] = []
+        self._all = bytearray()
+        self._bitmaps: dict[str, dict[Any, bytearray]] = {}
+        # the number of documents having each value of the indexed keys
+        self._sizes: dict[str, dict[Any, int]] = {}
+        self._strings: dict[str, list[str]] = {}
+        # the bitmaps converted to integers, until they are changed again
+        self._cache: dict[tuple[str, Any], int] = {}
+        self._columns = ColumnarFacets() if columnar else None
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether the given key is indexed"""
+        return key in self._paths
+
+    def index_key(self, key: str, documents: Mapping[str, JsonObject]) -> None:
+        """Index the values of the given key in all documents if not done yet"""
+        if key in self._paths:
+            return
+        path = self._paths[key] = key.split(".")
+        bitmaps = self._bitmaps[key] = {}
+        sizes = self._sizes[key] = defaultdict(int)
+        column = self._columns.add_column(key) if self._columns is not None else None
+        for resource_id, content in documents.items():
+            position = self._positions[resource_id]
+            values = facet_values(content, path)
+            for value in values:
+                set_bit(bitmaps.setdefault(value, bytearray()), position)
+                sizes[value] += 1
+            if column is not None:
+                column.set(position, values)
+        self._strings[key] = sorted(
+            value for value in bitmaps if isinstance(value, str)
+        )
+
+    def add(self, resource_id: str, content: JsonObject) -> None:
+        """Add a document that is not yet contained in the bitmaps"""
+        if self._free_positions:
+            position = self._free_positions.pop()
+            self._ids[position] = resource_id
+        else:
+            position = len(self._ids)
+            self._ids.append(resource_id)
+        self._positions[resource_id] = position
+        set_bit(self._all, position)
+        for key, path in self._paths.items():
+            bitmaps = self._bitmaps[key]
+            values = facet_values(content, path)
+            for value in values:
+                bitmap = bitmaps.get(value)
+                if bitmap is None:
+                    bitmap = bitmaps[value] = bytearray()
+                    if isinstance(value, str):
+                        insort(self._strings[key], value)
+                set_bit(bitmap, position)
+                self._sizes[key][value] += 1
+                self._cache.pop((key, value), None)
+            if self._columns is not None:
+                self._columns.columns[key].set(position, values)
+
+    def remove(self, resource_id: str, content: JsonObject) -> None:
+        """Remove a document with the given content from the bitmaps"""
+        position = self._positions.pop(resource_id)
+        clear_bit(self._all, position)
+        if self._columns is not None:
+            self._columns.clear(position)
+        for key, path in self._paths.items():
+            bitmaps = self._bitmaps[key]
+            sizes = self._sizes[key]
+            for value in facet_values(content, path):
+                clear_bit(bitmaps[value], position)
+                self._cache.pop((key, value), None)
+                sizes[value] -= 1
+                if not sizes[value]:
+                    del bitmaps[value], sizes[value]
+                    if isinstance(value, str):
+                        strings = self._strings[key]
+                        del strings[bisect_left(strings, value)]
+        self._free_positions.append(position)
+
+    def bitmap(self, key: str, value: Any) -> int:
+        """Get the bitmap of the documents having the given value of the key"""
+        cached = self._cache.get((key, value))
+        if cached is None:
+            bitmap = self._bitmaps[key].get(value)
+            cached = int.from_bytes(bitmap, "little") if bitmap else 0
+            self._cache[key, value] = cached
+        return cached
+
+    @property
+    def all(self) -> int:
+        """Get the bitmap of all documents"""
+        return int.from_bytes(self._all, "little")
+
+    def select(self, filters: Mapping[str, set[str]]) -> int:
+        """Get the bitmap of the documents matching all filters on indexed keys
+
+        The filters map the keys to the accepted values.
+        """
+        selected = self.all
+        for key, values in filters.items():
+            accepted = 0
+            for value in values:
+                accepted |= self.bitmap(key, value)
+            selected &= accepted
+        return selected
+
+    def from_ids(self, resource_ids: Iterable[str]) -> int:
+        """Get the bitmap of the documents with the given IDs"""
+        bitmap = bytearray()
+        for resource_id in resource_ids:
+            set_bit(bitmap, self._positions[resource_id])
+        return int.from_bytes(bitmap, "little")
+
+    def ids(self, bitmap: int) -> list[str]:
+        """Get the IDs of the documents in the given bitmap"""
+        bits = bin(bitmap)[:1:-1]
+        resource_ids = []
+        position = bits.find("1")
+        while position >= 0:
+            resource_ids.append(self._ids[position])
+            position = bits.find("1", position + 1)
+        return resource_ids
+
+    def prefixed(self, key: str, prefix: str) -> list[str]:
+        """Get the text values of the given indexed key that start with the prefix"""
+        strings = self._strings[key]
+        lower, upper = prefix_range(prefix)
+        start = bisect_left(strings, lower)
+        return strings[start : bisect_left(strings, upper, lo=start)]
+
+    def count(self, key: str, values: list[str], selected: int) -> dict[str, int]:
+        """Count the selected documents having each of the given values of the key
+
+        Values that none of the selected documents have are omitted.
+        """
+        if self._columns is not None:
+            wanted = set(values)
+            positions = positions_from_bitmap(selected)
+            return {
+                value: count
+                for value, count in self._columns.count(key, positions)
+                if value in wanted
+            }
+        counts: dict[str, int] = {}
+        for value in values:
+            count = (self.bitmap(key, value) & selected).bit_count()
+            if count:
+                counts[value] = count
+        return counts
+
+    def facet(self, key: str, selected: int) -> list[JsonObject]:
+        """Count the selected documents per value of the given indexed key"""
+        counts: dict[Any, int] = {}
+        if self._columns is not None:
+            positions = positions_from_bitmap(selected)
+            counts.update(self._columns.count(key, positions))
+        else:
+            for value in self._bitmaps[key]:
+                count = (self.bitmap(key, value) & selected).bit_count()
+                if count:
+                    counts[value] = count
+        return [
+            {"value": value, "count": counts[value]}
+            for value in sorted(counts, key=bson_order)
+        ]
+
+
+class InMemoryCollection:
+    """The resources of one class along with an inverted index of their text terms
+    and bitmaps of the values of their facetable fields
+    """
+
+    def __init__(
+        self, *, columnar_facets: bool = False, text_ranking: str = "textscore"
+    ):
+        """Initialize an empty collection
+
+        If columnar_facets is set, the facet options are counted on columns of
+        dictionary-encoded values instead of on the bitmaps, which is only used for
+        comparing both ways in tests and benchmarks. If the text ranking is bm25,
+        text matches are ranked with BM25 instead of the MongoDB text score.
+        """
+        self.documents: dict[str, JsonObject] = {}
+        # maps each term to the IDs of the documents containing it and their scores
+        self._postings: dict[str, dict[str, float]] = defaultdict(dict)
+        # maps the document IDs to the terms contained in them
+        self._terms: dict[str, list[str]] = {}
+        self._bitmaps = FacetBitmaps(columnar=columnar_facets)
+        self._bm25 = BM25Index() if text_ranking == "bm25" else None
+        # the number of documents containing each indexed word, for completions
+        self._words = WordCounts()
+        # the weights of the fields covered by the text index, None for all text
+        self._text_weights: dict[str, int] | None = None
+        # the paths from which the compact search text is built, if used
+        self._search_text_paths: list[str] | None = None
+
+    def __len__(self) -> int:
+        """Get the number of documents in the collection"""
+        return len(self.documents)
+
+    def upsert(self, resource: models.Resource) -> None:
+        """Insert or replace a resource and update the index"""
+        resource_id = resource.id_
+        self.delete(resource_id)
+        content = resource.model_dump()["content"]
+        self.documents[resource_id] = content
+        self._add_terms(resource_id, content)
+        self._bitmaps.add(resource_id, content)
+
+    def _add_terms(self, resource_id: str, content: JsonObject) -> None:
+        """Add the indexed terms of a document to the text index"""
+        document = indexed_document(resource_id, content, self._search_text_paths)
+        scores = term_scores(document, self._text_weights)
+        for term, score in scores.items():
+            self._postings[term][resource_id] = score
+        self._terms[resource_id] = list(scores)
+        self._words.update(
+            dict.fromkeys(indexed_words(document, self._text_weights), 1)
+        )
+        if self._bm25 is not None:
+            self._bm25.add(resource_id, document, self._text_weights)
+
+    def delete(self, resource_id: str) -> bool:
+        """Delete a resource and remove it from the index
+
+        Returns whether the resource existed.
+        """
+        content = self.documents.pop(resource_id, None)
+        if content is None:
+            return False
+        self._bitmaps.remove(resource_id, content)
+        if self._bm25 is not None:
+            self._bm25.remove(resource_id)
+        document = indexed_document(resource_id, content, self._search_text_paths)
+        self._words.update(
+            dict.fromkeys(indexed_words(document, self._text_weights), -1)
+        )
+        for term in self._terms.pop(resource_id):
+            postings = self._postings[term]
+            del postings[resource_id]
+            if not postings:
+                del self._postings[term]
+        return True
+
+    def index_text(
+        self,
+        weights: Mapping[str, int] | None,
+        search_text_paths: Sequence[str] | None = None,
+    ) -> None:
+        """Make sure that the text index covers the fields with the given weights
+
+        If search text paths are given, the compact search text is built from them.
+        If any of this has changed, the text index is rebuilt from the documents.
+        """
+        weights = dict(weights) if weights is not None else None
+        paths = list(search_text_paths) if search_text_paths is not None else None
+        if weights == self._text_weights and paths == self._search_text_paths:
+            return
+        self._text_weights = weights
+        self._search_text_paths = paths
+        self._postings.clear()
+        self._terms.clear()
+        self._words.clear()
+        if self._bm25 is not None:
+            self._bm25 = BM25Index()
+        for resource_id, content in self.documents.items():
+            self._add_terms(resource_id, content)
+
+    def index_facets(self, keys: Iterable[str]) -> None:
+        """Make sure that bitmaps are kept for the values of the given keys"""
+        for key in keys:
+            self._bitmaps.index_key(key, self.documents)
+
+    def text_scores(self, query: str) -> dict[str, float]:
+        """Get the IDs and text scores of the documents matching the text query"""
+        text_query = TextQuery.parse(query)
+        scores: dict[str, float] = defaultdict(float)
+        if self._bm25 is not None:
+            scores.update(self._bm25.scores(text_query.terms))
+        else:
+            for term in text_query.terms:
+                for resource_id, score in self._postings.get(term, {}).items():
+                    scores[resource_id] += score
+        excluded = {
+            resource_id
+            for term in text_query.negated_terms
+            for resource_id in self._postings.get(term, ())
+        }
+        return {
+            resource_id: score
+            for resource_id, score in scores.items()
+            if resource_id not in excluded
+            and text_query.matches_phrases(
+                indexed_document(
+                    resource_id,
+                    self.documents[resource_id],
+                    self._search_text_paths,
+                ),
+                self._text_weights,
+            )
+        }
+
+    def suggest(self, prefix: str, limit: int) -> list[models.Suggestion]:
+        """Get the most frequent indexed words completing the last word of the prefix"""
+        return self._words.complete(prefix, limit)
+
+    def matches(self, resource_id: str, filters: dict[str, set[str]]) -> bool:
+        """Check whether the document matches all filters
+
+        The filters map the keys to the accepted values, arrays match if any of their
+        items is accepted.
+        """
+        content = self.documents[resource_id]
+        for key, values in filters.items():
+            if key == "id_":
+                if resource_id not in values:
+                    return False
+            elif not any(
+                isinstance(value, str) and value in values
+                for value in path_values(content, key.split("."))
+            ):
+                return False
+        return True
+
+    def facet(self, key: str, resource_ids: list[str]) -> list[JsonObject]:
+        """Count the documents per value of the given key"""
+        counts: dict[Any, int] = defaultdict(int)
+        path = key.split(".")
+        for resource_id in resource_ids:
+            for value in facet_values(self.documents[resource_id], path):
+                counts[value] += 1
+        return [
+            {"value": value, "count": counts[value]}
+            for value in sorted(counts, key=bson_order)
+        ]
+
+    def facet_counts(
+        self, key: str, prefix: str, *, query: str, filters: list[models.Filter]
+    ) -> dict[str, int]:
+        """Count the documents matching the query and filters per text value of the
+        given key that starts with the prefix
+
+        For keys with bitmaps, only the values in the range of the prefix are counted.
+        """
+        scores = self.text_scores(query) if query.strip() else None
+        resource_ids, selected = self.select(scores=scores, filters=filters)
+        if key in self._bitmaps:
+            if selected is None:
+                selected = self._bitmaps.from_ids(resource_ids)
+            return self._bitmaps.count(
+                key, self._bitmaps.prefixed(key, prefix), selected
+            )
+        counts: dict[str, int] = defaultdict(int)
+        path = key.split(".")
+        for resource_id in resource_ids:
+            for value in facet_values(self.documents[resource_id], path):
+                if isinstance(value, str) and value.startswith(prefix):
+                    counts[value] += 1
+        return counts
+
+    def sort(
+        self,
+        resource_ids: list[str],
+        *,
+        sorting_parameters: list[models.SortingParameter],
+        scores: dict[str, float] | None,
+    ) -> list[str]:
+        """Sort the resource IDs by the sorting parameters like MongoDB"""
+        # the same field can only be used once, like in the pipeline
+        orders = {
+            param.field
+            if param.field == "id_"
+            else f"content.{param.field}": param.order
+            for param in sorting_parameters
+        }
+        for key, order in reversed(orders.items()):
+            descending = order != models.SortOrder.ASCENDING
+            if order == models.SortOrder.RELEVANCE:
+                if scores is None:
+                    raise ValueError(MISSING_TEXT_SCORE_MSG)
+                resource_ids.sort(key=scores.__getitem__, reverse=True)
+            elif key == "id_":
+                resource_ids.sort(reverse=descending)
+            else:
+                path = key.split(".")[1:]
+                choose = max if descending else min
+
+                def sort_key(resource_id: str, path=path, choose=choose):
+                    values = path_values(self.documents[resource_id], path)
+                    return choose(map(bson_order, values), default=bson_order(None))
+
+                resource_ids.sort(key=sort_key, reverse=descending)
+        return resource_ids
+
+    def select(
+        self, *, scores: dict[str, float] | None, filters: list[models.Filter]
+    ) -> tuple[list[str], int | None]:
+        """Get the IDs of the documents with text scores that match all filters
+
+        If no text scores are given, all documents are considered. Filters on keys
+        with bitmaps are evaluated on the bitmaps, other filters per document.
+        The bitmap of the selected documents is also returned if it was computed.
+        """
+        indexed_filters: dict[str, set[str]] = defaultdict(set)
+        other_filters: dict[str, set[str]] = defaultdict(set)
+        for item in filters:
+            indexed = item.key in self._bitmaps
+            (indexed_filters if indexed else other_filters)[item.key].add(item.value)
+
+        selected: int | None = None
+        if indexed_filters:
+            selected = self._bitmaps.select(indexed_filters)
+            if scores is not None:
+                selected &= self._bitmaps.from_ids(scores)
+            resource_ids = self._bitmaps.ids(selected)
+        elif scores is not None:
+            resource_ids = list(scores)
+        else:
+            resource_ids = list(self.documents)
+            selected = self._bitmaps.all
+        if other_filters:
+            resource_ids = [
+                resource_id
+                for resource_id in resource_ids
+                if self.matches(resource_id, other_filters)
+            ]
+            selected = None
+        return resource_ids, selected
+
+    def search(  # noqa: PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> dict[str, Any]:
+        """Search the documents and return results in the format of the aggregator
+
+        Facets for keys with bitmaps are counted on the bitmaps, other facets are
+        counted per document.
+
+        Raises:
+            ValueError - when sorting by relevance without a text query
+        """
+        scores = self.text_scores(query) if query.strip() else None
+        resource_ids, selected = self.select(scores=scores, filters=filters)
+
+        facets = []
+        for facet in facet_fields:
+            if facet.key in self._bitmaps:
+                if selected is None:
+                    selected = self._bitmaps.from_ids(resource_ids)
+                options = self._bitmaps.facet(facet.key, selected)
+            else:
+                options = self.facet(facet.key, resource_ids)
+            facets.append(
+                {
+                    "key": facet.key,
+                    "name": facet.name or utils.name_from_key(facet.key),
+                    "options": options,
+                }
+            )
+
+        self.sort(resource_ids, sorting_parameters=sorting_parameters, scores=scores)
+        page = resource_ids[skip : skip + limit if limit else None]
+        hits: list[dict[str, Any]] = [
+            {"content": deepcopy(self.documents[resource_id]), "id_": resource_id}
+            for resource_id in page
+        ]
+        if selected_fields:
+            keys = [
+                "id_",
+                *(
+                    f"content.{field.key}"
+                    for field in selected_fields
+                    if field.key != "id_"
+                ),
+            ]
+            hits = [project(hit, keys) for hit in hits]
+
+        results: dict[str, Any] = {"hits": hits, "facets": facets}
+        if resource_ids:
+            results["count"] = len(resource_ids)
+        return results
+
+
+def facet_keys(searchable_class: models.SearchableClass) -> list[str]:
+    """Get the keys of the facetable fields of a class that are indexed with bitmaps"""
+    return [
+        field.key for field in searchable_class.facetable_fields if field.key != "id_"
+    ]
+
+
+class InMemoryDatabase:
+    """A named set of in-memory collections"""
+
+    def __init__(self, *, text_ranking: str = "textscore"):
+        """Initialize an empty database
+
+        The text ranking is used for ranking the text matches in new collections.
+        """
+        self.collections: dict[str, InMemoryCollection] = {}
+        self.text_ranking = text_ranking
+
+    def create_collection(self) -> InMemoryCollection:
+        """Create a new collection that is not yet part of the database"""
+        return InMemoryCollection(text_ranking=self.text_ranking)
+
+    def get_collection(
+        self,
+        name: str,
+        *,
+        facet_keys: Sequence[str] = (),
+        text_weights: Mapping[str, int] | None = None,
+        search_text_paths: Sequence[str] | None = None,
+    ) -> InMemoryCollection:
+        """Get the collection with the given name, creating it if needed
+
+        The collection will keep bitmaps for the values of the given facet keys,
+        and its text index will cover the fields with the given text weights,
+        using a compact search text built from the search text paths if given.
+        """
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = self.create_collection()
+        collection.index_text(text_weights, search_text_paths)
+        collection.index_facets(facet_keys)
+        return collection
+
+
+_databases: dict[str, InMemoryDatabase] = {}
+
+
+def get_database(name: str, *, text_ranking: str = "textscore") -> InMemoryDatabase:
+    """Get the in-memory database with the given name
+
+    Like a database server, the databases are shared by all components of the
+    service running in the same process. The text ranking is only used when the
+    database is created by the first call.
+    """
+    database = _databases.get(name)
+    if database is None:
+        database = _databases[name] = InMemoryDatabase(text_ranking=text_ranking)
+    return database
+
+
+class InMemoryResourceDao:
+    """A DAO for the resources of one class stored in an in-memory collection"""
+
+    def __init__(
+        self,
+        *,
+        database: InMemoryDatabase,
+        name: str,
+        facet_keys: Sequence[str] = (),
+        text_weights: Mapping[str, int] | None = None,
+        search_text_paths: Sequence[str] | None = None,
+    ):
+        self._database = database
+        self._name = name
+        self._facet_keys = facet_keys
+        self._text_weights = text_weights
+        self._search_text_paths = search_text_paths
+
+    @property
+    def _collection(self) -> InMemoryCollection:
+        return self._database.get_collection(
+            self._name,
+            facet_keys=self._facet_keys,
+            text_weights=self._text_weights,
+            search_text_paths=self._search_text_paths,
+        )
+
+    async def get_by_id(self, id_: ID) -> models.Resource:  # noqa: D102
+        content = self._collection.documents.get(str(id_))
+        if content is None:
+            raise ResourceNotFoundError(id_=id_)
+        return models.Resource(id_=str(id_), content=deepcopy(content))
+
+    async def update(self, dto: models.Resource) -> None:  # noqa: D102
+        if dto.id_ not in self._collection.documents:
+            raise ResourceNotFoundError(id_=dto.id_)
+        self._collection.upsert(dto)
+
+    async def delete(self, id_: ID) -> None:  # noqa: D102
+        if not self._collection.delete(str(id_)):
+            raise ResourceNotFoundError(id_=id_)
+
+    async def find_one(self, *, mapping: Mapping[str, Any]) -> models.Resource:  # noqa: D102
+        hits = [hit async for hit in self.find_all(mapping=mapping)]
+        if not hits:
+            raise NoHitsFoundError(mapping=mapping)
+        if len(hits) > 1:
+            raise MultipleHitsFoundError(mapping=mapping)
+        return hits[0]
+
+    async def find_all(  # noqa: D102
+        self, *, mapping: Mapping[str, Any]
+    ) -> AsyncIterator[models.Resource]:
+        for resource_id, content in list(self._collection.documents.items()):
+            document = {"id_": resource_id, "content": content}
+            if all(
+                value in path_values(document, key.split("."))
+                for key, value in mapping.items()
+            ):
+                yield models.Resource(id_=resource_id, content=deepcopy(content))
+
+    async def insert(self, dto: models.Resource) -> None:  # noqa: D102
+        if dto.id_ in self._collection.documents:
+            raise ResourceAlreadyExistsError(id_=dto.id_)
+        self._collection.upsert(dto)
+
+    async def upsert(self, dto: models.Resource) -> None:  # noqa: D102
+        self._collection.upsert(dto)
+
+
+class InMemoryDaoCollection(DaoCollectionPort):
+    """Provides a DAO for each configured resource class using in-memory collections"""
+
+    def __init__(
+        self,
+        *,
+        config: SearchableClassesConfig,
+        database: InMemoryDatabase,
+        collection_suffix: str = "",
+    ):
+        """Initialize the DAOs for the collections in the given database
+
+        If a collection suffix is given, the DAOs will not use the live collections,
+        but shadow collections with the suffix appended to the class name.
+        """
+        self._config = config
+        self._database = database
+        self._collection_suffix = collection_suffix
+        self._resource_daos = {
+            class_name: InMemoryResourceDao(
+                database=database,
+                name=class_name + collection_suffix,
+                facet_keys=facet_keys(searchable_class),
+                text_weights=utils.text_index_weights(searchable_class),
+                search_text_paths=utils.search_text_paths(searchable_class),
+            )
+            for class_name, searchable_class in config.searchable_classes.items()
+        }
+
+    def _collection(self, class_name: str) -> InMemoryCollection:
+        """Get the collection used for the given resource class"""
+        searchable_class = self._config.searchable_classes.get(class_name)
+        if searchable_class is None:
+            raise DaoNotFoundError(class_name=class_name)
+        return self._database.get_collection(
+            class_name + self._collection_suffix,
+            facet_keys=facet_keys(searchable_class),
+            text_weights=utils.text_index_weights(searchable_class),
+            search_text_paths=utils.search_text_paths(searchable_class),
+        )
+
+    def get_dao(self, *, class_name: str) -> InMemoryResourceDao:
+        """Returns a dao for the given resource class name
+
+        Raises:
+            DaoNotFoundError: if the DAO isn't found
+        """
+        try:
+            return self._resource_daos[class_name]
+        except KeyError as err:
+            raise DaoNotFoundError(class_name=class_name) from err
+
+    async def bulk_write(
+        self,
+        *,
+        class_name: str,
+        upserts: Sequence[models.Resource] = (),
+        deletions: Sequence[str] = (),
+    ) -> None:
+        """Upsert and delete resources of the given class
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        collection = self._collection(class_name)
+        for resource in upserts:
+            collection.upsert(resource)
+        for resource_id in deletions:
+            collection.delete(resource_id)
+
+    def create_collections_and_indexes_if_needed(self) -> None:
+        """Create the collections and the bitmaps for the facetable fields.
+
+        The text index is rebuilt if the searchable fields have been changed. The text
+        index and the bitmaps are then kept up to date on every change.
+        """
+        for class_name in self._config.searchable_classes:
+            self._collection(class_name)
+
+    def recreate_collections_and_indexes(self) -> None:
+        """Create the collections if they have been removed."""
+        self.create_collections_and_indexes_if_needed()
+
+    def drop_collections(self) -> None:
+        """Drop all collections that are used by this DAO collection."""
+        for class_name in self._config.searchable_classes:
+            self._database.collections.pop(class_name + self._collection_suffix, None)
+
+    def count_resources(self, *, class_name: str) -> int:
+        """Count the resources of the given class.
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        return len(self._collection(class_name))
+
+    def swap_in_collections(self) -> None:
+        """Replace each live collection with its shadow collection."""
+        if not self._collection_suffix:
+            raise RuntimeError("Only shadow collections can be swapped in.")
+
+        collections = self._database.collections
+        for class_name in self._config.searchable_classes:
+            collections[class_name] = collections.pop(
+                class_name + self._collection_suffix,
+                self._database.create_collection(),
+            )
+
+
+class InMemoryAggregator(AggregatorPort):
+    """Searches the resources of one class in an in-memory collection"""
+
+    def __init__(
+        self,
+        *,
+        database: InMemoryDatabase,
+        name: str,
+        facet_keys: Sequence[str] = (),
+        text_weights: Mapping[str, int] | None = None,
+        search_text_paths: Sequence[str] | None = None,
+    ):
+        """Initialize with the database, the name of the collection, the keys
+        of the facetable fields that shall be indexed with bitmaps, the weights
+        of the fields covered by the text index and the paths of the search text
+        """
+        self._database = database
+        self._name = name
+        self._facet_keys = facet_keys
+        self._text_weights = text_weights
+        self._search_text_paths = search_text_paths
+
+    @property
+    def _collection(self) -> InMemoryCollection:
+        return self._database.get_collection(
+            self._name,
+            facet_keys=self._facet_keys,
+            text_weights=self._text_weights,
+            search_text_paths=self._search_text_paths,
+        )
+
+    def _search(self, **kwargs) -> dict[str, Any]:
+        """Search the collection, raising an AggregationError if this fails"""
+        collection = self._collection
+        try:
+            return collection.search(**kwargs)
+        except ValueError as err:
+            details = ", ".join(
+                f"{key}={kwargs[key]}"
+                for key in ("query", "filters", "sorting_parameters", "skip", "limit")
+            )
+            raise AggregationError(message=str(err), details=details) from err
+
+    async def aggregate(  # noqa: PLR0913, D102
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        timer: PhaseTimer | None = None,
+    ) -> JsonObject:
+        with timed(timer, "db"):
+            if not self._collection:
+                if timer:
+                    timer.annotate("strategy", "empty")
+                return models.QueryResults().model_dump()
+            if timer:
+                timer.annotate("strategy", "memory")
+            return self._search(
+                selected_fields=selected_fields,
+                facet_fields=facet_fields,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+            )
+
+    def build_pipeline(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> list[JsonObject]:
+        # the pipeline that the MongoDB backend would run for the same query
+        return utils.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+
+    async def explain(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        verbosity: str = "executionStats",
+    ) -> models.QueryExplanation:
+        pipeline = self.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+        if query.strip():
+            stage = "TEXT_INDEX"
+        elif any(item.key in self._facet_keys for item in filters):
+            stage = "BITMAP_INDEX"
+        else:
+            stage = "COLLECTION_SCAN"
+        execution_stats: dict[str, Any] = {
+            "backend": "memory",
+            "queryPlanner": {"winningPlan": {"stage": stage}},
+        }
+        if verbosity != "queryPlanner":
+            started = perf_counter()
+            results = self._search(
+                selected_fields=selected_fields,
+                facet_fields=facet_fields,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+            )
+            execution_stats["executionStats"] = {
+                "nReturned": len(results["hits"]),
+                "totalDocsExamined": len(self._collection),
+                "executionTimeMillis": round((perf_counter() - started) * 1000),
+            }
+        return models.QueryExplanation(
+            pipeline=pipeline, execution_stats=execution_stats
+        )
+
+    async def suggest(self, *, prefix: str, limit: int) -> list[models.Suggestion]:  # noqa: D102
+        return self._collection.suggest(prefix, limit)
+
+    async def facet_values(  # noqa: D102, PLR0913
+        self,
+        *,
+        facet: models.FieldLabel,
+        prefix: str,
+        query: str,
+        filters: list[models.Filter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.FacetValues:
+        counts = self._collection.facet_counts(
+            facet.key, prefix, query=query, filters=filters
+        )
+        return facet_values_page(facet, counts, skip=skip, limit=limit)
+
+
+class InMemoryAggregatorCollection(AggregatorCollectionPort):
+    """Provides an in-memory aggregator for each configured resource class"""
+
+    def __init__(
+        self,
+        *,
+        config: SearchableClassesConfig,
+        database: InMemoryDatabase,
+        collection_suffix: str = "",
+    ):
+        """Initialize the aggregators for the collections in the given database"""
+        self._aggregators = {
+            class_name: InMemoryAggregator(
+                database=database,
+                name=class_name + collection_suffix,
+                facet_keys=facet_keys(searchable_class),
+                text_weights=utils.text_index_weights(searchable_class),
+                search_text_paths=utils.search_text_paths(searchable_class),
+            )
+            for class_name, searchable_class in config.searchable_classes.items()
+        }
+
+    def get_aggregator(self, *, class_name: str) -> AggregatorPort:
+        """Returns the aggregator for a given resource class name
+
+        Raises:
+            AggregatorNotFoundError: if the aggregator isn't found
+        """
+        try:
+            return self._aggregators[class_name]
+        except KeyError as err:
+            raise AggregatorNotFoundError(class_name=class_name) from err
@@ -0,0 +1,174 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Ranking of text matches with BM25 based on incrementally maintained statistics
+
+MongoDB scores each field separately and ignores how common a term is in the
+collection, which gives a coarse ranking. BM25 instead weighs the frequency of a
+term in a document by the rarity of the term in the collection and normalizes it
+by the length of the document, relative to the average length of all documents.
+"""
+
+import math
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from mass.adapters.outbound.text_search import indexed_texts, terms
+
+# the usual parameters for the saturation of the term frequency and the strength of
+# the normalization by the document length
+K1 = 1.2
+B = 0.75
+
+
+def term_frequencies(
+    document: Any, weights: Mapping[str, int] | None = None
+) -> tuple[dict[str, int], int]:
+    """Count the terms in the indexed strings of the document
+
+    The counts of the terms are returned along with the length of the document,
+    which is the number of all indexed terms. Every occurrence of a term is counted
+    with the weight of its field, as if the term was repeated accordingly.
+    """
+    frequencies: dict[str, int] = {}
+    length = 0
+    for text, weight in indexed_texts(document, weights):
+        for term in terms(text):
+            frequencies[term] = frequencies.get(term, 0) + weight
+            length += weight
+    return frequencies, length
+
+
+def bm25_scores(  # noqa: PLR0913
+    frequencies: npt.NDArray,
+    lengths: npt.NDArray,
+    *,
+    documents: int,
+    average_length: float,
+    k1: float = K1,
+    b: float = B,
+) -> npt.NDArray[np.float64]:
+    """Get the BM25 scores of all documents containing a term at once
+
+    The frequencies of the term in these documents and the lengths of the documents
+    are given as arrays, along with the number of documents in the collection and
+    their average length.
+    """
+    containing = len(frequencies)
+    idf = math.log(1 + (documents - containing + 0.5) / (containing + 0.5))
+    frequencies = frequencies.astype(np.float64)
+    normalization = k1 * (1 - b + b * lengths / (average_length or 1))
+    return idf * frequencies * (k1 + 1) / (frequencies + normalization)
+
+
+class BM25Index:
+    """Term statistics of a collection for ranking the documents with BM25
+
+    The frequencies of the terms in each document and the lengths of the documents
+    are updated whenever a document is added or removed. The postings of each term
+    are converted to arrays when the term is first searched after a change, so that
+    the scores of all documents containing the term are computed at once.
+    """
+
+    def __init__(self, *, k1: float = K1, b: float = B):
+        """Initialize an empty index with the given BM25 parameters"""
+        self._k1 = k1
+        self._b = b
+        # maps each term to the IDs of the documents containing it and its frequency
+        self._frequencies: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._terms: dict[str, list[str]] = {}
+        self._total_length = 0
+        # the IDs, term frequencies and document lengths of the postings of a term
+        self._cache: dict[str, tuple[list[str], npt.NDArray, npt.NDArray]] = {}
+
+    def __len__(self) -> int:
+        """Get the number of documents in the index"""
+        return len(self._lengths)
+
+    def add(
+        self,
+        resource_id: str,
+        document: Any,
+        weights: Mapping[str, int] | None = None,
+    ) -> None:
+        """Add the indexed terms of a document, replacing any previous version"""
+        self.remove(resource_id)
+        frequencies, length = term_frequencies(document, weights)
+        for term, frequency in frequencies.items():
+            self._frequencies.setdefault(term, {})[resource_id] = frequency
+            self._cache.pop(term, None)
+        self._terms[resource_id] = list(frequencies)
+        self._lengths[resource_id] = length
+        self._total_length += length
+
+    def remove(self, resource_id: str) -> None:
+        """Remove the terms of a document if it has been added"""
+        length = self._lengths.pop(resource_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(resource_id):
+            postings = self._frequencies[term]
+            del postings[resource_id]
+            if not postings:
+                del self._frequencies[term]
+            self._cache.pop(term, None)
+
+    def _postings(self, term: str) -> tuple[list[str], npt.NDArray, npt.NDArray]:
+        """Get the IDs, term frequencies and lengths of the documents with the term"""
+        postings = self._cache.get(term)
+        if postings is None:
+            frequencies = self._frequencies.get(term, {})
+            size = len(frequencies)
+            postings = self._cache[term] = (
+                list(frequencies),
+                np.fromiter(frequencies.values(), dtype=np.float64, count=size),
+                np.fromiter(
+                    map(self._lengths.__getitem__, frequencies),
+                    dtype=np.float64,
+                    count=size,
+                ),
+            )
+        return postings
+
+    def scores(self, query_terms: Iterable[str]) -> dict[str, float]:
+        """Get the BM25 scores of all documents containing any of the terms"""
+        scores: dict[str, float] = {}
+        if not self._lengths:
+            return scores
+        documents = len(self._lengths)
+        average_length = self._total_length / documents
+        for term in query_terms:
+            resource_ids, frequencies, lengths = self._postings(term)
+            if not resource_ids:
+                continue
+            term_scores = bm25_scores(
+                frequencies,
+                lengths,
+                documents=documents,
+                average_length=average_length,
+                k1=self._k1,
+                b=self._b,
+            )
+            for resource_id, score in zip(
+                resource_ids, term_scores.tolist(), strict=True
+            ):
+                scores[resource_id] = scores.get(resource_id, 0) + score
+        return scores
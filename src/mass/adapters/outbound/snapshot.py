@@ -0,0 +1,1027 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Read-only search snapshots that are memory-mapped by the service
+
+A snapshot contains the searchable state of one resource class in a single binary
+file: the documents, the dictionary of their text terms with the postings of each
+term and the frequencies of the term used for ranking with BM25, the lengths of the
+documents, the dictionary of their words with the number of documents containing each
+word, the dictionaries of the values of the facetable fields with the codes of the
+values of each document, and the ranks of the documents when sorted by the selected
+and facetable fields. The search results are the same as with the other backends.
+
+The file starts with the magic bytes, the format version and the size of a JSON
+table of contents, which is followed by the sections, each aligned to 8 bytes. The
+sections are little-endian NumPy arrays that are used directly on the memory-mapped
+file, so that all processes serving the same snapshot share its pages.
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from hexkit.custom_types import ID, JsonObject
+from hexkit.protocols.dao import (
+    MultipleHitsFoundError,
+    NoHitsFoundError,
+    ResourceNotFoundError,
+)
+
+from mass.adapters.outbound import utils
+from mass.adapters.outbound.aggregator import AggregatorNotFoundError
+from mass.adapters.outbound.dao import DaoNotFoundError
+from mass.adapters.outbound.memory import (
+    MISSING_TEXT_SCORE_MSG,
+    bson_order,
+    facet_keys,
+    facet_values,
+    path_values,
+    project,
+)
+from mass.adapters.outbound.ranking import bm25_scores, term_frequencies
+from mass.adapters.outbound.suggestions import (
+    completed_word,
+    facet_values_page,
+    indexed_words,
+    prefix_range,
+)
+from mass.adapters.outbound.text_search import (
+    TextQuery,
+    indexed_document,
+    term_scores,
+)
+from mass.config import SearchableClassesConfig
+from mass.core import models
+from mass.core.timing import PhaseTimer, timed
+from mass.ports.outbound.aggregator import (
+    AggregationError,
+    AggregatorCollectionPort,
+    AggregatorPort,
+)
+from mass.ports.outbound.dao import DaoCollectionPort
+
+MAGIC = b"MASSSNAP"
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+# the magic bytes, the format version and the size of the table of contents
+HEADER = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+log = logging.getLogger(__name__)
+
+
+class SnapshotFormatError(RuntimeError):
+    """Raised when a file is not a snapshot in a supported format version."""
+
+    def __init__(self, path: Path, reason: str):
+        super().__init__(f"Cannot read snapshot '{path}': {reason}.")
+
+
+class SnapshotReadOnlyError(RuntimeError):
+    """Raised when trying to change resources that are served from snapshots."""
+
+    def __init__(self):
+        super().__init__("The resources are served from read-only snapshots.")
+
+
+def snapshot_path(directory: Path, class_name: str) -> Path:
+    """Get the path of the snapshot of the given class in the given directory"""
+    return directory / f"{class_name}{SNAPSHOT_SUFFIX}"
+
+
+def sort_keys(searchable_class: models.SearchableClass) -> list[str]:
+    """Get the keys of the fields of a class that are stored as sort columns"""
+    return list(
+        dict.fromkeys(
+            field.key
+            for field in (
+                *searchable_class.selected_fields,
+                *searchable_class.facetable_fields,
+            )
+            if field.key != "id_"
+        )
+    )
+
+
+def sort_value(content: JsonObject, path: list[str], *, descending: bool) -> Any:
+    """Get the value by which a document is sorted like MongoDB
+
+    Fields with several values are sorted by their smallest value when sorting in
+    ascending order and by their largest value otherwise.
+    """
+    choose = max if descending else min
+    return choose(map(bson_order, path_values(content, path)), default=bson_order(None))
+
+
+def dense_ranks(values: Sequence[Any]) -> npt.NDArray[np.uint32]:
+    """Rank the given comparable values, equal values get the same rank"""
+    ranks = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return np.fromiter(map(ranks.__getitem__, values), dtype="<u4", count=len(values))
+
+
+def encode_strings(strings: Sequence[str]) -> tuple[npt.NDArray[np.uint64], bytes]:
+    """Encode strings as UTF-8 and get the offsets of each one in their concatenation"""
+    encoded = [string.encode() for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum(
+        np.fromiter(map(len, encoded), dtype="<u8", count=len(encoded))
+    )
+    return offsets, b"".join(encoded)
+
+
+def aligned(size: int) -> int:
+    """Round the given size up to the alignment of the sections"""
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def text_sections(
+    documents: Sequence[tuple[str, JsonObject]],
+    text_weights: Mapping[str, int] | None,
+    search_text_paths: Sequence[str] | None,
+) -> dict[str, npt.NDArray | bytes]:
+    """Get the sections storing the text terms with their postings, the lengths of
+    the documents and the words with the number of documents containing them and
+    their rank by this number
+    """
+    sections: dict[str, npt.NDArray | bytes] = {}
+    postings: dict[str, list[tuple[int, float, int]]] = defaultdict(list)
+    lengths = np.zeros(len(documents), dtype="<u4")
+    word_counts: Counter[str] = Counter()
+    for position, (resource_id, content) in enumerate(documents):
+        document = indexed_document(resource_id, content, search_text_paths)
+        frequencies, lengths[position] = term_frequencies(document, text_weights)
+        for term, score in term_scores(document, text_weights).items():
+            postings[term].append((position, score, frequencies.get(term, 0)))
+        word_counts.update(indexed_words(document, text_weights))
+    terms = sorted(postings)
+    sections["terms.offsets"], sections["terms.data"] = encode_strings(terms)
+    postings_offsets = np.zeros(len(terms) + 1, dtype="<u8")
+    postings_offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+    sections["postings.offsets"] = postings_offsets
+    entries = [entry for term in terms for entry in postings[term]]
+    sections["postings.documents"] = np.array(
+        [position for position, _, _ in entries], dtype="<u4"
+    )
+    sections["postings.scores"] = np.array(
+        [score for _, score, _ in entries], dtype="<f8"
+    )
+    sections["postings.frequencies"] = np.array(
+        [frequency for _, _, frequency in entries], dtype="<u4"
+    )
+    sections["documents.lengths"] = lengths
+
+    words = sorted(word_counts)
+    sections["words.offsets"], sections["words.data"] = encode_strings(words)
+    sections["words.counts"] = np.array(
+        [word_counts[word] for word in words], dtype="<u4"
+    )
+    sections["words.ranks"] = dense_ranks(
+        [(-word_counts[word], word) for word in words]
+    )
+    return sections
+
+
+def write_snapshot(
+    path: Path,
+    *,
+    class_name: str,
+    searchable_class: models.SearchableClass,
+    resources: Iterable[models.Resource],
+) -> int:
+    """Write the searchable state of the given resources to a snapshot file
+
+    The file is first written under a temporary name and then renamed, so that
+    processes that open the snapshot never see a partially written file.
+    Returns the number of documents in the snapshot.
+    """
+    documents = sorted(
+        ((resource.id_, resource.model_dump()["content"]) for resource in resources),
+        key=lambda document: document[0],
+    )
+    sections: dict[str, npt.NDArray | bytes] = {}
+    sections["ids.offsets"], sections["ids.data"] = encode_strings(
+        [resource_id for resource_id, _ in documents]
+    )
+    sections["documents.offsets"], sections["documents.data"] = encode_strings(
+        [json.dumps(content, separators=(",", ":")) for _, content in documents]
+    )
+
+    text_weights = utils.text_index_weights(searchable_class)
+    search_text_paths = utils.search_text_paths(searchable_class)
+    sections.update(text_sections(documents, text_weights, search_text_paths))
+
+    facet_dictionaries: dict[str, list[Any]] = {}
+    for key in facet_keys(searchable_class):
+        field_path = key.split(".")
+        document_values = [
+            facet_values(content, field_path) for _, content in documents
+        ]
+        orders = sorted(
+            {bson_order(value): value for values in document_values for value in values}
+        )
+        codes = {order: code for code, order in enumerate(orders)}
+        document_codes = [
+            list(dict.fromkeys(codes[bson_order(value)] for value in values))
+            for values in document_values
+        ]
+        facet_dictionaries[key] = [order[1] for order in orders]
+        offsets = np.zeros(len(documents) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(item) for item in document_codes])
+        sections[f"facets.{key}.offsets"] = offsets
+        sections[f"facets.{key}.codes"] = np.array(
+            [code for item in document_codes for code in item], dtype="<u4"
+        )
+        sections[f"facets.{key}.documents"] = np.repeat(
+            np.arange(len(documents), dtype="<u4"), np.diff(offsets).astype(np.intp)
+        )
+
+    for key in sort_keys(searchable_class):
+        field_path = key.split(".")
+        for direction, descending in (("ascending", False), ("descending", True)):
+            sections[f"sort.{key}.{direction}"] = dense_ranks(
+                [
+                    sort_value(content, field_path, descending=descending)
+                    for _, content in documents
+                ]
+            )
+
+    table: dict[str, list[Any]] = {}
+    size = 0
+    for name, section in sections.items():
+        data = section if isinstance(section, bytes) else section.tobytes()
+        dtype = "bytes" if isinstance(section, bytes) else section.dtype.str
+        table[name] = [size, len(data), dtype]
+        size = aligned(size + len(data))
+    contents = json.dumps(
+        {
+            "class_name": class_name,
+            "created": datetime.now(UTC).isoformat(),
+            "documents": len(documents),
+            "facet_dictionaries": facet_dictionaries,
+            "sort_keys": sort_keys(searchable_class),
+            "text_weights": text_weights,
+            "search_text_paths": search_text_paths,
+            "sections": table,
+        }
+    ).encode()
+
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(contents)))
+        file.write(contents)
+        file.write(b"\0" * (aligned(file.tell()) - file.tell()))
+        start = file.tell()
+        for name, section in sections.items():
+            file.seek(start + table[name][0])
+            file.write(section if isinstance(section, bytes) else section.tobytes())
+        file.truncate(start + size)
+    os.replace(temporary_path, path)
+    return len(documents)
+
+
+class StringTable:
+    """Strings stored as UTF-8 in a buffer along with the offset of each string
+
+    The strings can be searched with bisect if they have been stored in order.
+    """
+
+    def __init__(self, buffer: mmap.mmap, start: int, offsets: npt.NDArray):
+        """Initialize with the buffer, the start of the strings and their offsets"""
+        self._buffer = buffer
+        self._start = start
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        """Get the number of strings"""
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        """Get the string at the given index"""
+        start = self._start + int(self._offsets[index])
+        end = self._start + int(self._offsets[index + 1])
+        return self._buffer[start:end].decode()
+
+    def index(self, string: str) -> int | None:
+        """Get the index of the given string in the sorted strings if it exists"""
+        index = bisect_left(self, string)
+        return index if index < len(self) and self[index] == string else None
+
+
+class Snapshot:
+    """A memory-mapped snapshot of the resources of one class"""
+
+    def __init__(self, path: Path, *, ranking: str = "textscore"):
+        """Map the snapshot file at the given path into memory
+
+        Text matches are ranked with the given text ranking, which is either the
+        MongoDB text score or BM25.
+
+        Raises:
+            SnapshotFormatError: if the file is not a snapshot that can be read or
+                cannot be ranked with BM25
+        """
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < HEADER.size:
+            raise SnapshotFormatError(path, "the file is too short")
+        magic, version, contents_size = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise SnapshotFormatError(path, "the file is not a snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotFormatError(path, f"unsupported format version {version}")
+        contents = json.loads(self._buffer[HEADER.size : HEADER.size + contents_size])
+        self.path = path
+        self.class_name: str = contents["class_name"]
+        self.created: str = contents["created"]
+        self._start = aligned(HEADER.size + contents_size)
+        self._sections: dict[str, list[Any]] = contents["sections"]
+        self._size: int = contents["documents"]
+
+        self._ids = self._strings("ids")
+        self._documents = self._strings("documents")
+        self._terms = self._strings("terms")
+        self._postings_offsets = self._array("postings.offsets")
+        self._postings_documents = self._array("postings.documents")
+        self._postings_scores = self._array("postings.scores")
+        # snapshots written by older versions do not contain the words
+        self._words = self._strings("words") if "words.data" in self._sections else None
+        self._bm25 = ranking == "bm25"
+        if self._bm25:
+            if "documents.lengths" not in self._sections:
+                raise SnapshotFormatError(
+                    path, "the snapshot must be exported again for ranking with BM25"
+                )
+            self._postings_frequencies = self._array("postings.frequencies")
+            self._lengths = self._array("documents.lengths")
+            self._average_length = float(self._lengths.mean()) if self._size else 0
+        # maps the facet keys to their values and the BSON order of the values to
+        # their codes
+        self._facet_values: dict[str, list[Any]] = contents["facet_dictionaries"]
+        self._facet_codes = {
+            key: {bson_order(value): code for code, value in enumerate(values)}
+            for key, values in self._facet_values.items()
+        }
+        self._sort_keys = set(contents["sort_keys"])
+        self._text_weights: dict[str, int] | None = contents.get("text_weights")
+        self._search_text_paths: list[str] | None = contents.get("search_text_paths")
+
+    def _array(self, name: str) -> npt.NDArray:
+        """Get the section with the given name as an array on the mapped file"""
+        offset, size, dtype = self._sections[name]
+        dtype = np.dtype(dtype)
+        if not size:
+            return np.empty(0, dtype=dtype)
+        return np.frombuffer(
+            self._buffer,
+            dtype=dtype,
+            count=size // dtype.itemsize,
+            offset=self._start + offset,
+        )
+
+    def _strings(self, name: str) -> StringTable:
+        """Get the strings stored in the sections with the given name prefix"""
+        offset = self._sections[f"{name}.data"][0]
+        return StringTable(
+            self._buffer, self._start + offset, self._array(f"{name}.offsets")
+        )
+
+    def __len__(self) -> int:
+        """Get the number of documents in the snapshot"""
+        return self._size
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether the values of the given facet key are indexed"""
+        return key in self._facet_values
+
+    def resource_id(self, position: int) -> str:
+        """Get the ID of the document at the given position"""
+        return self._ids[position]
+
+    def content(self, position: int) -> JsonObject:
+        """Get the content of the document at the given position"""
+        return json.loads(self._documents[position])
+
+    def position(self, resource_id: str) -> int | None:
+        """Get the position of the document with the given ID if it exists"""
+        return self._ids.index(resource_id)
+
+    def _postings(self, term: str) -> tuple[npt.NDArray, npt.NDArray] | None:
+        """Get the positions of the documents containing the term and its scores
+
+        The scores are the MongoDB text scores or the BM25 scores of the term,
+        depending on the text ranking of the snapshot.
+        """
+        index = self._terms.index(term)
+        if index is None:
+            return None
+        start, end = self._postings_offsets[index : index + 2]
+        positions = self._postings_documents[start:end]
+        if not self._bm25:
+            return positions, self._postings_scores[start:end]
+        return positions, bm25_scores(
+            self._postings_frequencies[start:end],
+            self._lengths[positions],
+            documents=self._size,
+            average_length=self._average_length,
+        )
+
+    def text_scores(self, query: str) -> tuple[npt.NDArray[np.bool_], npt.NDArray]:
+        """Get which documents match the text query along with their text scores"""
+        text_query = TextQuery.parse(query)
+        matched = np.zeros(self._size, dtype=np.bool_)
+        scores = np.zeros(self._size, dtype=np.float64)
+        for term in text_query.terms:
+            postings = self._postings(term)
+            if postings is not None:
+                positions, document_scores = postings
+                matched[positions] = True
+                scores[positions] += document_scores
+        for term in text_query.negated_terms:
+            postings = self._postings(term)
+            if postings is not None:
+                matched[postings[0]] = False
+        if text_query.phrases or text_query.negated_phrases:
+            for position in np.flatnonzero(matched).tolist():
+                document = indexed_document(
+                    self.resource_id(position),
+                    self.content(position),
+                    self._search_text_paths,
+                )
+                if not text_query.matches_phrases(document, self._text_weights):
+                    matched[position] = False
+        return matched, scores
+
+    def suggest(self, prefix: str, limit: int) -> list[models.Suggestion]:
+        """Get the most frequent words completing the last word of the prefix"""
+        if self._words is None:
+            return []
+        lower, upper = prefix_range(completed_word(prefix))
+        start = bisect_left(self._words, lower)
+        end = bisect_left(self._words, upper, lo=start)
+        ranks = self._array("words.ranks")[start:end]
+        if len(ranks) > limit:
+            candidates = np.argpartition(ranks, limit)[:limit]
+        else:
+            candidates = np.arange(len(ranks))
+        counts = self._array("words.counts")
+        return [
+            models.Suggestion(
+                text=self._words[start + index], count=int(counts[start + index])
+            )
+            for index in candidates[np.argsort(ranks[candidates])].tolist()
+        ]
+
+    def select(self, key: str, values: set[str]) -> npt.NDArray[np.bool_]:
+        """Get which documents have one of the given values at the given key"""
+        selected = np.zeros(self._size, dtype=np.bool_)
+        if key == "id_":
+            for value in values:
+                position = self.position(value)
+                if position is not None:
+                    selected[position] = True
+        elif key in self._facet_codes:
+            codes = self._facet_codes[key]
+            wanted = [
+                codes[order] for order in map(bson_order, values) if order in codes
+            ]
+            entries = np.isin(self._array(f"facets.{key}.codes"), wanted)
+            selected[self._array(f"facets.{key}.documents")[entries]] = True
+        else:
+            path = key.split(".")
+            for position in range(self._size):
+                selected[position] = any(
+                    isinstance(value, str) and value in values
+                    for value in path_values(self.content(position), path)
+                )
+        return selected
+
+    def facet(self, key: str, selected: npt.NDArray[np.bool_]) -> list[JsonObject]:
+        """Count the selected documents per value of the given key"""
+        if key in self._facet_values:
+            values = self._facet_values[key]
+            documents = self._array(f"facets.{key}.documents")
+            codes = self._array(f"facets.{key}.codes")[selected[documents]]
+            counts = np.bincount(codes, minlength=len(values))
+            return [
+                {"value": values[code], "count": int(counts[code])}
+                for code in np.flatnonzero(counts)
+            ]
+        counter: dict[Any, int] = defaultdict(int)
+        path = key.split(".")
+        for position in np.flatnonzero(selected).tolist():
+            for value in facet_values(self.content(position), path):
+                counter[value] += 1
+        return [
+            {"value": value, "count": counter[value]}
+            for value in sorted(counter, key=bson_order)
+        ]
+
+    def facet_counts(
+        self, key: str, prefix: str, selected: npt.NDArray[np.bool_]
+    ) -> dict[str, int]:
+        """Count the selected documents per text value of the given key that starts
+        with the prefix
+
+        The values in the dictionary of a facetable field are sorted, so that the
+        values starting with the prefix are found by bisection.
+        """
+        if key not in self._facet_values:
+            counter: dict[str, int] = defaultdict(int)
+            path = key.split(".")
+            for position in np.flatnonzero(selected).tolist():
+                for value in facet_values(self.content(position), path):
+                    if isinstance(value, str) and value.startswith(prefix):
+                        counter[value] += 1
+            return counter
+        values = self._facet_values[key]
+        lower, upper = prefix_range(prefix)
+        start = bisect_left(values, bson_order(lower), key=bson_order)
+        end = bisect_left(values, bson_order(upper), lo=start, key=bson_order)
+        if start == end:
+            return {}
+        documents = self._array(f"facets.{key}.documents")
+        codes = self._array(f"facets.{key}.codes")[selected[documents]]
+        counts = np.bincount(codes, minlength=end)[start:end]
+        return {
+            values[start + index]: int(counts[index])
+            for index in np.flatnonzero(counts).tolist()
+        }
+
+    def sort(
+        self,
+        positions: npt.NDArray[np.intp],
+        *,
+        sorting_parameters: list[models.SortingParameter],
+        scores: npt.NDArray | None,
+    ) -> npt.NDArray[np.intp]:
+        """Sort the document positions by the sorting parameters like MongoDB
+
+        Documents are stored in the order of their IDs, so that sorting by the
+        position is the same as sorting by the ID.
+
+        Raises:
+            ValueError - when sorting by relevance without scores
+        """
+        # the same field can only be used once, like in the pipeline
+        orders = {param.field: param.order for param in sorting_parameters}
+        sort_keys: list[npt.NDArray] = []
+        for field, order in orders.items():
+            descending = order != models.SortOrder.ASCENDING
+            if order == models.SortOrder.RELEVANCE:
+                if scores is None:
+                    raise ValueError(MISSING_TEXT_SCORE_MSG)
+                sort_key = -scores[positions]
+            elif field == "id_":
+                sort_key = positions
+            elif field in self._sort_keys:
+                direction = "descending" if descending else "ascending"
+                sort_key = self._array(f"sort.{field}.{direction}")[positions]
+            else:
+                path = field.split(".")
+                sort_key = dense_ranks(
+                    [
+                        sort_value(self.content(position), path, descending=descending)
+                        for position in positions
+                    ]
+                )
+            if descending and order != models.SortOrder.RELEVANCE:
+                sort_key = -sort_key.astype(np.int64)
+            sort_keys.append(sort_key)
+        # np.lexsort sorts by the last key first, ties are ordered by the IDs
+        return positions[np.lexsort([positions, *reversed(sort_keys)])]
+
+    def matches(
+        self, *, query: str, filters: list[models.Filter]
+    ) -> tuple[npt.NDArray[np.bool_], npt.NDArray | None]:
+        """Get which documents match the query and filters along with their text
+        scores, which are None if there is no text query
+        """
+        scores = None
+        if query.strip():
+            selected, scores = self.text_scores(query)
+        else:
+            selected = np.ones(self._size, dtype=np.bool_)
+        filter_values: dict[str, set[str]] = defaultdict(set)
+        for item in filters:
+            filter_values[item.key].add(item.value)
+        for key, values in filter_values.items():
+            selected &= self.select(key, values)
+        return selected, scores
+
+    def search(  # noqa: PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> dict[str, Any]:
+        """Search the documents and return results in the format of the aggregator
+
+        Raises:
+            ValueError - when sorting by relevance without a text query
+        """
+        selected, scores = self.matches(query=query, filters=filters)
+
+        facets = [
+            {
+                "key": facet.key,
+                "name": facet.name or utils.name_from_key(facet.key),
+                "options": self.facet(facet.key, selected),
+            }
+            for facet in facet_fields
+        ]
+
+        positions = self.sort(
+            np.flatnonzero(selected),
+            sorting_parameters=sorting_parameters,
+            scores=scores,
+        )
+        page = positions[skip : skip + limit if limit else None]
+        hits: list[dict[str, Any]] = [
+            {"content": self.content(position), "id_": self.resource_id(position)}
+            for position in page
+        ]
+        if selected_fields:
+            keys = [
+                "id_",
+                *(
+                    f"content.{field.key}"
+                    for field in selected_fields
+                    if field.key != "id_"
+                ),
+            ]
+            hits = [project(hit, keys) for hit in hits]
+
+        results: dict[str, Any] = {"hits": hits, "facets": facets}
+        if len(positions):
+            results["count"] = len(positions)
+        return results
+
+
+def open_snapshots(
+    *, config: SearchableClassesConfig, directory: Path, ranking: str = "textscore"
+) -> dict[str, Snapshot]:
+    """Open the snapshots of all configured classes that exist in the directory
+
+    Classes without a snapshot are logged and have no resources. Text matches are
+    ranked with the given text ranking.
+
+    Raises:
+        SnapshotFormatError: if a snapshot file cannot be read
+    """
+    snapshots: dict[str, Snapshot] = {}
+    for class_name in config.searchable_classes:
+        path = snapshot_path(directory, class_name)
+        if not path.exists():
+            log.warning("No snapshot of class %s found at %s.", class_name, path)
+            continue
+        snapshot = snapshots[class_name] = Snapshot(path, ranking=ranking)
+        log.info(
+            "Serving %d resources of class %s from the snapshot created at %s.",
+            len(snapshot),
+            class_name,
+            snapshot.created,
+        )
+    return snapshots
+
+
+class SnapshotResourceDao:
+    """A read-only DAO for the resources of one class served from a snapshot"""
+
+    def __init__(self, *, snapshot: Snapshot | None):
+        self._snapshot = snapshot
+
+    async def get_by_id(self, id_: ID) -> models.Resource:  # noqa: D102
+        snapshot = self._snapshot
+        position = snapshot.position(str(id_)) if snapshot else None
+        if snapshot is None or position is None:
+            raise ResourceNotFoundError(id_=id_)
+        return models.Resource(id_=str(id_), content=snapshot.content(position))
+
+    async def update(self, dto: models.Resource) -> None:  # noqa: D102
+        raise SnapshotReadOnlyError()
+
+    async def delete(self, id_: ID) -> None:  # noqa: D102
+        raise SnapshotReadOnlyError()
+
+    async def find_one(self, *, mapping: Mapping[str, Any]) -> models.Resource:  # noqa: D102
+        hits = [hit async for hit in self.find_all(mapping=mapping)]
+        if not hits:
+            raise NoHitsFoundError(mapping=mapping)
+        if len(hits) > 1:
+            raise MultipleHitsFoundError(mapping=mapping)
+        return hits[0]
+
+    async def find_all(  # noqa: D102
+        self, *, mapping: Mapping[str, Any]
+    ) -> AsyncIterator[models.Resource]:
+        snapshot = self._snapshot
+        for position in range(len(snapshot) if snapshot else 0):
+            resource_id = snapshot.resource_id(position)  # type: ignore[union-attr]
+            content = snapshot.content(position)  # type: ignore[union-attr]
+            document = {"id_": resource_id, "content": content}
+            if all(
+                value in path_values(document, key.split("."))
+                for key, value in mapping.items()
+            ):
+                yield models.Resource(id_=resource_id, content=content)
+
+    async def insert(self, dto: models.Resource) -> None:  # noqa: D102
+        raise SnapshotReadOnlyError()
+
+    async def upsert(self, dto: models.Resource) -> None:  # noqa: D102
+        raise SnapshotReadOnlyError()
+
+
+class SnapshotDaoCollection(DaoCollectionPort):
+    """Provides a read-only DAO for each configured resource class using snapshots"""
+
+    def __init__(
+        self, *, config: SearchableClassesConfig, snapshots: Mapping[str, Snapshot]
+    ):
+        """Initialize the DAOs with the opened snapshots of the resource classes"""
+        self._config = config
+        self._snapshots = snapshots
+        self._resource_daos = {
+            class_name: SnapshotResourceDao(snapshot=snapshots.get(class_name))
+            for class_name in config.searchable_classes
+        }
+
+    def get_dao(self, *, class_name: str) -> SnapshotResourceDao:
+        """Returns a dao for the given resource class name
+
+        Raises:
+            DaoNotFoundError: if the DAO isn't found
+        """
+        try:
+            return self._resource_daos[class_name]
+        except KeyError as err:
+            raise DaoNotFoundError(class_name=class_name) from err
+
+    async def bulk_write(
+        self,
+        *,
+        class_name: str,
+        upserts: Sequence[models.Resource] = (),
+        deletions: Sequence[str] = (),
+    ) -> None:
+        """Snapshots cannot be changed, export a new snapshot instead.
+
+        Raises:
+            SnapshotReadOnlyError: always
+        """
+        raise SnapshotReadOnlyError()
+
+    def create_collections_and_indexes_if_needed(self) -> None:
+        """Nothing needs to be created, the snapshots contain all indexes."""
+
+    def recreate_collections_and_indexes(self) -> None:
+        """Nothing needs to be recreated, the snapshots contain all indexes."""
+
+    def drop_indexes(self) -> None:
+        """Snapshots cannot be changed, export a new snapshot instead.
+
+        Raises:
+            SnapshotReadOnlyError: always
+        """
+        raise SnapshotReadOnlyError()
+
+    def drop_collections(self) -> None:
+        """Snapshots cannot be changed, export a new snapshot instead.
+
+        Raises:
+            SnapshotReadOnlyError: always
+        """
+        raise SnapshotReadOnlyError()
+
+    def count_resources(self, *, class_name: str) -> int:
+        """Count the resources of the given class.
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        if class_name not in self._config.searchable_classes:
+            raise DaoNotFoundError(class_name=class_name)
+        snapshot = self._snapshots.get(class_name)
+        return len(snapshot) if snapshot else 0
+
+    def swap_in_collections(self) -> None:
+        """Snapshots cannot be changed, export a new snapshot instead.
+
+        Raises:
+            SnapshotReadOnlyError: always
+        """
+        raise SnapshotReadOnlyError()
+
+
+class SnapshotAggregator(AggregatorPort):
+    """Searches the resources of one class in a memory-mapped snapshot"""
+
+    def __init__(self, *, snapshot: Snapshot | None):
+        """Initialize with the snapshot, which is None if the class has none"""
+        self._snapshot = snapshot
+
+    async def _search(self, snapshot: Snapshot, **kwargs) -> dict[str, Any]:
+        """Search the snapshot in a worker thread, not blocking the event loop.
+
+        Raises:
+            AggregationError: if the search fails
+        """
+        try:
+            return await asyncio.to_thread(snapshot.search, **kwargs)
+        except ValueError as err:
+            details = ", ".join(
+                f"{key}={kwargs[key]}"
+                for key in ("query", "filters", "sorting_parameters", "skip", "limit")
+            )
+            raise AggregationError(message=str(err), details=details) from err
+
+    async def aggregate(  # noqa: PLR0913, D102
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        timer: PhaseTimer | None = None,
+    ) -> JsonObject:
+        with timed(timer, "db"):
+            if not self._snapshot:
+                if timer:
+                    timer.annotate("strategy", "empty")
+                return models.QueryResults().model_dump()
+            if timer:
+                timer.annotate("strategy", "snapshot")
+            return await self._search(
+                self._snapshot,
+                selected_fields=selected_fields,
+                facet_fields=facet_fields,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+            )
+
+    def build_pipeline(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> list[JsonObject]:
+        # the pipeline that the MongoDB backend would run for the same query
+        return utils.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+
+    async def explain(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        verbosity: str = "executionStats",
+    ) -> models.QueryExplanation:
+        pipeline = self.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+        snapshot = self._snapshot
+        if query.strip():
+            stage = "TEXT_INDEX"
+        elif snapshot and any(item.key in snapshot for item in filters):
+            stage = "FACET_INDEX"
+        else:
+            stage = "COLLECTION_SCAN"
+        execution_stats: dict[str, Any] = {
+            "backend": "snapshot",
+            "queryPlanner": {"winningPlan": {"stage": stage}},
+        }
+        if snapshot:
+            execution_stats["snapshot"] = {
+                "path": str(snapshot.path),
+                "created": snapshot.created,
+            }
+        if verbosity != "queryPlanner" and snapshot:
+            started = perf_counter()
+            results = await self._search(
+                snapshot,
+                selected_fields=selected_fields,
+                facet_fields=facet_fields,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+            )
+            execution_stats["executionStats"] = {
+                "nReturned": len(results["hits"]),
+                "totalDocsExamined": len(snapshot),
+                "executionTimeMillis": round((perf_counter() - started) * 1000),
+            }
+        return models.QueryExplanation(
+            pipeline=pipeline, execution_stats=execution_stats
+        )
+
+    async def suggest(self, *, prefix: str, limit: int) -> list[models.Suggestion]:  # noqa: D102
+        if not self._snapshot:
+            return []
+        return self._snapshot.suggest(prefix, limit)
+
+    async def facet_values(  # noqa: D102, PLR0913
+        self,
+        *,
+        facet: models.FieldLabel,
+        prefix: str,
+        query: str,
+        filters: list[models.Filter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.FacetValues:
+        counts: dict[str, int] = {}
+        snapshot = self._snapshot
+        if snapshot:
+
+            def count() -> dict[str, int]:
+                selected, _ = snapshot.matches(query=query, filters=filters)
+                return snapshot.facet_counts(facet.key, prefix, selected)
+
+            counts = await asyncio.to_thread(count)
+        return facet_values_page(facet, counts, skip=skip, limit=limit)
+
+
+class SnapshotAggregatorCollection(AggregatorCollectionPort):
+    """Provides a snapshot aggregator for each configured resource class"""
+
+    def __init__(
+        self, *, config: SearchableClassesConfig, snapshots: Mapping[str, Snapshot]
+    ):
+        """Initialize the aggregators with the opened snapshots of the classes"""
+        self._aggregators = {
+            class_name: SnapshotAggregator(snapshot=snapshots.get(class_name))
+            for class_name in config.searchable_classes
+        }
+
+    def get_aggregator(self, *, class_name: str) -> AggregatorPort:
+        """Returns the aggregator for a given resource class name
+
+        Raises:
+            AggregatorNotFoundError: if the aggregator isn't found
+        """
+        try:
+            return self._aggregators[class_name]
+        except KeyError as err:
+            raise AggregatorNotFoundError(class_name=class_name) from err
@@ -0,0 +1,1204 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""A search backend storing the resources in an SQLite database
+
+Each resource class is stored in three tables: the resources with their content and
+the scores of their text terms, an FTS5 full-text index of their stemmed text terms,
+and a table of the values found at each path of their content, which is used for
+filtering, faceting and sorting, and for completing the options of facets. Two
+further tables store the settings of the text index and the number of resources
+containing each indexed word, which is used for completing prefixes. The text terms
+and the values are derived in the same way as by the in-memory backend, so that the
+results are the same as with the MongoDB backend. The database is used in WAL mode,
+so that searches can run concurrently on a pool of connections while resources are
+written.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from queue import SimpleQueue
+from time import perf_counter
+from typing import Any, TypeVar
+
+from hexkit.custom_types import ID, JsonObject
+from hexkit.protocols.dao import (
+    MultipleHitsFoundError,
+    NoHitsFoundError,
+    ResourceAlreadyExistsError,
+    ResourceNotFoundError,
+)
+
+from mass.adapters.outbound import utils
+from mass.adapters.outbound.aggregator import AggregatorNotFoundError
+from mass.adapters.outbound.dao import DaoNotFoundError
+from mass.adapters.outbound.memory import (
+    MISSING_TEXT_SCORE_MSG,
+    bson_order,
+    path_values,
+    project,
+)
+from mass.adapters.outbound.suggestions import (
+    WORDS_SUFFIX,
+    completed_word,
+    indexed_words,
+    prefix_range,
+    word_changes,
+)
+from mass.adapters.outbound.text_search import (
+    TextQuery,
+    indexed_document,
+    indexed_texts,
+    term_scores,
+    terms,
+)
+from mass.config import SearchableClassesConfig, SearchBackendConfig
+from mass.core import models
+from mass.core.timing import PhaseTimer, timed
+from mass.ports.outbound.aggregator import (
+    AggregationError,
+    AggregatorCollectionPort,
+    AggregatorPort,
+)
+from mass.ports.outbound.dao import DaoCollectionPort
+
+# the names of tables and indexes are quoted and values are passed as parameters
+# ruff: noqa: S608
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# the ranks of the value types in the sort order, see bson_order
+FACET_RANKS = (2, 3, 8)
+BOOLEAN_RANK = 8
+STRING_RANK = 3
+
+
+def quote(name: str) -> str:
+    """Quote the name of a table or index for use in an SQL statement"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def path_items(value: JsonObject, prefix: str = "") -> Iterator[tuple[str, Any]]:
+    """Get all dotted paths of a document along with the values found at them
+
+    The values found at a path are the same as the ones returned by path_values.
+    """
+    for key, item in value.items():
+        path = prefix + key
+        for child in item if isinstance(item, list) else [item]:
+            yield path, child
+            if isinstance(child, dict):
+                yield from path_items(child, path + ".")
+
+
+@lru_cache(maxsize=128)
+def parse_query(query: str) -> TextQuery:
+    """Parse a text query, caching the results for repeated use"""
+    return TextQuery.parse(query)
+
+
+def match_expression(text_query: TextQuery) -> str | None:
+    """Build the FTS5 expression matching the terms of a text query
+
+    Returns None if the query has no terms, in which case nothing matches.
+    """
+    if not text_query.terms:
+        return None
+    expression = " OR ".join(f'"{term}"' for term in sorted(text_query.terms))
+    if text_query.negated_terms:
+        negated = " OR ".join(f'"{term}"' for term in sorted(text_query.negated_terms))
+        expression = f"({expression}) NOT ({negated})"
+    return expression
+
+
+@lru_cache(maxsize=128)
+def parse_text_index(
+    text_index: str | None,
+) -> tuple[dict[str, int] | None, list[str] | None]:
+    """Parse the JSON encoded settings of a text index into its text weights and
+    search text paths, caching the results for repeated use
+    """
+    if not text_index:
+        return None, None
+    settings = json.loads(text_index)
+    return settings["weights"], settings["search_text_paths"]
+
+
+def matches_phrases(
+    resource_id: str, content: str, query: str, text_index: str | None
+) -> bool:
+    """Check the phrase conditions of the query, registered as an SQL function"""
+    weights, search_text_paths = parse_text_index(text_index)
+    document = indexed_document(resource_id, json.loads(content), search_text_paths)
+    return parse_query(query).matches_phrases(document, weights)
+
+
+def indexed_terms(document: JsonObject, weights: Mapping[str, int] | None) -> str:
+    """Get the indexed terms of the document as text for the FTS5 index
+
+    The terms of weighted fields are repeated according to their weight, so that
+    they are counted with their weight when ranking with BM25.
+    """
+    return " ".join(
+        " ".join([term] * weight)
+        for text, weight in indexed_texts(document, weights)
+        for term in terms(text)
+    )
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open a connection to the database in WAL mode
+
+    Transactions are not started implicitly, but must be started explicitly.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.create_function(
+        "mass_matches_phrases", 4, matches_phrases, deterministic=True
+    )
+    return connection
+
+
+@contextmanager
+def transaction(connection: sqlite3.Connection, mode: str = "DEFERRED"):
+    """Run the statements in the context in a transaction"""
+    connection.execute(f"BEGIN {mode}")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+class SqliteDatabase:
+    """The connections to an SQLite database
+
+    Reads use a pool of connections, so that they can run concurrently in worker
+    threads, while writes are serialized on a single connection.
+    """
+
+    def __init__(self, *, path: Path, pool_size: int):
+        """Open the connections to the database with the given path"""
+        self.path = path
+        self._writer = connect(path)
+        self._write_lock = threading.Lock()
+        self._readers: SimpleQueue[sqlite3.Connection] = SimpleQueue()
+        self._connections = [self._writer]
+        for _ in range(pool_size):
+            reader = connect(path)
+            reader.execute(
+                "CREATE TEMP TABLE matches"
+                + " (doc INTEGER PRIMARY KEY, id TEXT NOT NULL, score REAL)"
+            )
+            self._readers.put(reader)
+            self._connections.append(reader)
+
+    @classmethod
+    @contextmanager
+    def construct(cls, *, config: SearchBackendConfig) -> Iterator["SqliteDatabase"]:
+        """Open the configured database and close it afterwards"""
+        database = cls(path=config.sqlite_path, pool_size=config.sqlite_pool_size)
+        try:
+            yield database
+        finally:
+            database.close()
+
+    def close(self) -> None:
+        """Close all connections"""
+        for connection in self._connections:
+            connection.close()
+
+    def write(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        """Call the function with the connection for writing in a transaction"""
+        with self._write_lock, transaction(self._writer, "IMMEDIATE"):
+            return function(self._writer)
+
+    def read(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        """Call the function with a connection for reading in a transaction
+
+        All reads in the transaction see the same state of the database.
+        """
+        connection = self._readers.get()
+        try:
+            with transaction(connection):
+                return function(connection)
+        finally:
+            self._readers.put(connection)
+
+    async def write_async(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        """Call the function with the connection for writing in a worker thread"""
+        return await asyncio.to_thread(self.write, function)
+
+    async def read_async(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        """Call the function with a connection for reading in a worker thread"""
+        return await asyncio.to_thread(self.read, function)
+
+
+class SqliteCollection:
+    """The tables storing the resources of one class"""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        text_weights: Mapping[str, int] | None = None,
+        search_text_paths: Sequence[str] | None = None,
+    ):
+        """Initialize with the name of the collection, used as the table name, the
+        weights of the fields covered by the text index (None for all text) and the
+        paths from which the compact search text is built (None if not used)
+        """
+        self.name = name
+        self.text_weights = dict(text_weights) if text_weights is not None else None
+        self.search_text_paths = (
+            list(search_text_paths) if search_text_paths is not None else None
+        )
+        self._encoded_text_index = (
+            json.dumps(
+                {
+                    "weights": self.text_weights,
+                    "search_text_paths": self.search_text_paths,
+                },
+                sort_keys=True,
+            )
+            if self.text_weights is not None
+            else None
+        )
+        self._resources = quote(name)
+        self._terms = quote(name + "__terms")
+        self._values = quote(name + "__values")
+        self._values_index = quote(name + "__values_by_doc")
+        self._settings = quote(name + "__settings")
+        self._words = quote(name + WORDS_SUFFIX)
+
+    def create(self, connection: sqlite3.Connection) -> None:
+        """Create the tables and indexes if they do not exist yet"""
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._resources} (doc INTEGER PRIMARY KEY,"
+            + " id TEXT NOT NULL UNIQUE, content TEXT NOT NULL, scores TEXT NOT NULL)"
+        )
+        connection.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self._terms} USING fts5"
+            + "(terms, tokenize = \"unicode61 remove_diacritics 0 tokenchars '_'\")"
+        )
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._values} (doc INTEGER NOT NULL,"
+            + " path TEXT NOT NULL, rank INTEGER NOT NULL, value ANY NOT NULL,"
+            + " PRIMARY KEY (path, rank, value, doc)) WITHOUT ROWID"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self._values_index}"
+            + f" ON {self._values} (doc, path, rank, value)"
+        )
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._settings}"
+            + " (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._words}"
+            + " (word TEXT PRIMARY KEY, count INTEGER NOT NULL) WITHOUT ROWID"
+        )
+
+    def index_text(self, connection: sqlite3.Connection) -> bool:
+        """Make sure that the text index covers the configured fields
+
+        If the text weights or search text paths have changed since the text index
+        was built, the text terms and scores of all resources are recomputed, and so
+        are the word counts. This happens in the write transaction, so that concurrent
+        searches still see the previous text index.
+        Returns whether the text index was rebuilt.
+        """
+        row = connection.execute(
+            f"SELECT value FROM {self._settings} WHERE key = 'text_index'"
+        ).fetchone()
+        if row is not None and row[0] == self._encoded_text_index:
+            return False
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self._settings} (key, value)"
+            + " VALUES ('text_index', ?)",
+            (self._encoded_text_index,),
+        )
+        # tables without settings have been built with a wildcard text index
+        if (row[0] if row else None) == self._encoded_text_index:
+            return False
+        connection.execute(f"DELETE FROM {self._words}")
+        word_counts: Counter[str] = Counter()
+        for doc, resource_id, content in connection.execute(
+            f"SELECT doc, id, content FROM {self._resources}"
+        ).fetchall():
+            document = indexed_document(
+                resource_id, json.loads(content), self.search_text_paths
+            )
+            connection.execute(
+                f"UPDATE {self._resources} SET scores = ? WHERE doc = ?",
+                (json.dumps(term_scores(document, self.text_weights)), doc),
+            )
+            connection.execute(
+                f"UPDATE {self._terms} SET terms = ? WHERE rowid = ?",
+                (indexed_terms(document, self.text_weights), doc),
+            )
+            word_counts.update(indexed_words(document, self.text_weights))
+        self._count_words(connection, word_counts)
+        return True
+
+    def index_words(self, connection: sqlite3.Connection) -> bool:
+        """Make sure that the words of the resources are counted
+
+        The words are counted from scratch if there are resources, but no words,
+        which is the case for tables that were written before words were counted.
+        Returns whether the words have been counted.
+        """
+        if (
+            self.is_empty(connection)
+            or connection.execute(f"SELECT 1 FROM {self._words} LIMIT 1").fetchone()
+        ):
+            return False
+        word_counts: Counter[str] = Counter()
+        for resource_id, content in self.all(connection):
+            document = indexed_document(resource_id, content, self.search_text_paths)
+            word_counts.update(indexed_words(document, self.text_weights))
+        self._count_words(connection, word_counts)
+        return True
+
+    def _count_words(
+        self, connection: sqlite3.Connection, changes: Mapping[str, int]
+    ) -> None:
+        """Change the counts of the given words, removing the words that are not
+        contained in any resource anymore
+        """
+        connection.executemany(
+            f"INSERT INTO {self._words} (word, count) VALUES (?, ?)"
+            + " ON CONFLICT (word) DO UPDATE SET count = count + excluded.count",
+            ((word, change) for word, change in changes.items() if change),
+        )
+        connection.executemany(
+            f"DELETE FROM {self._words} WHERE word = ? AND count <= 0",
+            ((word,) for word, change in changes.items() if change < 0),
+        )
+
+    def _words_of(self, resource_id: str, encoded_content: str | None) -> set[str]:
+        """Get the indexed words of a resource with the given encoded content"""
+        if encoded_content is None:
+            return set()
+        document = indexed_document(
+            resource_id, json.loads(encoded_content), self.search_text_paths
+        )
+        return indexed_words(document, self.text_weights)
+
+    def drop(self, connection: sqlite3.Connection) -> None:
+        """Drop the tables and their indexes"""
+        for table in (
+            self._resources,
+            self._terms,
+            self._values,
+            self._settings,
+            self._words,
+        ):
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def rename(self, connection: sqlite3.Connection, name: str) -> "SqliteCollection":
+        """Replace the collection with the given name by this collection"""
+        target = SqliteCollection(
+            name,
+            text_weights=self.text_weights,
+            search_text_paths=self.search_text_paths,
+        )
+        target.drop(connection)
+        connection.execute(f"DROP INDEX IF EXISTS {self._values_index}")
+        for table, target_table in (
+            (self._resources, target._resources),
+            (self._terms, target._terms),
+            (self._values, target._values),
+            (self._settings, target._settings),
+            (self._words, target._words),
+        ):
+            connection.execute(f"ALTER TABLE {table} RENAME TO {target_table}")
+        target.create(connection)
+        return target
+
+    def count(self, connection: sqlite3.Connection) -> int:
+        """Count the resources"""
+        return connection.execute(f"SELECT count(*) FROM {self._resources}").fetchone()[
+            0
+        ]
+
+    def is_empty(self, connection: sqlite3.Connection) -> bool:
+        """Check whether there are no resources"""
+        return not connection.execute(
+            f"SELECT 1 FROM {self._resources} LIMIT 1"
+        ).fetchone()
+
+    def get(
+        self, connection: sqlite3.Connection, resource_id: str
+    ) -> JsonObject | None:
+        """Get the content of the resource with the given ID if it exists"""
+        row = connection.execute(
+            f"SELECT content FROM {self._resources} WHERE id = ?", (resource_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self, connection: sqlite3.Connection) -> list[tuple[str, JsonObject]]:
+        """Get the IDs and contents of all resources"""
+        return [
+            (resource_id, json.loads(content))
+            for resource_id, content in connection.execute(
+                f"SELECT id, content FROM {self._resources} ORDER BY doc"
+            )
+        ]
+
+    def upsert(self, connection: sqlite3.Connection, resource: models.Resource) -> None:
+        """Insert or replace a resource along with its text terms and values"""
+        resource_id = resource.id_
+        content = resource.model_dump()["content"]
+        document = indexed_document(resource_id, content, self.search_text_paths)
+        encoded_content = json.dumps(content)
+        encoded_scores = json.dumps(term_scores(document, self.text_weights))
+        row = connection.execute(
+            f"SELECT doc, content FROM {self._resources} WHERE id = ?", (resource_id,)
+        ).fetchone()
+        self._count_words(
+            connection,
+            word_changes(
+                self._words_of(resource_id, row[1] if row else None),
+                indexed_words(document, self.text_weights),
+            ),
+        )
+        if row:
+            doc = row[0]
+            self._delete_index_entries(connection, doc)
+            connection.execute(
+                f"UPDATE {self._resources} SET content = ?, scores = ? WHERE doc = ?",
+                (encoded_content, encoded_scores, doc),
+            )
+        else:
+            doc = connection.execute(
+                f"INSERT INTO {self._resources} (id, content, scores)"
+                + " VALUES (?, ?, ?)",
+                (resource_id, encoded_content, encoded_scores),
+            ).lastrowid
+        connection.execute(
+            f"INSERT INTO {self._terms} (rowid, terms) VALUES (?, ?)",
+            (doc, indexed_terms(document, self.text_weights)),
+        )
+        connection.executemany(
+            f"INSERT OR IGNORE INTO {self._values} (doc, path, rank, value)"
+            + " VALUES (?, ?, ?, ?)",
+            ((doc, path, *bson_order(value)) for path, value in path_items(content)),
+        )
+
+    def _delete_index_entries(self, connection: sqlite3.Connection, doc: int) -> None:
+        """Delete the text terms and values of the resource with the given number"""
+        connection.execute(f"DELETE FROM {self._terms} WHERE rowid = ?", (doc,))
+        connection.execute(f"DELETE FROM {self._values} WHERE doc = ?", (doc,))
+
+    def delete(self, connection: sqlite3.Connection, resource_id: str) -> bool:
+        """Delete a resource with its text terms and values
+
+        Returns whether the resource existed.
+        """
+        row = connection.execute(
+            f"DELETE FROM {self._resources} WHERE id = ? RETURNING doc, content",
+            (resource_id,),
+        ).fetchone()
+        if not row:
+            return False
+        self._delete_index_entries(connection, row[0])
+        self._count_words(
+            connection, word_changes(self._words_of(resource_id, row[1]), ())
+        )
+        return True
+
+    def suggest(
+        self, connection: sqlite3.Connection, prefix: str, limit: int
+    ) -> list[models.Suggestion]:
+        """Get the most frequent indexed words completing the last word of the prefix"""
+        return [
+            models.Suggestion(text=word, count=count)
+            for word, count in connection.execute(
+                f"SELECT word, count FROM {self._words} WHERE word >= ? AND word < ?"
+                + " ORDER BY count DESC, word LIMIT ?",
+                (*prefix_range(completed_word(prefix)), limit),
+            )
+        ]
+
+    def match_statement(
+        self, *, query: str, filters: list[models.Filter], ranking: str
+    ) -> tuple[str, list[Any]]:
+        """Build the statement selecting the number, ID and score of the matches"""
+        score_params: list[Any] = []
+        where_params: list[Any] = []
+        clauses: list[str] = []
+        text_query = parse_query(query) if query.strip() else None
+        if text_query is None:
+            source = f"{self._resources} r"
+            score = "NULL"
+        else:
+            source = (
+                f"{self._terms} JOIN {self._resources} r ON r.doc = {self._terms}.rowid"
+            )
+            expression = match_expression(text_query)
+            if expression is None:
+                clauses.append("0")
+            else:
+                clauses.append(f"{self._terms} MATCH ?")
+                where_params.append(expression)
+            if text_query.phrases or text_query.negated_phrases:
+                clauses.append("mass_matches_phrases(r.id, r.content, ?, ?)")
+                where_params.extend((query, self._encoded_text_index))
+            if ranking == "bm25":
+                score = f"-bm25({self._terms})"
+            else:
+                placeholders = ", ".join("?" * len(text_query.terms))
+                score = (
+                    "(SELECT total(value) FROM json_each(r.scores)"
+                    + f" WHERE key IN ({placeholders}))"
+                )
+                score_params.extend(sorted(text_query.terms))
+
+        filter_values: dict[str, list[str]] = defaultdict(list)
+        for item in filters:
+            filter_values[item.key].append(item.value)
+        for key, values in filter_values.items():
+            placeholders = ", ".join("?" * len(values))
+            if key == "id_":
+                clauses.append(f"r.id IN ({placeholders})")
+            else:
+                clauses.append(
+                    f"r.doc IN (SELECT doc FROM {self._values} WHERE path = ?"
+                    + f" AND rank = {STRING_RANK} AND value IN ({placeholders}))"
+                )
+                where_params.append(key)
+            where_params.extend(values)
+
+        statement = f"SELECT r.doc, r.id, {score} FROM {source}"
+        if clauses:
+            statement += " WHERE " + " AND ".join(clauses)
+        return statement, score_params + where_params
+
+    def order_by(
+        self, sorting_parameters: list[models.SortingParameter], *, scores: bool
+    ) -> tuple[str, list[Any]]:
+        """Build the ORDER BY clause for the matches like MongoDB sorts
+
+        Fields with several values are sorted by their smallest value when sorting
+        in ascending order and by their largest value otherwise.
+
+        Raises:
+            ValueError - when sorting by relevance without scores
+        """
+        # the same field can only be used once, like in the pipeline
+        orders = {param.field: param.order for param in sorting_parameters}
+        clauses: list[str] = []
+        params: list[Any] = []
+        for field, order in orders.items():
+            direction = "ASC" if order == models.SortOrder.ASCENDING else "DESC"
+            if order == models.SortOrder.RELEVANCE:
+                if not scores:
+                    raise ValueError(MISSING_TEXT_SCORE_MSG)
+                clauses.append("m.score DESC")
+            elif field == "id_":
+                clauses.append(f"m.id {direction}")
+            else:
+                value = (
+                    f"FROM {self._values} v WHERE v.doc = m.doc AND v.path = ?"
+                    + f" ORDER BY v.rank {direction}, v.value {direction} LIMIT 1"
+                )
+                clauses.append(f"coalesce((SELECT v.rank {value}), 1) {direction}")
+                clauses.append(f"coalesce((SELECT v.value {value}), 0) {direction}")
+                params.extend((field, field))
+        return ", ".join(clauses), params
+
+    def facet(self, connection: sqlite3.Connection, key: str) -> list[JsonObject]:
+        """Count the matches per value of the given key"""
+        ranks = ", ".join(map(str, FACET_RANKS))
+        counts = [
+            (bool(value) if rank == BOOLEAN_RANK else value, count)
+            for rank, value, count in connection.execute(
+                "SELECT v.rank, v.value, count(*) FROM temp.matches m"
+                + f" JOIN {self._values} v ON v.doc = m.doc"
+                + f" WHERE v.path = ? AND v.rank IN ({ranks}) GROUP BY v.rank, v.value",
+                (key,),
+            )
+        ]
+        return [
+            {"value": value, "count": count}
+            for value, count in sorted(counts, key=lambda item: bson_order(item[0]))
+        ]
+
+    def facet_values(  # noqa: PLR0913
+        self,
+        connection: sqlite3.Connection,
+        *,
+        facet: models.FieldLabel,
+        prefix: str,
+        query: str,
+        filters: list[models.Filter],
+        skip: int = 0,
+        limit: int | None = None,
+        ranking: str = "textscore",
+    ) -> models.FacetValues:
+        """Get the options of a facet whose text values start with the prefix
+
+        The values in the range of the prefix are read from the primary key of the
+        values table. Unless all resources are searched, they are joined with the
+        matches, which are collected in the temporary table like for a search.
+        """
+        source = f"{self._values} v"
+        if query.strip() or filters:
+            statement, params = self.match_statement(
+                query=query, filters=filters, ranking=ranking
+            )
+            connection.execute("DELETE FROM temp.matches")
+            connection.execute(
+                f"INSERT INTO temp.matches (doc, id, score) {statement}", params
+            )
+            source = f"temp.matches m JOIN {source} ON v.doc = m.doc"
+        options = (
+            f"SELECT v.value, count(*) AS count FROM {source} WHERE v.path = ?"
+            + f" AND v.rank = {STRING_RANK} AND v.value >= ? AND v.value < ?"
+            + " GROUP BY v.value"
+        )
+        options_params = (facet.key, *prefix_range(prefix))
+        count = connection.execute(
+            f"SELECT count(*) FROM ({options})", options_params
+        ).fetchone()[0]
+        rows = connection.execute(
+            f"{options} ORDER BY count DESC, v.value LIMIT ? OFFSET ?",
+            (*options_params, limit or -1, skip),
+        )
+        return models.FacetValues(
+            key=facet.key,
+            name=facet.name or utils.name_from_key(facet.key),
+            count=count,
+            options=[
+                models.FacetOption(value=value, count=count) for value, count in rows
+            ],
+        )
+
+    def search(  # noqa: PLR0913
+        self,
+        connection: sqlite3.Connection,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        ranking: str = "textscore",
+    ) -> dict[str, Any]:
+        """Search the resources and return results in the format of the aggregator
+
+        The matches are collected in a temporary table, from which the facets, the
+        count and the requested page of hits are then selected.
+
+        Raises:
+            ValueError - when sorting by relevance without a text query
+        """
+        order_by, order_params = self.order_by(
+            sorting_parameters, scores=bool(query.strip())
+        )
+        statement, params = self.match_statement(
+            query=query, filters=filters, ranking=ranking
+        )
+        connection.execute("DELETE FROM temp.matches")
+        connection.execute(
+            f"INSERT INTO temp.matches (doc, id, score) {statement}", params
+        )
+        count = connection.execute("SELECT count(*) FROM temp.matches").fetchone()[0]
+        facets = [
+            {
+                "key": facet.key,
+                "name": facet.name or utils.name_from_key(facet.key),
+                "options": self.facet(connection, facet.key),
+            }
+            for facet in facet_fields
+        ]
+        rows = connection.execute(
+            "SELECT m.id, r.content FROM temp.matches m"
+            + f" JOIN {self._resources} r ON r.doc = m.doc"
+            + f" ORDER BY {order_by} LIMIT ? OFFSET ?",
+            [*order_params, limit or -1, skip],
+        )
+        hits: list[dict[str, Any]] = [
+            {"content": json.loads(content), "id_": resource_id}
+            for resource_id, content in rows
+        ]
+        if selected_fields:
+            keys = [
+                "id_",
+                *(
+                    f"content.{field.key}"
+                    for field in selected_fields
+                    if field.key != "id_"
+                ),
+            ]
+            hits = [project(hit, keys) for hit in hits]
+
+        results: dict[str, Any] = {"hits": hits, "facets": facets}
+        if count:
+            results["count"] = count
+        return results
+
+    def plan(
+        self,
+        connection: sqlite3.Connection,
+        *,
+        query: str,
+        filters: list[models.Filter],
+        ranking: str,
+    ) -> list[str]:
+        """Get the query plan of the statement selecting the matches"""
+        statement, params = self.match_statement(
+            query=query, filters=filters, ranking=ranking
+        )
+        return [
+            row[3]
+            for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", params)
+        ]
+
+
+class SqliteResourceDao:
+    """A DAO for the resources of one class stored in an SQLite database"""
+
+    def __init__(self, *, database: SqliteDatabase, collection: SqliteCollection):
+        self._database = database
+        self._collection = collection
+
+    async def get_by_id(self, id_: ID) -> models.Resource:  # noqa: D102
+        content = await self._database.read_async(
+            lambda connection: self._collection.get(connection, str(id_))
+        )
+        if content is None:
+            raise ResourceNotFoundError(id_=id_)
+        return models.Resource(id_=str(id_), content=content)
+
+    async def update(self, dto: models.Resource) -> None:  # noqa: D102
+        def update(connection: sqlite3.Connection) -> bool:
+            if self._collection.get(connection, dto.id_) is None:
+                return False
+            self._collection.upsert(connection, dto)
+            return True
+
+        if not await self._database.write_async(update):
+            raise ResourceNotFoundError(id_=dto.id_)
+
+    async def delete(self, id_: ID) -> None:  # noqa: D102
+        if not await self._database.write_async(
+            lambda connection: self._collection.delete(connection, str(id_))
+        ):
+            raise ResourceNotFoundError(id_=id_)
+
+    async def find_one(self, *, mapping: Mapping[str, Any]) -> models.Resource:  # noqa: D102
+        hits = [hit async for hit in self.find_all(mapping=mapping)]
+        if not hits:
+            raise NoHitsFoundError(mapping=mapping)
+        if len(hits) > 1:
+            raise MultipleHitsFoundError(mapping=mapping)
+        return hits[0]
+
+    async def find_all(  # noqa: D102
+        self, *, mapping: Mapping[str, Any]
+    ) -> AsyncIterator[models.Resource]:
+        resources = await self._database.read_async(self._collection.all)
+        for resource_id, content in resources:
+            document = {"id_": resource_id, "content": content}
+            if all(
+                value in path_values(document, key.split("."))
+                for key, value in mapping.items()
+            ):
+                yield models.Resource(id_=resource_id, content=content)
+
+    async def insert(self, dto: models.Resource) -> None:  # noqa: D102
+        def insert(connection: sqlite3.Connection) -> bool:
+            if self._collection.get(connection, dto.id_) is not None:
+                return False
+            self._collection.upsert(connection, dto)
+            return True
+
+        if not await self._database.write_async(insert):
+            raise ResourceAlreadyExistsError(id_=dto.id_)
+
+    async def upsert(self, dto: models.Resource) -> None:  # noqa: D102
+        await self._database.write_async(
+            lambda connection: self._collection.upsert(connection, dto)
+        )
+
+
+class SqliteDaoCollection(DaoCollectionPort):
+    """Provides a DAO for each configured resource class using SQLite tables"""
+
+    def __init__(
+        self,
+        *,
+        config: SearchableClassesConfig,
+        database: SqliteDatabase,
+        collection_suffix: str = "",
+    ):
+        """Initialize the DAOs for the tables in the given database
+
+        If a collection suffix is given, the DAOs will not use the live tables,
+        but shadow tables with the suffix appended to the class name.
+        """
+        self._config = config
+        self._database = database
+        self._collection_suffix = collection_suffix
+        self._collections = {
+            class_name: SqliteCollection(
+                class_name + collection_suffix,
+                text_weights=utils.text_index_weights(searchable_class),
+                search_text_paths=utils.search_text_paths(searchable_class),
+            )
+            for class_name, searchable_class in config.searchable_classes.items()
+        }
+        self._resource_daos = {
+            class_name: SqliteResourceDao(database=database, collection=collection)
+            for class_name, collection in self._collections.items()
+        }
+        self._tables_created = False
+
+    def _collection(self, class_name: str) -> SqliteCollection:
+        """Get the tables used for the given resource class"""
+        try:
+            return self._collections[class_name]
+        except KeyError as err:
+            raise DaoNotFoundError(class_name=class_name) from err
+
+    def get_dao(self, *, class_name: str) -> SqliteResourceDao:
+        """Returns a dao for the given resource class name
+
+        Raises:
+            DaoNotFoundError: if the DAO isn't found
+        """
+        try:
+            return self._resource_daos[class_name]
+        except KeyError as err:
+            raise DaoNotFoundError(class_name=class_name) from err
+
+    async def bulk_write(
+        self,
+        *,
+        class_name: str,
+        upserts: Sequence[models.Resource] = (),
+        deletions: Sequence[str] = (),
+    ) -> None:
+        """Upsert and delete resources of the given class in one transaction
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        collection = self._collection(class_name)
+        # like MongoDB collections, the tables are created when first written to
+        self.create_collections_and_indexes_if_needed()
+
+        def write(connection: sqlite3.Connection) -> None:
+            for resource in upserts:
+                collection.upsert(connection, resource)
+            for resource_id in deletions:
+                collection.delete(connection, resource_id)
+
+        await self._database.write_async(write)
+
+    def create_collections_and_indexes_if_needed(self) -> None:
+        """Create the tables and indexes if this hasn't been done yet.
+
+        The text index is rebuilt if the searchable fields have been changed.
+        """
+        if self._tables_created:
+            return
+
+        def create(connection: sqlite3.Connection) -> None:
+            for collection in self._collections.values():
+                collection.create(connection)
+                if collection.index_text(connection):
+                    log.info("Rebuilt text index of table %s", collection.name)
+                elif collection.index_words(connection):
+                    log.info("Counted the words of table %s", collection.name)
+
+        self._database.write(create)
+        self._tables_created = True
+
+    def recreate_collections_and_indexes(self) -> None:
+        """Recreate the tables and indexes if they have been removed."""
+        self._tables_created = False
+        self.create_collections_and_indexes_if_needed()
+
+    def drop_collections(self) -> None:
+        """Drop all tables that are used by this DAO collection."""
+
+        def drop(connection: sqlite3.Connection) -> None:
+            for collection in self._collections.values():
+                collection.drop(connection)
+
+        self._database.write(drop)
+        self._tables_created = False
+
+    def count_resources(self, *, class_name: str) -> int:
+        """Count the resources of the given class.
+
+        Raises:
+            DaoNotFoundError: if the resource class is not configured
+        """
+        collection = self._collection(class_name)
+        try:
+            return self._database.read(collection.count)
+        except sqlite3.OperationalError:
+            # the tables have not been created yet
+            return 0
+
+    def swap_in_collections(self) -> None:
+        """Atomically replace the live tables with the shadow tables."""
+        if not self._collection_suffix:
+            raise RuntimeError("Only shadow collections can be swapped in.")
+
+        def swap(connection: sqlite3.Connection) -> None:
+            for class_name, collection in self._collections.items():
+                collection.create(connection)
+                collection.rename(connection, class_name)
+
+        self._database.write(swap)
+        self._tables_created = False
+
+
+class SqliteAggregator(AggregatorPort):
+    """Searches the resources of one class in an SQLite database"""
+
+    def __init__(
+        self,
+        *,
+        database: SqliteDatabase,
+        collection: SqliteCollection,
+        ranking: str = "textscore",
+    ):
+        """Initialize with the database, the tables and the ranking of text searches"""
+        self._database = database
+        self._collection = collection
+        self._ranking = ranking
+
+    async def _read(self, function: Callable[[sqlite3.Connection], T], **kwargs) -> T:
+        """Read from the database, raising an AggregationError if this fails"""
+        try:
+            return await self._database.read_async(function)
+        except (ValueError, sqlite3.Error) as err:
+            details = ", ".join(f"{key}={value}" for key, value in kwargs.items())
+            raise AggregationError(
+                message=str(err),
+                details=details,
+                missing_index=isinstance(err, sqlite3.OperationalError)
+                and "no such table" in str(err),
+            ) from err
+
+    async def aggregate(  # noqa: PLR0913, D102
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        timer: PhaseTimer | None = None,
+    ) -> JsonObject:
+        collection = self._collection
+
+        def search(connection: sqlite3.Connection) -> dict[str, Any] | None:
+            # don't search if the collection is empty
+            if collection.is_empty(connection):
+                return None
+            return collection.search(
+                connection,
+                selected_fields=selected_fields,
+                facet_fields=facet_fields,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+                ranking=self._ranking,
+            )
+
+        with timed(timer, "db"):
+            results = await self._read(
+                search,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+            )
+        if timer:
+            timer.annotate("strategy", "sqlite" if results is not None else "empty")
+        return models.QueryResults().model_dump() if results is None else results
+
+    def build_pipeline(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> list[JsonObject]:
+        # the pipeline that the MongoDB backend would run for the same query
+        return utils.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+
+    async def explain(  # noqa: D102, PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        verbosity: str = "executionStats",
+    ) -> models.QueryExplanation:
+        pipeline = self.build_pipeline(
+            query=query,
+            filters=filters,
+            facet_fields=facet_fields,
+            selected_fields=selected_fields,
+            skip=skip,
+            limit=limit,
+            sorting_parameters=sorting_parameters,
+        )
+        plan = await self._read(
+            lambda connection: self._collection.plan(
+                connection, query=query, filters=filters, ranking=self._ranking
+            ),
+            query=query,
+            filters=filters,
+        )
+        execution_stats: dict[str, Any] = {
+            "backend": "sqlite",
+            "queryPlanner": {
+                "winningPlan": {"inputStages": [{"stage": step} for step in plan]}
+            },
+        }
+        if verbosity != "queryPlanner":
+            started = perf_counter()
+            results = await self.aggregate(
+                selected_fields=selected_fields,
+                facet_fields=facet_fields,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+            )
+            execution_stats["executionStats"] = {
+                "nReturned": len(models.QueryResults(**results).hits),  # type: ignore
+                "executionTimeMillis": round((perf_counter() - started) * 1000),
+            }
+        return models.QueryExplanation(
+            pipeline=pipeline, execution_stats=execution_stats
+        )
+
+    async def suggest(self, *, prefix: str, limit: int) -> list[models.Suggestion]:  # noqa: D102
+        return await self._read(
+            lambda connection: self._collection.suggest(connection, prefix, limit),
+            prefix=prefix,
+            limit=limit,
+        )
+
+    async def facet_values(  # noqa: D102, PLR0913
+        self,
+        *,
+        facet: models.FieldLabel,
+        prefix: str,
+        query: str,
+        filters: list[models.Filter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.FacetValues:
+        return await self._read(
+            lambda connection: self._collection.facet_values(
+                connection,
+                facet=facet,
+                prefix=prefix,
+                query=query,
+                filters=filters,
+                skip=skip,
+                limit=limit,
+                ranking=self._ranking,
+            ),
+            key=facet.key,
+            prefix=prefix,
+            query=query,
+            filters=filters,
+        )
+
+
+class SqliteAggregatorCollection(AggregatorCollectionPort):
+    """Provides an SQLite aggregator for each configured resource class"""
+
+    def __init__(
+        self,
+        *,
+        config: SearchableClassesConfig,
+        database: SqliteDatabase,
+        collection_suffix: str = "",
+        ranking: str = "textscore",
+    ):
+        """Initialize the aggregators for the tables in the given database"""
+        self._aggregators = {
+            class_name: SqliteAggregator(
+                database=database,
+                collection=SqliteCollection(
+                    class_name + collection_suffix,
+                    text_weights=utils.text_index_weights(searchable_class),
+                    search_text_paths=utils.search_text_paths(searchable_class),
+                ),
+                ranking=ranking,
+            )
+            for class_name, searchable_class in config.searchable_classes.items()
+        }
+
+    def get_aggregator(self, *, class_name: str) -> AggregatorPort:
+        """Returns the aggregator for a given resource class name
+
+        Raises:
+            AggregatorNotFoundError: if the aggregator isn't found
+        """
+        try:
+            return self._aggregators[class_name]
+        except KeyError as err:
+            raise AggregatorNotFoundError(class_name=class_name) from err
@@ -0,0 +1,159 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Completion of prefixes from the sorted words in the text index and facet values
+
+The search backends keep the number of resources containing each word that is covered
+by the text index and update these counts whenever resources are written. The words
+are normalized like the text in the index, but they are not stemmed, so that they can
+be offered to users as completions. A prefix is completed with the most frequent words
+starting with it, which only requires looking at a range of the sorted words.
+The options of a facet are completed in the same way from a range of its sorted
+values, but counted among the resources matching the current search.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from mass.adapters.outbound.text_search import (
+    STOP_WORDS,
+    indexed_texts,
+    normalize,
+    tokenize,
+)
+from mass.adapters.outbound.utils import name_from_key
+from mass.core import models
+
+# the suffix of the names of the tables and collections holding the word counts
+WORDS_SUFFIX = "__words"
+# a character that sorts after all characters that can occur in words
+MAX_CHARACTER = "\U0010ffff"
+
+LAST_WORD_PATTERN = re.compile(r"\w*$")
+
+
+def indexed_words(document: Any, weights: Mapping[str, int] | None = None) -> set[str]:
+    """Get the distinct words of the indexed strings that are not stop words"""
+    return {
+        word
+        for text, _ in indexed_texts(document, weights)
+        for word in tokenize(text)
+        if word not in STOP_WORDS
+    }
+
+
+def word_changes(old_words: Iterable[str], new_words: Iterable[str]) -> Counter[str]:
+    """Get how the word counts change when a document with the old words is replaced
+    by a document with the new words
+    """
+    old, new = set(old_words), set(new_words)
+    changes = Counter(new - old)
+    changes.subtract(old - new)
+    return changes
+
+
+def completed_word(prefix: str) -> str:
+    """Get the normalized beginning of the last word of the prefix
+
+    The result is empty if the prefix does not end with a word character, since then
+    the user has not started to type the next word yet.
+    """
+    match = LAST_WORD_PATTERN.search(normalize(prefix))
+    return match.group() if match else ""
+
+
+def prefix_range(prefix: str) -> tuple[str, str]:
+    """Get the bounds of the range of the sorted strings that start with the prefix"""
+    return prefix, prefix + MAX_CHARACTER
+
+
+def facet_values_page(
+    facet: models.FieldLabel,
+    counts: Mapping[str, int],
+    *,
+    skip: int = 0,
+    limit: int | None = None,
+) -> models.FacetValues:
+    """Get a page of the options of a facet with the given counts
+
+    The options are ordered by their counts, the most frequent first, and then by
+    their values.
+    """
+    ranked: Iterable[tuple[str, int]] = counts.items()
+    if limit:
+        ranked = heapq.nsmallest(
+            skip + limit, ranked, key=lambda item: (-item[1], item[0])
+        )[skip:]
+    else:
+        ranked = sorted(ranked, key=lambda item: (-item[1], item[0]))[skip:]
+    return models.FacetValues(
+        key=facet.key,
+        name=facet.name or name_from_key(facet.key),
+        count=len(counts),
+        options=[
+            models.FacetOption(value=value, count=count) for value, count in ranked
+        ],
+    )
+
+
+class WordCounts:
+    """The number of documents containing each word, with the words kept in order"""
+
+    def __init__(self):
+        """Initialize without any words"""
+        self._counts: dict[str, int] = {}
+        self._words: list[str] = []
+
+    def __len__(self) -> int:
+        """Get the number of distinct words"""
+        return len(self._words)
+
+    def update(self, changes: Mapping[str, int]) -> None:
+        """Change the counts of the given words, removing the words that are not
+        contained in any document anymore
+        """
+        counts = self._counts
+        for word, change in changes.items():
+            count = counts.get(word, 0) + change
+            if count > 0:
+                if word not in counts:
+                    insort(self._words, word)
+                counts[word] = count
+            elif word in counts:
+                del counts[word]
+                del self._words[bisect_left(self._words, word)]
+
+    def clear(self) -> None:
+        """Remove all words"""
+        self._counts.clear()
+        self._words.clear()
+
+    def complete(self, prefix: str, limit: int) -> list[models.Suggestion]:
+        """Get the most frequent words completing the last word of the prefix"""
+        lower, upper = prefix_range(completed_word(prefix))
+        start = bisect_left(self._words, lower)
+        end = bisect_left(self._words, upper, lo=start)
+        counts = self._counts
+        return [
+            models.Suggestion(text=word, count=counts[word])
+            for word in heapq.nsmallest(
+                limit, self._words[start:end], key=lambda word: (-counts[word], word)
+            )
+        ]
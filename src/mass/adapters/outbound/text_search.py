@@ -0,0 +1,524 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Text analysis and scoring compatible with the text indexes of MongoDB
+
+This reproduces how MongoDB tokenizes, filters and stems English text and how it
+computes the text score of documents, so that other search backends can return the
+same results in the same order as a MongoDB text index. The text index either covers
+all strings of the documents like a wildcard text index, or only the strings at the
+paths given by weights, like a text index on specific fields. Documents can also carry
+a compact search text built from some of their fields, which is then the only field
+covered by the text index.
+"""
+
+import re
+import unicodedata
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from hexkit.custom_types import JsonObject
+
+# the field of the documents holding the compact search text, if configured
+SEARCH_TEXT_FIELD = "_search_text"
+
+# the English stop words that are ignored by MongoDB text indexes
+STOP_WORDS = frozenset([
+    "a", "able", "about", "above", "abst", "accordance", "according", "accordingly",
+    "across", "act", "actually", "added", "adj", "affected", "affecting", "affects",
+    "after", "afterwards", "again", "against", "ah", "all", "almost", "alone", "along",
+    "already", "also", "although", "always", "am", "among", "amongst", "an", "and",
+    "announce", "another", "any", "anybody", "anyhow", "anymore", "anyone", "anything",
+    "anyway", "anyways", "anywhere", "apparently", "approximately", "are", "aren",
+    "arent", "arise", "around", "as", "aside", "ask", "asking", "at", "auth",
+    "available", "away", "awfully", "b", "back", "be", "became", "because", "become",
+    "becomes", "becoming", "been", "before", "beforehand", "begin", "beginning",
+    "beginnings", "begins", "behind", "being", "believe", "below", "beside", "besides",
+    "between", "beyond", "biol", "both", "brief", "briefly", "but", "by", "c", "ca",
+    "came", "can", "cannot", "can't", "cause", "causes", "certain", "certainly", "co",
+    "com", "come", "comes", "contain", "containing", "contains", "could", "couldnt",
+    "d", "date", "did", "didn't", "different", "do", "does", "doesn't", "doing", "done",
+    "don't", "down", "downwards", "due", "during", "e", "each", "ed", "edu", "effect",
+    "eg", "eight", "eighty", "either", "else", "elsewhere", "end", "ending", "enough",
+    "especially", "et", "et-al", "etc", "even", "ever", "every", "everybody",
+    "everyone", "everything", "everywhere", "ex", "except", "f", "far", "few", "ff",
+    "fifth", "first", "five", "fix", "followed", "following", "follows", "for",
+    "former", "formerly", "forth", "found", "four", "from", "further", "furthermore",
+    "g", "gave", "get", "gets", "getting", "give", "given", "gives", "giving", "go",
+    "goes", "gone", "got", "gotten", "h", "had", "happens", "hardly", "has", "hasn't",
+    "have", "haven't", "having", "he", "hed", "hence", "her", "here", "hereafter",
+    "hereby", "herein", "heres", "hereupon", "hers", "herself", "hes", "hi", "hid",
+    "him", "himself", "his", "hither", "home", "how", "howbeit", "however", "hundred",
+    "i", "id", "ie", "if", "i'll", "im", "immediate", "immediately", "importance",
+    "important", "in", "inc", "indeed", "index", "information", "instead", "into",
+    "invention", "inward", "is", "isn't", "it", "itd", "it'll", "its", "itself", "i've",
+    "j", "just", "k", "keep", "keeps", "kept", "kg", "km", "know", "known", "knows",
+    "l", "largely", "last", "lately", "later", "latter", "latterly", "least", "less",
+    "lest", "let", "lets", "like", "liked", "likely", "line", "little", "'ll", "look",
+    "looking", "looks", "ltd", "m", "made", "mainly", "make", "makes", "many", "may",
+    "maybe", "me", "mean", "means", "meantime", "meanwhile", "merely", "mg", "might",
+    "million", "miss", "ml", "more", "moreover", "most", "mostly", "mr", "mrs", "much",
+    "mug", "must", "my", "myself", "n", "na", "name", "namely", "nay", "nd", "near",
+    "nearly", "necessarily", "necessary", "need", "needs", "neither", "never",
+    "nevertheless", "new", "next", "nine", "ninety", "no", "nobody", "non", "none",
+    "nonetheless", "noone", "nor", "normally", "nos", "not", "noted", "nothing", "now",
+    "nowhere", "o", "obtain", "obtained", "obviously", "of", "off", "often", "oh", "ok",
+    "okay", "old", "omitted", "on", "once", "one", "ones", "only", "onto", "or", "ord",
+    "other", "others", "otherwise", "ought", "our", "ours", "ourselves", "out",
+    "outside", "over", "overall", "owing", "own", "p", "page", "pages", "part",
+    "particular", "particularly", "past", "per", "perhaps", "placed", "please", "plus",
+    "poorly", "possible", "possibly", "potentially", "pp", "predominantly", "present",
+    "previously", "primarily", "probably", "promptly", "proud", "provides", "put", "q",
+    "que", "quickly", "quite", "qv", "r", "ran", "rather", "rd", "re", "readily",
+    "really", "recent", "recently", "ref", "refs", "regarding", "regardless", "regards",
+    "related", "relatively", "research", "respectively", "resulted", "resulting",
+    "results", "right", "run", "s", "said", "same", "saw", "say", "saying", "says",
+    "sec", "section", "see", "seeing", "seem", "seemed", "seeming", "seems", "seen",
+    "self", "selves", "sent", "seven", "several", "shall", "she", "shed", "she'll",
+    "shes", "should", "shouldn't", "show", "showed", "shown", "showns", "shows",
+    "significant", "significantly", "similar", "similarly", "since", "six", "slightly",
+    "so", "some", "somebody", "somehow", "someone", "somethan", "something", "sometime",
+    "sometimes", "somewhat", "somewhere", "soon", "sorry", "specifically", "specified",
+    "specify", "specifying", "still", "stop", "strongly", "sub", "substantially",
+    "successfully", "such", "sufficiently", "suggest", "sup", "sure", "t", "take",
+    "taken", "taking", "tell", "tends", "th", "than", "thank", "thanks", "thanx",
+    "that", "that'll", "thats", "that've", "the", "their", "theirs", "them",
+    "themselves", "then", "thence", "there", "thereafter", "thereby", "thered",
+    "therefore", "therein", "there'll", "thereof", "therere", "theres", "thereto",
+    "thereupon", "there've", "these", "they", "theyd", "they'll", "theyre", "they've",
+    "think", "this", "those", "thou", "though", "thoughh", "thousand", "throug",
+    "through", "throughout", "thru", "thus", "til", "tip", "to", "together", "too",
+    "took", "toward", "towards", "tried", "tries", "truly", "try", "trying", "ts",
+    "twice", "two", "u", "un", "under", "unfortunately", "unless", "unlike", "unlikely",
+    "until", "unto", "up", "upon", "ups", "us", "use", "used", "useful", "usefully",
+    "usefulness", "uses", "using", "usually", "v", "value", "various", "'ve", "very",
+    "via", "viz", "vol", "vols", "vs", "w", "want", "wants", "was", "wasn't", "way",
+    "we", "wed", "welcome", "we'll", "went", "were", "weren't", "we've", "what",
+    "whatever", "what'll", "whats", "when", "whence", "whenever", "where", "whereafter",
+    "whereas", "whereby", "wherein", "wheres", "whereupon", "wherever", "whether",
+    "which", "while", "whim", "whither", "who", "whod", "whoever", "whole", "who'll",
+    "whom", "whomever", "whos", "whose", "why", "widely", "willing", "wish", "with",
+    "within", "without", "won't", "words", "world", "would", "wouldn't", "www", "x",
+    "y", "yes", "yet", "you", "youd", "you'll", "your", "youre", "yours", "yourself",
+    "yourselves", "you've", "z", "zero",
+])  # fmt: skip
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# like in MongoDB, a hyphen only negates a word or phrase at the start of a term
+QUERY_PATTERN = re.compile(r'(?:(?<!\S)(-))?"([^"]*)"?|(?:(?<!\S)(-))?(\w+)')
+
+VOWELS = frozenset("aeiouy")
+DOUBLES = ("bb", "dd", "ff", "gg", "mm", "nn", "pp", "rr", "tt")
+LI_ENDINGS = frozenset("cdeghkmnrt")
+
+EXCEPTIONAL_FORMS = {
+    "skis": "ski",
+    "skies": "sky",
+    "dying": "die",
+    "lying": "lie",
+    "tying": "tie",
+    "idly": "idl",
+    "gently": "gentl",
+    "ugly": "ugli",
+    "early": "earli",
+    "only": "onli",
+    "singly": "singl",
+    "sky": "sky",
+    "news": "news",
+    "howe": "howe",
+    "atlas": "atlas",
+    "cosmos": "cosmos",
+    "bias": "bias",
+    "andes": "andes",
+}
+EXCEPTIONAL_STEMS = frozenset(
+    [
+        "inning",
+        "outing",
+        "canning",
+        "herring",
+        "earring",
+        "proceed",
+        "exceed",
+        "succeed",
+    ]
+)
+
+STEP_2_SUFFIXES = {
+    "ization": "ize",
+    "ational": "ate",
+    "fulness": "ful",
+    "ousness": "ous",
+    "iveness": "ive",
+    "tional": "tion",
+    "biliti": "ble",
+    "lessli": "less",
+    "entli": "ent",
+    "ation": "ate",
+    "alism": "al",
+    "aliti": "al",
+    "ousli": "ous",
+    "iviti": "ive",
+    "fulli": "ful",
+    "enci": "ence",
+    "anci": "ance",
+    "abli": "able",
+    "izer": "ize",
+    "ator": "ate",
+    "alli": "al",
+    "bli": "ble",
+    "ogi": "og",
+    "li": "",
+}
+STEP_3_SUFFIXES = {
+    "ational": "ate",
+    "tional": "tion",
+    "alize": "al",
+    "icate": "ic",
+    "iciti": "ic",
+    "ative": "",
+    "ical": "ic",
+    "ness": "",
+    "ful": "",
+}
+STEP_4_SUFFIXES = [
+    "ement", "ance", "ence", "able", "ible", "ment", "ant", "ent", "ism", "ate", "iti",
+    "ous", "ive", "ize", "ion", "al", "er", "ic",
+]  # fmt: skip
+
+
+def _region_start(word: str, start: int) -> int:
+    """Get the start of the region after the first non-vowel following a vowel"""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _ends_with_short_syllable(word: str) -> bool:
+    """Check whether the word ends with a short syllable"""
+    if len(word) == 2:
+        return word[0] in VOWELS and word[1] not in VOWELS
+    return (
+        len(word) > 2
+        and word[-3] not in VOWELS
+        and word[-2] in VOWELS
+        and word[-1] not in VOWELS
+        and word[-1] not in "wxY"
+    )
+
+
+def _longest_suffix(word: str, suffixes) -> str | None:
+    """Get the longest of the given suffixes (ordered by length) of the word"""
+    return next((suffix for suffix in suffixes if word.endswith(suffix)), None)
+
+
+def _step_1a(word: str) -> str:
+    """Remove plural suffixes"""
+    suffix = _longest_suffix(word, ("sses", "ied", "ies", "us", "ss", "s"))
+    if suffix == "sses":
+        return word[:-2]
+    if suffix in ("ied", "ies"):
+        return word[:-3] + ("i" if len(word) > 4 else "ie")
+    if suffix == "s" and any(char in VOWELS for char in word[:-2]):
+        return word[:-1]
+    return word
+
+
+def _step_1b(word: str, r1: int) -> str:
+    """Remove past participle and gerund suffixes"""
+    suffix = _longest_suffix(word, ("eedly", "ingly", "edly", "eed", "ing", "ed"))
+    if suffix in ("eed", "eedly"):
+        if len(word) - len(suffix) >= r1:
+            word = word[: -len(suffix)] + "ee"
+    elif suffix and any(char in VOWELS for char in word[: -len(suffix)]):
+        word = word[: -len(suffix)]
+        if word.endswith(("at", "bl", "iz")):
+            word += "e"
+        elif word.endswith(DOUBLES):
+            word = word[:-1]
+        elif _ends_with_short_syllable(word) and r1 >= len(word):
+            word += "e"
+    return word
+
+
+def _step_1c(word: str) -> str:
+    """Replace a final y after a consonant by i"""
+    if len(word) > 2 and word[-1] in "yY" and word[-2] not in VOWELS:
+        return word[:-1] + "i"
+    return word
+
+
+def _step_2(word: str, r1: int) -> str:
+    """Replace derivational suffixes in the first region"""
+    suffix = _longest_suffix(word, sorted(STEP_2_SUFFIXES, key=len, reverse=True))
+    if suffix is None or len(word) - len(suffix) < r1:
+        return word
+    stem = word[: -len(suffix)]
+    if suffix == "ogi" and not stem.endswith("l"):
+        return word
+    if suffix == "li" and (not stem or stem[-1] not in LI_ENDINGS):
+        return word
+    return stem + STEP_2_SUFFIXES[suffix]
+
+
+def _step_3(word: str, r1: int, r2: int) -> str:
+    """Replace further derivational suffixes in the first region"""
+    suffix = _longest_suffix(word, sorted(STEP_3_SUFFIXES, key=len, reverse=True))
+    if suffix is None or len(word) - len(suffix) < r1:
+        return word
+    if suffix == "ative" and len(word) - len(suffix) < r2:
+        return word
+    return word[: -len(suffix)] + STEP_3_SUFFIXES[suffix]
+
+
+def _step_4(word: str, r2: int) -> str:
+    """Remove residual suffixes in the second region"""
+    suffix = _longest_suffix(word, STEP_4_SUFFIXES)
+    if suffix is None or len(word) - len(suffix) < r2:
+        return word
+    stem = word[: -len(suffix)]
+    if suffix == "ion" and not stem.endswith(("s", "t")):
+        return word
+    return stem
+
+
+def _step_5(word: str, r1: int, r2: int) -> str:
+    """Remove a final e or the second l of a final double l"""
+    position = len(word) - 1
+    if word.endswith("e"):
+        if position >= r2 or (
+            position >= r1 and not _ends_with_short_syllable(word[:-1])
+        ):
+            return word[:-1]
+    elif word.endswith("ll") and position >= r2:
+        return word[:-1]
+    return word
+
+
+def stem(word: str) -> str:
+    """Stem a lower case English word using the Porter2 algorithm
+
+    This is the Snowball stemmer for English that is used by MongoDB text indexes.
+    """
+    if len(word) <= 2:
+        return word
+    if word in EXCEPTIONAL_FORMS:
+        return EXCEPTIONAL_FORMS[word]
+
+    # mark consonant y as Y
+    if word[0] == "y":
+        word = "Y" + word[1:]
+    word = re.sub(r"(?<=[aeiouy])y", "Y", word)
+
+    for prefix in ("gener", "commun", "arsen"):
+        if word.startswith(prefix):
+            r1 = len(prefix)
+            break
+    else:
+        r1 = _region_start(word, 0)
+    r2 = _region_start(word, r1)
+
+    word = _step_1a(word)
+    if word not in EXCEPTIONAL_STEMS:
+        word = _step_1b(word, r1)
+        word = _step_1c(word)
+        word = _step_2(word, r1)
+        word = _step_3(word, r1, r2)
+        word = _step_4(word, r2)
+        word = _step_5(word, r1, r2)
+    return word.replace("Y", "y")
+
+
+def normalize(text: str) -> str:
+    """Normalize text by folding its case and removing diacritics"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Split text into normalized words"""
+    return (match.group() for match in TOKEN_PATTERN.finditer(normalize(text)))
+
+
+def terms(text: str) -> Iterator[str]:
+    """Get the stemmed terms of the words of the text that are not stop words"""
+    return (stem(word) for word in tokenize(text) if word not in STOP_WORDS)
+
+
+def string_values(value: Any) -> Iterator[str]:
+    """Get all strings contained in a JSON value, descending into objects and arrays"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from string_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from string_values(item)
+
+
+def path_strings(value: Any, path: Sequence[str]) -> Iterator[str]:
+    """Get the strings at the given path of a JSON value, descending into arrays"""
+    if isinstance(value, list):
+        for item in value:
+            yield from path_strings(item, path)
+    elif not path:
+        if isinstance(value, str):
+            yield value
+    elif isinstance(value, dict) and path[0] in value:
+        yield from path_strings(value[path[0]], path[1:])
+
+
+def path_targets(value: Any, path: Sequence[str]) -> Iterator[Any]:
+    """Get the values at the given path of a JSON value, descending into arrays"""
+    if not path:
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from path_targets(item, path)
+    elif isinstance(value, dict) and path[0] in value:
+        yield from path_targets(value[path[0]], path[1:])
+
+
+def search_text(document: Any, paths: Sequence[str]) -> str:
+    """Build the compact search text from the strings at the given paths
+
+    The strings are collected from nested objects and arrays as well. They are
+    case-folded, deduplicated and joined with line breaks, so that the phrases of a
+    text query cannot span two of them.
+    """
+    texts: dict[str, None] = {}
+    for path in paths:
+        for value in path_targets(document, path.split(".")):
+            for text in string_values(value):
+                texts.setdefault(text.casefold())
+    return "\n".join(texts)
+
+
+def indexed_document(
+    resource_id: str,
+    content: JsonObject,
+    search_text_paths: Sequence[str] | None = None,
+) -> JsonObject:
+    """Get a resource as stored in the database for analysing its text
+
+    If search text paths are given, the document carries the compact search text
+    built from the strings at these paths.
+    """
+    document: dict[str, Any] = {"_id": resource_id, "content": content}
+    if search_text_paths is not None:
+        document[SEARCH_TEXT_FIELD] = search_text(document, search_text_paths)
+    return document
+
+
+def indexed_texts(
+    document: Any, weights: Mapping[str, int] | None = None
+) -> Iterator[tuple[str, int]]:
+    """Get the strings of the document that are covered by a text index
+
+    Without weights, all strings are covered with the same weight, like by a wildcard
+    text index. Otherwise only the strings at the dotted paths of the weights are
+    covered, along with the weight of their path.
+    """
+    if weights is None:
+        for text in string_values(document):
+            yield text, 1
+        return
+    for path, weight in weights.items():
+        for text in path_strings(document, path.split(".")):
+            yield text, weight
+
+
+def add_term_scores(text: str, scores: dict[str, float], weight: float = 1) -> None:
+    """Add the scores of all terms of the text to the given term scores
+
+    Repeated terms contribute with decreasing frequency, terms making up a larger
+    part of the text get a higher score, and a term that is identical to the whole
+    text gets a small boost, like in MongoDB.
+    """
+    frequencies: dict[str, tuple[int, float]] = {}
+    tokens = 0
+    for term in terms(text):
+        count, frequency = frequencies.get(term, (0, 0))
+        frequencies[term] = (count + 1, frequency + 1 / 2**count)
+        tokens += 1
+    for term, (count, frequency) in frequencies.items():
+        coefficient = 0.5 * count / tokens + 0.5
+        adjustment = 1.1 if normalize(text) == term else 1
+        scores[term] = (
+            scores.get(term, 0) + weight * frequency * coefficient * adjustment
+        )
+
+
+def term_scores(
+    document: Any, weights: Mapping[str, int] | None = None
+) -> dict[str, float]:
+    """Compute the scores of all terms in the indexed strings of the document
+
+    Every string value is scored separately and multiplied with the weight of its
+    field. Without weights, all strings are indexed with the same weight.
+    """
+    scores: dict[str, float] = {}
+    for text, weight in indexed_texts(document, weights):
+        add_term_scores(text, scores, weight)
+    return scores
+
+
+@dataclass
+class TextQuery:
+    """A parsed text search query
+
+    Like in MongoDB, words are combined with a logical OR, while all phrases in
+    double quotes must be contained in the document. Words and phrases preceded by a
+    hyphen must not be contained in the document. The words of a phrase also count
+    as search terms.
+    """
+
+    terms: set[str] = field(default_factory=set)
+    negated_terms: set[str] = field(default_factory=set)
+    phrases: list[str] = field(default_factory=list)
+    negated_phrases: list[str] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, query: str) -> "TextQuery":
+        """Parse a text search query"""
+        text_query = cls()
+        for match in QUERY_PATTERN.finditer(query):
+            phrase_negation, phrase, word_negation, word = match.groups()
+            if word is not None:
+                target = text_query.negated_terms if word_negation else text_query.terms
+                target.update(terms(word))
+            elif phrase_negation:
+                text_query.negated_phrases.append(normalize(phrase))
+            else:
+                text_query.phrases.append(normalize(phrase))
+                text_query.terms.update(terms(phrase))
+        return text_query
+
+    def matches_phrases(
+        self, document: Any, weights: Mapping[str, int] | None = None
+    ) -> bool:
+        """Check the phrase conditions of the query against the indexed strings"""
+        if not self.phrases and not self.negated_phrases:
+            return True
+        texts = [normalize(text) for text, _ in indexed_texts(document, weights)]
+        return all(
+            any(phrase in text for text in texts) for phrase in self.phrases
+        ) and not any(
+            phrase in text for phrase in self.negated_phrases for text in texts
+        )
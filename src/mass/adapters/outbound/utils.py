@@ -14,13 +14,18 @@
 # limitations under the License.
 #
 
-"""Utility functions for building the aggregation pipeline used by query handler"""
+"""Utility functions for building the aggregation pipeline used by query handler
+and for tagging database operations
+"""
 
+import re
 from collections import defaultdict
 from typing import Any
 
+from hexkit.correlation import correlation_id_var
 from hexkit.custom_types import JsonObject
 
+from mass.adapters.outbound.text_search import SEARCH_TEXT_FIELD
 from mass.core import models
 
 SORT_ORDER_CONVERSION: JsonObject = {
@@ -30,11 +35,61 @@ SORT_ORDER_CONVERSION: JsonObject = {
 }
 
 
+def operation_comment(*, class_name: str, operation: str) -> JsonObject:
+    """Build a comment for tagging a database operation
+
+    The comment shows up in the database profiler and in the list of current
+    operations, where it allows correlating the operation with the service logs.
+    """
+    correlation_id = correlation_id_var.get(None)
+    return {
+        "service": "mass",
+        "correlation_id": str(correlation_id) if correlation_id else None,
+        "class_name": class_name,
+        "operation": operation,
+    }
+
+
 def name_from_key(key: str) -> str:
     """Auto generate a suitable name from a key"""
     return key.title().replace("_", " ").replace(".", " ")
 
 
+def text_index_weights(
+    searchable_class: models.SearchableClass,
+) -> dict[str, int] | None:
+    """Get the weights of the fields covered by the text index of a class
+
+    The keys are the paths of the fields in the stored documents. If the class uses
+    a compact search text, only this field is covered. If no searchable fields are
+    configured, None is returned, meaning that all text is covered.
+    """
+    if searchable_class.compact_search_text:
+        return {SEARCH_TEXT_FIELD: 1}
+    if not searchable_class.searchable_fields:
+        return None
+    return {
+        "_id" if field.key == "id_" else f"content.{field.key}": field.weight
+        for field in searchable_class.searchable_fields
+    }
+
+
+def search_text_paths(searchable_class: models.SearchableClass) -> list[str] | None:
+    """Get the paths from which the compact search text of a class is built
+
+    If no searchable fields are configured, the text of the whole content is used.
+    Returns None if the class does not use a compact search text.
+    """
+    if not searchable_class.compact_search_text:
+        return None
+    if not searchable_class.searchable_fields:
+        return ["content"]
+    return [
+        "_id" if field.key == "id_" else f"content.{field.key}"
+        for field in searchable_class.searchable_fields
+    ]
+
+
 def pipeline_match_text_search(*, query: str) -> JsonObject:
     """Build text search segment of aggregation pipeline"""
     text_search = {"$text": {"$search": query}}
@@ -71,6 +126,49 @@ def pipeline_match_filters_stage(*, filters: list[models.Filter]) -> JsonObject:
     return {"$match": {"$and": segment}}
 
 
+def pipeline_count_facet_options(
+    *, key: str, value_match: JsonObject | None = None
+) -> list[JsonObject]:
+    """Build the stages counting the documents per value of a facetable field
+
+    If a value match is given, only the values matching it are counted.
+    """
+    pipeline: list[JsonObject] = [
+        {
+            "$unwind": {
+                "path": "$content",
+                "preserveNullAndEmptyArrays": True,
+            }
+        },
+    ]
+    path = "$content"
+    for field in key.split("."):
+        path += f".{field}"
+        pipeline.append(
+            {
+                "$unwind": {
+                    "path": path,
+                    "preserveNullAndEmptyArrays": True,
+                }
+            },
+        )
+    path, field = path.rsplit(".", 1)
+    pipeline.extend(
+        (
+            {
+                "$group": {
+                    "_id": {"$getField": {"field": field, "input": path}},
+                    "uniqueIds": {"$addToSet": "$_id"},
+                }
+            },
+            {"$match": {"_id": value_match or {"$ne": None}}},
+            {"$addFields": {"value": "$_id", "count": {"$size": "$uniqueIds"}}},
+            {"$unset": "_id"},
+        )
+    )
+    return pipeline
+
+
 def pipeline_facet_sort_and_paginate(
     *,
     facet_fields: list[models.FieldLabel],
@@ -86,47 +184,18 @@ def pipeline_facet_sort_and_paginate(
         name = facet.name
         if not name:
             name = name_from_key(facet.key)
-        pipeline: list[JsonObject] = [
-            {
-                "$unwind": {
-                    "path": "$content",
-                    "preserveNullAndEmptyArrays": True,
-                }
-            },
-        ]
-        path = "$content"
-        for field in facet.key.split("."):
-            path += f".{field}"
-            pipeline.append(
-                {
-                    "$unwind": {
-                        "path": path,
-                        "preserveNullAndEmptyArrays": True,
-                    }
-                },
-            )
-        path, field = path.rsplit(".", 1)
-        pipeline.extend(
-            (
-                {
-                    "$group": {
-                        "_id": {"$getField": {"field": field, "input": path}},
-                        "uniqueIds": {"$addToSet": "$_id"},
-                    }
-                },
-                {"$match": {"_id": {"$ne": None}}},
-                {"$addFields": {"value": "$_id", "count": {"$size": "$uniqueIds"}}},
-                {"$unset": "_id"},
-                {"$sort": {"value": 1}},
-            )
-        )
+        pipeline = pipeline_count_facet_options(key=facet.key)
+        pipeline.append({"$sort": {"value": 1}})
         segment[name] = pipeline
 
     # this is the total number of hits, but pagination can mean only a few are returned
     segment["count"] = [{"$count": "total"}]
 
-    # rename the ID field to id_ to match our model
-    segment["hits"] = [{"$addFields": {"id_": "$_id"}}, {"$unset": "_id"}]
+    # rename the ID field to id_ to match our model and drop the search text
+    segment["hits"] = [
+        {"$addFields": {"id_": "$_id"}},
+        {"$unset": ["_id", SEARCH_TEXT_FIELD]},
+    ]
 
     # apply sorting parameters (maybe some of them are unselected fields)
     if sort:
@@ -166,6 +235,57 @@ def pipeline_project(*, facet_fields: list[models.FieldLabel]) -> JsonObject:
     return {"$project": segment}
 
 
+def build_facet_values_pipeline(  # noqa: PLR0913
+    *,
+    key: str,
+    prefix: str,
+    query: str,
+    filters: list[models.Filter],
+    skip: int = 0,
+    limit: int | None = None,
+) -> list[JsonObject]:
+    """Build the aggregation pipeline counting the options of a facet whose text
+    values start with the prefix among the results of a query
+
+    Unless there is a text query, the documents having such values are selected with
+    the index on the facetable field before the values are counted.
+    """
+    pipeline: list[JsonObject] = []
+    query = query.strip()
+    value_match: dict[str, Any] = {"$type": "string"}
+    if prefix:
+        value_match["$regex"] = "^" + re.escape(prefix)
+
+    if query:
+        pipeline.append(pipeline_match_text_search(query=query))
+    if filters:
+        pipeline.append(pipeline_match_filters_stage(filters=filters))
+    if prefix:
+        pipeline.append(
+            {"$match": {f"content.{key}": {"$regex": value_match["$regex"]}}}
+        )
+
+    options: list[JsonObject] = [{"$sort": {"count": -1, "value": 1}}]
+    if skip > 0:
+        options.append({"$skip": skip})
+    if limit:
+        options.append({"$limit": limit})
+    options.append({"$project": {"value": 1, "count": 1}})
+    pipeline.extend(
+        (
+            *pipeline_count_facet_options(key=key, value_match=value_match),
+            {"$facet": {"count": [{"$count": "total"}], "options": options}},
+            {
+                "$project": {
+                    "count": {"$ifNull": [{"$arrayElemAt": ["$count.total", 0]}, 0]},
+                    "options": 1,
+                }
+            },
+        )
+    )
+    return pipeline
+
+
 def build_pipeline(  # noqa: PLR0913
     *,
     facet_fields: list[models.FieldLabel],
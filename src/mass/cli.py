@@ -16,12 +16,22 @@
 """Entrypoint of the package"""
 
 import asyncio
+from pathlib import Path
+from typing import Annotated
 
 import typer
 
-from mass.main import consume_events, run_rest_app
+from mass.main import (
+    consume_events,
+    export_snapshots,
+    load_files,
+    replay_searches,
+    run_rest_app,
+)
 
 cli = typer.Typer()
+snapshot_cli = typer.Typer(help="Manage read-only snapshots of the resources.")
+cli.add_typer(snapshot_cli, name="snapshot")
 
 
 @cli.command(name="run-rest")
@@ -31,6 +41,106 @@ def sync_run_api():
 
 
 @cli.command(name="consume-events")
-def sync_consume_events(run_forever: bool = True):
-    """Run an event consumer listening to the specified topic."""
-    asyncio.run(consume_events(run_forever=run_forever))
+def sync_consume_events(
+    run_forever: bool = True, catch_up: bool = False, rebuild: bool = False
+):
+    """Run an event consumer listening to the specified topic.
+
+    With --catch-up, all events that are already available are consumed in bulk first,
+    which is much faster when the consumer has fallen behind.
+    With --rebuild, all events are replayed in bulk into shadow collections instead,
+    which atomically replace the live collections once they are complete.
+    """
+    asyncio.run(
+        consume_events(run_forever=run_forever, catch_up=catch_up, rebuild=rebuild)
+    )
+
+
+@cli.command(name="load")
+def sync_load_files(
+    paths: Annotated[
+        list[Path],
+        typer.Argument(
+            exists=True,
+            dir_okay=False,
+            help="JSON or JSONL files containing the resources",
+        ),
+    ],
+    class_name: Annotated[
+        str | None,
+        typer.Option(help="The class of the resources (default: the file names)"),
+    ] = None,
+    workers: Annotated[
+        int | None,
+        typer.Option(min=1, help="Number of validating worker processes"),
+    ] = None,
+    batch_size: Annotated[
+        int | None,
+        typer.Option(min=1, help="Number of resources written in one bulk operation"),
+    ] = None,
+    rebuild: Annotated[
+        bool,
+        typer.Option(help="Replace all collections with the loaded resources"),
+    ] = False,
+):
+    """Load resources from JSON or JSONL files directly into the database.
+
+    Without --rebuild, all collections must be empty, since they cannot be searched
+    while loading. With --rebuild, the resources replace the existing ones atomically.
+    """
+    asyncio.run(
+        load_files(
+            paths=paths,
+            class_name=class_name,
+            workers=workers,
+            batch_size=batch_size,
+            rebuild=rebuild,
+        )
+    )
+
+
+@cli.command(name="replay")
+def sync_replay_searches(
+    path: Annotated[
+        Path,
+        typer.Argument(
+            exists=True, dir_okay=False, help="JSONL file with captured searches"
+        ),
+    ],
+    url: Annotated[
+        str | None,
+        typer.Option(help="Base URL of a running instance (default: use the database)"),
+    ] = None,
+    concurrency: Annotated[
+        int, typer.Option(min=1, help="Number of concurrent search requests")
+    ] = 1,
+):
+    """Replay captured search requests and report throughput and latencies.
+
+    The report is printed as JSON with latency percentiles in milliseconds for all
+    requests, per class and per execution strategy.
+    """
+    report = asyncio.run(replay_searches(path=path, url=url, concurrency=concurrency))
+    typer.echo(report.model_dump_json(indent=2))
+
+
+@snapshot_cli.command(name="export")
+def sync_export_snapshots(
+    class_name: Annotated[
+        list[str] | None,
+        typer.Option(help="Classes to export, can be repeated (default: all)"),
+    ] = None,
+    output_dir: Annotated[
+        Path | None,
+        typer.Option(
+            file_okay=False,
+            help="Directory of the snapshots (default: the configured snapshot_dir)",
+        ),
+    ] = None,
+):
+    """Export the resources of each class from the database to a snapshot file.
+
+    The snapshots can be served without any database by setting search_backend to
+    snapshot, e.g. by stateless REST API replicas.
+    """
+    asyncio.run(export_snapshots(class_names=class_name, output_dir=output_dir))
@@ -15,15 +15,20 @@
 
 """Config Parameter Modeling and Parsing"""
 
+from pathlib import Path
+from typing import Literal
+
 from ghga_service_commons.api import ApiConfigBase
 from hexkit.config import config_from_yaml
 from hexkit.log import LoggingConfig
 from hexkit.providers.akafka import KafkaConfig
 from hexkit.providers.mongodb import MongoDbConfig
-from pydantic import Field
+from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings
 
 from mass.adapters.inbound.event_sub import EventSubTranslatorConfig
+from mass.adapters.inbound.ingest_metrics import IngestMetricsConfig
+from mass.adapters.outbound.event_ids import ProcessedEventStoreConfig
 from mass.core.models import SearchableClass
 
 
@@ -36,13 +41,142 @@ class SearchableClassesConfig(BaseSettings):
     )
 
 
+class SlowSearchLogConfig(BaseSettings):
+    """Provides configuration for logging slow searches"""
+
+    slow_search_threshold: float | None = Field(
+        default=None,
+        gt=0,
+        description="Duration in seconds above which a search is considered slow and"
+        + " logged along with its parameters and aggregation pipeline."
+        + " Slow searches are not logged if not set.",
+        examples=[None, 0.5],
+    )
+    slow_search_log_plan: bool = Field(
+        default=False,
+        description="Whether a summary of the query plan shall be added to the log"
+        + " records of slow searches. The plan is requested in the background after"
+        + " the search, so that these log records are written with a delay.",
+    )
+    slow_search_log_limit: int = Field(
+        default=10,
+        gt=0,
+        description="The maximum number of slow searches that are logged per minute."
+        + " Further slow searches within the same minute are only counted.",
+    )
+
+
+class SearchBackendConfig(BaseSettings):
+    """Provides configuration for selecting the backend that stores the resources"""
+
+    search_backend: Literal["mongodb", "memory", "sqlite", "snapshot"] = Field(
+        default="mongodb",
+        description="The backend that stores and searches the resources. 'mongodb'"
+        + " uses the configured MongoDB database. 'sqlite' stores the resources in a"
+        + " local SQLite database file, which suits small and medium deployments on a"
+        + " single node. 'snapshot' answers searches from read-only snapshot files"
+        + " exported with `mass snapshot export`, so that REST API replicas can be"
+        + " scaled out without any database. 'memory' keeps the resources in the"
+        + " memory of one process, where they are lost on restart and are not shared"
+        + " with other processes, so it is only meant for tests and benchmarks. The"
+        + " REST API, the event consumer and the file loader refuse to run with it.",
+        examples=["mongodb", "memory", "sqlite", "snapshot"],
+    )
+    sqlite_path: Path = Field(
+        default=Path("mass.sqlite"),
+        description="The path of the database file used by the SQLite backend."
+        + " The file is created if it does not exist.",
+        examples=["mass.sqlite", "/var/lib/mass/mass.sqlite"],
+    )
+    sqlite_pool_size: int = Field(
+        default=4,
+        gt=0,
+        description="The number of connections used by the SQLite backend for"
+        + " running searches concurrently. Writes always use a separate connection.",
+    )
+    text_ranking: Literal["textscore", "bm25"] = Field(
+        default="textscore",
+        description="How the memory, SQLite and snapshot backends rank the results of"
+        + " text searches when sorting by relevance. 'textscore' computes the same"
+        + " scores as the MongoDB text index. 'bm25' ranks with BM25, which also"
+        + " considers how rare the terms are and how long the documents are. The"
+        + " MongoDB backend always uses the text score.",
+        examples=["textscore", "bm25"],
+    )
+    snapshot_dir: Path = Field(
+        default=Path("snapshots"),
+        description="The directory containing one snapshot file per resource class,"
+        + " which is written by `mass snapshot export` and read by the snapshot"
+        + " backend. The snapshot files are memory-mapped, so that all processes"
+        + " on the same host share their pages.",
+        examples=["snapshots", "/var/lib/mass/snapshots"],
+    )
+
+
+class QueryHandlerConfig(SearchableClassesConfig, SlowSearchLogConfig):
+    """Provides the configuration used by the query handler"""
+
+
+class BulkLoadConfig(BaseSettings):
+    """Provides configuration for writing resources to the database in bulk"""
+
+    bulk_batch_size: int = Field(
+        default=1000,
+        gt=0,
+        description="The maximum number of resources that are buffered before they"
+        + " are written to the database in a single bulk operation",
+    )
+    catch_up_idle_timeout: float = Field(
+        default=10,
+        gt=0,
+        description="Time in seconds without new events after which the catch-up mode"
+        + " of the event consumer considers itself caught up and switches to normal"
+        + " streaming",
+    )
+
+
+class SearchApiConfig(BaseSettings):
+    """Provides configuration for the search API"""
+
+    server_timing: bool = Field(
+        default=False,
+        description="Whether search responses shall contain a Server-Timing header"
+        + " with the durations of the phases of the search operation",
+    )
+    admin_token: SecretStr | None = Field(
+        default=None,
+        description="Bearer token that grants access to admin-only endpoints like"
+        + " /search/explain. These endpoints are disabled if no token is set.",
+    )
+    search_capture_file: Path | None = Field(
+        default=None,
+        description="Path of a JSONL file to which the parameters and latency of"
+        + " search requests are appended, so that they can be replayed later with"
+        + " the replay command. No search requests are captured if not set.",
+        examples=[None, "searches.jsonl"],
+    )
+    search_capture_rate: float = Field(
+        default=1,
+        gt=0,
+        le=1,
+        description="The fraction of search requests that are randomly sampled for"
+        + " capturing",
+        examples=[1, 0.1],
+    )
+
+
 @config_from_yaml(prefix="mass")
 class Config(
     ApiConfigBase,
     MongoDbConfig,
+    SearchBackendConfig,
     KafkaConfig,
     EventSubTranslatorConfig,
-    SearchableClassesConfig,
+    IngestMetricsConfig,
+    ProcessedEventStoreConfig,
+    QueryHandlerConfig,
+    SearchApiConfig,
+    BulkLoadConfig,
     LoggingConfig,
 ):
     """Config parameters and their defaults."""
@@ -0,0 +1,236 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Contains a query handler that writes loaded and deleted resources in bulk"""
+
+import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+from mass.config import QueryHandlerConfig
+from mass.core import models
+from mass.core.query_handler import QueryHandler
+from mass.ports.outbound.aggregator import AggregatorCollectionPort
+from mass.ports.outbound.dao import DaoCollectionPort
+
+PROGRESS_INTERVAL = 10  # minimum number of seconds between progress reports
+
+log = logging.getLogger(__name__)
+
+
+class BulkQueryHandler(QueryHandler):
+    """A query handler that buffers loaded and deleted resources and writes them to
+    the database in bulk.
+
+    Only the latest change of each buffered resource is written. Since deletions are
+    deferred, deleting a resource that does not exist will not raise an error.
+    Buffered changes are always written before handling a query.
+    """
+
+    class RebuildVerificationError(RuntimeError):
+        """Raised when a rebuilt collection does not contain the expected resources"""
+
+        def __init__(self, *, class_name: str, expected: int, actual: int):
+            super().__init__(
+                f"Rebuilt collection for class '{class_name}' contains {actual}"
+                + f" resources instead of the expected {expected}."
+            )
+
+    class CollectionInUseError(RuntimeError):
+        """Raised when the indexes of a collection that contains resources shall be
+        dropped
+        """
+
+        def __init__(self, *, class_name: str):
+            super().__init__(
+                f"The collection for class '{class_name}' already contains resources"
+                + " that may be searched, so its indexes cannot be dropped."
+            )
+
+    def __init__(
+        self,
+        *,
+        config: QueryHandlerConfig,
+        aggregator_collection: AggregatorCollectionPort,
+        dao_collection: DaoCollectionPort,
+        batch_size: int = 1000,
+    ):
+        """Initialize the query handler with resource DAOs/aggregators"""
+        super().__init__(
+            config=config,
+            aggregator_collection=aggregator_collection,
+            dao_collection=dao_collection,
+        )
+        self._batch_size = batch_size
+        # maps class names to resource IDs to resources or None for deletions
+        self._buffer: dict[str, dict[str, models.Resource | None]] = defaultdict(dict)
+        self._buffered = 0
+        self._written = 0
+        # the IDs of all resources per class, only tracked while rebuilding
+        self._resource_ids: dict[str, set[str]] | None = None
+        self._started = self._reported = time.monotonic()
+
+    @property
+    def written(self) -> int:
+        """The number of resource changes that have been written so far"""
+        return self._written
+
+    @property
+    def throughput(self) -> float:
+        """The number of resource changes written per second so far"""
+        elapsed = time.monotonic() - self._started
+        return self._written / elapsed if elapsed else 0
+
+    async def load_resource(  # noqa: D102
+        self, *, resource: models.Resource, class_name: str
+    ) -> None:
+        await self._buffer_change(
+            class_name=class_name, resource_id=resource.id_, resource=resource
+        )
+
+    async def delete_resource(self, *, resource_id: str, class_name: str) -> None:  # noqa: D102
+        await self._buffer_change(
+            class_name=class_name, resource_id=resource_id, resource=None
+        )
+
+    async def handle_query(self, **kwargs) -> models.QueryResults:  # noqa: D102
+        await self.flush()
+        return await super().handle_query(**kwargs)
+
+    async def _buffer_change(
+        self, *, class_name: str, resource_id: str, resource: models.Resource | None
+    ) -> None:
+        """Buffer the change of a resource and flush the buffer if it is full"""
+        if class_name not in self._config.searchable_classes:
+            raise self.ClassNotConfiguredError(class_name=class_name)
+
+        changes = self._buffer[class_name]
+        if resource_id not in changes:
+            self._buffered += 1
+        changes[resource_id] = resource
+        if self._buffered >= self._batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered changes to the database"""
+        if not self._buffered:
+            return
+        buffer, buffered = self._buffer, self._buffered
+        self._buffer, self._buffered = defaultdict(dict), 0
+
+        for class_name, changes in buffer.items():
+            await self._dao_collection.bulk_write(
+                class_name=class_name,
+                upserts=[res for res in changes.values() if res is not None],
+                deletions=[id_ for id_, res in changes.items() if res is None],
+            )
+            if self._resource_ids is not None:
+                resource_ids = self._resource_ids[class_name]
+                for id_, res in changes.items():
+                    if res is None:
+                        resource_ids.discard(id_)
+                    else:
+                        resource_ids.add(id_)
+        self._written += buffered
+
+        now = time.monotonic()
+        if now - self._reported >= PROGRESS_INTERVAL:
+            self._reported = now
+            log.info(
+                "Written %d resource changes so far (%.0f per second).",
+                self._written,
+                self.throughput,
+            )
+
+    @asynccontextmanager
+    async def writing(self) -> AsyncGenerator[None]:
+        """Write the remaining changes when done and report the throughput.
+
+        The indexes are created first if needed and kept up to date while writing, so
+        that the collections can be searched at any time.
+        """
+        self._dao_collection.create_collections_and_indexes_if_needed()
+        try:
+            yield
+        finally:
+            await self._flush_and_report()
+
+    @asynccontextmanager
+    async def deferred_indexing(self) -> AsyncGenerator[None]:
+        """Drop the indexes and build them again after all changes have been written.
+
+        Writing a large number of resources is much faster without having to update
+        the indexes for each of them, particularly the wildcard text index. Since
+        searches need the indexes, this is only allowed if all collections are empty.
+
+        Raises:
+            CollectionInUseError: if a collection already contains resources
+        """
+        for class_name in self._config.searchable_classes:
+            if self._dao_collection.count_resources(class_name=class_name):
+                raise self.CollectionInUseError(class_name=class_name)
+        self._dao_collection.drop_indexes()
+        try:
+            yield
+        finally:
+            await self._finish_writing()
+
+    @asynccontextmanager
+    async def rebuild(self) -> AsyncGenerator[None]:
+        """Rebuild all collections from scratch and swap them in afterwards.
+
+        The DAO collection must have been set up to use shadow collections, which are
+        emptied first. After all changes have been written, the indexes have been built
+        and the number of resources in each shadow collection has been verified, the
+        shadow collections replace the live collections. The live collections are left
+        untouched if anything goes wrong.
+
+        Raises:
+            RebuildVerificationError: if a shadow collection has an unexpected size
+        """
+        self._dao_collection.drop_collections()
+        self._resource_ids = defaultdict(set)
+        try:
+            yield
+            await self._finish_writing()
+            for class_name in self._config.searchable_classes:
+                expected = len(self._resource_ids[class_name])
+                actual = self._dao_collection.count_resources(class_name=class_name)
+                if actual != expected:
+                    raise self.RebuildVerificationError(
+                        class_name=class_name, expected=expected, actual=actual
+                    )
+            self._dao_collection.swap_in_collections()
+            log.info("Swapped in the rebuilt collections.")
+        finally:
+            self._resource_ids = None
+
+    async def _flush_and_report(self) -> None:
+        """Write the remaining changes and report the throughput"""
+        await self.flush()
+        log.info(
+            "Written %d resource changes in total (%.0f per second).",
+            self._written,
+            self.throughput,
+        )
+
+    async def _finish_writing(self) -> None:
+        """Write the remaining changes, report the throughput and build the indexes"""
+        await self._flush_and_report()
+        started = time.monotonic()
+        self._dao_collection.recreate_collections_and_indexes()
+        log.info("Built indexes in %.1f seconds.", time.monotonic() - started)
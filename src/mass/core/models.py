@@ -31,6 +31,22 @@ class FieldLabel(BaseModel):
     )
 
 
+class SearchableField(BaseModel):
+    """Represents a field that is covered by the text search along with its weight"""
+
+    key: str = Field(
+        ...,
+        description="The raw field name, such as study.title (use id_ for the ID)",
+    )
+    weight: int = Field(
+        default=1,
+        ge=1,
+        le=99999,
+        description="How much more a match in this field counts than in a field"
+        + " with weight 1 when ranking by relevance",
+    )
+
+
 class FacetOption(BaseModel):
     """Represents the format for an option for a facet"""
 
@@ -46,6 +62,14 @@ class Facet(FieldLabel):
     )
 
 
+class FacetValues(Facet):
+    """Represents a page of the options of a facet whose values start with a prefix"""
+
+    count: int = Field(
+        default=0, description="The number of options matching the prefix"
+    )
+
+
 class SearchableClass(BaseModel):
     """Represents a searchable artifact or resource type"""
 
@@ -62,6 +86,21 @@ class SearchableClass(BaseModel):
         description="A list of the returned fields for the resource type"
         " (leave empty to return all, use dotted notation for nested fields)",
     )
+    searchable_fields: list[SearchableField] = Field(
+        default=[],
+        description="A list of the fields covered by the text search for the resource"
+        " type with their weights (leave empty to search all text in the resources,"
+        " use dotted notation for nested fields). When these fields or the compact"
+        " search text are changed, the MongoDB backend keeps the existing text index"
+        " until the collections are rebuilt, e.g. with `mass consume-events --rebuild`",
+    )
+    compact_search_text: bool = Field(
+        default=False,
+        description="Whether to combine the text of the searchable fields into one"
+        " case-folded and deduplicated search text when loading the resources, which"
+        " is then the only field covered by the text search (the text of nested"
+        " objects and arrays is included, and the weights of the fields are ignored)",
+    )
 
 
 class Resource(BaseModel):
@@ -86,6 +125,25 @@ class QueryResults(BaseModel):
     hits: list[Resource] = Field(default=[], description="The search results")
 
 
+class Suggestion(BaseModel):
+    """Represents a word completing a prefix along with how common it is"""
+
+    text: str = Field(..., description="The completed word")
+    count: int = Field(..., description="The number of resources containing the word")
+
+
+class QueryExplanation(BaseModel):
+    """Contains the aggregation pipeline of a query and how it is executed"""
+
+    pipeline: list[JsonObject] = Field(
+        ..., description="The aggregation pipeline that is run for the query"
+    )
+    execution_stats: JsonObject = Field(
+        ...,
+        description="The query plan and execution statistics reported by the database",
+    )
+
+
 class SortOrder(Enum):
     """Represents the possible sorting orders"""
 
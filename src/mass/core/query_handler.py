@@ -15,28 +15,60 @@
 #
 """Contains implementation of a QueryHandler to field queries on metadata"""
 
+import asyncio
 import logging
+from time import perf_counter
+from typing import Any
 
 from hexkit.custom_types import JsonObject
 from hexkit.protocols.dao import ResourceNotFoundError
 from pydantic import ValidationError
 
-from mass.config import SearchableClassesConfig
+from mass.config import QueryHandlerConfig
 from mass.core import models
+from mass.core.timing import PhaseTimer, RateLimiter, timed
 from mass.ports.inbound.query_handler import QueryHandlerPort
-from mass.ports.outbound.aggregator import AggregationError, AggregatorCollectionPort
+from mass.ports.outbound.aggregator import (
+    AggregationError,
+    AggregatorCollectionPort,
+    AggregatorPort,
+)
 from mass.ports.outbound.dao import DaoCollectionPort
 
+SLOW_SEARCH_LOG_MSG = "Slow search for class '%s' took %.3f seconds"
+
 log = logging.getLogger(__name__)
 
 
+def summarize_plan(explanation: JsonObject) -> JsonObject:
+    """Summarize the winning query plans with their stages and used indexes"""
+    stages: list[str] = []
+    indexes: list[str] = []
+
+    def collect(node, in_winning_plan: bool = False) -> None:
+        if isinstance(node, dict):
+            if in_winning_plan:
+                if isinstance(node.get("stage"), str):
+                    stages.append(node["stage"])
+                if isinstance(node.get("indexName"), str):
+                    indexes.append(node["indexName"])
+            for key, value in node.items():
+                collect(value, in_winning_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                collect(item, in_winning_plan)
+
+    collect(explanation)
+    return {"stages": stages, "indexes": list(dict.fromkeys(indexes))}
+
+
 class QueryHandler(QueryHandlerPort):
     """Concrete implementation of a query handler"""
 
     def __init__(
         self,
         *,
-        config: SearchableClassesConfig,
+        config: QueryHandlerConfig,
         aggregator_collection: AggregatorCollectionPort,
         dao_collection: DaoCollectionPort,
     ):
@@ -44,6 +76,8 @@ class QueryHandler(QueryHandlerPort):
         self._config = config
         self._aggregator_collection = aggregator_collection
         self._dao_collection = dao_collection
+        self._slow_search_log_limiter = RateLimiter(limit=config.slow_search_log_limit)
+        self._slow_search_log_tasks: set[asyncio.Task] = set()
 
     async def load_resource(  # noqa: D102
         self, *, resource: models.Resource, class_name: str
@@ -68,16 +102,22 @@ class QueryHandler(QueryHandlerPort):
         except ResourceNotFoundError as err:
             raise self.ResourceNotFoundError(resource_id=resource_id) from err
 
-    async def handle_query(  # noqa: C901, D102, PLR0913
+    def _prepare_query(
         self,
         *,
         class_name: str,
-        query: str = "",
-        filters: list[models.Filter] | None = None,
-        sorting_parameters: list[models.SortingParameter] | None = None,
-        skip: int = 0,
-        limit: int | None = None,
-    ) -> models.QueryResults:
+        query: str,
+        filters: list[models.Filter] | None,
+        sorting_parameters: list[models.SortingParameter] | None,
+    ) -> tuple[
+        models.SearchableClass, list[models.Filter], list[models.SortingParameter]
+    ]:
+        """Get the configuration of the class and complete the query parameters
+
+        Raises:
+            ClassNotConfiguredError - when the class_name parameter does not
+                match any configured class
+        """
         # set empty list if not provided
         if filters is None:
             filters = []
@@ -97,14 +137,35 @@ class QueryHandler(QueryHandlerPort):
                 models.SortingParameter(field="id_", order=models.SortOrder.ASCENDING)
             )
 
-        # get configured facet and selected fields for given resource class
+        # get configuration with facet and selected fields for given resource class
         try:
             searchable_class = self._config.searchable_classes[class_name]
-            facet_fields: list[models.FieldLabel] = searchable_class.facetable_fields
-            selected_fields: list[models.FieldLabel] = searchable_class.selected_fields
         except KeyError as err:
             raise self.ClassNotConfiguredError(class_name=class_name) from err
 
+        return searchable_class, filters, sorting_parameters
+
+    async def handle_query(  # noqa: D102, PLR0913
+        self,
+        *,
+        class_name: str,
+        query: str = "",
+        filters: list[models.Filter] | None = None,
+        sorting_parameters: list[models.SortingParameter] | None = None,
+        skip: int = 0,
+        limit: int | None = None,
+        timer: PhaseTimer | None = None,
+    ) -> models.QueryResults:
+        started = perf_counter()
+        searchable_class, filters, sorting_parameters = self._prepare_query(
+            class_name=class_name,
+            query=query,
+            filters=filters,
+            sorting_parameters=sorting_parameters,
+        )
+        facet_fields: list[models.FieldLabel] = searchable_class.facetable_fields
+        selected_fields: list[models.FieldLabel] = searchable_class.selected_fields
+
         # run the aggregation. Results will have {facets, count, hits} format
         aggregator = self._aggregator_collection.get_aggregator(class_name=class_name)
         for attempt in range(2):
@@ -117,6 +178,7 @@ class QueryHandler(QueryHandlerPort):
                     skip=skip,
                     limit=limit,
                     sorting_parameters=sorting_parameters,
+                    timer=timer,
                 )
             except AggregationError as err:
                 if err.missing_index and not attempt:
@@ -131,10 +193,187 @@ class QueryHandler(QueryHandlerPort):
                 raise self.SearchError() from err
             break
 
-        try:
-            query_results = models.QueryResults(**aggregator_results)  # type: ignore
-        except ValidationError as err:
-            log.warning("Search results validation error: %s", err)
-            raise self.ValidationError() from err
+        with timed(timer, "validate"):
+            try:
+                query_results = models.QueryResults(**aggregator_results)  # type: ignore
+            except ValidationError as err:
+                log.warning("Search results validation error: %s", err)
+                raise self.ValidationError() from err
+
+        duration = perf_counter() - started
+        threshold = self._config.slow_search_threshold
+        if threshold is not None and duration > threshold:
+            self._log_slow_search(
+                class_name=class_name,
+                query=query,
+                filters=filters,
+                sorting_parameters=sorting_parameters,
+                skip=skip,
+                limit=limit,
+                duration=duration,
+                count=query_results.count,
+            )
 
         return query_results
+
+    def _log_slow_search(  # noqa: PLR0913
+        self,
+        *,
+        class_name: str,
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int,
+        limit: int | None,
+        duration: float,
+        count: int,
+    ) -> None:
+        """Log a slow search with its parameters and pipeline, unless rate-limited
+
+        The pipeline is built without accessing the database. If the query plan shall
+        be logged as well, it is requested and logged in a background task, so that
+        the search does not have to wait for it.
+        """
+        limiter = self._slow_search_log_limiter
+        if not limiter.allow():
+            return
+        searchable_class = self._config.searchable_classes[class_name]
+        aggregator = self._aggregator_collection.get_aggregator(class_name=class_name)
+        search_args: dict[str, Any] = {
+            "query": query,
+            "filters": filters,
+            "facet_fields": searchable_class.facetable_fields,
+            "selected_fields": searchable_class.selected_fields,
+            "skip": skip,
+            "limit": limit,
+            "sorting_parameters": sorting_parameters,
+        }
+        details: dict[str, Any] = {
+            "class_name": class_name,
+            "query": query,
+            "filters": [item.model_dump() for item in filters],
+            "sorting_parameters": [
+                item.model_dump(mode="json") for item in sorting_parameters
+            ],
+            "skip": skip,
+            "limit": limit,
+            "duration": duration,
+            "count": count,
+            "suppressed": limiter.suppressed,
+        }
+        limiter.suppressed = 0
+        details["pipeline"] = aggregator.build_pipeline(**search_args)
+        if not self._config.slow_search_log_plan:
+            log.warning(SLOW_SEARCH_LOG_MSG, class_name, duration, extra=details)
+            return
+        task = asyncio.create_task(
+            self._log_slow_search_plan(
+                aggregator=aggregator, search_args=search_args, details=details
+            )
+        )
+        self._slow_search_log_tasks.add(task)
+        task.add_done_callback(self._slow_search_log_tasks.discard)
+
+    async def _log_slow_search_plan(
+        self,
+        *,
+        aggregator: AggregatorPort,
+        search_args: dict[str, Any],
+        details: dict[str, Any],
+    ) -> None:
+        """Log a slow search along with the plan of its query"""
+        try:
+            # only ask for the query plan, the pipeline does not need to run again
+            explanation = await aggregator.explain(
+                **search_args, verbosity="queryPlanner"
+            )
+        except AggregationError as err:
+            log.debug("Cannot explain slow search: %s", err)
+        else:
+            details["plan"] = summarize_plan(explanation.execution_stats)
+        log.warning(
+            SLOW_SEARCH_LOG_MSG,
+            details["class_name"],
+            details["duration"],
+            extra=details,
+        )
+
+    async def explain_query(  # noqa: D102, PLR0913
+        self,
+        *,
+        class_name: str,
+        query: str = "",
+        filters: list[models.Filter] | None = None,
+        sorting_parameters: list[models.SortingParameter] | None = None,
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.QueryExplanation:
+        searchable_class, filters, sorting_parameters = self._prepare_query(
+            class_name=class_name,
+            query=query,
+            filters=filters,
+            sorting_parameters=sorting_parameters,
+        )
+        aggregator = self._aggregator_collection.get_aggregator(class_name=class_name)
+        try:
+            return await aggregator.explain(
+                query=query,
+                filters=filters,
+                facet_fields=searchable_class.facetable_fields,
+                selected_fields=searchable_class.selected_fields,
+                skip=skip,
+                limit=limit,
+                sorting_parameters=sorting_parameters,
+            )
+        except AggregationError as err:
+            log.error("Explain operation error: %s", err)
+            raise self.SearchError() from err
+
+    async def suggest(  # noqa: D102
+        self, *, class_name: str, prefix: str = "", limit: int = 10
+    ) -> list[models.Suggestion]:
+        if class_name not in self._config.searchable_classes:
+            raise self.ClassNotConfiguredError(class_name=class_name)
+
+        aggregator = self._aggregator_collection.get_aggregator(class_name=class_name)
+        try:
+            return await aggregator.suggest(prefix=prefix, limit=limit)
+        except AggregationError as err:
+            log.error("Suggest operation error: %s", err)
+            raise self.SearchError() from err
+
+    async def facet_values(  # noqa: D102, PLR0913
+        self,
+        *,
+        class_name: str,
+        key: str,
+        prefix: str = "",
+        query: str = "",
+        filters: list[models.Filter] | None = None,
+        skip: int = 0,
+        limit: int | None = 10,
+    ) -> models.FacetValues:
+        try:
+            searchable_class = self._config.searchable_classes[class_name]
+        except KeyError as err:
+            raise self.ClassNotConfiguredError(class_name=class_name) from err
+        facet = next(
+            (field for field in searchable_class.facetable_fields if field.key == key),
+            None,
+        )
+        if facet is None:
+            raise self.FacetNotConfiguredError(class_name=class_name, key=key)
+
+        aggregator = self._aggregator_collection.get_aggregator(class_name=class_name)
+        try:
+            return await aggregator.facet_values(
+                facet=facet,
+                prefix=prefix,
+                query=query,
+                filters=filters or [],
+                skip=skip,
+                limit=limit,
+            )
+        except AggregationError as err:
+            log.error("Facet values operation error: %s", err)
+            raise self.SearchError() from err
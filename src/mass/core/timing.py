@@ -0,0 +1,89 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Provides a lightweight timer for measuring the phases of an operation and helpers
+for reporting the measurements
+"""
+
+from collections.abc import Collection, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from time import monotonic, perf_counter
+
+# the metrics label of all class names that are not configured
+UNKNOWN_CLASS = "unknown"
+
+
+class PhaseTimer:
+    """Collects the durations of the named phases of an operation in seconds
+
+    Additional information about how the operation was carried out can be attached
+    as annotations.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        self.annotations: dict[str, str] = {}
+
+    def annotate(self, name: str, value: object) -> None:
+        """Attach a piece of information about the operation"""
+        self.annotations[name] = str(value)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the duration of a phase, adding up repeated phases of one name"""
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - started
+            self.durations[name] = self.durations.get(name, 0) + duration
+
+
+def timed(timer: PhaseTimer | None, name: str) -> AbstractContextManager:
+    """Measure a phase with the given timer, or do nothing if there is no timer"""
+    return timer.phase(name) if timer else nullcontext()
+
+
+class RateLimiter:
+    """Allows a limited number of events within each time interval"""
+
+    def __init__(self, *, limit: int, interval: float = 60):
+        self._limit = limit
+        self._interval = interval
+        self._window_start = float("-inf")
+        self._count = 0
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        """Check whether another event is allowed, counting suppressed events"""
+        now = monotonic()
+        if now - self._window_start >= self._interval:
+            self._window_start = now
+            self._count = 0
+        if self._count < self._limit:
+            self._count += 1
+            return True
+        self.suppressed += 1
+        return False
+
+
+def class_label(class_name: str, *, class_names: Collection[str]) -> str:
+    """Get the metrics label for the given class name
+
+    Class names that are not among the given ones share one label, so that the
+    number of label values is bounded by the configuration.
+    """
+    return class_name if class_name in class_names else UNKNOWN_CLASS
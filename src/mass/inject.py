@@ -15,37 +15,132 @@
 #
 """Module hosting the dependency injection container."""
 
-from collections.abc import AsyncGenerator
+import asyncio
+from collections.abc import AsyncGenerator, Callable
 from contextlib import asynccontextmanager, nullcontext
+from typing import Any
 
+from aiokafka import AIOKafkaConsumer
 from fastapi import FastAPI
 from hexkit.providers.akafka.provider import KafkaEventPublisher, KafkaEventSubscriber
-from hexkit.providers.mongodb.provider import MongoDbDaoFactory
+from hexkit.providers.mongodb.provider import ConfiguredMongoClient, MongoDbDaoFactory
 
+from mass.adapters.inbound.coalescer import CommitDeferringConsumer, UpdateCoalescer
+from mass.adapters.inbound.consumer import IdleStoppingConsumer, ReplayingConsumer
 from mass.adapters.inbound.event_sub import EventSubTranslator
 from mass.adapters.inbound.fastapi_ import dummies
+from mass.adapters.inbound.fastapi_.capture import SearchCapture
 from mass.adapters.inbound.fastapi_.configure import get_configured_app
+from mass.adapters.inbound.ingest_metrics import MeteredConsumer, MeteredDlqPublisher
 from mass.adapters.outbound.aggregator import AggregatorCollection, AggregatorFactory
 from mass.adapters.outbound.dao import DaoCollection
+from mass.adapters.outbound.event_ids import MongoDbProcessedEventStore
+from mass.adapters.outbound.memory import (
+    InMemoryAggregatorCollection,
+    InMemoryDaoCollection,
+    get_database,
+)
+from mass.adapters.outbound.snapshot import (
+    SnapshotAggregatorCollection,
+    SnapshotDaoCollection,
+    open_snapshots,
+)
+from mass.adapters.outbound.sqlite import (
+    SqliteAggregatorCollection,
+    SqliteDaoCollection,
+    SqliteDatabase,
+)
 from mass.config import Config
+from mass.core.bulk_query_handler import BulkQueryHandler
 from mass.core.query_handler import QueryHandler
 from mass.ports.inbound.query_handler import QueryHandlerPort
+from mass.ports.outbound.aggregator import AggregatorCollectionPort
+from mass.ports.outbound.dao import DaoCollectionPort
+
+SHADOW_COLLECTION_SUFFIX = "__building"
 
 
 @asynccontextmanager
-async def prepare_core(*, config: Config) -> AsyncGenerator[QueryHandlerPort]:
-    """Constructs and initializes all core components and their outbound dependencies."""
+async def prepare_outbound(
+    *, config: Config, collection_suffix: str = ""
+) -> AsyncGenerator[tuple[AggregatorCollectionPort, DaoCollectionPort]]:
+    """Constructs and initializes the outbound dependencies of the core components."""
+    if config.search_backend == "memory":
+        database = get_database(config.db_name, text_ranking=config.text_ranking)
+        yield (
+            InMemoryAggregatorCollection(
+                config=config, database=database, collection_suffix=collection_suffix
+            ),
+            InMemoryDaoCollection(
+                config=config, database=database, collection_suffix=collection_suffix
+            ),
+        )
+        return
+
+    if config.search_backend == "snapshot":
+        # snapshots are read-only, so there are no shadow collections
+        snapshots = open_snapshots(
+            config=config,
+            directory=config.snapshot_dir,
+            ranking=config.text_ranking,
+        )
+        yield (
+            SnapshotAggregatorCollection(config=config, snapshots=snapshots),
+            SnapshotDaoCollection(config=config, snapshots=snapshots),
+        )
+        return
+
+    if config.search_backend == "sqlite":
+        with SqliteDatabase.construct(config=config) as sqlite_database:
+            yield (
+                SqliteAggregatorCollection(
+                    config=config,
+                    database=sqlite_database,
+                    collection_suffix=collection_suffix,
+                    ranking=config.text_ranking,
+                ),
+                SqliteDaoCollection(
+                    config=config,
+                    database=sqlite_database,
+                    collection_suffix=collection_suffix,
+                ),
+            )
+        return
+
     async with (
         AggregatorFactory.construct(config=config) as aggregator_factory,
         MongoDbDaoFactory.construct(config=config) as dao_factory,
+        ConfiguredMongoClient(config=config) as client,
     ):
         dao_collection = await DaoCollection.construct(
-            dao_factory=dao_factory, config=config
+            dao_factory=dao_factory,
+            database=client[config.db_name],
+            config=config,
+            collection_suffix=collection_suffix,
         )
         aggregator_collection = await AggregatorCollection.construct(
-            aggregator_factory=aggregator_factory, config=config
+            aggregator_factory=aggregator_factory,
+            config=config,
+            collection_suffix=collection_suffix,
         )
 
+        try:
+            yield aggregator_collection, dao_collection
+        finally:
+            await dao_collection.flush_word_counts()
+
+
+@asynccontextmanager
+async def prepare_core(*, config: Config) -> AsyncGenerator[QueryHandlerPort]:
+    """Constructs and initializes all core components and their outbound dependencies."""
+    async with prepare_outbound(config=config) as (
+        aggregator_collection,
+        dao_collection,
+    ):
+        # create what is missing while keeping outdated text indexes until the
+        #  collections are rebuilt; missing word counts are counted by scanning the
+        #  collections, so this does not run on the event loop
+        await asyncio.to_thread(dao_collection.create_collections_and_indexes_if_needed)
         yield QueryHandler(
             config=config,
             aggregator_collection=aggregator_collection,
@@ -53,6 +148,28 @@ async def prepare_core(*, config: Config) -> AsyncGenerator[QueryHandlerPort]:
         )
 
 
+@asynccontextmanager
+async def prepare_bulk_core(
+    *, config: Config, shadow: bool = False
+) -> AsyncGenerator[BulkQueryHandler]:
+    """Constructs and initializes a query handler that writes resources in bulk.
+
+    If shadow is set, the query handler will operate on shadow collections
+    that can be used to rebuild the database and swap them in afterwards.
+    """
+    collection_suffix = SHADOW_COLLECTION_SUFFIX if shadow else ""
+    async with prepare_outbound(config=config, collection_suffix=collection_suffix) as (
+        aggregator_collection,
+        dao_collection,
+    ):
+        yield BulkQueryHandler(
+            config=config,
+            aggregator_collection=aggregator_collection,
+            dao_collection=dao_collection,
+            batch_size=config.bulk_batch_size,
+        )
+
+
 def prepare_core_with_override(
     *, config: Config, query_handler_override: QueryHandlerPort | None = None
 ):
@@ -76,30 +193,94 @@ async def prepare_rest_app(
     """
     app = get_configured_app(config=config)
 
-    async with prepare_core_with_override(
-        config=config, query_handler_override=query_handler_override
-    ) as query_handler:
+    async with (
+        prepare_core_with_override(
+            config=config, query_handler_override=query_handler_override
+        ) as query_handler,
+        (
+            SearchCapture.construct(
+                path=config.search_capture_file, rate=config.search_capture_rate
+            )
+            if config.search_capture_file
+            else nullcontext()
+        ) as search_capture,
+    ):
         app.dependency_overrides[dummies.config_dummy] = lambda: config
         app.dependency_overrides[dummies.query_handler_port] = lambda: query_handler
+        app.dependency_overrides[dummies.search_capture_dummy] = lambda: search_capture
         yield app
 
 
+def get_kafka_consumer_factory(
+    *,
+    coalescer: UpdateCoalescer | None = None,
+    idle_timeout: float | None = None,
+    replay: bool = False,
+) -> Callable[..., Any]:
+    """Get a factory for the Kafka consumer that is used by the event subscriber.
+
+    The consumer records the lag of the events it receives.
+    If updates are coalesced, the consumer only commits events after their coalesced
+    operations have been applied. If an idle timeout is given, the consumer stops when
+    no new event arrives within that time. If replaying, the consumer does not join
+    the consumer group of the service and reads all events from the beginning.
+    """
+
+    def create_consumer(*topics: str, **kwargs: Any) -> Any:
+        if replay:
+            kwargs["group_id"] = None
+        consumer: Any = MeteredConsumer(AIOKafkaConsumer(*topics, **kwargs))
+        if coalescer is not None:
+            consumer = CommitDeferringConsumer(consumer, coalescer=coalescer)
+        if idle_timeout is not None:
+            consumer = IdleStoppingConsumer(consumer, idle_timeout=idle_timeout)
+        if replay:
+            consumer = ReplayingConsumer(consumer)
+        return consumer
+
+    return create_consumer
+
+
 @asynccontextmanager
 async def prepare_event_subscriber(
     *,
     config: Config,
     query_handler_override: QueryHandlerPort | None = None,
+    idle_timeout: float | None = None,
+    replay: bool = False,
 ) -> AsyncGenerator[KafkaEventSubscriber]:
     """Construct and initialize an event subscriber with all its dependencies.
     By default, the core dependencies are automatically prepared but you can also
     provide them using the query_handler_override parameter.
+    If an idle timeout is given, the subscriber stops running when no new event
+    arrives within that time. If replaying, all events are consumed from the beginning
+    without committing them, and the subscriber verifies that it has consumed all of
+    them when it stops running.
     """
-    async with prepare_core_with_override(
-        config=config, query_handler_override=query_handler_override
-    ) as query_handler:
+    async with (
+        prepare_core_with_override(
+            config=config, query_handler_override=query_handler_override
+        ) as query_handler,
+        (
+            UpdateCoalescer.construct(window=config.coalesce_window)
+            if config.coalesce_window
+            else nullcontext()
+        ) as coalescer,
+        (
+            MongoDbProcessedEventStore.construct(config=config, mongodb_config=config)
+            if config.deduplicate_events
+            else nullcontext()
+        ) as processed_event_store,
+    ):
         event_sub_translator = EventSubTranslator(
             query_handler=query_handler,
             config=config,
+            class_names=config.searchable_classes,
+            coalescer=coalescer,
+            processed_event_store=processed_event_store,
+        )
+        consumer_factory = get_kafka_consumer_factory(
+            coalescer=coalescer, idle_timeout=idle_timeout, replay=replay
         )
 
         async with (
@@ -107,7 +288,8 @@ async def prepare_event_subscriber(
             KafkaEventSubscriber.construct(
                 config=config,
                 translator=event_sub_translator,
-                dlq_publisher=dlq_publisher,
+                dlq_publisher=MeteredDlqPublisher(dlq_publisher),
+                kafka_consumer_cls=consumer_factory,  # type: ignore[arg-type]
             ) as event_subscriber,
         ):
             yield event_subscriber
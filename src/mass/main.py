@@ -15,26 +15,200 @@
 #
 """Top-level functionality for the microservice"""
 
+import logging
+import os
+from pathlib import Path
+
+import httpx
 from ghga_service_commons.api import run_server
 from hexkit.log import configure_logging
 
+from mass.adapters.inbound.file_loader import FileLoader
+from mass.adapters.inbound.ingest_metrics import start_metrics_server
+from mass.adapters.inbound.replay import (
+    ReplayReport,
+    http_search,
+    query_handler_search,
+    read_captured_searches,
+    replay,
+)
+from mass.adapters.outbound.snapshot import snapshot_path, write_snapshot
 from mass.config import Config
-from mass.inject import prepare_event_subscriber, prepare_rest_app
+from mass.inject import (
+    prepare_bulk_core,
+    prepare_core,
+    prepare_event_subscriber,
+    prepare_outbound,
+    prepare_rest_app,
+)
+
+log = logging.getLogger(__name__)
+
+
+class ProcessLocalBackendError(RuntimeError):
+    """Raised when running a service command with a backend that is local to it"""
+
+    def __init__(self, backend: str):
+        super().__init__(
+            f"The {backend} backend keeps the resources in the memory of one process,"
+            + " which is not shared with the other service commands. It can only be"
+            + " used by tests and benchmarks that run all components in one process."
+            + " Use the sqlite or the snapshot backend for small and medium"
+            + " deployments."
+        )
+
+
+def check_shared_backend(config: Config) -> None:
+    """Check that the configured backend is shared with other processes.
+
+    Raises:
+        ProcessLocalBackendError: if the resources would only be kept in this process
+    """
+    if config.search_backend == "memory":
+        raise ProcessLocalBackendError(config.search_backend)
 
 
 async def run_rest_app():
     """Run the HTTP REST API."""
     config = Config()  # type: ignore [call-arg]
     configure_logging(config=config)
+    check_shared_backend(config)
 
     async with prepare_rest_app(config=config) as app:
         await run_server(app=app, config=config)
 
 
-async def consume_events(run_forever: bool = True):
-    """Run the event consumer"""
+async def catch_up_events(*, config: Config, rebuild: bool = False) -> None:
+    """Consume all available events in bulk.
+
+    The live collections keep their indexes, so that they can be searched meanwhile.
+    When rebuilding, all events are replayed without a consumer group and written to
+    shadow collections, which replace the live collections only after they have been
+    completed, indexed and verified. Searches are therefore not affected by a rebuild.
+    Note that the regular consumer group is not advanced by a rebuild, so events that
+    arrive in the meantime will be applied when switching to normal streaming.
+    """
+    # replayed events must not be skipped as duplicates
+    subscriber_config = config.model_copy(update={"deduplicate_events": False})
+    if rebuild:
+        log.info("Rebuilding the database from all events in bulk mode.")
+    else:
+        log.info("Catching up with events in bulk mode.")
+    async with (
+        prepare_bulk_core(config=config, shadow=rebuild) as query_handler,
+        query_handler.rebuild() if rebuild else query_handler.writing(),
+        prepare_event_subscriber(
+            config=subscriber_config,
+            query_handler_override=query_handler,
+            idle_timeout=config.catch_up_idle_timeout,
+            replay=rebuild,
+        ) as event_subscriber,
+    ):
+        # the subscriber returns once no new event arrives within the idle timeout
+        await event_subscriber.run()
+    log.info("Caught up with events, switching to normal streaming.")
+
+
+async def consume_events(
+    run_forever: bool = True, catch_up: bool = False, rebuild: bool = False
+):
+    """Run the event consumer, optionally catching up or rebuilding in bulk mode first"""
     config = Config()  # type: ignore[call-arg]
     configure_logging(config=config)
+    check_shared_backend(config)
+    start_metrics_server(config=config)
+
+    if catch_up or rebuild:
+        await catch_up_events(config=config, rebuild=rebuild)
 
     async with prepare_event_subscriber(config=config) as event_subscriber:
         await event_subscriber.run(forever=run_forever)
+
+
+async def load_files(
+    *,
+    paths: list[Path],
+    class_name: str | None = None,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    rebuild: bool = False,
+):
+    """Load resources from JSON or JSONL files in bulk.
+
+    The class name is derived from the file names unless it is specified explicitly.
+    Without rebuilding, the resources can only be loaded into empty collections, since
+    their indexes are dropped while loading. When rebuilding, the resources are loaded
+    into shadow collections which replace the live collections only after they have
+    been completed and verified, so that searches are not affected.
+    """
+    config = Config()  # type: ignore[call-arg]
+    configure_logging(config=config)
+    check_shared_backend(config)
+
+    if batch_size:
+        config = config.model_copy(update={"bulk_batch_size": batch_size})
+    async with (
+        prepare_bulk_core(config=config, shadow=rebuild) as query_handler,
+        query_handler.rebuild() if rebuild else query_handler.deferred_indexing(),
+        FileLoader.construct(
+            query_handler=query_handler,
+            workers=workers or os.cpu_count() or 1,
+            batch_size=config.bulk_batch_size,
+        ) as file_loader,
+    ):
+        for path in paths:
+            await file_loader.load_file(path, class_name=class_name)
+
+
+async def export_snapshots(
+    *, class_names: list[str] | None = None, output_dir: Path | None = None
+) -> None:
+    """Export the resources of the given classes from the database to snapshots.
+
+    One snapshot file is written per class, by default for all configured classes
+    and into the configured snapshot directory. Existing snapshots are replaced
+    atomically, so that they can be exported while being served.
+    """
+    config = Config()  # type: ignore[call-arg]
+    configure_logging(config=config)
+
+    directory = output_dir or config.snapshot_dir
+    directory.mkdir(parents=True, exist_ok=True)
+    async with prepare_outbound(config=config) as (_, dao_collection):
+        for class_name in class_names or list(config.searchable_classes):
+            dao = dao_collection.get_dao(class_name=class_name)
+            path = snapshot_path(directory, class_name)
+            count = write_snapshot(
+                path,
+                class_name=class_name,
+                searchable_class=config.searchable_classes[class_name],
+                resources=[resource async for resource in dao.find_all(mapping={})],
+            )
+            log.info(
+                "Exported %d resources of class %s to %s.", count, class_name, path
+            )
+
+
+async def replay_searches(
+    *, path: Path, url: str | None = None, concurrency: int = 1
+) -> ReplayReport:
+    """Replay search requests captured in a JSONL file for benchmarking.
+
+    The searches are sent to the API of the instance running at the given URL or,
+    if no URL is given, directly to a query handler using the configured database.
+    """
+    searches = read_captured_searches(path)
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+            return await replay(
+                searches, search=http_search(client), concurrency=concurrency
+            )
+
+    config = Config()  # type: ignore[call-arg]
+    configure_logging(config=config)
+    async with prepare_core(config=config) as query_handler:
+        return await replay(
+            searches,
+            search=query_handler_search(query_handler),
+            concurrency=concurrency,
+        )
@@ -18,6 +18,7 @@
 from abc import ABC, abstractmethod
 
 from mass.core import models
+from mass.core.timing import PhaseTimer
 
 
 class QueryHandlerPort(ABC):
@@ -30,6 +31,13 @@ class QueryHandlerPort(ABC):
             message = f"Class with name '{class_name}' not configured."
             super().__init__(message)
 
+    class FacetNotConfiguredError(RuntimeError):
+        """Raised when requesting a facet that isn't configured for the class"""
+
+        def __init__(self, class_name: str, key: str):
+            message = f"Facet with key '{key}' not configured for class '{class_name}'."
+            super().__init__(message)
+
     class SearchError(RuntimeError):
         """Raised when there is a problem searching with the query parameters."""
 
@@ -77,9 +85,13 @@ class QueryHandlerPort(ABC):
         sorting_parameters: list[models.SortingParameter] | None = None,
         skip: int = 0,
         limit: int | None = None,
+        timer: PhaseTimer | None = None,
     ) -> models.QueryResults:
         """Processes a query
 
+        If a timer is passed, the durations of the phases of the search operation are
+        measured with it.
+
         Raises:
             ClassNotConfiguredError - when the class_name parameter does not
                 match any configured class
@@ -88,6 +100,63 @@ class QueryHandlerPort(ABC):
         """
         ...
 
+    @abstractmethod
+    async def explain_query(  # noqa: PLR0913
+        self,
+        *,
+        class_name: str,
+        query: str = "",
+        filters: list[models.Filter] | None = None,
+        sorting_parameters: list[models.SortingParameter] | None = None,
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.QueryExplanation:
+        """Explain how a query is executed without returning its results
+
+        Raises:
+            ClassNotConfiguredError - when the class_name parameter does not
+                match any configured class
+            SearchError - when the query cannot be explained
+        """
+        ...
+
+    @abstractmethod
+    async def suggest(
+        self, *, class_name: str, prefix: str = "", limit: int = 10
+    ) -> list[models.Suggestion]:
+        """Get the most frequent words completing the last word of the prefix
+
+        Raises:
+            ClassNotConfiguredError - when the class_name parameter does not
+                match any configured class
+            SearchError - when the completions cannot be retrieved
+        """
+        ...
+
+    @abstractmethod
+    async def facet_values(  # noqa: PLR0913
+        self,
+        *,
+        class_name: str,
+        key: str,
+        prefix: str = "",
+        query: str = "",
+        filters: list[models.Filter] | None = None,
+        skip: int = 0,
+        limit: int | None = 10,
+    ) -> models.FacetValues:
+        """Get the options of a facet whose values start with the prefix, counted
+        among the results of the query with the given filters
+
+        Raises:
+            ClassNotConfiguredError - when the class_name parameter does not
+                match any configured class
+            FacetNotConfiguredError - when the key is not a facetable field of
+                the class
+            SearchError - when the options cannot be retrieved
+        """
+        ...
+
     @abstractmethod
     async def load_resource(
         self,
@@ -20,6 +20,7 @@ from abc import ABC, abstractmethod
 from hexkit.custom_types import JsonObject
 
 from mass.core import models
+from mass.core.timing import PhaseTimer
 
 
 class AggregationError(RuntimeError):
@@ -44,8 +45,80 @@ class AggregatorPort(ABC):
         sorting_parameters: list[models.SortingParameter],
         skip: int = 0,
         limit: int | None = None,
+        timer: PhaseTimer | None = None,
     ) -> JsonObject:
-        """Applies an aggregation pipeline to a mongodb collection"""
+        """Applies an aggregation pipeline to a mongodb collection
+
+        If a timer is passed, the time spent for building the pipeline and for running
+        it in the database is measured in the phases "build" and "db", and the
+        execution strategy and number of pipeline stages are added as annotations.
+        """
+        ...
+
+    @abstractmethod
+    def build_pipeline(  # noqa: PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> list[JsonObject]:
+        """Build the aggregation pipeline for the given query without running it"""
+        ...
+
+    @abstractmethod
+    async def explain(  # noqa: PLR0913
+        self,
+        *,
+        selected_fields: list[models.FieldLabel],
+        facet_fields: list[models.FieldLabel],
+        query: str,
+        filters: list[models.Filter],
+        sorting_parameters: list[models.SortingParameter],
+        skip: int = 0,
+        limit: int | None = None,
+        verbosity: str = "executionStats",
+    ) -> models.QueryExplanation:
+        """Explain how the aggregation pipeline for the given query is executed
+
+        By default, the pipeline is run in the database, returning the query plan
+        along with the execution statistics instead of the results. With the verbosity
+        "queryPlanner", only the query plan is returned without running the pipeline.
+        """
+        ...
+
+    @abstractmethod
+    async def suggest(self, *, prefix: str, limit: int) -> list[models.Suggestion]:
+        """Complete the last word of the prefix with words covered by the text index
+
+        The completions are the words contained in the most resources, ordered by the
+        number of these resources. They are read from a dictionary of the words that is
+        updated whenever resources are written, without running a search.
+        """
+        ...
+
+    @abstractmethod
+    async def facet_values(  # noqa: PLR0913
+        self,
+        *,
+        facet: models.FieldLabel,
+        prefix: str,
+        query: str,
+        filters: list[models.Filter],
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> models.FacetValues:
+        """Get the options of a facet whose text values start with the prefix
+
+        The options are counted among the resources matching the query and filters,
+        like the facets of the search results, and ordered by their counts. Only a
+        range of the sorted values of the facet needs to be looked at, which is read
+        from an index on these values.
+        """
         ...
 
 
@@ -17,13 +17,49 @@
 """ResourceDao Port and DaoCollectionPort"""
 
 from abc import ABC, abstractmethod
-from typing import TypeAlias
+from collections.abc import AsyncIterator, Mapping, Sequence
+from typing import Any, Protocol
 
-from hexkit.protocols.dao import Dao
+from hexkit.custom_types import ID
 
 from mass.core.models import Resource
 
-ResourceDao: TypeAlias = Dao[Resource]
+
+class ResourceDao(Protocol):
+    """A DAO for the resources of one class
+
+    This is the hexkit DAO protocol without transactions, which are not supported by
+    all backends and not needed by the service. The methods behave and raise errors
+    like those of the hexkit DAOs.
+    """
+
+    async def get_by_id(self, id_: ID) -> Resource:
+        """Get the resource with the given ID"""
+        ...
+
+    async def update(self, dto: Resource) -> None:
+        """Update an existing resource"""
+        ...
+
+    async def delete(self, id_: ID) -> None:
+        """Delete the resource with the given ID"""
+        ...
+
+    async def find_one(self, *, mapping: Mapping[str, Any]) -> Resource:
+        """Find the one resource that matches the mapping"""
+        ...
+
+    def find_all(self, *, mapping: Mapping[str, Any]) -> AsyncIterator[Resource]:
+        """Find all resources that match the mapping"""
+        ...
+
+    async def insert(self, dto: Resource) -> None:
+        """Insert a new resource"""
+        ...
+
+    async def upsert(self, dto: Resource) -> None:
+        """Update the resource if it exists, insert it otherwise"""
+        ...
 
 
 class DaoCollectionPort(ABC):
@@ -41,6 +77,26 @@ class DaoCollectionPort(ABC):
         """
         ...
 
+    @abstractmethod
+    async def bulk_write(
+        self,
+        *,
+        class_name: str,
+        upserts: Sequence[Resource] = (),
+        deletions: Sequence[str] = (),
+    ) -> None:
+        """Upsert and delete resources of the specified class in one bulk operation.
+
+        The operations are not guaranteed to be applied in order, therefore the same
+        resource ID must not be used in both the upserts and the deletions.
+
+        Args:
+            class_name (str): name of the resource class
+            upserts (Sequence[Resource]): resources that shall be inserted or replaced
+            deletions (Sequence[str]): IDs of the resources that shall be deleted
+        """
+        ...
+
     def create_collections_and_indexes_if_needed(self) -> None:  # noqa: B027
         """Creates `MongoDB` collections and indexes.
 
@@ -58,3 +114,37 @@ class DaoCollectionPort(ABC):
         happen when the database has been modified from the outside, e.g. for testing.
         """
         ...
+
+    def drop_indexes(self) -> None:  # noqa: B027
+        """Drops the `MongoDB` indexes of all configured collections.
+
+        This can be used to speed up writing a large number of resources. The indexes
+        can be created again afterwards using `recreate_collections_and_indexes`.
+        """
+        ...
+
+    def drop_collections(self) -> None:  # noqa: B027
+        """Drops the `MongoDB` collections of all configured classes."""
+        ...
+
+    @abstractmethod
+    def count_resources(self, *, class_name: str) -> int:
+        """Count the resources of the specified class
+
+        Args:
+            class_name (str): name of the resource class
+
+        Returns:
+            The number of resources in the database (int)
+        """
+        ...
+
+    @abstractmethod
+    def swap_in_collections(self) -> None:
+        """Replaces the live collections with the shadow collections.
+
+        This is only possible when the DAO collection has been set up to use shadow
+        collections. Each collection is replaced atomically, so that searches either
+        see the complete old or the complete new state of a resource class.
+        """
+        ...
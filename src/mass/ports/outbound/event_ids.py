@@ -0,0 +1,46 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Contains the outbound port for a store of processed event IDs"""
+
+from abc import ABC, abstractmethod
+
+from pydantic import UUID4
+
+
+class ProcessedEventStorePort(ABC):
+    """A port describing a store that remembers the IDs of recently processed events"""
+
+    @abstractmethod
+    async def contains(self, *, event_id: UUID4) -> bool:
+        """Check whether the event with the given ID has been processed recently
+
+        Args:
+            event_id (UUID4): the ID of the event
+
+        Returns:
+            Whether the event has been processed already (bool)
+        """
+        ...
+
+    @abstractmethod
+    async def add(self, *, event_id: UUID4) -> None:
+        """Remember that the event with the given ID has been processed
+
+        Args:
+            event_id (UUID4): the ID of the event
+        """
+        ...
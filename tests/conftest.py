@@ -28,6 +28,7 @@ from hexkit.providers.mongodb.testutils import (  # noqa: F401
 from tests.fixtures.joint import (  # noqa: F401
     JointFixture,
     joint_fixture,
+    search_backend,
 )
 
 mongodb = get_persistent_mongodb_fixture()
@@ -19,9 +19,11 @@
 import glob
 import re
 from collections.abc import AsyncGenerator, Mapping
+from contextlib import nullcontext
 from dataclasses import dataclass
 from typing import TypeAlias
 
+import pytest
 import pytest_asyncio
 from ghga_service_commons.api.testing import AsyncTestClient
 from hexkit.custom_types import Ascii, JsonObject
@@ -29,6 +31,9 @@ from hexkit.providers.akafka import KafkaEventSubscriber
 from hexkit.providers.akafka.testutils import KafkaFixture
 from hexkit.providers.mongodb.testutils import MongoClient, MongoDbFixture
 
+from mass.adapters.outbound.dao import DaoCollection
+from mass.adapters.outbound.memory import get_database
+from mass.adapters.outbound.snapshot import snapshot_path, write_snapshot
 from mass.config import Config
 from mass.core import models
 from mass.inject import prepare_core, prepare_event_subscriber, prepare_rest_app
@@ -38,6 +43,11 @@ from tests.fixtures.utils import get_resources_from_file
 
 QueryParams: TypeAlias = Mapping[str, int | str | list[str]]
 
+# the search backends that must return the same results as MongoDB
+SEARCH_BACKENDS = ["mongodb", "memory", "sqlite", "snapshot"]
+# the search backends that cannot be written to by the tests
+READ_ONLY_BACKENDS = {"snapshot"}
+
 
 @dataclass
 class State:
@@ -48,11 +58,35 @@ class State:
     # the events are considered dirty if some have been published already
     events_dirty: bool
     resources: dict[str, list[models.Resource]]
+    # the search backend into which the test data has been loaded
+    search_backend: str = "mongodb"
 
 
 state = State(database_dirty=True, events_dirty=False, resources={})
 
 
+def get_test_data() -> dict[str, list[models.Resource]]:
+    """Get the resources of each test data file by the name of their class"""
+    filename_pattern = re.compile(r"/(\w+)\.json")
+    for filename in glob.glob("tests/fixtures/test_data/*.json"):
+        match_obj = re.search(filename_pattern, filename)
+        if match_obj and match_obj.group(1) not in state.resources:
+            state.resources[match_obj.group(1)] = get_resources_from_file(filename)
+    return state.resources
+
+
+def export_test_snapshots(config: Config) -> None:
+    """Export the test data to the snapshots read by the snapshot backend"""
+    config.snapshot_dir.mkdir(parents=True, exist_ok=True)
+    for class_name, resources in get_test_data().items():
+        write_snapshot(
+            snapshot_path(config.snapshot_dir, class_name),
+            class_name=class_name,
+            searchable_class=config.searchable_classes[class_name],
+            resources=resources,
+        )
+
+
 @dataclass
 class JointFixture:
     """A fixture embedding all other fixtures."""
@@ -68,6 +102,8 @@ class JointFixture:
     _mongodb: MongoDbFixture
     _kafka: KafkaFixture
     _query_handler: QueryHandlerPort
+    # query handler using MongoDB, which is the reference for other backends
+    _mongodb_query_handler: QueryHandlerPort
     _event_subscriber: KafkaEventSubscriber
 
     # convenience methods that can be accessed by tests directly
@@ -75,6 +111,9 @@ class JointFixture:
     def purge_database(self) -> None:
         """Empty the database."""
         self._mongodb.empty_collections()
+        get_database(self.config.db_name).collections.clear()
+        if self.config.search_backend == "sqlite":
+            self._query_handler._dao_collection.drop_collections()  # type: ignore
         state.database_dirty = True
 
     async def purge_events(self) -> None:
@@ -82,31 +121,39 @@ class JointFixture:
         await self._kafka.clear_topics()
 
     async def load_test_data(self) -> None:
-        """Populate a collection for each file in test_data."""
-        filename_pattern = re.compile(r"/(\w+)\.json")
-        self._query_handler._dao_collection._indexes_created = False  # type: ignore
-        for filename in glob.glob("tests/fixtures/test_data/*.json"):
-            match_obj = re.search(filename_pattern, filename)
-            if match_obj:
-                collection_name = match_obj.group(1)
-                resources = state.resources.get(collection_name)
-                if resources is None:
-                    resources = get_resources_from_file(filename)
-                    state.resources[collection_name] = resources
-                for resource in resources:
-                    await self._query_handler.load_resource(
+        """Populate a collection for each file in test_data.
+
+        If another search backend than MongoDB is used, the test data is loaded into
+        MongoDB as well, so that it can be used as a reference in the tests. Read-only
+        backends have been set up with the test data beforehand.
+        """
+        self._mongodb_query_handler._dao_collection._indexes_created = False  # type: ignore
+        query_handlers = dict.fromkeys(
+            [self._query_handler, self._mongodb_query_handler]
+        )
+        if self.config.search_backend in READ_ONLY_BACKENDS:
+            del query_handlers[self._query_handler]
+        for collection_name, resources in get_test_data().items():
+            for resource in resources:
+                for query_handler in query_handlers:
+                    await query_handler.load_resource(
                         resource=resource, class_name=collection_name
                     )
+        # MongoDB counts the words in the background when loading single resources
+        dao_collection = self._mongodb_query_handler._dao_collection  # type: ignore
+        if isinstance(dao_collection, DaoCollection):
+            await dao_collection.flush_word_counts()
 
     async def reset_state(self) -> None:
         """Reset the state of the database and event topics if needed."""
         if state.events_dirty:
             await self.purge_events()
             state.events_dirty = False
-        if state.database_dirty:
+        if state.database_dirty or state.search_backend != self.config.search_backend:
             self.purge_database()
             await self.load_test_data()
             state.database_dirty = False
+            state.search_backend = self.config.search_backend
 
     async def call_search_endpoint(self, params: QueryParams) -> models.QueryResults:
         """Call the search endpoint (convenience method)."""
@@ -125,7 +172,7 @@ class JointFixture:
 
     def recreate_mongodb_indexes(self) -> None:
         """Set flag to recreate MongoDB indexes and mark the database state as dirty."""
-        self._query_handler._dao_collection._indexes_created = False  # type: ignore
+        self._mongodb_query_handler._dao_collection._indexes_created = False  # type: ignore
         state.database_dirty = True
 
     async def handle_query(
@@ -147,8 +194,14 @@ class JointFixture:
             sorting_parameters=sorting_parameters,
         )
 
+    def _skip_if_read_only(self) -> None:
+        """Skip the test if it writes to a read-only search backend."""
+        if self.config.search_backend in READ_ONLY_BACKENDS:
+            pytest.skip(f"The {self.config.search_backend} backend is read-only.")
+
     async def delete_resource(self, resource_id: str, class_name: str) -> None:
         """Delete a resource and mark the database state as dirty."""
+        self._skip_if_read_only()
         await self._query_handler.delete_resource(
             resource_id=resource_id, class_name=class_name
         )
@@ -156,6 +209,7 @@ class JointFixture:
 
     async def load_resource(self, resource: models.Resource, class_name: str) -> None:
         """Load a resource and mark the database state as dirty."""
+        self._skip_if_read_only()
         await self._query_handler.load_resource(
             resource=resource, class_name=class_name
         )
@@ -175,16 +229,46 @@ class JointFixture:
         state.events_dirty = True
 
 
+@pytest.fixture()
+def search_backend(request: pytest.FixtureRequest) -> str:
+    """The search backend used by the joint fixture, MongoDB by default.
+
+    Test modules can run their tests against all backends using indirect
+    parametrization of this fixture.
+    """
+    return getattr(request, "param", "mongodb")
+
+
 @pytest_asyncio.fixture()
 async def joint_fixture(
-    mongodb: MongoDbFixture, kafka: KafkaFixture
+    mongodb: MongoDbFixture,
+    kafka: KafkaFixture,
+    search_backend: str,
+    tmp_path_factory: pytest.TempPathFactory,
 ) -> AsyncGenerator[JointFixture]:
     """Function scoped joint fixture for API-level integration testing."""
     # merge configs from different sources with the default one:
-    config = get_config(sources=[mongodb.config, kafka.config], kafka_enable_dlq=True)
+    config = get_config(
+        sources=[mongodb.config, kafka.config],
+        kafka_enable_dlq=True,
+        search_backend=search_backend,
+        # the database file is kept for the session like the test data in MongoDB
+        sqlite_path=tmp_path_factory.getbasetemp() / "mass.sqlite",
+        snapshot_dir=tmp_path_factory.getbasetemp() / "snapshots",
+    )
+    if search_backend == "snapshot":
+        # the snapshots are opened when preparing the core, so they are written first
+        export_test_snapshots(config)
 
     async with (
         prepare_core(config=config) as query_handler,
+        (
+            nullcontext(query_handler)
+            if search_backend == "mongodb"
+            else prepare_core(
+                config=config.model_copy(update={"search_backend": "mongodb"})
+            )
+        ) as mongodb_query_handler,
         prepare_rest_app(config=config, query_handler_override=query_handler) as app,
         prepare_event_subscriber(
             config=config, query_handler_override=query_handler
@@ -194,6 +278,7 @@ async def joint_fixture(
         joint_fixture = JointFixture(
             config=config,
             _query_handler=query_handler,
+            _mongodb_query_handler=mongodb_query_handler,
             _event_subscriber=event_subscriber,
             _kafka=kafka,
             _mongodb=mongodb,
@@ -17,14 +17,22 @@
 """Tests to assess API functionality"""
 
 import logging
+from unittest.mock import AsyncMock
+from uuid import uuid4
 
 import httpx
 import pytest
+from ghga_service_commons.api.api import CORRELATION_ID_HEADER_NAME
+from ghga_service_commons.api.testing import AsyncTestClient
+from hexkit.correlation import set_correlation_id
 from hexkit.providers.mongodb.provider import ConfiguredMongoClient
+from pydantic import SecretStr
 
 from mass.core import models
+from mass.inject import prepare_rest_app
+from mass.ports.inbound.query_handler import QueryHandlerPort
 from tests.fixtures.config import get_config
-from tests.fixtures.joint import JointFixture, QueryParams
+from tests.fixtures.joint import SEARCH_BACKENDS, JointFixture, QueryParams
 
 pytestmark = pytest.mark.asyncio()
 
@@ -187,3 +195,276 @@ async def test_auto_recreation_of_indexes(
         assert len(caplog.records) == 1
         msg = caplog.records[0].message
         assert "Missing text indexes, trying to recreate them" in msg
+
+
+async def test_metrics(joint_fixture: JointFixture):
+    """Verify that search requests are recorded in the exposed metrics"""
+    await joint_fixture.call_search_endpoint({"class_name": CLASS_NAME})
+    params: QueryParams = {"class_name": "InvalidClassName"}
+    with pytest.raises(httpx.HTTPStatusError):
+        await joint_fixture.call_search_endpoint(params)
+
+    response = await joint_fixture.rest_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    metrics = response.text
+    assert f'mass_search_duration_seconds_count{{class_name="{CLASS_NAME}"}}' in metrics
+    for phase in ["build", "db", "validate", "serialize"]:
+        label = f'class_name="{CLASS_NAME}",phase="{phase}"'
+        assert f"mass_search_phase_duration_seconds_count{{{label}}}" in metrics
+    label = 'class_name="unknown",error="ClassNotConfiguredError"'
+    assert f"mass_search_errors_total{{{label}}}" in metrics
+    assert "InvalidClassName" not in metrics
+
+
+async def test_server_timing(joint_fixture: JointFixture):
+    """Test that the Server-Timing header is only sent when enabled"""
+    params: QueryParams = {"class_name": CLASS_NAME}
+    response = await joint_fixture.rest_client.get("/search", params=params)
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+    config = joint_fixture.config.model_copy(update={"server_timing": True})
+    async with (
+        prepare_rest_app(config=config) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        response = await rest_client.get("/search", params=params)
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+    metrics = dict(
+        metric.strip().split(";", 1)
+        for metric in response.headers["Server-Timing"].split(",")
+    )
+    for phase in ["build", "db", "validate", "serialize", "total"]:
+        assert metrics[phase].startswith("dur=")
+    assert metrics["strategy"] == 'desc="aggregate"'
+    assert metrics["stages"].startswith("desc=")
+
+
+@pytest.mark.parametrize(
+    "admin_token, authorization, status_code",
+    [
+        (None, "Bearer secret", 403),
+        ("secret", None, 401),
+        ("secret", "Bearer wrong", 403),
+        ("secret", "Bearer secret", 200),
+    ],
+)
+async def test_explain_requires_admin(
+    admin_token: str | None, authorization: str | None, status_code: int
+):
+    """Test that the explain endpoint can only be used with the admin token"""
+    config = get_config(admin_token=admin_token)
+    query_handler = AsyncMock(spec=QueryHandlerPort)
+    query_handler.explain_query.return_value = models.QueryExplanation(
+        pipeline=[], execution_stats={}
+    )
+    headers = {"Authorization": authorization} if authorization else {}
+    async with (
+        prepare_rest_app(config=config, query_handler_override=query_handler) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        response = await rest_client.get(
+            "/search/explain", params={"class_name": CLASS_NAME}, headers=headers
+        )
+
+    assert response.status_code == status_code
+    assert query_handler.explain_query.await_count == (status_code == 200)
+
+
+async def test_explain(joint_fixture: JointFixture):
+    """Test that the pipeline and execution statistics of a search are returned"""
+    config = joint_fixture.config.model_copy(
+        update={"admin_token": SecretStr("secret")}
+    )
+    params: QueryParams = {
+        "class_name": CLASS_NAME,
+        "query": "hotel",
+        "filter_by": ["object.type"],
+        "value": ["piano"],
+    }
+    async with (
+        prepare_rest_app(config=config) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        response = await rest_client.get(
+            "/search/explain",
+            params=params,
+            headers={"Authorization": "Bearer secret"},
+        )
+
+    assert response.status_code == 200
+    explanation = models.QueryExplanation(**response.json())
+    assert {"$match": {"$text": {"$search": "hotel"}}} in explanation.pipeline
+    assert "executionStats" in str(explanation.execution_stats)
+
+
+@pytest.mark.parametrize("search_backend", SEARCH_BACKENDS, indirect=True)
+async def test_suggest(joint_fixture: JointFixture):
+    """Test that the most frequent words completing the last word are returned"""
+    params: QueryParams = {
+        "class_name": "RelevanceTests",
+        "prefix": "Same as I",
+        "limit": 3,
+    }
+    response = await joint_fixture.rest_client.get("/suggest", params=params)
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"text": "i1", "count": 2},
+        {"text": "i4", "count": 2},
+        {"text": "i2", "count": 1},
+    ]
+
+    response = await joint_fixture.rest_client.get(
+        "/suggest", params={"class_name": "InvalidClassName"}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("limit, status_code", [(0, 422), (1, 200), (101, 422)])
+async def test_suggest_limit(limit: int, status_code: int):
+    """Test that the number of completions is limited"""
+    query_handler = AsyncMock(spec=QueryHandlerPort)
+    query_handler.suggest.return_value = [models.Suggestion(text="test", count=1)]
+    async with (
+        prepare_rest_app(
+            config=get_config(), query_handler_override=query_handler
+        ) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        response = await rest_client.get(
+            "/suggest", params={"class_name": CLASS_NAME, "limit": limit}
+        )
+
+    assert response.status_code == status_code
+    assert query_handler.suggest.await_count == (status_code == 200)
+
+
+@pytest.mark.parametrize("search_backend", SEARCH_BACKENDS, indirect=True)
+async def test_facet_values(joint_fixture: JointFixture):
+    """Test that the options of a facet starting with a prefix are returned"""
+    url = "/facet-values"
+    params: QueryParams = {"class_name": "FilteringTests", "key": "friends.name"}
+    response = await joint_fixture.rest_client.get(url, params={**params, "limit": 3})
+    assert response.status_code == 200
+    assert response.json() == {
+        "key": "friends.name",
+        "name": "Friend",
+        "count": 13,
+        "options": [
+            {"value": "Jack", "count": 3},
+            {"value": "Jon", "count": 2},
+            {"value": "Arlene", "count": 1},
+        ],
+    }
+
+    # the options are counted among the results of the query and filters
+    response = await joint_fixture.rest_client.get(
+        url, params={**params, "prefix": "J", "filter_by": "species", "value": "cat"}
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    assert response.json()["options"] == [
+        {"value": "Jack", "count": 1},
+        {"value": "Jon", "count": 1},
+    ]
+    params = {"class_name": "FilteringTests", "key": "items.color"}
+    response = await joint_fixture.rest_client.get(
+        url, params={**params, "query": "cat", "skip": 1}
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+    assert response.json()["options"] == [
+        {"value": "white", "count": 1},
+        {"value": "yellow", "count": 1},
+    ]
+    response = await joint_fixture.rest_client.get(
+        url, params={**params, "prefix": "P"}
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == 0
+    assert response.json()["options"] == []
+
+    for invalid_params in (
+        {"class_name": "InvalidClassName", "key": "items.color"},
+        {"class_name": "FilteringTests", "key": "name"},
+        {"class_name": "FilteringTests", "key": "items.color", "filter_by": "eats"},
+    ):
+        response = await joint_fixture.rest_client.get(url, params=invalid_params)
+        assert response.status_code == 422
+
+
+@pytest.mark.parametrize("limit, status_code", [(0, 422), (1, 200), (1001, 422)])
+async def test_facet_values_limit(limit: int, status_code: int):
+    """Test that the number of returned facet options is limited"""
+    query_handler = AsyncMock(spec=QueryHandlerPort)
+    query_handler.facet_values.return_value = models.FacetValues(
+        key="category", options=[]
+    )
+    async with (
+        prepare_rest_app(
+            config=get_config(), query_handler_override=query_handler
+        ) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        response = await rest_client.get(
+            "/facet-values",
+            params={"class_name": CLASS_NAME, "key": "category", "limit": limit},
+        )
+
+    assert response.status_code == status_code
+    assert query_handler.facet_values.await_count == (status_code == 200)
+
+
+async def test_operations_are_tagged_with_correlation_id(joint_fixture: JointFixture):
+    """Test that database operations carry the correlation ID as a comment"""
+    correlation_id = str(uuid4())
+    db = joint_fixture.mongodb_client[joint_fixture.config.db_name]
+    db.command("profile", 2)
+    try:
+        response = await joint_fixture.rest_client.get(
+            "/search",
+            params={"class_name": CLASS_NAME},
+            headers={CORRELATION_ID_HEADER_NAME: correlation_id},
+        )
+    finally:
+        db.command("profile", 0)
+    assert response.status_code == 200
+
+    comments = [
+        entry["command"]["comment"]
+        for entry in db["system.profile"].find(
+            {"command.comment.correlation_id": correlation_id}
+        )
+    ]
+    db["system.profile"].drop()
+    assert {comment["operation"] for comment in comments} == {"find", "aggregate"}
+    assert all(comment["class_name"] == CLASS_NAME for comment in comments)
+
+
+async def test_writes_are_tagged_with_correlation_id(joint_fixture: JointFixture):
+    """Test that single upserts and deletions carry the correlation ID as a comment"""
+    correlation_id = uuid4()
+    resource = models.Resource(id_="tagged", content={"type": "hotel"})
+    db = joint_fixture.mongodb_client[joint_fixture.config.db_name]
+    db.command("profile", 2)
+    try:
+        async with set_correlation_id(correlation_id):
+            await joint_fixture.load_resource(resource, class_name=CLASS_NAME)
+            await joint_fixture.delete_resource(resource.id_, class_name=CLASS_NAME)
+    finally:
+        db.command("profile", 0)
+
+    comments = [
+        entry["command"]["comment"]
+        for entry in db["system.profile"].find(
+            {"command.comment.correlation_id": str(correlation_id)}
+        )
+    ]
+    db["system.profile"].drop()
+    assert {comment["operation"] for comment in comments} == {"upsert", "delete"}
+    assert all(comment["class_name"] == CLASS_NAME for comment in comments)
@@ -0,0 +1,172 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for the data generator and utilities used by the benchmarks"""
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from benchmarks.generator import (
+    FACET_FIELDS,
+    GeneratorSettings,
+    MetadataGenerator,
+    searchable_classes,
+)
+from benchmarks.micro import (
+    BASELINE_PATH,
+    MicroBenchmarkReport,
+    benchmarks,
+    compare_reports,
+    read_report,
+    regressions,
+)
+from benchmarks.mixed import InMemoryEventSource, updated_resources
+from benchmarks.search import HEAVY_FACET_FIELDS
+from benchmarks.utils import LatencyStatistics, make_config
+
+from mass.adapters.inbound.event_sub import EventSubTranslator
+
+
+def get_values(content, key: str) -> list:
+    """Get all values of the given dotted key, descending into arrays"""
+    values = content if isinstance(content, list) else [content]
+    for part in key.split("."):
+        values = [
+            item
+            for value in values
+            for item in (
+                value[part] if isinstance(value[part], list) else [value[part]]
+            )
+        ]
+    return values
+
+
+def test_generator_is_deterministic():
+    """Test that the same settings produce the same documents"""
+    settings = GeneratorSettings(seed=7, vocabulary_size=100)
+    first = list(MetadataGenerator(settings).resources("Dataset", 20))
+    second = list(MetadataGenerator(settings).resources("Dataset", 20))
+    other = list(MetadataGenerator(GeneratorSettings(seed=8)).resources("Dataset", 20))
+
+    assert first == second
+    assert first != other
+    assert (
+        list(MetadataGenerator(settings).resources("Dataset", 5, start=15))
+        == (first[15:])
+    )
+    assert len({resource.id_ for resource in first}) == 20
+
+
+@pytest.mark.parametrize("class_name", list(FACET_FIELDS))
+def test_generated_documents_have_facets(class_name: str):
+    """Test that all facet fields are present with the configured cardinality"""
+    settings = GeneratorSettings(facet_cardinality=5, nesting_depth=3)
+    resources = list(MetadataGenerator(settings).resources(class_name, 200))
+
+    assert class_name in searchable_classes()
+    for key in FACET_FIELDS[class_name] + HEAVY_FACET_FIELDS[class_name]:
+        values = {
+            value
+            for resource in resources
+            for value in get_values(resource.content, key)
+        }
+        assert values
+        assert all(isinstance(value, str) for value in values)
+        if key in FACET_FIELDS[class_name]:
+            assert len(values) <= 5
+
+
+def test_latency_statistics():
+    """Test that latencies are converted to milliseconds"""
+    statistics = LatencyStatistics.from_durations([0.001 * n for n in range(1, 101)])
+    assert statistics.runs == 100
+    assert statistics.p50 == pytest.approx(50)
+    assert statistics.p99 == pytest.approx(99)
+    assert statistics.mean == pytest.approx(50.5)
+
+
+def test_micro_benchmarks_run():
+    """Test that all micro-benchmarks can be called and match the baseline"""
+    generator = MetadataGenerator(GeneratorSettings(vocabulary_size=100))
+    names = []
+    for name, function in benchmarks(generator):
+        function()
+        names.append(name)
+
+    assert len(names) == len(set(names))
+    assert set(read_report(BASELINE_PATH).timings) == set(names)
+
+
+def test_compare_micro_benchmarks():
+    """Test that regressions beyond the tolerance are detected"""
+    started = datetime.now(UTC)
+    baseline = MicroBenchmarkReport(
+        started=started,
+        python_version="3.12",
+        pydantic_version="2",
+        timings={"same": 10.0, "slower": 10.0, "faster": 10.0, "removed": 1.0},
+    )
+    current = baseline.model_copy(
+        update={"timings": {"same": 11.0, "slower": 13.0, "faster": 5.0, "new": 1.0}}
+    )
+    comparisons = compare_reports(baseline, current)
+
+    assert [comparison.name for comparison in comparisons] == [
+        "same",
+        "slower",
+        "faster",
+        "removed",
+        "new",
+    ]
+    assert comparisons[1].ratio == pytest.approx(1.3)
+    assert comparisons[3].ratio is None
+    assert comparisons[4].ratio is None
+    assert regressions(comparisons, tolerance=0.25) == ["slower"]
+    assert regressions(comparisons, tolerance=0.5) == []
+
+
+@pytest.mark.asyncio()
+async def test_in_memory_event_source():
+    """Test that upsertion events are fed to the translator at the given rate"""
+    config = make_config(
+        mongo_dsn="mongodb://localhost:27017",
+        db_name="mass-benchmark",
+        searchable_classes=searchable_classes(),
+    )
+    query_handler = AsyncMock()
+    generator = MetadataGenerator(GeneratorSettings(vocabulary_size=100))
+    source = InMemoryEventSource(
+        translator=EventSubTranslator(
+            config=config,
+            query_handler=query_handler,
+            class_names=config.searchable_classes,
+        ),
+        config=config,
+        class_name="Study",
+        resources=updated_resources(generator, class_name="Study", documents=3),
+    )
+
+    rate = await source.run(rate=50, duration=0.2)
+
+    calls = query_handler.load_resource.await_args_list
+    assert 5 <= len(calls) <= 11
+    assert rate <= 55
+    assert len(source.durations) == len(calls)
+    resources = [call.kwargs["resource"] for call in calls]
+    assert {call.kwargs["class_name"] for call in calls} == {"Study"}
+    assert resources[:3] == list(generator.resources("Study", 3))
+    assert resources[3] == resources[0]
@@ -0,0 +1,290 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for writing resources in bulk and the catch-up mode of the event consumer"""
+
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+from aiokafka import TopicPartition
+from ghga_event_schemas import pydantic_ as event_schemas
+from hexkit.providers.akafka.testutils import KafkaFixture
+from hexkit.providers.mongodb.testutils import MongoDbFixture
+from pymongo import TEXT
+
+from mass.adapters.inbound.consumer import IdleStoppingConsumer, ReplayingConsumer
+from mass.core import models
+from mass.core.bulk_query_handler import BulkQueryHandler
+from mass.inject import prepare_core
+from mass.main import catch_up_events
+from mass.ports.outbound.aggregator import AggregatorCollectionPort
+from mass.ports.outbound.dao import DaoCollectionPort
+from tests.fixtures.config import get_config
+from tests.fixtures.joint import state
+
+pytestmark = pytest.mark.asyncio()
+
+CLASS_NAME = "NestedData"
+
+
+def make_resource(id_: str, city: str = "Berlin") -> models.Resource:
+    """Create a resource with the given ID"""
+    return models.Resource(id_=id_, content={"city": city})
+
+
+def make_bulk_query_handler(batch_size: int) -> tuple[BulkQueryHandler, Mock]:
+    """Create a bulk query handler with a mock DAO collection"""
+    dao_collection = Mock(spec=DaoCollectionPort)
+    query_handler = BulkQueryHandler(
+        config=get_config(),
+        aggregator_collection=Mock(spec=AggregatorCollectionPort),
+        dao_collection=dao_collection,
+        batch_size=batch_size,
+    )
+    return query_handler, dao_collection
+
+
+async def test_changes_are_written_in_batches():
+    """Test that changes are buffered until the batch size is reached"""
+    query_handler, dao_collection = make_bulk_query_handler(batch_size=3)
+
+    await query_handler.load_resource(
+        resource=make_resource("id-1"), class_name=CLASS_NAME
+    )
+    await query_handler.load_resource(
+        resource=make_resource("id-1", city="Hamburg"), class_name=CLASS_NAME
+    )
+    await query_handler.delete_resource(resource_id="id-2", class_name=CLASS_NAME)
+    dao_collection.bulk_write.assert_not_awaited()
+
+    await query_handler.load_resource(
+        resource=make_resource("id-3"), class_name=CLASS_NAME
+    )
+    dao_collection.bulk_write.assert_awaited_once_with(
+        class_name=CLASS_NAME,
+        upserts=[make_resource("id-1", city="Hamburg"), make_resource("id-3")],
+        deletions=["id-2"],
+    )
+    assert query_handler.written == 3
+
+
+async def test_unconfigured_class_is_rejected():
+    """Test that changes for unconfigured classes are rejected right away"""
+    query_handler, _ = make_bulk_query_handler(batch_size=3)
+
+    with pytest.raises(BulkQueryHandler.ClassNotConfiguredError):
+        await query_handler.load_resource(
+            resource=make_resource("id-1"), class_name="NotConfigured"
+        )
+    with pytest.raises(BulkQueryHandler.ClassNotConfiguredError):
+        await query_handler.delete_resource(
+            resource_id="id-1", class_name="NotConfigured"
+        )
+
+
+async def test_writing_keeps_indexes():
+    """Test that indexes are kept in place when writing to searched collections"""
+    query_handler, dao_collection = make_bulk_query_handler(batch_size=100)
+
+    async with query_handler.writing():
+        dao_collection.create_collections_and_indexes_if_needed.assert_called_once()
+        await query_handler.load_resource(
+            resource=make_resource("id-1"), class_name=CLASS_NAME
+        )
+        dao_collection.bulk_write.assert_not_awaited()
+
+    dao_collection.bulk_write.assert_awaited_once()
+    dao_collection.drop_indexes.assert_not_called()
+
+
+async def test_deferred_indexing():
+    """Test that indexes are dropped first and built again after the last write"""
+    query_handler, dao_collection = make_bulk_query_handler(batch_size=100)
+    dao_collection.count_resources.return_value = 0
+
+    async with query_handler.deferred_indexing():
+        dao_collection.drop_indexes.assert_called_once()
+        await query_handler.load_resource(
+            resource=make_resource("id-1"), class_name=CLASS_NAME
+        )
+        dao_collection.bulk_write.assert_not_awaited()
+        dao_collection.recreate_collections_and_indexes.assert_not_called()
+
+    dao_collection.bulk_write.assert_awaited_once()
+    dao_collection.recreate_collections_and_indexes.assert_called_once()
+
+
+async def test_deferred_indexing_requires_empty_collections():
+    """Test that indexes of collections containing resources are not dropped"""
+    query_handler, dao_collection = make_bulk_query_handler(batch_size=100)
+    dao_collection.count_resources.side_effect = lambda class_name: (
+        1 if class_name == CLASS_NAME else 0
+    )
+
+    with pytest.raises(BulkQueryHandler.CollectionInUseError):
+        async with query_handler.deferred_indexing():
+            pass
+    dao_collection.drop_indexes.assert_not_called()
+
+
+async def test_rebuild_swaps_in_verified_collections():
+    """Test that shadow collections are swapped in after successful verification"""
+    query_handler, dao_collection = make_bulk_query_handler(batch_size=100)
+    dao_collection.count_resources.side_effect = lambda class_name: (
+        1 if class_name == CLASS_NAME else 0
+    )
+
+    async with query_handler.rebuild():
+        dao_collection.drop_collections.assert_called_once()
+        await query_handler.load_resource(
+            resource=make_resource("id-1"), class_name=CLASS_NAME
+        )
+        await query_handler.load_resource(
+            resource=make_resource("id-2"), class_name=CLASS_NAME
+        )
+        await query_handler.delete_resource(resource_id="id-2", class_name=CLASS_NAME)
+
+    dao_collection.recreate_collections_and_indexes.assert_called_once()
+    dao_collection.swap_in_collections.assert_called_once()
+
+
+async def test_rebuild_with_unexpected_count_is_not_swapped_in():
+    """Test that shadow collections with an unexpected size are not swapped in"""
+    query_handler, dao_collection = make_bulk_query_handler(batch_size=100)
+    dao_collection.count_resources.return_value = 0
+
+    with pytest.raises(BulkQueryHandler.RebuildVerificationError):
+        async with query_handler.rebuild():
+            await query_handler.load_resource(
+                resource=make_resource("id-1"), class_name=CLASS_NAME
+            )
+
+    dao_collection.swap_in_collections.assert_not_called()
+
+
+async def test_consumer_stops_when_idle():
+    """Test that the consumer only stops when waiting too long for the next event"""
+    events = ["first", "second"]
+
+    class SlowConsumer:
+        async def __anext__(self):
+            await asyncio.sleep(0.1 if events else 3600)
+            return events.pop(0)
+
+    consumer = IdleStoppingConsumer(SlowConsumer(), idle_timeout=0.5)
+    consumed = []
+    async for event in consumer:
+        consumed.append(event)
+        # processing the event does not count as being idle
+        await asyncio.sleep(1)
+    assert consumed == ["first", "second"]
+
+
+class PartitionConsumer:
+    """A consumer of one partition that stops after the given number of events"""
+
+    def __init__(self, *, events: int, end: int):
+        self.partition = TopicPartition("topic", 0)
+        self.events = events
+        self.end = end
+        self.consumed = 0
+
+    async def __anext__(self):  # noqa: D105
+        if self.consumed == self.events:
+            raise StopAsyncIteration
+        self.consumed += 1
+        return self.consumed
+
+    def assignment(self):  # noqa: D102
+        return {self.partition}
+
+    async def end_offsets(self, partitions):  # noqa: D102
+        return dict.fromkeys(partitions, self.end)
+
+    async def position(self, partition):  # noqa: D102
+        return self.consumed
+
+
+async def test_replay_is_verified():
+    """Test that a replay must reach the end offsets from when it started"""
+    consumer = ReplayingConsumer(PartitionConsumer(events=3, end=3))
+    await consumer.commit()
+    assert [event async for event in consumer] == [1, 2, 3]
+
+    consumer = ReplayingConsumer(PartitionConsumer(events=2, end=3))
+    with pytest.raises(ReplayingConsumer.IncompleteReplayError):
+        _ = [event async for event in consumer]
+
+
+async def test_catch_up(mongodb: MongoDbFixture, kafka: KafkaFixture):
+    """Test catching up with published events in bulk mode"""
+    config = get_config(sources=[mongodb.config, kafka.config], catch_up_idle_timeout=5)
+    state.database_dirty = state.events_dirty = True
+
+    for index in range(10):
+        payload = event_schemas.SearchableResource(
+            accession=f"catch-up-{index}",
+            class_name=CLASS_NAME,
+            content={"city": f"Catch-up city {index}"},
+        ).model_dump()
+        await kafka.publish_event(
+            payload=payload,
+            type_=config.resource_upsertion_type,
+            topic=config.resource_change_topic,
+            key=f"catch-up-{index}",
+        )
+
+    await catch_up_events(config=config)
+
+    # the text index must have been built again
+    collection = mongodb.client[config.db_name][CLASS_NAME]
+    assert any(index["name"] == f"$**_{TEXT}" for index in collection.list_indexes())
+
+    async with prepare_core(config=config) as query_handler:
+        results = await query_handler.handle_query(
+            class_name=CLASS_NAME, query='"Catch-up city"'
+        )
+    assert results.count == 10
+
+
+async def test_rebuild(mongodb: MongoDbFixture, kafka: KafkaFixture):
+    """Test rebuilding the database from all events using shadow collections"""
+    config = get_config(sources=[mongodb.config, kafka.config], catch_up_idle_timeout=5)
+    state.database_dirty = state.events_dirty = True
+
+    payload = event_schemas.SearchableResource(
+        accession="rebuilt", class_name=CLASS_NAME, content={"city": "Rebuilt city"}
+    ).model_dump()
+    await kafka.publish_event(
+        payload=payload,
+        type_=config.resource_upsertion_type,
+        topic=config.resource_change_topic,
+        key="rebuilt",
+    )
+
+    # add a resource to the live collection that is not backed by an event
+    collection = mongodb.client[config.db_name][CLASS_NAME]
+    collection.insert_one({"_id": "stale", "content": {"city": "Stale city"}})
+
+    await catch_up_events(config=config, rebuild=True)
+
+    db = mongodb.client[config.db_name]
+    assert not any(name.endswith("__building") for name in db.list_collection_names())
+    collection = db[CLASS_NAME]
+    assert any(index["name"] == f"$**_{TEXT}" for index in collection.list_indexes())
+    assert collection.find_one({"_id": "rebuilt"})
+    assert not collection.find_one({"_id": "stale"})
@@ -0,0 +1,256 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for coalescing repeated updates of the same resource"""
+
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from aiokafka import ConsumerRecord, TopicPartition
+from ghga_event_schemas import pydantic_ as event_schemas
+
+from mass.adapters.inbound.coalescer import CommitDeferringConsumer, UpdateCoalescer
+from mass.adapters.inbound.event_sub import EventSubTranslator
+from mass.core import models
+from tests.fixtures.config import get_config
+
+pytestmark = pytest.mark.asyncio()
+
+CLASS_NAME = "NestedData"
+WINDOW = 0.05
+
+
+def make_operation(applied: list[str], value: str):
+    """Create an operation that records the given value when applied"""
+
+    async def operation():
+        applied.append(value)
+
+    return operation
+
+
+async def test_only_latest_operation_is_applied():
+    """Test that operations for the same key are coalesced within the window"""
+    applied: list[str] = []
+    coalescer = UpdateCoalescer(window=WINDOW)
+
+    for value in ("first", "second", "third"):
+        coalescer.submit(key="key", operation=make_operation(applied, value))
+    coalescer.submit(key="other", operation=make_operation(applied, "other"))
+    assert coalescer.pending == 2
+    assert not applied
+
+    await asyncio.sleep(WINDOW * 4)
+
+    assert sorted(applied) == ["other", "third"]
+    assert coalescer.pending == 0
+
+
+async def test_pending_operations_are_flushed_on_teardown():
+    """Test that leaving the context applies pending operations right away"""
+    applied: list[str] = []
+
+    async with UpdateCoalescer.construct(window=3600) as coalescer:
+        coalescer.submit(key="key", operation=make_operation(applied, "first"))
+        coalescer.submit(key="key", operation=make_operation(applied, "second"))
+        assert not applied
+
+    assert applied == ["second"]
+    assert coalescer.pending == 0
+
+
+async def test_failing_operation_does_not_block_others():
+    """Test that an error in one operation does not affect others but is raised"""
+    applied: list[str] = []
+
+    async def failing_operation():
+        raise RuntimeError("Database unavailable")
+
+    with pytest.raises(UpdateCoalescer.OperationFailedError):
+        async with UpdateCoalescer.construct(window=3600) as coalescer:
+            coalescer.submit(key="good", operation=make_operation(applied, "first"))
+            coalescer.submit(key="bad", operation=failing_operation)
+            coalescer.submit(key="good", operation=make_operation(applied, "good"))
+
+    assert applied == ["good"]
+    # the operations up to the failing one count as applied
+    assert coalescer.applied == 1
+    assert coalescer.submitted == 3
+
+
+class FakeConsumer:
+    """A Kafka consumer delivering events of one partition and recording commits"""
+
+    def __init__(self, count: int):
+        self.events = [
+            ConsumerRecord(
+                topic="topic",
+                partition=0,
+                offset=offset,
+                timestamp=0,
+                timestamp_type=0,
+                key=None,
+                value=None,
+                checksum=None,
+                serialized_key_size=0,
+                serialized_value_size=0,
+                headers=(),
+            )
+            for offset in range(count)
+        ]
+        self.committed: list[int] = []
+        self.stopped = False
+
+    async def start(self):  # noqa: D102
+        pass
+
+    async def stop(self):  # noqa: D102
+        self.stopped = True
+
+    async def __anext__(self):  # noqa: D105
+        if not self.events:
+            # wait for events that never arrive
+            await asyncio.Event().wait()
+        return self.events.pop(0)
+
+    async def commit(self, offsets):  # noqa: D102
+        self.committed.append(offsets[TopicPartition("topic", 0)])
+
+
+async def test_commits_are_deferred_until_operations_are_applied():
+    """Test that events are only committed after their operations have been applied"""
+    applied: list[str] = []
+    fake_consumer = FakeConsumer(count=4)
+    coalescer = UpdateCoalescer(window=WINDOW)
+    consumer = CommitDeferringConsumer(fake_consumer, coalescer=coalescer)
+
+    for value in ("first", "second", "third"):
+        await consumer.__anext__()
+        coalescer.submit(key=value, operation=make_operation(applied, value))
+        await consumer.commit()
+    assert not fake_consumer.committed
+
+    # the events are committed as soon as their operations have been applied
+    await asyncio.sleep(WINDOW * 4)
+    assert sorted(applied) == ["first", "second", "third"]
+    assert fake_consumer.committed == [1, 2, 3]
+    await consumer.__anext__()
+    coalescer.submit(key="fourth", operation=make_operation(applied, "fourth"))
+    await consumer.commit()
+    assert fake_consumer.committed == [1, 2, 3]
+
+    await consumer.stop()
+    assert fake_consumer.committed == [1, 2, 3, 4]
+    assert fake_consumer.stopped
+
+
+async def test_nothing_is_committed_after_failures():
+    """Test that events are not committed anymore once an operation has failed"""
+
+    async def failing_operation():
+        raise RuntimeError("Database unavailable")
+
+    fake_consumer = FakeConsumer(count=2)
+    coalescer = UpdateCoalescer(window=3600)
+    consumer = CommitDeferringConsumer(fake_consumer, coalescer=coalescer)
+
+    await consumer.__anext__()
+    coalescer.submit(key="bad", operation=failing_operation)
+    await consumer.commit()
+    await consumer.__anext__()
+    coalescer.submit(key="good", operation=make_operation([], "good"))
+    await consumer.commit()
+
+    with pytest.raises(UpdateCoalescer.OperationFailedError):
+        await consumer.stop()
+    assert not fake_consumer.committed
+    assert fake_consumer.stopped
+
+
+async def test_failures_stop_waiting_for_events():
+    """Test that a failed operation is raised while waiting for the next event"""
+
+    async def failing_operation():
+        raise RuntimeError("Database unavailable")
+
+    fake_consumer = FakeConsumer(count=1)
+    coalescer = UpdateCoalescer(window=WINDOW)
+    consumer = CommitDeferringConsumer(fake_consumer, coalescer=coalescer)
+
+    await consumer.__anext__()
+    coalescer.submit(key="bad", operation=failing_operation)
+    await consumer.commit()
+
+    with pytest.raises(UpdateCoalescer.OperationFailedError):
+        await asyncio.wait_for(consumer.__anext__(), timeout=WINDOW * 20)
+    assert not fake_consumer.committed
+
+
+async def test_translator_coalesces_upserts_and_deletions():
+    """Test that the event translator only writes the latest change of a resource"""
+    config = get_config(coalesce_window=3600)
+    query_handler = AsyncMock()
+    processed_event_store = AsyncMock()
+    processed_event_store.contains.return_value = False
+    event_ids = [uuid4(), uuid4(), uuid4()]
+
+    async with UpdateCoalescer.construct(window=config.coalesce_window) as coalescer:
+        translator = EventSubTranslator(
+            config=config,
+            query_handler=query_handler,
+            class_names=config.searchable_classes,
+            coalescer=coalescer,
+            processed_event_store=processed_event_store,
+        )
+        for city, event_id in zip(("Berlin", "Hamburg"), event_ids[:2], strict=True):
+            payload = event_schemas.SearchableResource(
+                accession="some-id", class_name=CLASS_NAME, content={"city": city}
+            ).model_dump()
+            await translator.consume(
+                payload=payload,
+                type_=config.resource_upsertion_type,
+                topic=config.resource_change_topic,
+                key="some-id",
+                event_id=event_id,
+            )
+        payload = event_schemas.SearchableResourceInfo(
+            accession="other-id", class_name=CLASS_NAME
+        ).model_dump()
+        await translator.consume(
+            payload=payload,
+            type_=config.resource_deletion_type,
+            topic=config.resource_change_topic,
+            key="other-id",
+            event_id=event_ids[2],
+        )
+
+        query_handler.load_resource.assert_not_awaited()
+        query_handler.delete_resource.assert_not_awaited()
+        # the events are only remembered as processed once they have been applied
+        processed_event_store.add.assert_not_awaited()
+
+    query_handler.load_resource.assert_awaited_once_with(
+        resource=models.Resource(id_="some-id", content={"city": "Hamburg"}),
+        class_name=CLASS_NAME,
+    )
+    query_handler.delete_resource.assert_awaited_once_with(
+        resource_id="other-id", class_name=CLASS_NAME
+    )
+    assert sorted(
+        call.kwargs["event_id"] for call in processed_event_store.add.await_args_list
+    ) == sorted(event_ids)
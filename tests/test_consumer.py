@@ -16,10 +16,12 @@
 """Tests to verify functionality of kafka event consumer"""
 
 from unittest.mock import AsyncMock
+from uuid import uuid4
 
 import pytest
 from ghga_event_schemas import pydantic_ as event_schemas
 from hexkit.providers.akafka.testutils import KafkaFixture
+from hexkit.providers.mongodb.testutils import MongoDbFixture
 
 from mass.core import models
 from mass.inject import prepare_event_subscriber
@@ -182,3 +184,39 @@ async def test_consume_from_retry(kafka: KafkaFixture):
         await consumer.run(forever=False)
 
     qh_mock.load_resource.assert_awaited_once()
+
+
+async def test_redelivered_event_is_skipped(
+    mongodb: MongoDbFixture, kafka: KafkaFixture
+):
+    """Verify that an event which has been processed already is not applied again"""
+    config = get_config(sources=[mongodb.config, kafka.config], deduplicate_events=True)
+    payload = event_schemas.SearchableResource(
+        accession="redelivered-resource",
+        class_name=CLASS_NAME,
+        content={"city": "something"},
+    ).model_dump()
+    event_id = uuid4()
+
+    # publish the same event twice, as happens when it is delivered again
+    for _ in range(2):
+        await kafka.publish_event(
+            payload=payload,
+            type_=config.resource_upsertion_type,
+            topic=config.resource_change_topic,
+            key="test",
+            event_id=event_id,
+        )
+
+    qh_mock = AsyncMock()
+    async with prepare_event_subscriber(
+        config=config, query_handler_override=qh_mock
+    ) as consumer:
+        await consumer.run(forever=False)
+        await consumer.run(forever=False)
+
+    qh_mock.load_resource.assert_awaited_once()
+    processed_events = mongodb.client[config.db_name][
+        config.processed_events_collection
+    ]
+    assert processed_events.find_one({"_id": str(event_id)})
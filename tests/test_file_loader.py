@@ -0,0 +1,102 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for loading resources from files"""
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from hexkit.providers.mongodb.testutils import MongoDbFixture
+
+from mass.adapters.inbound.file_loader import FileFormatError, FileLoader
+from mass.core.bulk_query_handler import BulkQueryHandler
+from mass.inject import prepare_core
+from mass.main import load_files
+from tests.fixtures.config import get_config
+from tests.fixtures.joint import state
+from tests.fixtures.utils import BASE_DIR, get_resources_from_file
+
+pytestmark = pytest.mark.asyncio()
+
+CLASS_NAME = "FilteringTests"
+JSON_FILE = BASE_DIR / "test_data" / f"{CLASS_NAME}.json"
+
+
+def write_jsonl_file(path: Path) -> Path:
+    """Write the items of the JSON test file into a JSONL file"""
+    items = json.loads(JSON_FILE.read_text(encoding="utf-8"))["items"]
+    jsonl_file = path / f"{CLASS_NAME}.jsonl"
+    jsonl_file.write_text(
+        "\n".join(json.dumps(item) for item in items) + "\n", encoding="utf-8"
+    )
+    return jsonl_file
+
+
+@pytest.mark.parametrize("file_format", ["json", "jsonl"])
+async def test_load_file(file_format: str, tmp_path: Path):
+    """Test that all resources of a file are loaded in order"""
+    path = JSON_FILE if file_format == "json" else write_jsonl_file(tmp_path)
+    query_handler = AsyncMock()
+
+    async with FileLoader.construct(
+        query_handler=query_handler, workers=2, batch_size=2
+    ) as file_loader:
+        count = await file_loader.load_file(path)
+
+    expected_resources = get_resources_from_file(str(JSON_FILE))
+    assert count == len(expected_resources)
+    assert [call.kwargs for call in query_handler.load_resource.await_args_list] == [
+        {"resource": resource, "class_name": CLASS_NAME}
+        for resource in expected_resources
+    ]
+
+
+async def test_load_invalid_file(tmp_path: Path):
+    """Test that loading a file with invalid resources fails"""
+    path = tmp_path / "Invalid.jsonl"
+    path.write_text('{"id_": "valid"}\n{"no_id": "invalid"}\n', encoding="utf-8")
+
+    async with FileLoader.construct(
+        query_handler=AsyncMock(), workers=1, batch_size=10
+    ) as file_loader:
+        with pytest.raises(FileFormatError, match="lines 1-2"):
+            await file_loader.load_file(path)
+
+
+async def test_load_files(
+    mongodb: MongoDbFixture, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test loading resources from a file into the database"""
+    config = get_config(sources=[mongodb.config])
+    monkeypatch.setattr("mass.main.Config", lambda: config)
+    mongodb.empty_collections()
+    state.database_dirty = True
+
+    await load_files(paths=[write_jsonl_file(tmp_path)], workers=2, batch_size=2)
+
+    async with prepare_core(config=config) as query_handler:
+        results = await query_handler.handle_query(class_name=CLASS_NAME)
+    assert results.count == len(get_resources_from_file(str(JSON_FILE)))
+
+    # the collections are not empty anymore, so they can only be replaced
+    with pytest.raises(BulkQueryHandler.CollectionInUseError):
+        await load_files(paths=[write_jsonl_file(tmp_path)])
+    await load_files(paths=[write_jsonl_file(tmp_path)], rebuild=True)
+    async with prepare_core(config=config) as query_handler:
+        results = await query_handler.handle_query(class_name=CLASS_NAME)
+    assert results.count == len(get_resources_from_file(str(JSON_FILE)))
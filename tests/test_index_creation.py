@@ -16,10 +16,24 @@
 
 """Test index creation"""
 
+import logging
+from typing import Any
+from unittest.mock import AsyncMock
+
 import pytest
+from hexkit.providers.mongodb.provider import ConfiguredMongoClient
 from pymongo import TEXT
 
+from mass.adapters.outbound.dao import (
+    DaoCollection,
+    TextIndexFields,
+    WordCountingResourceDao,
+)
+from mass.adapters.outbound.suggestions import WORDS_SUFFIX
+from mass.adapters.outbound.text_search import SEARCH_TEXT_FIELD
+from mass.config import Config
 from mass.core import models
+from mass.inject import prepare_bulk_core, prepare_core
 from tests.fixtures.joint import JointFixture
 
 CLASS_NAME = "EmptyCollection"
@@ -83,8 +97,12 @@ async def test_index_creation(joint_fixture: JointFixture, create_index_manually
     # load a resource
     await joint_fixture.load_resource(resource=RESOURCE, class_name=CLASS_NAME)
 
-    # verify the text index exists now
+    # verify the text index and the index on the facetable field exist now
     assert any(index["name"] == f"$**_{TEXT}" for index in collection.list_indexes())
+    assert any(
+        dict(index["key"]) == {"content.fun_fact": 1}
+        for index in collection.list_indexes()
+    )
 
     # verify that supplying a query string doesn't result in an error
     results_with_coll = await joint_fixture.handle_query(
@@ -93,3 +111,221 @@ async def test_index_creation(joint_fixture: JointFixture, create_index_manually
 
     assert results_with_coll.count == 1
     assert results_with_coll.hits[0] == RESOURCE
+
+
+async def create_collections_and_indexes(config: Config) -> None:
+    """Create the collections and indexes for the given configuration"""
+    async with ConfiguredMongoClient(config=config) as client:
+        DaoCollection(
+            config=config, resource_daos={}, database=client[config.db_name]
+        ).create_collections_and_indexes_if_needed()
+
+
+async def rebuild(config: Config, *resources: models.Resource) -> None:
+    """Rebuild the collections with the given resources of the test class"""
+    async with (
+        prepare_bulk_core(config=config, shadow=True) as bulk_query_handler,
+        bulk_query_handler.rebuild(),
+    ):
+        for resource in resources:
+            await bulk_query_handler.load_resource(
+                resource=resource, class_name=CLASS_NAME
+            )
+
+
+def with_searchable_class(config: Config, **updates: Any) -> Config:
+    """Get a copy of the config with updated settings of the test class"""
+    searchable_class = config.searchable_classes[CLASS_NAME].model_copy(update=updates)
+    return config.model_copy(
+        update={
+            "searchable_classes": {
+                **config.searchable_classes,
+                CLASS_NAME: searchable_class,
+            }
+        }
+    )
+
+
+@pytest.mark.asyncio()
+async def test_text_index_follows_searchable_fields(
+    joint_fixture: JointFixture, caplog: pytest.LogCaptureFixture
+):
+    """Test that the text index is replaced by rebuilding the collections when the
+    searchable fields change, while the live text index is kept until then
+    """
+    joint_fixture.purge_database()
+    config = joint_fixture.config
+    weighted_config = with_searchable_class(
+        config,
+        searchable_fields=[
+            models.SearchableField(key="fun_fact", weight=5),
+            models.SearchableField(key="id_"),
+        ],
+    )
+    collection = joint_fixture.mongodb_client[config.db_name][CLASS_NAME]
+
+    def text_indexes() -> dict[str, dict[str, int]]:
+        return {
+            index["name"]: dict(index["weights"])
+            for index in collection.list_indexes()
+            if "weights" in index
+        }
+
+    await create_collections_and_indexes(config)
+    assert text_indexes() == {f"$**_{TEXT}": {"$**": 1}}
+
+    with caplog.at_level(logging.WARNING):
+        await create_collections_and_indexes(weighted_config)
+    assert text_indexes() == {f"$**_{TEXT}": {"$**": 1}}
+    assert "Rebuild the collections" in caplog.text
+
+    await rebuild(weighted_config, RESOURCE)
+    assert text_indexes() == {
+        f"content.fun_fact_{TEXT}__id_{TEXT}": {"content.fun_fact": 5, "_id": 1}
+    }
+
+    await rebuild(config, RESOURCE)
+    assert text_indexes() == {f"$**_{TEXT}": {"$**": 1}}
+
+
+@pytest.mark.asyncio()
+async def test_compact_search_text(joint_fixture: JointFixture):
+    """Test that resources are stored and searched with a compact search text"""
+    joint_fixture.purge_database()
+    config = joint_fixture.config
+    compact_config = with_searchable_class(
+        config,
+        searchable_fields=[models.SearchableField(key="fun_fact")],
+        compact_search_text=True,
+    )
+    collection = joint_fixture.mongodb_client[config.db_name][CLASS_NAME]
+
+    async with prepare_core(config=compact_config) as query_handler:
+        await query_handler.load_resource(resource=RESOURCE, class_name=CLASS_NAME)
+        results = await query_handler.handle_query(
+            class_name=CLASS_NAME, query=QUERY_STRING
+        )
+        assert results.hits == [RESOURCE]
+        dao = query_handler._dao_collection.get_dao(class_name=CLASS_NAME)  # type: ignore
+        assert await dao.get_by_id(RESOURCE.id_) == RESOURCE
+
+    document = collection.find_one({"_id": RESOURCE.id_})
+    assert document is not None
+    assert document[SEARCH_TEXT_FIELD] == str(RESOURCE.content["fun_fact"]).casefold()
+    [text_index] = [index for index in collection.list_indexes() if "weights" in index]
+    assert dict(text_index["weights"]) == {SEARCH_TEXT_FIELD: 1}
+
+    # the search texts are kept until the collections are rebuilt
+    id_config = with_searchable_class(
+        compact_config, searchable_fields=[models.SearchableField(key="id_")]
+    )
+    other_resource = models.Resource(id_="other", content={"fun_fact": "Backrub"})
+    async with prepare_core(config=id_config) as query_handler:
+        results = await query_handler.handle_query(
+            class_name=CLASS_NAME, query=QUERY_STRING
+        )
+        assert results.hits == [RESOURCE]
+        # new resources are written for the live text index as well
+        await query_handler.load_resource(
+            resource=other_resource, class_name=CLASS_NAME
+        )
+        results = await query_handler.handle_query(
+            class_name=CLASS_NAME, query=QUERY_STRING
+        )
+        assert results.hits == [other_resource, RESOURCE]
+    await rebuild(id_config, RESOURCE)
+    async with prepare_core(config=id_config) as query_handler:
+        results = await query_handler.handle_query(
+            class_name=CLASS_NAME, query=QUERY_STRING
+        )
+        assert results.hits == []
+    document = collection.find_one({"_id": RESOURCE.id_})
+    assert document is not None
+    assert document[SEARCH_TEXT_FIELD] == RESOURCE.id_
+
+    # and removed when the compact search text is not used any more
+    await rebuild(config, RESOURCE)
+    document = collection.find_one({"_id": RESOURCE.id_})
+    assert document is not None
+    assert SEARCH_TEXT_FIELD not in document
+
+
+@pytest.mark.asyncio()
+async def test_word_counts(joint_fixture: JointFixture):
+    """Test that the words used for completions are counted when writing resources"""
+    joint_fixture.purge_database()
+    config = joint_fixture.config
+    words = joint_fixture.mongodb_client[config.db_name][CLASS_NAME + WORDS_SUFFIX]
+
+    async def suggest(prefix: str) -> list[tuple[str, int]]:
+        async with prepare_core(config=config) as query_handler:
+            suggestions = await query_handler.suggest(
+                class_name=CLASS_NAME, prefix=prefix
+            )
+        return [(suggestion.text, suggestion.count) for suggestion in suggestions]
+
+    async with prepare_core(config=config) as query_handler:
+        await query_handler.load_resource(resource=RESOURCE, class_name=CLASS_NAME)
+        await query_handler.load_resource(
+            resource=models.Resource(id_="other", content={"name": "Backrub"}),
+            class_name=CLASS_NAME,
+        )
+    assert await suggest("the original BACK") == [("backrub", 2)]
+
+    async with prepare_bulk_core(config=config) as bulk_query_handler:
+        await bulk_query_handler.load_resource(
+            resource=models.Resource(id_="other", content={"name": "Backgammon"}),
+            class_name=CLASS_NAME,
+        )
+        await bulk_query_handler.delete_resource(
+            resource_id=RESOURCE.id_, class_name=CLASS_NAME
+        )
+        await bulk_query_handler.flush()
+    assert await suggest("back") == [("backgammon", 1)]
+
+    # the words are counted again if the counts are missing
+    words.drop()
+    assert await suggest("back") == [("backgammon", 1)]
+
+    async with prepare_core(config=config) as query_handler:
+        await query_handler.delete_resource(resource_id="other", class_name=CLASS_NAME)
+    assert await suggest("") == []
+    assert words.count_documents({}) == 0
+
+
+@pytest.mark.asyncio()
+async def test_word_count_changes_are_batched():
+    """Test that single writes collect the changes of the word counts, which are
+    then written together with one bulk write
+    """
+    collection = AsyncMock()
+    words = AsyncMock()
+    dao = WordCountingResourceDao(
+        dao=AsyncMock(),
+        collection=collection,
+        words=words,
+        class_name=CLASS_NAME,
+        text_index=TextIndexFields(weights=None, search_text_paths=None),
+    )
+    # the stored resources are returned when replacing or deleting them
+    collection.find_one_and_replace.return_value = {
+        "_id": "test",
+        "content": {"name": "Backrub"},
+    }
+    collection.find_one_and_delete.return_value = {
+        "_id": "other",
+        "content": {"name": "Google"},
+    }
+    await dao.upsert(models.Resource(id_="test", content={"name": "Google"}))
+    await dao.delete("other")
+    collection.find_one.assert_not_awaited()
+    words.bulk_write.assert_not_awaited()
+
+    await dao.flush_word_counts()
+    words.bulk_write.assert_awaited_once()
+    operations = words.bulk_write.await_args.args[0]
+    # the word of the deleted resource has been added by the upsert before
+    assert [(operation._filter, operation._doc) for operation in operations[:-1]] == [
+        ({"_id": "backrub"}, {"$inc": {"count": -1}})
+    ]
+    assert operations[-1]._filter == {"_id": {"$in": ["backrub"]}, "count": {"$lte": 0}}
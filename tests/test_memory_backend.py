@@ -0,0 +1,515 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Tests for the in-memory search backend that do not need a database
+
+The equivalence with MongoDB is tested by running the filtering, sorting and
+relevance tests against both backends.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+from hexkit.protocols.dao import ResourceAlreadyExistsError, ResourceNotFoundError
+
+from mass.adapters.outbound.columnar import (
+    INITIAL_CAPACITY,
+    FacetColumn,
+    positions_from_bitmap,
+)
+from mass.adapters.outbound.memory import (
+    InMemoryCollection,
+    facet_keys,
+    get_database,
+    path_values,
+    project,
+)
+from mass.adapters.outbound.suggestions import (
+    WordCounts,
+    completed_word,
+    facet_values_page,
+    indexed_words,
+    word_changes,
+)
+from mass.adapters.outbound.text_search import (
+    SEARCH_TEXT_FIELD,
+    TextQuery,
+    search_text,
+    stem,
+    term_scores,
+)
+from mass.config import Config
+from mass.core import models
+from mass.inject import prepare_bulk_core, prepare_core
+from mass.main import (
+    ProcessLocalBackendError,
+    consume_events,
+    load_files,
+    run_rest_app,
+)
+from tests.fixtures.config import get_config
+from tests.fixtures.utils import get_resources_from_file
+
+CLASS_NAME = "RelevanceTests"
+
+
+@pytest.mark.parametrize(
+    "word,expected",
+    [
+        ("tests", "test"),
+        ("running", "run"),
+        ("alternative", "altern"),
+        ("generously", "generous"),
+        ("skies", "sky"),
+        ("cries", "cri"),
+        ("sensational", "sensat"),
+        ("hopefulness", "hope"),
+        ("meatballs", "meatbal"),
+        ("by", "by"),
+    ],
+)
+def test_stem(word: str, expected: str):
+    """Test that words are stemmed like in MongoDB"""
+    assert stem(word) == expected
+
+
+def test_term_scores():
+    """Test the scores of the terms of a document like computed by MongoDB"""
+    scores = term_scores(
+        {"data": "Test tests test", "other": ["test", "the alternatives"], "n": 1}
+    )
+    # repeated terms contribute 1, 1/2, 1/4, ..., the exact value gets a boost
+    assert scores == {"test": 1.75 + 1.1, "altern": 1}
+    # only the fields with weights are indexed, and their scores are multiplied
+    scores = term_scores(
+        {"data": "Test tests test", "other": [{"x": "test"}, {"x": "the cats"}]},
+        {"other.x": 10},
+    )
+    assert scores == {"test": 11, "cat": 10}
+
+
+def test_search_text():
+    """Test building the compact search text from nested fields"""
+    document = {
+        "_id": "ID-1",
+        "content": {
+            "title": "Great Dogs",
+            "files": [{"name": "great dogs"}, {"name": ["Cats", {"alias": "Mice"}]}],
+            "other": "ignored",
+        },
+    }
+    paths = ["_id", "content.title", "content.files.name"]
+    assert search_text(document, paths) == "id-1\ngreat dogs\ncats\nmice"
+    assert search_text(document, ["content.missing"]) == ""
+    # phrases do not span two of the strings
+    query = TextQuery.parse('"dogs cats"')
+    assert not query.matches_phrases(
+        {SEARCH_TEXT_FIELD: search_text(document, paths)}, {SEARCH_TEXT_FIELD: 1}
+    )
+
+
+def test_parse_text_query():
+    """Test that words, phrases and negations are parsed from a text query"""
+    query = TextQuery.parse('Tests the "Great Dogs" -cats -"bad cat"')
+    assert query.terms == {"test", "great", "dog"}
+    assert query.negated_terms == {"cat"}
+    assert query.phrases == ["great dogs"]
+    assert query.negated_phrases == ["bad cat"]
+    assert query.matches_phrases({"a": ["great dogs and cats"]})
+    assert not query.matches_phrases({"a": "great dog"})
+    assert not query.matches_phrases({"a": "great dogs", "b": "a bad cat"})
+    assert query.matches_phrases({"a": "great dogs", "b": "a bad cat"}, {"a": 1})
+    assert not query.matches_phrases({"a": "great dogs"}, {"b": 1})
+
+
+@pytest.mark.parametrize(
+    "text, terms, negated_terms",
+    [
+        ("dogs-cats", {"dog", "cat"}, set()),
+        ("dogs -cats", {"dog"}, {"cat"}),
+        ("-dogs-cats", {"cat"}, {"dog"}),
+    ],
+)
+def test_hyphens_in_text_query(text: str, terms: set[str], negated_terms: set[str]):
+    """Test that like in MongoDB, only a hyphen at the start of a term negates it"""
+    query = TextQuery.parse(text)
+    assert query.terms == terms
+    assert query.negated_terms == negated_terms
+
+
+def test_hyphen_before_phrase_in_text_query():
+    """Test that a hyphen only negates a phrase at the start of a term"""
+    assert TextQuery.parse('dogs-"bad cat"').phrases == ["bad cat"]
+    assert TextQuery.parse('dogs -"bad cat"').negated_phrases == ["bad cat"]
+
+
+def test_word_counts():
+    """Test counting the indexed words and completing prefixes with them"""
+    document = {"_id": "doc-1", "content": {"title": "The Café", "tags": ["cafe", 1]}}
+    assert indexed_words(document) == {"doc", "1", "cafe"}
+    assert indexed_words(document, {"content.tags": 1}) == {"cafe"}
+    assert word_changes({"a", "b"}, {"b", "c"}) == {"a": -1, "c": 1}
+
+    assert completed_word("Breast CA") == "ca"
+    assert completed_word("Breast ") == ""
+    assert completed_word("") == ""
+
+    word_counts = WordCounts()
+    word_counts.update({"cat": 2, "cattle": 1, "catalog": 2, "dog": 3})
+    word_counts.update({"cat": -2, "dog": 1})
+    assert len(word_counts) == 3
+
+    def complete(prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        return [
+            (suggestion.text, suggestion.count)
+            for suggestion in word_counts.complete(prefix, limit)
+        ]
+
+    assert complete("Wild CAT") == [("catalog", 2), ("cattle", 1)]
+    assert complete("", limit=2) == [("dog", 4), ("catalog", 2)]
+    assert complete("cats") == []
+    word_counts.clear()
+    assert complete("") == []
+
+
+@pytest.mark.parametrize("columnar_facets", [False, True])
+def test_facet_values_follow_changes(columnar_facets: bool):
+    """Test counting the facet values with a prefix while documents change"""
+    scanned = InMemoryCollection()
+    indexed = InMemoryCollection(columnar_facets=columnar_facets)
+    indexed.index_facets(["tags"])
+    for collection in (scanned, indexed):
+        tagged: list[tuple[str, list[Any]]] = [
+            ("a", ["cat", "cattle", 1]),
+            ("b", ["cat", "Cat"]),
+            ("c", ["catalog", "dog"]),
+        ]
+        for resource_id, tags in tagged:
+            collection.upsert(models.Resource(id_=resource_id, content={"tags": tags}))
+
+    def counts(
+        collection: InMemoryCollection,
+        prefix: str,
+        filters: list[models.Filter] | None = None,
+    ) -> dict[str, int]:
+        return dict(
+            collection.facet_counts("tags", prefix, query="", filters=filters or [])
+        )
+
+    for collection in (scanned, indexed):
+        assert counts(collection, "cat") == {"cat": 2, "cattle": 1, "catalog": 1}
+        assert counts(collection, "") == {
+            "Cat": 1,
+            "cat": 2,
+            "catalog": 1,
+            "cattle": 1,
+            "dog": 1,
+        }
+        assert counts(
+            collection, "cat", filters=[models.Filter(key="tags", value="dog")]
+        ) == {"catalog": 1}
+        collection.delete("c")
+        collection.upsert(models.Resource(id_="b", content={"tags": ["catfish"]}))
+        assert counts(collection, "cat") == {"cat": 1, "catfish": 1, "cattle": 1}
+        assert counts(collection, "d") == {}
+
+    facet = models.FieldLabel(key="tags")
+    page = facet_values_page(facet, {"b": 1, "a": 1, "c": 3}, skip=1, limit=1)
+    assert page == models.FacetValues(
+        key="tags",
+        name="Tags",
+        count=3,
+        options=[models.FacetOption(value="a", count=1)],
+    )
+    assert [option.value for option in facet_values_page(facet, {}).options] == []
+
+
+def test_path_values_and_projection():
+    """Test that dotted paths and projections descend into arrays like MongoDB"""
+    document = {
+        "id_": "some-id",
+        "content": {
+            "name": "Jack",
+            "items": [{"type": "bowl", "color": "red"}, {"color": "blue"}, "coin"],
+            "eats": ["bananas", "fish"],
+        },
+    }
+    assert path_values(document, ["content", "items", "type"]) == ["bowl"]
+    assert path_values(document, ["content", "eats"]) == ["bananas", "fish"]
+    assert path_values(document, ["content", "missing"]) == []
+
+    assert project(document, ["id_", "content.items.type", "content.name"]) == {
+        "id_": "some-id",
+        "content": {"name": "Jack", "items": [{"type": "bowl"}, {}]},
+    }
+
+
+@pytest.mark.parametrize("columnar_facets", [False, True])
+def test_bitmaps_give_the_same_results_as_scanning(columnar_facets: bool):
+    """Test that filters and facets evaluated on bitmaps or columns match a scan"""
+    config = get_config()
+    searchable_class = config.searchable_classes["FilteringTests"]
+    facet_fields = searchable_class.facetable_fields
+    resources = get_resources_from_file("tests/fixtures/test_data/FilteringTests.json")
+    scanned = InMemoryCollection()
+    indexed = InMemoryCollection(columnar_facets=columnar_facets)
+    indexed.index_facets(facet_keys(searchable_class)[:2])
+    for resource in resources:
+        scanned.upsert(resource)
+        indexed.upsert(resource)
+    indexed.index_facets(facet_keys(searchable_class))
+    # replacing and deleting documents frees and reuses their positions
+    indexed.delete(resources[0].id_)
+    indexed.upsert(resources[1])
+    indexed.upsert(resources[0])
+
+    def search(
+        collection: InMemoryCollection, query: str, filters: list[models.Filter]
+    ):
+        return collection.search(
+            selected_fields=[],
+            facet_fields=facet_fields,
+            query=query,
+            filters=filters,
+            sorting_parameters=[models.SortingParameter(field="id_")],
+        )
+
+    values = [
+        (field.key, option["value"])
+        for facet in search(scanned, "", [])["facets"]
+        for field in facet_fields
+        if field.key == facet["key"]
+        for option in facet["options"]
+    ]
+    filter_combinations: list[list[models.Filter]] = [[]] + [
+        [models.Filter(key=key, value=value)] for key, value in values
+    ]
+    filter_combinations += [
+        [models.Filter(key=key, value=value) for key, value in values[:3]],
+        [
+            models.Filter(key=values[0][0], value=values[0][1]),
+            models.Filter(key="id_", value=resources[0].id_),
+        ],
+    ]
+    for filters in filter_combinations:
+        for query in ("", "cat"):
+            assert search(indexed, query, filters) == search(scanned, query, filters)
+
+
+def test_facet_column():
+    """Test counting values in a column while documents are updated and removed"""
+    column = FacetColumn()
+    for position in range(INITIAL_CAPACITY):
+        column.set(position, ["a"] if position % 2 else ["a", "b"])
+    assert column.count(np.arange(4)) == [("a", 4), ("b", 2)]
+    # growing the values of all documents leaves unused codes
+    for position in range(INITIAL_CAPACITY):
+        column.set(position, ["c", "b", "a"])
+    column.compact()
+    column.clear(0)
+    column.set(1, [])
+    column.set(2, [1.5])
+    assert column.count(np.arange(5)) == [("a", 2), ("b", 2), ("c", 2), (1.5, 1)]
+    assert column.count(positions_from_bitmap(0b1100)) == [
+        ("a", 1),
+        ("b", 1),
+        ("c", 1),
+        (1.5, 1),
+    ]
+    assert column.count(np.arange(INITIAL_CAPACITY, INITIAL_CAPACITY + 2)) == []
+
+
+def test_bm25_ranking():
+    """Test that BM25 considers term frequencies, document lengths and rare terms"""
+    collection = InMemoryCollection(text_ranking="bm25")
+    for resource in get_resources_from_file(
+        "tests/fixtures/test_data/RelevanceTests.json"
+    ):
+        collection.upsert(resource)
+
+    def ranking(query: str) -> list[str]:
+        scores = collection.text_scores(query)
+        return sorted(scores, key=scores.__getitem__, reverse=True)
+
+    # unlike with the MongoDB text score, i4 and i5 with the same number of
+    # occurrences do not tie, since i5 is longer
+    scores = collection.text_scores("test")
+    assert len(set(scores.values())) == len(scores)
+    assert ranking("test") == ["i2", "i4", "i5", "i1", "i3"]
+    # the rare term weighs more than the term contained in all documents
+    assert ranking("alternative test") == ["i5", "i2", "i4", "i1", "i3"]
+
+    # the statistics are kept up to date
+    collection.upsert(models.Resource(id_="i6", content={"data": "test " * 10}))
+    collection.delete("i5")
+    assert ranking("test") == ["i6", "i2", "i4", "i1", "i3"]
+    assert ranking("alternative") == ["i2"]
+
+
+@pytest.mark.asyncio()
+async def test_text_index_follows_searchable_fields():
+    """Test that the text index is rebuilt when the searchable fields change"""
+    config = get_config(search_backend="memory", db_name="test-searchable-fields")
+    get_database(config.db_name).collections.clear()
+
+    def with_searchable_fields(*fields: models.SearchableField) -> Config:
+        searchable_class = config.searchable_classes[CLASS_NAME].model_copy(
+            update={"searchable_fields": list(fields)}
+        )
+        return config.model_copy(
+            update={
+                "searchable_classes": {
+                    **config.searchable_classes,
+                    CLASS_NAME: searchable_class,
+                }
+            }
+        )
+
+    async def search(config: Config, query: str) -> list[str]:
+        async with prepare_core(config=config) as query_handler:
+            results = await query_handler.handle_query(
+                class_name=CLASS_NAME, query=query
+            )
+        return [hit.id_ for hit in results.hits]
+
+    async with prepare_core(config=config) as query_handler:
+        for id_, content in [
+            ("title", {"title": "cats", "description": "friendly dogs"}),
+            ("description", {"title": "dogs", "description": "many cats cats"}),
+        ]:
+            await query_handler.load_resource(
+                resource=models.Resource(id_=id_, content=content),
+                class_name=CLASS_NAME,
+            )
+    assert await search(config, "cat") == ["description", "title"]
+
+    weighted = with_searchable_fields(
+        models.SearchableField(key="title", weight=10),
+        models.SearchableField(key="description"),
+    )
+    assert await search(weighted, "cat") == ["title", "description"]
+    assert await search(weighted, '"friendly dogs"') == ["title"]
+
+    title_only = with_searchable_fields(models.SearchableField(key="title"))
+    assert await search(title_only, "friendly") == []
+    assert await search(title_only, "dog") == ["description"]
+    assert await search(config, "friendly") == ["title"]
+
+    # the compact search text is scored as one text, ignoring the weights
+    compact = weighted.model_copy(deep=True)
+    compact.searchable_classes[CLASS_NAME].compact_search_text = True
+    assert await search(compact, "cat") == ["description", "title"]
+    assert await search(compact, '"friendly dogs"') == ["title"]
+    assert await search(compact, '"cats friendly"') == []
+
+
+@pytest.mark.asyncio()
+async def test_relevance_and_text_query_operators():
+    """Test relevance sorting, phrases and negations with the memory backend"""
+    config = get_config(search_backend="memory", db_name="test-relevance")
+    get_database(config.db_name).collections.clear()
+    async with prepare_core(config=config) as query_handler:
+        for resource in get_resources_from_file(
+            "tests/fixtures/test_data/RelevanceTests.json"
+        ):
+            await query_handler.load_resource(resource=resource, class_name=CLASS_NAME)
+
+        async def search(query: str) -> list[str]:
+            results = await query_handler.handle_query(
+                class_name=CLASS_NAME, query=query
+            )
+            assert results.count == len(results.hits)
+            return [hit.id_ for hit in results.hits]
+
+        assert await search("test") == ["i2", "i4", "i5", "i1", "i3"]
+        assert await search("alternative") == ["i5", "i2"]
+        assert await search("alternative test") == ["i5", "i2", "i4", "i1", "i3"]
+        assert await search('"test test" -alternative') == ["i4", "i1", "i3"]
+        assert await search("-test") == []
+        assert await search("the") == []
+
+        with pytest.raises(query_handler.SearchError):
+            await query_handler.handle_query(
+                class_name=CLASS_NAME,
+                sorting_parameters=[
+                    models.SortingParameter(
+                        field="query", order=models.SortOrder.RELEVANCE
+                    )
+                ],
+            )
+
+        await query_handler.delete_resource(resource_id="i2", class_name=CLASS_NAME)
+        assert await search("alternative") == ["i5"]
+        with pytest.raises(query_handler.ResourceNotFoundError):
+            await query_handler.delete_resource(resource_id="i2", class_name=CLASS_NAME)
+
+
+@pytest.mark.asyncio()
+async def test_rebuild_with_shadow_collections():
+    """Test rebuilding the resources of the memory backend in shadow collections"""
+    config = get_config(search_backend="memory", db_name="test-rebuild")
+    database = get_database(config.db_name)
+    database.collections.clear()
+    resource = models.Resource(id_="old", content={"field": "old value"})
+    async with prepare_core(config=config) as query_handler:
+        await query_handler.load_resource(resource=resource, class_name=CLASS_NAME)
+        dao = query_handler._dao_collection.get_dao(class_name=CLASS_NAME)  # type: ignore
+        with pytest.raises(ResourceAlreadyExistsError):
+            await dao.insert(resource)
+        assert await dao.get_by_id("old") == resource
+
+    async with prepare_bulk_core(config=config, shadow=True) as bulk_query_handler:
+        async with bulk_query_handler.rebuild():
+            for index in range(3):
+                await bulk_query_handler.load_resource(
+                    resource=models.Resource(id_=f"new-{index}", content={}),
+                    class_name=CLASS_NAME,
+                )
+
+    async with prepare_core(config=config) as query_handler:
+        results = await query_handler.handle_query(class_name=CLASS_NAME)
+        assert [hit.id_ for hit in results.hits] == ["new-0", "new-1", "new-2"]
+        dao = query_handler._dao_collection.get_dao(class_name=CLASS_NAME)  # type: ignore
+        with pytest.raises(ResourceNotFoundError):
+            await dao.get_by_id("old")
+    assert not any(name.endswith("__building") for name in database.collections)
+
+
+def test_database_settings_are_kept():
+    """Test that getting a database again does not change its settings"""
+    database = get_database("test-settings", text_ranking="bm25")
+
+    assert get_database("test-settings") is database
+    assert database.text_ranking == "bm25"
+
+
+@pytest.mark.asyncio()
+async def test_service_commands_refuse_memory_backend(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that the service commands do not run with a process-local backend"""
+    config = get_config(search_backend="memory", db_name="test-commands")
+    monkeypatch.setattr("mass.main.Config", lambda: config)
+
+    with pytest.raises(ProcessLocalBackendError):
+        await load_files(paths=[tmp_path / "resources.jsonl"])
+    with pytest.raises(ProcessLocalBackendError):
+        await consume_events(run_forever=False)
+    with pytest.raises(ProcessLocalBackendError):
+        await run_rest_app()
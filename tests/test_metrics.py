@@ -0,0 +1,189 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Unit tests for the phase timer and the metrics of the REST API and event consumer"""
+
+import socket
+import time
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import httpx
+import pytest
+from ghga_event_schemas import pydantic_ as event_schemas
+from ghga_event_schemas.validation import EventSchemaValidationError
+from prometheus_client import REGISTRY
+
+from mass.adapters.inbound.event_sub import EventSubTranslator
+from mass.adapters.inbound.fastapi_ import metrics
+from mass.adapters.inbound.fastapi_.routes import server_timing
+from mass.adapters.inbound.ingest_metrics import (
+    MeteredConsumer,
+    MeteredDlqPublisher,
+    start_metrics_server,
+)
+from mass.core import models
+from mass.core.timing import PhaseTimer, timed
+from tests.fixtures.config import get_config
+
+
+def sample(name: str, **labels: str) -> float:
+    """Get the current value of a metric sample, or zero if it doesn't exist"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_phase_timer():
+    """Test that the durations of repeated phases are added up"""
+    timer = PhaseTimer()
+    with timer.phase("db"):
+        pass
+    first = timer.durations["db"]
+    with timed(timer, "db"):
+        pass
+    with timed(None, "build"):
+        pass
+
+    assert list(timer.durations) == ["db"]
+    assert timer.durations["db"] >= first > 0
+
+
+def test_server_timing():
+    """Test the formatting of the Server-Timing header"""
+    timer = PhaseTimer()
+    timer.durations = {"build": 0.0001, "db": 0.0125}
+    timer.annotate("stages", 7)
+
+    header = server_timing(timer, total=0.02)
+
+    assert header == (
+        'build;dur=0.100, db;dur=12.500, total;dur=20.000, stages;desc="7"'
+    )
+
+
+def test_observe_search():
+    """Test that search metrics only use configured class names as labels"""
+    config = get_config()
+    class_name = next(iter(config.searchable_classes))
+    timer = PhaseTimer()
+    with timer.phase("build"):
+        pass
+    results = models.QueryResults(
+        facets=[
+            models.Facet(
+                key="type",
+                name="Type",
+                options=[models.FacetOption(value="piano", count=1)],
+            )
+        ],
+        count=1,
+    )
+
+    before = sample("mass_search_hits_count", class_name=class_name)
+    unknown_before = sample("mass_search_hits_count", class_name="unknown")
+    metrics.observe_search(
+        class_name=class_name, duration=0.1, timer=timer, results=results, config=config
+    )
+    metrics.observe_search(
+        class_name="Bogus", duration=0.1, timer=timer, results=results, config=config
+    )
+
+    assert sample("mass_search_hits_count", class_name=class_name) == before + 1
+    assert sample("mass_search_hits_count", class_name="unknown") == unknown_before + 1
+    assert sample("mass_search_hits_count", class_name="Bogus") == 0
+    assert sample(
+        "mass_search_phase_duration_seconds_count",
+        class_name=class_name,
+        phase="build",
+    )
+    assert sample("mass_search_facet_options_sum", class_name=class_name) >= 1
+
+
+@pytest.mark.asyncio()
+async def test_ingest_metrics():
+    """Test that consumed events, write durations and validation failures are recorded"""
+    config = get_config()
+    translator = EventSubTranslator(
+        config=config,
+        query_handler=AsyncMock(),
+        class_names=config.searchable_classes,
+    )
+    class_name = next(iter(config.searchable_classes))
+    labels = {"operation": "upsertion", "class_name": class_name}
+    unknown_labels = {"operation": "upsertion", "class_name": "unknown"}
+    events_before = sample("mass_events_total", **labels)
+    unknown_before = sample("mass_events_total", **unknown_labels)
+    writes_before = sample("mass_db_write_duration_seconds_count", **labels)
+    failures_before = sample(
+        "mass_event_validation_failures_total", operation="upsertion"
+    )
+
+    payload = event_schemas.SearchableResource(
+        accession="some-id", class_name=class_name, content={}
+    ).model_dump()
+    event = {
+        "type_": config.resource_upsertion_type,
+        "topic": config.resource_change_topic,
+        "key": "some-id",
+    }
+    await translator.consume(payload=payload, event_id=uuid4(), **event)
+    # unknown classes must not create new labels
+    await translator.consume(
+        payload={**payload, "class_name": "Bogus"}, event_id=uuid4(), **event
+    )
+    with pytest.raises(EventSchemaValidationError):
+        await translator.consume(payload={"foo": "bar"}, event_id=uuid4(), **event)
+
+    assert sample("mass_events_total", **labels) == events_before + 1
+    assert sample("mass_events_total", **unknown_labels) == unknown_before + 1
+    assert sample("mass_events_total", operation="upsertion", class_name="Bogus") == 0
+    assert sample("mass_db_write_duration_seconds_count", **labels) == writes_before + 1
+    assert (
+        sample("mass_event_validation_failures_total", operation="upsertion")
+        == failures_before + 1
+    )
+
+
+@pytest.mark.asyncio()
+async def test_lag_and_dlq_metrics():
+    """Test that the lag of received events and the DLQ sends are recorded"""
+    record = Mock(timestamp=(time.time() - 5) * 1000)
+    kafka_consumer = Mock(__anext__=AsyncMock(return_value=record))
+    publisher = AsyncMock()
+    lag_before = sample("mass_event_lag_seconds_sum")
+    dlq_before = sample("mass_event_dlq_sends_total")
+
+    assert await MeteredConsumer(kafka_consumer).__anext__() is record
+    await MeteredDlqPublisher(publisher).publish(
+        payload={}, type_="some-type", key="some-key", topic="some-topic"
+    )
+
+    assert sample("mass_event_lag_seconds_sum") >= lag_before + 5
+    publisher.publish.assert_awaited_once()
+    assert sample("mass_event_dlq_sends_total") == dlq_before + 1
+
+
+def test_metrics_server():
+    """Test that the consumer metrics are exposed on the configured port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    start_metrics_server(config=get_config(ingest_metrics_port=port))
+
+    response = httpx.get(f"http://127.0.0.1:{port}/metrics")
+
+    assert response.status_code == 200
+    assert "mass_event_lag_seconds" in response.text
@@ -18,9 +18,13 @@
 import pytest
 
 from mass.core import models
-from tests.fixtures.joint import JointFixture, QueryParams
+from tests.fixtures.joint import SEARCH_BACKENDS, JointFixture, QueryParams
 
-pytestmark = pytest.mark.asyncio()
+pytestmark = [
+    pytest.mark.asyncio(),
+    # the results of all search backends must be the same as with MongoDB
+    pytest.mark.parametrize("search_backend", SEARCH_BACKENDS, indirect=True),
+]
 
 CLASS_NAME: str = "RelevanceTests"
 RELEVANCE_SORT = models.SortingParameter(
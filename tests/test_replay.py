@@ -0,0 +1,160 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for capturing and replaying search requests"""
+
+import json
+import logging
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from ghga_service_commons.api.testing import AsyncTestClient
+
+from mass.adapters.inbound.fastapi_ import capture as capture_module
+from mass.adapters.inbound.fastapi_.capture import SearchCapture
+from mass.adapters.inbound.replay import (
+    SearchParams,
+    http_search,
+    percentile,
+    query_handler_search,
+    read_captured_searches,
+    replay,
+)
+from mass.core import models
+from mass.inject import prepare_rest_app
+from mass.ports.inbound.query_handler import QueryHandlerPort
+from tests.fixtures.config import get_config
+
+CLASS_NAME = "NestedData"
+
+
+def test_percentile():
+    """Test the nearest-rank percentiles"""
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([3.0], 0.99) == 3
+    assert percentile([], 0.5) == 0
+
+
+@pytest.mark.asyncio()
+async def test_capture_sampling(tmp_path: Path):
+    """Test that only the configured fraction of searches is captured"""
+    path = tmp_path / "searches.jsonl"
+    async with SearchCapture.construct(path=path, rate=0.5) as capture:
+        for _ in range(1000):
+            capture.record(params={"class_name": CLASS_NAME}, duration=0.1, count=1)
+
+    assert 350 < len(list(read_captured_searches(path))) < 650
+
+
+@pytest.mark.asyncio()
+async def test_capture_drops_are_counted(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    """Test that dropped searches are counted instead of logged one by one"""
+    monkeypatch.setattr(capture_module, "MAX_PENDING_RECORDS", 5)
+    path = tmp_path / "searches.jsonl"
+    with caplog.at_level(logging.WARNING):
+        async with SearchCapture.construct(path=path) as capture:
+            for _ in range(20):
+                capture.record(params={"class_name": CLASS_NAME}, duration=0.1, count=1)
+            limiter = capture._drop_log_limiter
+            assert limiter.suppressed == 14
+
+    assert len(list(read_captured_searches(path))) == 5
+    assert [record.getMessage() for record in caplog.records] == [
+        "Dropped 1 captured searches since the file cannot keep up."
+    ]
+
+
+@pytest.mark.asyncio()
+async def test_capture_and_replay(tmp_path: Path):
+    """Test capturing searches in the API and replaying them with HTTP requests"""
+    path = tmp_path / "searches.jsonl"
+    config = get_config(search_capture_file=path, server_timing=True)
+    query_handler = AsyncMock(spec=QueryHandlerPort)
+    query_handler.handle_query.return_value = models.QueryResults(count=42)
+    params = {
+        "class_name": CLASS_NAME,
+        "query": "hotel",
+        "filter_by": ["type"],
+        "value": ["resort"],
+        "order_by": ["id_"],
+        "sort": ["descending"],
+    }
+
+    async with (
+        prepare_rest_app(config=config, query_handler_override=query_handler) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        response = await rest_client.get("/search", params=params)
+        assert response.status_code == 200
+
+    # the captured searches are written when the app is shut down at the latest
+    [record] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert record["params"] == {**params, "skip": 0, "limit": None}
+    assert record["count"] == 42
+    assert record["duration"] > 0
+
+    async with (
+        prepare_rest_app(config=config, query_handler_override=query_handler) as app,
+        AsyncTestClient(app=app) as rest_client,
+    ):
+        searches = list(read_captured_searches(path)) * 3
+        report = await replay(searches, search=http_search(rest_client), concurrency=2)
+
+    assert query_handler.handle_query.await_count == 4
+    assert report.total.requests == 3
+    assert report.total.errors == 0
+    assert report.classes[CLASS_NAME].requests == 3
+    assert report.strategies["unknown"].requests == 3
+    assert 0 < report.total.p50 <= report.total.p99 <= report.total.max
+
+
+@pytest.mark.asyncio()
+async def test_replay_against_query_handler():
+    """Test replaying searches directly against a query handler"""
+
+    async def handle_query(*, class_name: str, timer, **_kwargs):
+        if class_name == "Broken":
+            raise QueryHandlerPort.SearchError()
+        timer.annotate("strategy", "aggregate")
+        return models.QueryResults()
+
+    query_handler = AsyncMock(spec=QueryHandlerPort)
+    query_handler.handle_query.side_effect = handle_query
+    searches: list[SearchParams] = [
+        {"class_name": CLASS_NAME, "filter_by": ["type"], "value": ["resort"]},
+        {"class_name": CLASS_NAME, "order_by": ["id_"], "sort": ["descending"]},
+        {"class_name": "Broken"},
+    ]
+
+    report = await replay(
+        searches, search=query_handler_search(query_handler), concurrency=1
+    )
+
+    assert report.total.requests == 3
+    assert report.total.errors == 1
+    assert report.classes[CLASS_NAME].requests == 2
+    assert report.classes["Broken"].errors == 1
+    assert report.strategies["aggregate"].requests == 2
+    kwargs = query_handler.handle_query.await_args_list[1].kwargs
+    assert kwargs["sorting_parameters"] == [
+        models.SortingParameter(field="id_", order=models.SortOrder.DESCENDING)
+    ]
@@ -20,9 +20,12 @@ import pytest
 from mass.core import models
 from mass.ports.inbound.query_handler import QueryHandlerPort
 from tests.fixtures.config import get_config
-from tests.fixtures.joint import JointFixture
+from tests.fixtures.joint import SEARCH_BACKENDS, JointFixture
 
-pytestmark = pytest.mark.asyncio()
+pytestmark = [
+    pytest.mark.asyncio(),
+    pytest.mark.parametrize("search_backend", SEARCH_BACKENDS, indirect=True),
+]
 
 
 CLASS_NAME = "NestedData"
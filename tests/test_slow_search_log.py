@@ -0,0 +1,146 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tests for logging slow searches"""
+
+import asyncio
+import logging
+from typing import cast
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from hexkit.custom_types import JsonObject
+
+from mass.core import models
+from mass.core.query_handler import QueryHandler, summarize_plan
+from mass.ports.outbound.aggregator import AggregatorCollectionPort, AggregatorPort
+from mass.ports.outbound.dao import DaoCollectionPort
+from tests.fixtures.config import get_config
+
+CLASS_NAME = "NestedData"
+PIPELINE: list[JsonObject] = [{"$match": {"$text": {"$search": "hotel"}}}]
+PLAN = {
+    "stages": [
+        {
+            "$cursor": {
+                "queryPlanner": {
+                    "winningPlan": {
+                        "stage": "TEXT_MATCH",
+                        "inputStage": {"stage": "IXSCAN", "indexName": "$**_text"},
+                    },
+                    "rejectedPlans": [{"stage": "COLLSCAN"}],
+                }
+            }
+        }
+    ]
+}
+
+
+def make_query_handler(*, duration: float, **config_overrides) -> QueryHandler:
+    """Create a query handler with an aggregator taking the given time"""
+
+    async def aggregate(**_kwargs):
+        await asyncio.sleep(duration)
+        return {"count": 2, "hits": [], "facets": []}
+
+    aggregator = Mock(spec=AggregatorPort)
+    aggregator.aggregate = AsyncMock(side_effect=aggregate)
+    aggregator.build_pipeline.return_value = PIPELINE
+    aggregator.explain = AsyncMock(
+        return_value=models.QueryExplanation(pipeline=PIPELINE, execution_stats=PLAN)
+    )
+    aggregator_collection = Mock(spec=AggregatorCollectionPort)
+    aggregator_collection.get_aggregator.return_value = aggregator
+    return QueryHandler(
+        config=get_config(**config_overrides),
+        aggregator_collection=aggregator_collection,
+        dao_collection=Mock(spec=DaoCollectionPort),
+    )
+
+
+def test_summarize_plan():
+    """Test that only stages and indexes of winning plans are summarized"""
+    assert summarize_plan(PLAN) == {
+        "stages": ["TEXT_MATCH", "IXSCAN"],
+        "indexes": ["$**_text"],
+    }
+
+
+@pytest.mark.asyncio()
+async def test_fast_search_is_not_logged(caplog: pytest.LogCaptureFixture):
+    """Test that searches below the threshold are not logged"""
+    query_handler = make_query_handler(duration=0, slow_search_threshold=10)
+
+    with caplog.at_level(logging.WARNING):
+        await query_handler.handle_query(class_name=CLASS_NAME, query="hotel")
+
+    assert not caplog.records
+
+
+@pytest.mark.asyncio()
+async def test_slow_search_is_logged(caplog: pytest.LogCaptureFixture):
+    """Test that a slow search is logged with its parameters, pipeline and plan"""
+    query_handler = make_query_handler(
+        duration=0.02, slow_search_threshold=0.01, slow_search_log_plan=True
+    )
+    filters = [models.Filter(key="type", value="resort")]
+
+    with caplog.at_level(logging.WARNING):
+        await query_handler.handle_query(
+            class_name=CLASS_NAME, query="hotel", filters=filters, limit=5
+        )
+        # the query plan is logged in the background
+        assert not caplog.records
+        await asyncio.gather(*query_handler._slow_search_log_tasks)
+
+    [record] = caplog.records
+    assert record.getMessage().startswith(f"Slow search for class '{CLASS_NAME}'")
+    details = record.__dict__
+    assert details["query"] == "hotel"
+    assert details["filters"] == [{"key": "type", "value": "resort"}]
+    assert details["sorting_parameters"] == [
+        {"field": "query", "order": "relevance"},
+        {"field": "id_", "order": "ascending"},
+    ]
+    assert details["limit"] == 5
+    assert details["count"] == 2
+    assert details["duration"] > 0.01
+    assert details["pipeline"] == PIPELINE
+    assert details["plan"] == {
+        "stages": ["TEXT_MATCH", "IXSCAN"],
+        "indexes": ["$**_text"],
+    }
+
+
+@pytest.mark.asyncio()
+async def test_slow_search_log_is_rate_limited(caplog: pytest.LogCaptureFixture):
+    """Test that no more slow searches than allowed are logged per minute"""
+    query_handler = make_query_handler(
+        duration=0.02, slow_search_threshold=0.01, slow_search_log_limit=2
+    )
+
+    with caplog.at_level(logging.WARNING):
+        for _ in range(4):
+            await query_handler.handle_query(class_name=CLASS_NAME)
+
+    assert len(caplog.records) == 2
+    assert caplog.records[0].__dict__["pipeline"] == PIPELINE
+    assert "plan" not in caplog.records[0].__dict__
+    # the query plan is not needed, so the database is not asked for it
+    aggregator = query_handler._aggregator_collection.get_aggregator(
+        class_name=CLASS_NAME
+    )
+    cast(AsyncMock, aggregator.explain).assert_not_awaited()
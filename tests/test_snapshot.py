@@ -0,0 +1,189 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Tests for exporting resources to snapshots and serving them read-only"""
+
+import struct
+from pathlib import Path
+from typing import Any
+
+import pytest
+from hexkit.protocols.dao import ResourceNotFoundError
+
+from mass.adapters.outbound.memory import get_database
+from mass.adapters.outbound.snapshot import (
+    FORMAT_VERSION,
+    MAGIC,
+    Snapshot,
+    SnapshotFormatError,
+    SnapshotReadOnlyError,
+    snapshot_path,
+    write_snapshot,
+)
+from mass.core import models
+from mass.inject import prepare_core
+from mass.main import export_snapshots
+from tests.fixtures.config import get_config
+from tests.fixtures.utils import get_resources_from_file
+
+CLASS_NAMES = ["FilteringTests", "RelevanceTests"]
+
+
+@pytest.mark.asyncio()
+async def test_export_and_serve_snapshots(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that snapshots return the same results as the exported database"""
+    config = get_config(search_backend="memory", db_name="test-snapshot")
+    get_database(config.db_name).collections.clear()
+    async with prepare_core(config=config) as query_handler:
+        for class_name in CLASS_NAMES:
+            for resource in get_resources_from_file(
+                f"tests/fixtures/test_data/{class_name}.json"
+            ):
+                await query_handler.load_resource(
+                    resource=resource, class_name=class_name
+                )
+    monkeypatch.setattr("mass.main.Config", lambda: config)
+    await export_snapshots(class_names=CLASS_NAMES, output_dir=tmp_path)
+
+    snapshot_config = get_config(search_backend="snapshot", snapshot_dir=tmp_path)
+    async with (
+        prepare_core(config=config) as query_handler,
+        prepare_core(config=snapshot_config) as snapshot_query_handler,
+    ):
+        searches: list[dict[str, Any]] = [
+            {"class_name": "FilteringTests"},
+            {"class_name": "FilteringTests", "query": "cat", "skip": 1, "limit": 2},
+            {
+                "class_name": "FilteringTests",
+                "filters": [
+                    models.Filter(key="category", value="cat"),
+                    models.Filter(key="field", value="some data"),
+                ],
+            },
+            {
+                "class_name": "RelevanceTests",
+                "query": '"test test" -alternative',
+                "sorting_parameters": [
+                    models.SortingParameter(
+                        field="query", order=models.SortOrder.RELEVANCE
+                    ),
+                    models.SortingParameter(
+                        field="field", order=models.SortOrder.DESCENDING
+                    ),
+                ],
+            },
+        ]
+        for search in searches:
+            assert await snapshot_query_handler.handle_query(
+                **search
+            ) == await query_handler.handle_query(**search)
+
+        # the words for completions are counted when exporting the snapshots
+        for prefix in ["", "i", "Same as ALT", "cats "]:
+            assert await snapshot_query_handler.suggest(
+                class_name="RelevanceTests", prefix=prefix, limit=3
+            ) == await query_handler.suggest(
+                class_name="RelevanceTests", prefix=prefix, limit=3
+            )
+
+        # the options of facets are completed from the facet dictionaries
+        facet_searches: list[dict[str, Any]] = [
+            {"key": "friends.name", "limit": 3},
+            {"key": "friends.name", "prefix": "J", "query": "cat"},
+            {
+                "key": "items.color",
+                "prefix": "b",
+                "filters": [models.Filter(key="eats", value="fish")],
+                "skip": 1,
+            },
+        ]
+        for facet_search in facet_searches:
+            assert await snapshot_query_handler.facet_values(
+                class_name="FilteringTests", **facet_search
+            ) == await query_handler.facet_values(
+                class_name="FilteringTests", **facet_search
+            )
+
+        # the class without a snapshot has no resources
+        results = await snapshot_query_handler.handle_query(class_name="SortingTests")
+        assert results == models.QueryResults()
+
+        with pytest.raises(SnapshotReadOnlyError):
+            await snapshot_query_handler.load_resource(
+                resource=models.Resource(id_="new", content={}),
+                class_name="RelevanceTests",
+            )
+        with pytest.raises(SnapshotReadOnlyError):
+            await snapshot_query_handler.delete_resource(
+                resource_id="i2", class_name="RelevanceTests"
+            )
+        dao = snapshot_query_handler._dao_collection.get_dao(  # type: ignore
+            class_name="RelevanceTests"
+        )
+        assert (await dao.get_by_id("i2")).content["field"] == "alternative"
+        with pytest.raises(ResourceNotFoundError):
+            await dao.get_by_id("i0")
+
+
+def test_invalid_snapshots(tmp_path: Path):
+    """Test that files that are not snapshots in a supported version are rejected"""
+    path = snapshot_path(tmp_path, "FilteringTests")
+    path.write_bytes(b"something else entirely")
+    with pytest.raises(SnapshotFormatError, match="not a snapshot"):
+        Snapshot(path)
+    path.write_bytes(struct.pack("<8sII", MAGIC, FORMAT_VERSION + 1, 0))
+    with pytest.raises(SnapshotFormatError, match="unsupported format version"):
+        Snapshot(path)
+
+
+@pytest.mark.asyncio()
+async def test_bm25_ranking(tmp_path: Path):
+    """Test that snapshots rank text matches with BM25 like the memory backend"""
+    config = get_config(
+        search_backend="memory", db_name="test-snapshot-bm25", text_ranking="bm25"
+    )
+    get_database(config.db_name, text_ranking="bm25").collections.clear()
+    resources = [
+        *get_resources_from_file("tests/fixtures/test_data/RelevanceTests.json"),
+        models.Resource(id_="longer", content={"data": "cats", "field": "and dogs"}),
+        models.Resource(id_="short", content={"data": "cats"}),
+    ]
+    write_snapshot(
+        snapshot_path(tmp_path, "RelevanceTests"),
+        class_name="RelevanceTests",
+        searchable_class=config.searchable_classes["RelevanceTests"],
+        resources=resources,
+    )
+    snapshot_config = get_config(
+        search_backend="snapshot", snapshot_dir=tmp_path, text_ranking="bm25"
+    )
+    async with (
+        prepare_core(config=config) as query_handler,
+        prepare_core(config=snapshot_config) as snapshot_query_handler,
+    ):
+        for resource in resources:
+            await query_handler.load_resource(
+                resource=resource, class_name="RelevanceTests"
+            )
+        for query in ["test", "alternative test", '"test test" -alternative', "cat"]:
+            search: dict[str, Any] = {"class_name": "RelevanceTests", "query": query}
+            results = await snapshot_query_handler.handle_query(**search)
+            assert results == await query_handler.handle_query(**search)
+        # MongoDB scores only the fields containing a term, BM25 prefers short documents
+        assert [hit.id_ for hit in results.hits] == ["short", "longer"]
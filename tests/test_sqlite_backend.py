@@ -0,0 +1,225 @@
+# Copyright 2021 - 2026 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Tests for the SQLite search backend that go beyond the shared backend tests
+
+The equivalence with MongoDB is tested by running the filtering, sorting,
+relevance and resource tests against all backends.
+"""
+
+import sqlite3
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import pytest
+from hexkit.protocols.dao import ResourceAlreadyExistsError, ResourceNotFoundError
+
+from mass.adapters.outbound.sqlite import SqliteDatabase
+from mass.config import Config
+from mass.core import models
+from mass.inject import prepare_bulk_core, prepare_core
+from tests.fixtures.config import get_config
+from tests.fixtures.utils import get_resources_from_file
+
+CLASS_NAME = "RelevanceTests"
+
+
+def test_connections_use_write_ahead_logging(tmp_path: Path):
+    """Test that readers do not block the writer of the database"""
+    config = get_config(search_backend="sqlite", sqlite_path=tmp_path / "mass.sqlite")
+    with SqliteDatabase.construct(config=config) as database:
+        journal_mode = database.read(
+            lambda connection: connection.execute("PRAGMA journal_mode").fetchone()
+        )
+        assert journal_mode == ("wal",)
+        database.write(lambda connection: connection.execute("CREATE TABLE t (x)"))
+        # the readers see what has been committed by the writer
+        assert database.read(
+            lambda connection: connection.execute("SELECT count(*) FROM t").fetchone()
+        ) == (0,)
+    with pytest.raises(sqlite3.ProgrammingError):
+        database.read(lambda connection: connection.execute("SELECT 1"))
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(
+    "ranking,expected",
+    [("textscore", ["longer", "short"]), ("bm25", ["short", "longer"])],
+)
+async def test_relevance_and_explain(ranking: str, expected: list[str], tmp_path: Path):
+    """Test both rankings and the query plan of the SQLite backend"""
+    config = get_config(
+        search_backend="sqlite",
+        sqlite_path=tmp_path / "mass.sqlite",
+        text_ranking=ranking,
+    )
+    async with prepare_core(config=config) as query_handler:
+        for resource in get_resources_from_file(
+            "tests/fixtures/test_data/RelevanceTests.json"
+        ):
+            await query_handler.load_resource(resource=resource, class_name=CLASS_NAME)
+
+        results = await query_handler.handle_query(class_name=CLASS_NAME, query="test")
+        assert [hit.id_ for hit in results.hits] == ["i2", "i4", "i5", "i1", "i3"]
+        results = await query_handler.handle_query(
+            class_name=CLASS_NAME, query='"test test" -alternative'
+        )
+        assert [hit.id_ for hit in results.hits] == ["i4", "i1", "i3"]
+
+        # MongoDB scores only the fields containing a term, BM25 prefers short documents
+        for id_, content in [
+            ("longer", {"data": "cats", "field": "and dogs"}),
+            ("short", {"data": "cats"}),
+        ]:
+            await query_handler.load_resource(
+                resource=models.Resource(id_=id_, content=content),
+                class_name=CLASS_NAME,
+            )
+        results = await query_handler.handle_query(class_name=CLASS_NAME, query="cat")
+        assert [hit.id_ for hit in results.hits] == expected
+
+        explanation = await query_handler.explain_query(
+            class_name=CLASS_NAME, query="cat"
+        )
+        stats: Mapping[str, Any] = explanation.execution_stats
+        assert stats["backend"] == "sqlite"
+        stages = stats["queryPlanner"]["winningPlan"]["inputStages"]
+        assert any("VIRTUAL TABLE" in stage["stage"] for stage in stages)
+        assert stats["executionStats"]["nReturned"] == len(expected)
+
+
+@pytest.mark.asyncio()
+async def test_text_index_follows_searchable_fields(tmp_path: Path):
+    """Test that the text index is rebuilt when the searchable fields change"""
+    config = get_config(search_backend="sqlite", sqlite_path=tmp_path / "mass.sqlite")
+    searchable_class = config.searchable_classes[CLASS_NAME].model_copy(
+        update={
+            "searchable_fields": [
+                models.SearchableField(key="title", weight=10),
+                models.SearchableField(key="description"),
+            ]
+        }
+    )
+    weighted = config.model_copy(
+        update={
+            "searchable_classes": {
+                **config.searchable_classes,
+                CLASS_NAME: searchable_class,
+            }
+        }
+    )
+
+    async def search(config: Config, query: str) -> list[str]:
+        async with prepare_core(config=config) as query_handler:
+            results = await query_handler.handle_query(
+                class_name=CLASS_NAME, query=query
+            )
+        return [hit.id_ for hit in results.hits]
+
+    async with prepare_core(config=config) as query_handler:
+        for id_, content in [
+            ("title", {"title": "cats", "description": "friendly dogs"}),
+            ("description", {"title": "dogs", "description": "many cats cats"}),
+            ("other", {"title": "mice", "comment": "friendly cats"}),
+        ]:
+            await query_handler.load_resource(
+                resource=models.Resource(id_=id_, content=content),
+                class_name=CLASS_NAME,
+            )
+    assert await search(config, "cat") == ["description", "title", "other"]
+    assert await search(config, '"friendly cats"') == ["other"]
+
+    assert await search(weighted, "cat") == ["title", "description"]
+    assert await search(weighted, '"friendly cats"') == []
+    assert await search(weighted, "friendly") == ["title"]
+
+    assert await search(config, "cat") == ["description", "title", "other"]
+
+    compact = weighted.model_copy(deep=True)
+    compact.searchable_classes[CLASS_NAME].compact_search_text = True
+    assert await search(compact, "cat") == ["description", "title"]
+    assert await search(compact, '"cats friendly"') == []
+
+
+@pytest.mark.asyncio()
+async def test_word_counts_follow_changes(tmp_path: Path):
+    """Test that the words used for completions are counted when writing resources"""
+    config = get_config(search_backend="sqlite", sqlite_path=tmp_path / "mass.sqlite")
+
+    async def suggest(prefix: str) -> list[tuple[str, int]]:
+        async with prepare_core(config=config) as query_handler:
+            suggestions = await query_handler.suggest(
+                class_name=CLASS_NAME, prefix=prefix, limit=3
+            )
+        return [(suggestion.text, suggestion.count) for suggestion in suggestions]
+
+    async with prepare_core(config=config) as query_handler:
+        for resource in get_resources_from_file(
+            "tests/fixtures/test_data/RelevanceTests.json"
+        ):
+            await query_handler.load_resource(resource=resource, class_name=CLASS_NAME)
+        assert await suggest("") == [("test", 5), ("alternative", 2), ("i1", 2)]
+        assert await suggest("Same as I") == [("i1", 2), ("i4", 2), ("i2", 1)]
+
+        await query_handler.load_resource(
+            resource=models.Resource(id_="i5", content={"field": "tested"}),
+            class_name=CLASS_NAME,
+        )
+        await query_handler.delete_resource(resource_id="i2", class_name=CLASS_NAME)
+        assert await suggest("te") == [("test", 3), ("tested", 1)]
+        assert await suggest("alt") == []
+
+    # the words are counted again for tables written without word counts
+    connection = sqlite3.connect(config.sqlite_path)
+    with connection:
+        connection.execute(f'DELETE FROM "{CLASS_NAME}__words"')
+    connection.close()
+    assert await suggest("te") == [("test", 3), ("tested", 1)]
+
+
+@pytest.mark.asyncio()
+async def test_rebuild_with_shadow_collections(tmp_path: Path):
+    """Test rebuilding the resources of the SQLite backend in shadow tables"""
+    config = get_config(search_backend="sqlite", sqlite_path=tmp_path / "mass.sqlite")
+    resource = models.Resource(id_="old", content={"field": "old value"})
+    async with prepare_core(config=config) as query_handler:
+        await query_handler.load_resource(resource=resource, class_name=CLASS_NAME)
+        dao = query_handler._dao_collection.get_dao(class_name=CLASS_NAME)  # type: ignore
+        with pytest.raises(ResourceAlreadyExistsError):
+            await dao.insert(resource)
+        assert await dao.get_by_id("old") == resource
+
+    async with prepare_bulk_core(config=config, shadow=True) as bulk_query_handler:
+        async with bulk_query_handler.rebuild():
+            for index in range(3):
+                await bulk_query_handler.load_resource(
+                    resource=models.Resource(id_=f"new-{index}", content={}),
+                    class_name=CLASS_NAME,
+                )
+
+    async with prepare_core(config=config) as query_handler:
+        results = await query_handler.handle_query(class_name=CLASS_NAME)
+        assert [hit.id_ for hit in results.hits] == ["new-0", "new-1", "new-2"]
+        dao = query_handler._dao_collection.get_dao(class_name=CLASS_NAME)  # type: ignore
+        with pytest.raises(ResourceNotFoundError):
+            await dao.get_by_id("old")
+
+    connection = sqlite3.connect(config.sqlite_path)
+    tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master")]
+    connection.close()
+    assert not any("__building" in table for table in tables)